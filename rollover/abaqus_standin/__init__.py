@@ -0,0 +1,76 @@
+"""Stand-in for the subset of the Abaqus scripting interface used by the
+rollover package, backed by numpy arrays. It makes it possible to run
+and profile the model building code (e.g. rail constraints, shadow
+regions, wheel include, loading and output setup) without an Abaqus
+license, see :py:mod:`rollover.abaqus_standin.benchmark`.
+
+Call :py:func:`install` before importing any module that imports
+Abaqus modules:
+
+.. code-block:: python
+
+    from rollover import abaqus_standin
+    abaqus_standin.install()
+
+    from rollover.three_d.rail import include as rail_include
+
+Only orphan mesh parts are supported, i.e. the rail must be given as a
+mesh bundle (.npz), see :py:mod:`rollover.utils.mesh_bundle_io`.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import sys
+import types
+
+from rollover.abaqus_standin import constants
+from rollover.abaqus_standin import mesh
+from rollover.abaqus_standin import model
+
+# Abaqus modules that are imported but whose content is not used
+EMPTY_MODULES = ['part', 'load', 'interaction', 'material', 'sketch', 'job', 'section',
+                 'assembly']
+
+
+def get_modules():
+    """ Get the stand-in modules with the names of the corresponding
+    Abaqus modules as keys.
+
+    :returns: The stand-in modules
+    :rtype: dict
+
+    """
+    modules = {'abaqus': model, 'abaqusConstants': constants, 'mesh': mesh}
+
+    region_toolset = types.ModuleType('regionToolset')
+    region_toolset.Region = model.Region
+    modules['regionToolset'] = region_toolset
+
+    step = types.ModuleType('step')
+    step.RAMP = constants.RAMP
+    step.STEP = constants.STEP
+    modules['step'] = step
+
+    for name in EMPTY_MODULES:
+        modules[name] = types.ModuleType(name)
+
+    return modules
+
+
+def install():
+    """ Register the stand-in modules as the Abaqus modules (e.g.
+    `abaqus`, `abaqusConstants`, `mesh`, `regionToolset`), such that
+    they are used when these are imported. Calling install again has no
+    effect.
+
+    :returns: The stand-in model database
+    :rtype: Mdb
+
+    """
+    if sys.modules.get('abaqus', model) is not model:
+        raise RuntimeError('Abaqus is already imported, the stand-in cannot be installed')
+    if sys.modules.get('abaqus', None) is not model:
+        sys.modules.update(get_modules())
+    return model.mdb
@@ -0,0 +1,333 @@
+"""Benchmark of the model building in the rollover package, using the
+Abaqus stand-in (:py:mod:`rollover.abaqus_standin`). A synthetic rail
+(a box meshed with linear hexahedral elements, saved as a mesh bundle)
+and a synthetic wheel super element folder are created. Thereafter, the
+model is built with the same steps as in `create_rollover_3d.py`
+(rail include with shadow regions and constraints, wheel include,
+contact, loading, output and writing the input file). Each stage is
+timed with :py:class:`rollover.utils.abaqus_python_tools.span`, and
+the trace file can be viewed as a flame chart.
+
+Usage
+
+.. code-block:: python
+
+    from rollover.abaqus_standin import benchmark
+    summary = benchmark.run('benchmark_dir', mesh_size=0.5)
+    benchmark.print_summary(summary)
+
+.. note:: Importing this module installs the Abaqus stand-in, and it
+          can therefore not be imported in Abaqus.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import os
+import numpy as np
+
+# The stand-in must be installed before importing modules using Abaqus
+from rollover import abaqus_standin
+abaqus_standin.install()
+
+from abaqus import mdb
+
+from rollover.utils import naming_mod as names
+from rollover.utils import abaqus_python_tools as apt
+from rollover.utils import json_io
+from rollover.utils import mesh_bundle_io
+from rollover.utils import output_schedule
+from rollover.three_d.rail import include as rail_include
+from rollover.three_d.wheel import include as wheel_include
+from rollover.three_d.utils import contact
+from rollover.three_d.utils import loading
+from rollover.three_d.utils import odb_output
+from rollover.three_d.utils import fil_output
+
+RAIL_BUNDLE_FILE = 'benchmark_rail.npz'
+WHEEL_FOLDER = 'benchmark_wheel'
+TRACE_FILE = 'benchmark_trace.json'
+
+RAIL_MATERIAL = {'material_model': 'elastic', 'mpar': {'E': 210.e3, 'nu': 0.3}}
+
+FIELD_OUTPUT = {'wheel_output': {'set': 'WHEEL_RP', 'var': ['U', 'UR'],
+                                 'freq': 1, 'cycle': 1},
+                'contact_nodes': {'set': names.rail_contact_nodes, 'var': ['U'],
+                                  'freq': 1, 'cycle': 1}}
+
+
+def get_rail_bundle(length=30.0, width=20.0, height=20.0, mesh_size=1.0):
+    """ Get a mesh bundle of a synthetic rail: a box with the top
+    surface (y=0) as contact surface, meshed with C3D8 elements.
+
+    :param length: The rail length (z-direction)
+    :type length: float
+
+    :param width: The rail width (x-direction, centered at x=0)
+    :type width: float
+
+    :param height: The rail height (y-direction, from y=-height)
+    :type height: float
+
+    :param mesh_size: The element size
+    :type mesh_size: float
+
+    :returns: The mesh bundle, see :py:mod:`rollover.utils.mesh_bundle_io`
+    :rtype: dict
+
+    """
+    num = [max(int(round(dim/mesh_size)), 1) for dim in [width, height, length]]
+    xv, yv, zv = [np.linspace(x0, x0 + dim, n+1) for x0, dim, n in
+                  zip([-width/2.0, -height, 0.0], [width, height, length], num)]
+    # Node index: i + j*(nx+1) + k*(nx+1)*(ny+1)
+    z, y, x = np.meshgrid(zv, yv, xv, indexing='ij')
+    node_coords = np.transpose([x.flatten(), y.flatten(), z.flatten()])
+    node_labels = np.arange(1, len(node_coords) + 1)
+    node_grid = node_labels.reshape((num[2]+1, num[1]+1, num[0]+1))
+
+    # Corner node labels of each element, with i, j, k increasing
+    corners = [node_grid[dk:num[2]+dk, dj:num[1]+dj, di:num[0]+di]
+               for dk in [0, 1] for dj, di in [(0, 0), (0, 1), (1, 1), (1, 0)]]
+    connectivity = np.transpose([c.flatten() for c in corners])
+    elem_labels = np.arange(1, len(connectivity) + 1)
+    elem_grid = elem_labels.reshape((num[2], num[1], num[0]))
+
+    no_elems = np.zeros(0, dtype=np.int64)
+    top_elems = elem_grid[:, -1, :].flatten()
+    sets = {names.rail_bottom_nodes: node_grid[:, 0, :].flatten(),
+            names.rail_side_sets[0]: node_grid[0, :, :].flatten(),
+            names.rail_side_sets[1]: node_grid[-1, :, :].flatten(),
+            names.rail_contact_surf: node_grid[:, -1, :].flatten()}
+    sets = dict([(key, {'nodes': sets[key], 'elements': no_elems}) for key in sets])
+    sets[names.rail_set] = {'nodes': node_labels, 'elements': elem_labels}
+
+    # Face 5 (nodes 3, 7, 8, 4) is the face with highest j (y)
+    return {'node_labels': node_labels, 'node_coords': node_coords,
+            'elements': {'C3D8': {'labels': elem_labels, 'connectivity': connectivity}},
+            'sets': sets, 'surfaces': {names.rail_contact_surf: {5: top_elems}},
+            'material': RAIL_MATERIAL,
+            'section': {'name': names.rail_sect, 'material': 'RAIL_MATERIAL'}}
+
+
+def write_wheel_folder(folder, radius=460.0, width=20.0, length=30.0, mesh_size=1.0):
+    """ Write a synthetic wheel super element folder, with the contact
+    nodes on a cylindrical patch (axis along x) below the wheel center.
+    The stiffness file is only a placeholder, as the stand-in cannot
+    run analyses.
+
+    :param folder: The folder to create
+    :type folder: str
+
+    :param radius: The wheel radius
+    :type radius: float
+
+    :param width: The width of the contact patch (x-direction)
+    :type width: float
+
+    :param length: The arc length of the contact patch
+    :type length: float
+
+    :param mesh_size: The element size
+    :type mesh_size: float
+
+    :returns: None
+    :rtype: None
+
+    """
+    nx, na = [max(int(round(dim/mesh_size)), 1) for dim in [width, length]]
+    angles = np.linspace(-length/(2*radius), length/(2*radius), na+1)
+    x, angle = np.meshgrid(np.linspace(-width/2.0, width/2.0, nx+1), angles, indexing='ij')
+    coords = np.transpose([x.flatten(), -radius*np.cos(angle.flatten()),
+                           radius*np.sin(angle.flatten())])
+    node_grid = np.arange(len(coords)).reshape((nx+1, na+1))
+    corners = [node_grid[di:nx+di, dj:na+dj] for di, dj in [(0, 0), (1, 0), (1, 1), (0, 1)]]
+    elements = np.transpose([c.flatten() for c in corners])
+
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    np.save(folder + '/' + names.uel_coordinates_file, coords)
+    np.save(folder + '/' + names.uel_elements_file, elements)
+    with open(folder + '/' + names.uel_stiffness_file, 'w') as fid:
+        fid.write('Placeholder stiffness for the Abaqus stand-in benchmark\n')
+
+
+def get_settings(radius=460.0, length=30.0, num_cycles=10, use_rail_rp=True):
+    """ Get the rollover settings used for the benchmark, see
+    :doc:`/using_script` for a description.
+
+    :param radius: The wheel radius
+    :type radius: float
+
+    :param length: The rail (rolling) length
+    :type length: float
+
+    :param num_cycles: The number of cycles to create in the model
+    :type num_cycles: int
+
+    :param use_rail_rp: Should a rail reference point be used?
+    :type use_rail_rp: bool
+
+    :returns: The rollover settings
+    :rtype: dict
+
+    """
+    return {'rail': {'model_file': RAIL_BUNDLE_FILE,
+                     'shadow_extents': [length/2.0, length/2.0],
+                     'use_rail_rp': use_rail_rp},
+            'wheel': {'folder': WHEEL_FOLDER, 'translation': [0.0, radius, 0.0],
+                      'stiffness': 210.e3},
+            'contact': {'friction_coefficient': 0.5, 'contact_stiffness': 1.e6},
+            'loading': {'initial_depression': 0.1, 'inbetween_step_time': 1.e-6,
+                        'inbetween_max_incr': 100, 'rolling_length': length,
+                        'rolling_radius': radius, 'max_incr': 1000, 'min_incr': 60,
+                        'num_cycles': num_cycles, 'cycles': [1],
+                        'vertical_load': [150.e3], 'speed': [30.e3], 'slip': [0.015],
+                        'rail_ext': [0.0]},
+            'field_output': FIELD_OUTPUT}
+
+
+def create_rollover(param):
+    """ Build the rollover model and write the input file, using the
+    same steps as in `create_rollover_3d.py`. Each stage is timed by
+    a span.
+
+    :param param: The rollover settings, see :py:func:`get_settings`
+    :type param: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    with apt.span('create_model'):
+        rollover_model = apt.create_model(names.model)
+    with apt.span('rail_include.from_file'):
+        num_nodes, num_elems = rail_include.from_file(rollover_model, **param['rail'])
+    with apt.span('wheel_include.from_folder'):
+        wheel_stiffness = wheel_include.from_folder(rollover_model,
+                                                    start_labels=(num_nodes+1, num_elems+1),
+                                                    **param['wheel'])
+    with apt.span('contact.setup'):
+        contact.setup(rollover_model, **param['contact'])
+    with apt.span('loading.setup'):
+        num_cycles = loading.setup(rollover_model, **param['loading'])
+    with apt.span('odb_output.add'):
+        odb_output.add(rollover_model, param['field_output'])
+    with apt.span('wheel_include.add_wheel_super_element_to_inp'):
+        wheel_include.add_wheel_super_element_to_inp(rollover_model, wheel_stiffness,
+                                                     param['wheel']['folder'],
+                                                     param['wheel']['translation'])
+    with apt.span('fil_output.add'):
+        fil_output.add(rollover_model, num_cycles)
+    with apt.span('write_input_file'):
+        mdb.Job(name=names.job, model=names.model).writeInput()
+    with apt.span('output_schedule.inject'):
+        output_schedule.inject(names.job + '.inp')
+
+
+def run(work_dir, mesh_size=1.0, num_cycles=10, length=30.0, width=20.0, height=20.0,
+        radius=460.0, use_rail_rp=True):
+    """ Create the synthetic rail and wheel, and build the rollover
+    model in `work_dir` while timing each stage. The trace is saved to
+    `work_dir/TRACE_FILE`.
+
+    :param work_dir: The folder in which the benchmark is run (created
+                     if not existing)
+    :type work_dir: str
+
+    :param mesh_size: The element size of the rail and wheel contact
+                      surface. Use e.g. 0.5 for realistic model sizes.
+    :type mesh_size: float
+
+    :param num_cycles: The number of cycles created in the model
+    :type num_cycles: int
+
+    :param length: The rail length
+    :type length: float
+
+    :param width: The rail width
+    :type width: float
+
+    :param height: The rail height
+    :type height: float
+
+    :param radius: The wheel radius
+    :type radius: float
+
+    :param use_rail_rp: Should a rail reference point be used?
+    :type use_rail_rp: bool
+
+    :returns: The summary of each stage, see :py:func:`get_summary`
+    :rtype: list[ dict ]
+
+    """
+    if not os.path.exists(work_dir):
+        os.makedirs(work_dir)
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        mdb.reset()
+        mesh_bundle_io.save(RAIL_BUNDLE_FILE, get_rail_bundle(length, width, height, mesh_size))
+        write_wheel_folder(WHEEL_FOLDER, radius, width, length, mesh_size)
+        param = get_settings(radius, length, num_cycles, use_rail_rp)
+        json_io.save(names.rollover_settings_file, param)
+
+        apt.start_trace(TRACE_FILE)
+        try:
+            with apt.span('create_rollover', mesh_size=mesh_size, num_cycles=num_cycles):
+                create_rollover(param)
+        finally:
+            apt.stop_trace()
+
+        summary = get_summary(TRACE_FILE)
+    finally:
+        os.chdir(cwd)
+
+    return summary
+
+
+def get_summary(trace_file):
+    """ Get a summary of the spans in a trace file, sorted by start
+    time (i.e. a parent span before its children).
+
+    :param trace_file: The trace file written by
+                       :py:func:`rollover.utils.abaqus_python_tools.stop_trace`
+    :type trace_file: str
+
+    :returns: A dictionary for each span with the keys 'name', 'depth'
+              (nesting level), 'wall_time' and 'cpu_time' (s), and
+              'rss' (MB, at the end of the span)
+    :rtype: list[ dict ]
+
+    """
+    events = sorted(json_io.read(trace_file)['traceEvents'],
+                    key=lambda e: (e['ts'], -e['dur']))
+    summary = []
+    ends = []
+    for event in events:
+        while len(ends) > 0 and event['ts'] >= ends[-1]:
+            ends.pop()
+        summary.append({'name': event['name'], 'depth': len(ends),
+                        'wall_time': event['dur']*1.e-6,
+                        'cpu_time': event['args']['cpu_time'],
+                        'rss': event['args']['rss_end_mb']})
+        ends.append(event['ts'] + event['dur'])
+
+    return summary
+
+
+def print_summary(summary):
+    """ Print the summary from :py:func:`get_summary` as a table
+
+    :param summary: The summary
+    :type summary: list[ dict ]
+
+    :returns: None
+    :rtype: None
+
+    """
+    print('%-50s %10s %10s %10s' % ('Stage', 'Wall [s]', 'CPU [s]', 'RSS [MB]'))
+    for item in summary:
+        rss = '-' if item['rss'] is None else '%0.1f' % item['rss']
+        print('%-50s %10.3f %10.3f %10s' % ('  '*item['depth'] + item['name'],
+                                            item['wall_time'], item['cpu_time'], rss))
@@ -0,0 +1,193 @@
+"""Stand-in for the `abaqus` command, used to test the parameter sweep
+runner (:py:mod:`rollover.utils.param_sweep`) without Abaqus. The
+following commands are supported:
+
+- ``cae noGUI=<script>``: The scripts `create_wheel_3d.py` and
+  `create_rail_3d.py` cannot be run, as the stand-in has no geometry
+  or meshing. Instead, a synthetic wheel folder and rail mesh bundle
+  are created from the settings files, see
+  :py:func:`rollover.abaqus_standin.benchmark.write_wheel_folder` and
+  :py:func:`rollover.abaqus_standin.benchmark.get_rail_bundle`. Other
+  scripts, e.g. `create_rollover_3d.py`, are run with the Abaqus
+  stand-in installed. The synthetic wheel has the radius
+  `WHEEL_RADIUS`, and its center is at the origin, i.e. the wheel
+  translation should be ``[0, WHEEL_RADIUS, 0]`` as the top of the
+  synthetic rail is at y=0. As the stand-in cannot open .cae files,
+  the rail settings should contain ``"mesh_bundle": true``.
+- ``job=<job> [input=<inp_file>] ...``: Wait `JOB_TIME_ENV_VAR`
+  seconds (default `DEFAULT_JOB_TIME`), and write the status file
+  `<job>.sta` ending with "THE ANALYSIS HAS COMPLETED SUCCESSFULLY".
+  Other options (e.g. `user`, `cpus` and `interactive`) are ignored.
+
+The command used to call the stand-in is given by :py:func:`get_cmd`:
+
+:command:`python <path_to_command.py> <abaqus arguments>`
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import sys, os, time, shutil, runpy
+
+repo_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not repo_path in sys.path:
+    sys.path.append(repo_path)
+
+JOB_TIME_ENV_VAR = 'ROLLOVER_STANDIN_JOB_TIME'
+DEFAULT_JOB_TIME = 1.0
+WHEEL_RADIUS = 460.0    # Radius of the synthetic wheel
+COMPLETED_STR = 'THE ANALYSIS HAS COMPLETED SUCCESSFULLY'
+
+
+def get_cmd():
+    """ Get the command that calls the stand-in, to be used instead of
+    the `abaqus` command
+
+    :returns: The command
+    :rtype: str
+
+    """
+    return '"' + sys.executable + '" "' + os.path.abspath(__file__).replace('.pyc', '.py') + '"'
+
+
+def get_options(args):
+    """ Get the options given as `key=value` on the command line.
+    Options without value are given the value True. The keys are
+    converted to lower case.
+
+    :param args: The command line arguments
+    :type args: list[ str ]
+
+    :returns: The options
+    :rtype: dict
+
+    """
+    options = {}
+    for arg in args:
+        key, sep, value = arg.partition('=')
+        options[key.lower()] = value if len(sep) > 0 else True
+
+    return options
+
+
+def run_cae(script):
+    """ Run a cae script (noGUI), see the module description.
+
+    :param script: Path to the script
+    :type script: str
+
+    :returns: None
+    :rtype: None
+
+    """
+    script_name = os.path.basename(script)
+    if script_name == 'create_wheel_3d.py':
+        create_wheel()
+    elif script_name == 'create_rail_3d.py':
+        create_rail()
+    else:
+        from rollover import abaqus_standin
+        from rollover.abaqus_standin import model
+        abaqus_standin.install()
+        # As in Abaqus, mdb and session are available in the script
+        runpy.run_path(script, init_globals={'mdb': model.mdb, 'session': model.session},
+                       run_name='__main__')
+
+
+def create_wheel():
+    """ Create a synthetic wheel folder from the wheel settings file,
+    instead of running `create_wheel_3d.py`. The contact node region is
+    given by `"wheel_contact_pos"` and `"wheel_angles"`, and the element
+    size by the first of the `"mesh_sizes"`.
+
+    :returns: None
+    :rtype: None
+
+    """
+    from rollover.utils import json_io
+    from rollover.utils import naming_mod as names
+    from rollover.abaqus_standin import benchmark
+
+    param = json_io.read(names.wheel_settings_file)
+    radius = WHEEL_RADIUS
+    xmin, xmax = param.get('wheel_contact_pos', [-10.0, 10.0])
+    angles = param.get('wheel_angles', [-0.05, 0.05])
+    benchmark.write_wheel_folder(param['wheel_name'], radius=radius, width=xmax - xmin,
+                                 length=radius*(angles[1] - angles[0]),
+                                 mesh_size=param['mesh_sizes'][0])
+    shutil.copy(names.wheel_settings_file, param['wheel_name'])
+
+
+def create_rail():
+    """ Create a synthetic rail mesh bundle, `<rail_name>.npz`, from the
+    rail settings file, instead of running `create_rail_3d.py`. The
+    rail has the length `"rail_length"`, the element size
+    `"fine_mesh"`, and covers `"refine_region"` if given.
+
+    :returns: None
+    :rtype: None
+
+    """
+    from rollover.utils import json_io
+    from rollover.utils import naming_mod as names
+    from rollover.utils import mesh_bundle_io
+    from rollover.abaqus_standin import benchmark
+
+    param = json_io.read(names.rail_settings_file)
+    (xmin, ymin), (xmax, ymax) = param.get('refine_region', [[-10.0, -20.0], [10.0, 0.0]])
+    bundle = benchmark.get_rail_bundle(length=param['rail_length'], width=xmax - xmin,
+                                       height=ymax - ymin, mesh_size=param['fine_mesh'])
+    bundle['material'] = param.get('material', bundle['material'])
+    rail_name = param['rail_name']
+    if rail_name.endswith('.cae'):
+        rail_name = rail_name[:-4]
+    mesh_bundle_io.save(rail_name + '.npz', bundle)
+
+
+def run_job(job, inp_file):
+    """ Emulate running an Abaqus job, see the module description.
+
+    :param job: The job name
+    :type job: str
+
+    :param inp_file: The input file
+    :type inp_file: str
+
+    :returns: True if the input file exists (and the job "completed")
+    :rtype: bool
+
+    """
+    if not os.path.exists(inp_file):
+        print('Input file "' + inp_file + '" not found')
+        return False
+
+    time.sleep(float(os.environ.get(JOB_TIME_ENV_VAR, DEFAULT_JOB_TIME)))
+    with open(job + '.sta', 'w') as fid:
+        fid.write(' Abaqus stand-in, input file: ' + inp_file + '\n')
+        fid.write(' ' + COMPLETED_STR + '\n')
+
+    return True
+
+
+def main(argv):
+    options = get_options(argv[1:])
+    if 'cae' in options:
+        script = options.get('nogui', options.get('script', None))
+        if script is None:
+            print('The Abaqus stand-in can only run cae scripts (noGUI=<script>)')
+            sys.exit(1)
+        run_cae(script)
+    elif 'job' in options:
+        inp_file = options.get('input', options['job'])
+        if not inp_file.endswith('.inp'):
+            inp_file = inp_file + '.inp'
+        if not run_job(options['job'], inp_file):
+            sys.exit(1)
+    else:
+        print('Unsupported command for the Abaqus stand-in: ' + ' '.join(argv[1:]))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,55 @@
+"""Symbolic constants of the Abaqus stand-in, registered as
+`abaqusConstants` by :py:func:`rollover.abaqus_standin.install`. Only
+the constants used by the rollover package are defined. As in Abaqus,
+the string representation of a constant is its name, e.g.
+``str(FACE1) == 'FACE1'``.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+
+
+class SymbolicConstant(str):
+    """ Symbolic constant, behaves as a string equal to its name.
+    Usage
+
+    .. code-block:: python
+
+        ON = SymbolicConstant('ON')
+        str(ON)     # 'ON'
+
+    """
+    def __repr__(self):
+        return str(self)
+
+
+CONSTANT_NAMES = [
+    # General
+    'ON', 'OFF', 'YES', 'NO', 'NONE', 'DEFAULT', 'UNSET', 'SET', 'FREED',
+    'UNION', 'INTERSECTION', 'DIFFERENCE', 'COMPLETED', 'ABORTED',
+    'SUBMITTED', 'RUNNING', 'ANALYSIS', 'STANDARD', 'EXPLICIT',
+    'STANDARD_EXPLICIT', 'THREE_D', 'TWO_D_PLANAR', 'DEFORMABLE_BODY',
+    'USER_DEFINED', 'UNIFORM', 'SPECIFIED', 'COMPUTED', 'XAXIS', 'YAXIS',
+    'ZAXIS', 'FORWARD', 'REVERSE', 'RIGHT', 'LEFT', 'BACK', 'FRONT',
+    # Step and loading
+    'RAMP', 'STEP', 'LINEAR', 'PENALTY', 'FRACTION', 'FINITE', 'SMALL',
+    'MECHANICAL', 'COMBINED', 'PARAMETERS', 'PRESELECT', 'ALL',
+    # Meshing
+    'SHELL', 'SOLID', 'FREE', 'STRUCTURED', 'SWEEP', 'TET', 'HEX', 'WEDGE',
+    'QUAD', 'TRI', 'ADVANCING_FRONT', 'MEDIAL_AXIS', 'FINER', 'FIXED',
+    'TRI3', 'TRI6', 'QUAD4', 'QUAD8', 'TET4', 'TET10', 'WEDGE6',
+    'WEDGE15', 'HEX8', 'HEX20',
+    # Element faces and sides
+    'FACE1', 'FACE2', 'FACE3', 'FACE4', 'FACE5', 'FACE6', 'SIDE1',
+    'SIDE2', 'SPOS', 'SNEG',
+    # Element codes
+    'C3D4', 'C3D6', 'C3D8', 'C3D8R', 'C3D10', 'C3D15', 'C3D20', 'C3D20R',
+    'M3D3', 'M3D4', 'M3D4R', 'M3D6', 'M3D8', 'M3D8R', 'S3', 'S3R', 'S3RS',
+    'S4', 'S4R', 'S4R5', 'S4RS', 'S4RSW', 'S8R', 'S8R5', 'STRI3', 'STRI65',
+    'R3D3', 'R3D4',
+    ]
+
+for _name in CONSTANT_NAMES:
+    globals()[_name] = SymbolicConstant(_name)
+del _name
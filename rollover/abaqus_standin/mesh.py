@@ -0,0 +1,887 @@
+"""Mesh objects of the Abaqus stand-in, registered as `mesh` by
+:py:func:`rollover.abaqus_standin.install`.
+
+The mesh of a part is saved in a :py:class:`MeshStore`, i.e. in numpy
+arrays with node labels, node coordinates, element labels and element
+connectivity (node labels). The Abaqus objects (:py:class:`MeshNode`,
+:py:class:`MeshElement`, :py:class:`MeshNodeArray`, etc.) are light
+views that refer to the store by labels. Hence, they remain valid when
+nodes are added or deleted, and bounding box searches are vectorized.
+Views of instance meshes have an offset (the instance translation)
+added to the coordinates.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import numpy as np
+
+from rollover.abaqus_standin import constants as const
+
+MAX_ELEM_NODES = 20
+
+# Number of nodes for each supported element code
+ELEMENT_NODES = {'C3D4': 4, 'C3D6': 6, 'C3D8': 8, 'C3D8R': 8, 'C3D10': 10,
+                 'C3D15': 15, 'C3D20': 20, 'C3D20R': 20,
+                 'M3D3': 3, 'M3D4': 4, 'M3D4R': 4, 'M3D6': 6, 'M3D8': 8,
+                 'M3D8R': 8, 'S3': 3, 'S3R': 3, 'S3RS': 3, 'S4': 4, 'S4R': 4,
+                 'S4R5': 4, 'S4RS': 4, 'S4RSW': 4, 'S8R': 8, 'S8R5': 8,
+                 'STRI3': 3, 'STRI65': 6, 'R3D3': 3, 'R3D4': 4}
+
+# Element code given to elements created with only an element shape
+SHAPE_ELEMENTS = {'TRI3': 'S3', 'TRI6': 'STRI65', 'QUAD4': 'S4R', 'QUAD8': 'S8R',
+                  'TET4': 'C3D4', 'TET10': 'C3D10', 'WEDGE6': 'C3D6',
+                  'WEDGE15': 'C3D15', 'HEX8': 'C3D8', 'HEX20': 'C3D20'}
+
+# Element code used for shell elements created by offsetting faces
+OFFSET_ELEMENTS = {3: 'S3', 4: 'S4R', 6: 'STRI65', 8: 'S8R'}
+
+# Node indices of each face (FACE1, FACE2, ...) of solid elements, with
+# the number of element nodes as key. Corner nodes are given first.
+SOLID_FACES = {4: [[0, 1, 2], [0, 3, 1], [1, 3, 2], [2, 3, 0]],
+               10: [[0, 1, 2, 4, 5, 6], [0, 3, 1, 7, 8, 4], [1, 3, 2, 8, 9, 5],
+                    [2, 3, 0, 9, 7, 6]],
+               6: [[0, 1, 2], [3, 5, 4], [0, 3, 4, 1], [1, 4, 5, 2], [2, 5, 3, 0]],
+               15: [[0, 1, 2, 6, 7, 8], [3, 5, 4, 11, 10, 9],
+                    [0, 3, 4, 1, 12, 9, 13, 6], [1, 4, 5, 2, 13, 10, 14, 7],
+                    [2, 5, 3, 0, 14, 11, 12, 8]],
+               8: [[0, 1, 2, 3], [4, 7, 6, 5], [0, 4, 5, 1], [1, 5, 6, 2],
+                   [2, 6, 7, 3], [3, 7, 4, 0]],
+               20: [[0, 1, 2, 3, 8, 9, 10, 11], [4, 7, 6, 5, 15, 14, 13, 12],
+                    [0, 4, 5, 1, 16, 12, 17, 8], [1, 5, 6, 2, 17, 13, 18, 9],
+                    [2, 6, 7, 3, 18, 14, 19, 10], [3, 7, 4, 0, 19, 15, 16, 11]]}
+
+
+def is_solid(type_name):
+    """ Check if the element type is a continuum (solid) element
+
+    :param type_name: The element code, e.g. 'C3D8'
+    :type type_name: str
+
+    :returns: True if solid element
+    :rtype: bool
+
+    """
+    return str(type_name).startswith('C3D')
+
+
+def get_face_names(type_name, num_nodes):
+    """ Get the names of the faces of an element
+
+    :param type_name: The element code, e.g. 'C3D8'
+    :type type_name: str
+
+    :param num_nodes: The number of element nodes
+    :type num_nodes: int
+
+    :returns: The face names, e.g. ['FACE1', 'FACE2', ...]
+    :rtype: list[ str ]
+
+    """
+    if is_solid(type_name):
+        return ['FACE' + str(i+1) for i in range(len(SOLID_FACES[num_nodes]))]
+    return ['SPOS', 'SNEG']
+
+
+def get_face_node_inds(type_name, num_nodes, face_name):
+    """ Get the element node indices for a face of an element. For
+    shell and membrane elements, both sides ('SPOS'/'SNEG' or
+    'SIDE1'/'SIDE2') contain all nodes.
+
+    :param type_name: The element code, e.g. 'C3D8'
+    :type type_name: str
+
+    :param num_nodes: The number of element nodes
+    :type num_nodes: int
+
+    :param face_name: The name of the face, e.g. 'FACE1'
+    :type face_name: str
+
+    :returns: The node indices (0-based) of the face
+    :rtype: list[ int ]
+
+    """
+    face_name = str(face_name)
+    if is_solid(type_name) and face_name.startswith('FACE'):
+        return SOLID_FACES[num_nodes][int(face_name[4:])-1]
+    return list(range(num_nodes))
+
+
+def resize(array, size):
+    """ Get a copy of array with at least `size` rows. The capacity is
+    at least doubled to make repeated additions cheap. New rows are
+    filled with -1.
+
+    :param array: The array to resize
+    :type array: np.array
+
+    :param size: The required number of rows
+    :type size: int
+
+    :returns: The resized array
+    :rtype: np.array
+
+    """
+    new_array = -np.ones((max(size, 2*array.shape[0]),) + array.shape[1:], dtype=array.dtype)
+    new_array[:array.shape[0]] = array
+    return new_array
+
+
+class MeshStore():
+    """ Numpy storage of the nodes and elements of a part. This class
+    is not part of the Abaqus API, it is used by the mesh objects of
+    the stand-in. Usage
+
+    .. code-block:: python
+
+        store = MeshStore()
+        labels = store.add_nodes([[0, 0, 0], [1, 0, 0], [0, 1, 0]])
+        store.add_elements([labels], 'S3')
+
+    """
+    def __init__(self):
+        """
+        :returns: Instance of MeshStore class
+        :rtype: MeshStore
+
+        """
+        self.num_nodes = 0
+        self.node_labels = np.zeros(0, dtype=np.int64)
+        self.node_coords = np.zeros((0, 3))
+        self.node_lookup = np.zeros(0, dtype=np.int64)
+        self.num_elems = 0
+        self.elem_labels = np.zeros(0, dtype=np.int64)
+        self.elem_nodes = np.zeros((0, MAX_ELEM_NODES), dtype=np.int64)
+        self.elem_num_nodes = np.zeros(0, dtype=np.int64)
+        self.elem_types = np.zeros(0, dtype=np.int64)
+        self.elem_lookup = np.zeros(0, dtype=np.int64)
+        self.type_names = []
+
+    def copy(self):
+        """ Get a deep copy of the store
+
+        :returns: The copy
+        :rtype: MeshStore
+
+        """
+        the_copy = MeshStore()
+        for key, value in self.__dict__.items():
+            the_copy.__dict__[key] = value.copy() if hasattr(value, 'copy') else value
+        the_copy.type_names = list(self.type_names)
+        return the_copy
+
+    def get_labels(self):
+        """ Get the labels of all nodes and all elements
+
+        :returns: Node labels, element labels
+        :rtype: list[ np.array ]
+
+        """
+        return self.node_labels[:self.num_nodes], self.elem_labels[:self.num_elems]
+
+    def get_node_inds(self, labels):
+        """ Get the indices of nodes in the store
+
+        :param labels: The node labels
+        :type labels: np.array
+
+        :returns: The node indices
+        :rtype: np.array
+
+        """
+        return get_inds(self.node_lookup, labels, 'node')
+
+    def get_elem_inds(self, labels):
+        """ Get the indices of elements in the store
+
+        :param labels: The element labels
+        :type labels: np.array
+
+        :returns: The element indices
+        :rtype: np.array
+
+        """
+        return get_inds(self.elem_lookup, labels, 'element')
+
+    def has_nodes(self, labels):
+        """ Check which node labels exist in the store
+
+        :param labels: The node labels
+        :type labels: np.array
+
+        :returns: Mask that is True for the existing labels
+        :rtype: np.array
+
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        mask = np.logical_and(labels >= 0, labels < len(self.node_lookup))
+        mask[mask] = self.node_lookup[labels[mask]] >= 0
+        return mask
+
+    def has_elements(self, labels):
+        """ Check which element labels exist in the store
+
+        :param labels: The element labels
+        :type labels: np.array
+
+        :returns: Mask that is True for the existing labels
+        :rtype: np.array
+
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        mask = np.logical_and(labels >= 0, labels < len(self.elem_lookup))
+        mask[mask] = self.elem_lookup[labels[mask]] >= 0
+        return mask
+
+    def get_coords(self, labels):
+        """ Get the coordinates of nodes
+
+        :param labels: The node labels
+        :type labels: np.array
+
+        :returns: The coordinates, shape [len(labels), 3]
+        :rtype: np.array
+
+        """
+        return self.node_coords[self.get_node_inds(labels)]
+
+    def add_nodes(self, coords, labels=None):
+        """ Add nodes to the store
+
+        :param coords: The node coordinates, shape [num_nodes, 3]
+        :type coords: np.array
+
+        :param labels: The node labels. If None, labels are numbered
+                       from the highest existing label.
+        :type labels: np.array
+
+        :returns: The labels of the added nodes
+        :rtype: np.array
+
+        """
+        coords = np.asarray(coords, dtype=np.float64).reshape((-1, 3))
+        labels = self.get_new_labels(self.node_labels[:self.num_nodes], len(coords), labels)
+        if np.any(self.has_nodes(labels)):
+            raise ValueError('Node labels already exist')
+        num = self.num_nodes + len(labels)
+        if num > len(self.node_labels):
+            self.node_labels = resize(self.node_labels, num)
+            self.node_coords = resize(self.node_coords, num)
+        self.node_labels[self.num_nodes:num] = labels
+        self.node_coords[self.num_nodes:num] = coords
+        self.node_lookup = set_lookup(self.node_lookup, labels,
+                                      np.arange(self.num_nodes, num))
+        self.num_nodes = num
+        return labels
+
+    def add_elements(self, connectivity, type_name, labels=None):
+        """ Add elements of one type to the store
+
+        :param connectivity: The node labels of each element, shape
+                             [num_elems, num_elem_nodes]
+        :type connectivity: np.array
+
+        :param type_name: The element code, e.g. 'C3D8'
+        :type type_name: str
+
+        :param labels: The element labels. If None, labels are
+                       numbered from the highest existing label.
+        :type labels: np.array
+
+        :returns: The labels of the added elements
+        :rtype: np.array
+
+        """
+        connectivity = np.asarray(connectivity, dtype=np.int64)
+        if connectivity.ndim == 1:
+            connectivity = connectivity.reshape((1, -1))
+        num_elem_nodes = connectivity.shape[1]
+        if not np.all(self.has_nodes(connectivity.flatten())):
+            raise ValueError('Element connectivity contains non-existing nodes')
+        labels = self.get_new_labels(self.elem_labels[:self.num_elems],
+                                     connectivity.shape[0], labels)
+        if np.any(self.has_elements(labels)):
+            raise ValueError('Element labels already exist')
+        num = self.num_elems + len(labels)
+        if num > len(self.elem_labels):
+            self.elem_labels = resize(self.elem_labels, num)
+            self.elem_nodes = resize(self.elem_nodes, num)
+            self.elem_num_nodes = resize(self.elem_num_nodes, num)
+            self.elem_types = resize(self.elem_types, num)
+        self.elem_labels[self.num_elems:num] = labels
+        self.elem_nodes[self.num_elems:num] = -1
+        self.elem_nodes[self.num_elems:num, :num_elem_nodes] = connectivity
+        self.elem_num_nodes[self.num_elems:num] = num_elem_nodes
+        self.elem_types[self.num_elems:num] = self.get_type_code(type_name)
+        self.elem_lookup = set_lookup(self.elem_lookup, labels,
+                                      np.arange(self.num_elems, num))
+        self.num_elems = num
+        return labels
+
+    def get_new_labels(self, existing_labels, num, labels=None):
+        """ Get labels for new nodes or elements
+
+        :param existing_labels: The existing labels
+        :type existing_labels: np.array
+
+        :param num: The number of new labels
+        :type num: int
+
+        :param labels: Labels requested by the user. If None, labels
+                       are numbered from the highest existing label.
+        :type labels: np.array
+
+        :returns: The new labels
+        :rtype: np.array
+
+        """
+        if labels is not None:
+            labels = np.asarray(labels, dtype=np.int64).flatten()
+            if len(labels) != num or len(np.unique(labels)) != num:
+                raise ValueError('The given labels must be unique, one for each item')
+            return labels
+        start = existing_labels.max() + 1 if len(existing_labels) > 0 else 1
+        return np.arange(start, start + num, dtype=np.int64)
+
+    def get_type_code(self, type_name):
+        """ Get the integer code for an element type
+
+        :param type_name: The element code, e.g. 'C3D8'
+        :type type_name: str
+
+        :returns: The index of type_name in self.type_names
+        :rtype: int
+
+        """
+        type_name = str(type_name)
+        if type_name not in self.type_names:
+            self.type_names.append(type_name)
+        return self.type_names.index(type_name)
+
+    def set_element_type(self, labels, type_name):
+        """ Set the element type
+
+        :param labels: The element labels
+        :type labels: np.array
+
+        :param type_name: The element code, e.g. 'M3D4'
+        :type type_name: str
+
+        :returns: None
+        :rtype: None
+
+        """
+        self.elem_types[self.get_elem_inds(labels)] = self.get_type_code(type_name)
+
+    def get_elem_node_labels(self, labels):
+        """ Get the unique node labels of the given elements
+
+        :param labels: The element labels
+        :type labels: np.array
+
+        :returns: The sorted node labels
+        :rtype: np.array
+
+        """
+        nodes = self.elem_nodes[self.get_elem_inds(labels)]
+        return np.unique(nodes[nodes >= 0])
+
+    def get_face_node_labels(self, labels, face_names):
+        """ Get the node labels of element faces
+
+        :param labels: The element labels
+        :type labels: np.array
+
+        :param face_names: The face name (e.g. 'FACE1') of each element
+        :type face_names: list[ str ]
+
+        :returns: The node labels of each face
+        :rtype: list[ np.array ]
+
+        """
+        face_nodes = []
+        for ind, face_name in zip(self.get_elem_inds(labels), face_names):
+            num_nodes = self.elem_num_nodes[ind]
+            type_name = self.type_names[self.elem_types[ind]]
+            face_inds = get_face_node_inds(type_name, num_nodes, face_name)
+            face_nodes.append(self.elem_nodes[ind, face_inds])
+        return face_nodes
+
+    def edit_nodes(self, labels, coordinates=None, offset=None):
+        """ Change the coordinates of nodes
+
+        :param labels: The node labels
+        :type labels: np.array
+
+        :param coordinates: New coordinate for each axis, None to keep
+                            the current coordinate.
+        :type coordinates: list[ float ] (len=3)
+
+        :param offset: Offset for each axis, None for no offset
+        :type offset: list[ float ] (len=3)
+
+        :returns: None
+        :rtype: None
+
+        """
+        inds = self.get_node_inds(labels)
+        for axis in range(3):
+            if coordinates is not None and coordinates[axis] is not None:
+                self.node_coords[inds, axis] = coordinates[axis]
+            if offset is not None and offset[axis] is not None:
+                self.node_coords[inds, axis] += offset[axis]
+
+    def delete_nodes(self, labels):
+        """ Delete nodes and all elements that refer to them
+
+        :param labels: The node labels
+        :type labels: np.array
+
+        :returns: None
+        :rtype: None
+
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        elem_nodes = self.elem_nodes[:self.num_elems]
+        delete_elems = np.any(np.isin(elem_nodes, labels), axis=1)
+        self.delete_elements(self.elem_labels[:self.num_elems][delete_elems])
+
+        keep = np.logical_not(np.isin(self.node_labels[:self.num_nodes], labels))
+        self.node_labels = self.node_labels[:self.num_nodes][keep]
+        self.node_coords = self.node_coords[:self.num_nodes][keep]
+        self.num_nodes = len(self.node_labels)
+        self.node_lookup = set_lookup(np.zeros(0, dtype=np.int64), self.node_labels,
+                                      np.arange(self.num_nodes))
+
+    def delete_elements(self, labels):
+        """ Delete elements
+
+        :param labels: The element labels
+        :type labels: np.array
+
+        :returns: None
+        :rtype: None
+
+        """
+        keep = np.logical_not(np.isin(self.elem_labels[:self.num_elems], labels))
+        self.elem_labels = self.elem_labels[:self.num_elems][keep]
+        self.elem_nodes = self.elem_nodes[:self.num_elems][keep]
+        self.elem_num_nodes = self.elem_num_nodes[:self.num_elems][keep]
+        self.elem_types = self.elem_types[:self.num_elems][keep]
+        self.num_elems = len(self.elem_labels)
+        self.elem_lookup = set_lookup(np.zeros(0, dtype=np.int64), self.elem_labels,
+                                      np.arange(self.num_elems))
+
+
+def set_lookup(lookup, labels, inds):
+    """ Set lookup[labels] = inds, and extend lookup if required.
+
+    :param lookup: Array with the index for each label, -1 if missing
+    :type lookup: np.array
+
+    :param labels: The labels
+    :type labels: np.array
+
+    :param inds: The index of each label
+    :type inds: np.array
+
+    :returns: The updated lookup array
+    :rtype: np.array
+
+    """
+    if len(labels) == 0:
+        return lookup
+    if np.min(labels) < 1:
+        raise ValueError('Labels must be positive')
+    max_label = np.max(labels)
+    if max_label >= len(lookup):
+        lookup = resize(lookup, max_label + 1)
+    lookup[labels] = inds
+    return lookup
+
+
+def get_inds(lookup, labels, kind):
+    """ Get the indices of labels from a lookup array
+
+    :param lookup: Array with the index for each label, -1 if missing
+    :type lookup: np.array
+
+    :param labels: The labels
+    :type labels: np.array
+
+    :param kind: What kind of labels (used in error message)
+    :type kind: str
+
+    :returns: The indices
+    :rtype: np.array
+
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    if labels.size == 0:
+        return np.zeros(labels.shape, dtype=np.int64)
+    if np.min(labels) < 0 or np.max(labels) >= len(lookup):
+        raise KeyError('The ' + kind + ' does not exist')
+    inds = lookup[labels]
+    if np.min(inds) < 0:
+        raise KeyError('The ' + kind + ' does not exist')
+    return inds
+
+
+class MeshNode():
+    """ A node in a part or instance mesh, see the Abaqus MeshNode
+    object. Nodes are equal if they have the same label and belong to
+    the same store.
+    """
+    def __init__(self, store, label, offset=None):
+        """
+        :param store: The store containing the node
+        :type store: MeshStore
+
+        :param label: The node label
+        :type label: int
+
+        :param offset: Translation added to the coordinates
+        :type offset: np.array
+
+        :returns: Instance of MeshNode class
+        :rtype: MeshNode
+
+        """
+        self.store = store
+        self.label = int(label)
+        self.offset = offset
+
+    @property
+    def coordinates(self):
+        coords = self.store.node_coords[self.store.node_lookup[self.label]]
+        if self.offset is not None:
+            coords = coords + self.offset
+        return tuple(coords.tolist())
+
+    def getElements(self):
+        store = self.store
+        elem_nodes = store.elem_nodes[:store.num_elems]
+        labels = store.elem_labels[:store.num_elems][np.any(elem_nodes == self.label, axis=1)]
+        return MeshElementArray.from_labels(store, labels, self.offset)
+
+    def __eq__(self, other):
+        return (isinstance(other, MeshNode) and self.label == other.label
+                and self.store is other.store)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((id(self.store), self.label))
+
+    def __repr__(self):
+        return 'mesh.MeshNode(label=' + str(self.label) + ')'
+
+
+class MeshElement():
+    """ An element in a part or instance mesh, see the Abaqus
+    MeshElement object.
+    """
+    def __init__(self, store, label, offset=None):
+        """
+        :param store: The store containing the element
+        :type store: MeshStore
+
+        :param label: The element label
+        :type label: int
+
+        :param offset: Translation added to the node coordinates
+        :type offset: np.array
+
+        :returns: Instance of MeshElement class
+        :rtype: MeshElement
+
+        """
+        self.store = store
+        self.label = int(label)
+        self.offset = offset
+
+    @property
+    def type(self):
+        ind = self.store.elem_lookup[self.label]
+        return const.SymbolicConstant(self.store.type_names[self.store.elem_types[ind]])
+
+    @property
+    def connectivity(self):
+        return tuple(self.store.get_node_inds(self.get_node_labels()).tolist())
+
+    def get_node_labels(self):
+        """ Get the node labels of the element (not part of the Abaqus
+        API)
+
+        :returns: The node labels
+        :rtype: np.array
+
+        """
+        ind = self.store.elem_lookup[self.label]
+        return self.store.elem_nodes[ind, :self.store.elem_num_nodes[ind]]
+
+    def getNodes(self):
+        return tuple([MeshNode(self.store, label, self.offset)
+                      for label in self.get_node_labels().tolist()])
+
+    def getElemFaces(self):
+        ind = self.store.elem_lookup[self.label]
+        num_nodes = self.store.elem_num_nodes[ind]
+        type_name = self.store.type_names[self.store.elem_types[ind]]
+        return tuple([MeshFace(self, face_name)
+                      for face_name in get_face_names(type_name, num_nodes)])
+
+    def __eq__(self, other):
+        return (isinstance(other, MeshElement) and self.label == other.label
+                and self.store is other.store)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((id(self.store), self.label))
+
+    def __repr__(self):
+        return 'mesh.MeshElement(label=' + str(self.label) + ')'
+
+
+class MeshFace():
+    """ A face of an element, see the Abaqus MeshFace object.
+    """
+    def __init__(self, element, face_name):
+        """
+        :param element: The element that the face belongs to
+        :type element: MeshElement
+
+        :param face_name: The name of the face, e.g. 'FACE1'
+        :type face_name: str
+
+        :returns: Instance of MeshFace class
+        :rtype: MeshFace
+
+        """
+        self.element = element
+        self.face = const.SymbolicConstant(face_name)
+        self.label = element.label
+
+    def getNodes(self):
+        store = self.element.store
+        labels = store.get_face_node_labels([self.label], [self.face])[0]
+        return tuple([MeshNode(store, label, self.element.offset)
+                      for label in labels.tolist()])
+
+    def getElements(self):
+        return (self.element,)
+
+
+class MeshArray():
+    """ Base class for arrays of nodes or elements. The array contains
+    the labels of the items in a store. Supports len, iteration and
+    indexing (integer or slice) as Abaqus arrays.
+    """
+    item_class = None
+
+    def __init__(self, items=None):
+        items = [] if items is None else list(items)
+        if len(items) > 0:
+            self.store = items[0].store
+            self.offset = items[0].offset
+            if any([item.store is not self.store for item in items]):
+                raise ValueError('All items in a mesh array must belong to the same mesh')
+        else:
+            self.store = None
+            self.offset = None
+        self.labels = np.array([item.label for item in items], dtype=np.int64)
+
+    @classmethod
+    def from_labels(cls, store, labels, offset=None):
+        """ Create an array from labels (not part of the Abaqus API)
+
+        :param store: The store containing the items
+        :type store: MeshStore
+
+        :param labels: The labels of the items
+        :type labels: np.array
+
+        :param offset: Translation added to the coordinates
+        :type offset: np.array
+
+        :returns: The array
+        :rtype: MeshArray
+
+        """
+        the_array = cls()
+        the_array.store = store
+        the_array.offset = offset
+        the_array.labels = np.asarray(labels, dtype=np.int64).flatten()
+        return the_array
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __iter__(self):
+        for label in self.labels.tolist():
+            yield self.item_class(self.store, label, self.offset)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.from_labels(self.store, self.labels[key], self.offset)
+        return self.item_class(self.store, self.labels[key], self.offset)
+
+    def __contains__(self, item):
+        return item.store is self.store and item.label in self.labels
+
+    def sequenceFromLabels(self, labels):
+        labels = np.asarray(labels, dtype=np.int64).flatten()
+        if not np.all(np.isin(labels, self.labels)):
+            raise KeyError('Not all labels exist in the array')
+        return self.from_labels(self.store, labels, self.offset)
+
+    def __repr__(self):
+        return 'mesh.' + self.__class__.__name__ + '(len=' + str(len(self)) + ')'
+
+
+class MeshNodeArray(MeshArray):
+    """ Array of nodes, see the Abaqus MeshNodeArray object.
+    """
+    item_class = MeshNode
+
+    def __init__(self, nodes=None):
+        """
+        :param nodes: The nodes in the array
+        :type nodes: list[ MeshNode ]
+
+        :returns: Instance of MeshNodeArray class
+        :rtype: MeshNodeArray
+
+        """
+        MeshArray.__init__(self, nodes)
+
+    def get_coords(self):
+        """ Get the coordinates of the nodes (not part of the Abaqus
+        API)
+
+        :returns: The coordinates, shape [len(self), 3]
+        :rtype: np.array
+
+        """
+        if len(self) == 0:
+            return np.zeros((0, 3))
+        coords = self.store.get_coords(self.labels)
+        if self.offset is not None:
+            coords = coords + self.offset
+        return coords
+
+    def getBoundingBox(self):
+        coords = self.get_coords()
+        return {'low': tuple(np.min(coords, axis=0).tolist()),
+                'high': tuple(np.max(coords, axis=0).tolist())}
+
+    def getByBoundingBox(self, xMin=-np.inf, yMin=-np.inf, zMin=-np.inf,
+                         xMax=np.inf, yMax=np.inf, zMax=np.inf):
+        inside = get_inside_box(self.get_coords(), [xMin, yMin, zMin], [xMax, yMax, zMax])
+        return self.from_labels(self.store, self.labels[inside], self.offset)
+
+    def getByBoundingCylinder(self, center1, center2, radius):
+        coords = self.get_coords()
+        axis = np.array(center2, dtype=np.float64) - np.array(center1, dtype=np.float64)
+        length = np.linalg.norm(axis)
+        rel_coords = coords - np.array(center1, dtype=np.float64)
+        axial = np.dot(rel_coords, axis/length)
+        radial = np.linalg.norm(rel_coords - np.outer(axial, axis/length), axis=1)
+        inside = np.logical_and(np.logical_and(axial >= 0, axial <= length), radial <= radius)
+        return self.from_labels(self.store, self.labels[inside], self.offset)
+
+    def getByBoundingSphere(self, center, radius):
+        coords = self.get_coords()
+        inside = np.linalg.norm(coords - np.array(center, dtype=np.float64), axis=1) <= radius
+        return self.from_labels(self.store, self.labels[inside], self.offset)
+
+
+class MeshElementArray(MeshArray):
+    """ Array of elements, see the Abaqus MeshElementArray object.
+    """
+    item_class = MeshElement
+
+    def __init__(self, elements=None):
+        """
+        :param elements: The elements in the array
+        :type elements: list[ MeshElement ]
+
+        :returns: Instance of MeshElementArray class
+        :rtype: MeshElementArray
+
+        """
+        MeshArray.__init__(self, elements)
+
+    def get_node_labels(self):
+        """ Get the unique node labels of the elements (not part of the
+        Abaqus API)
+
+        :returns: The sorted node labels
+        :rtype: np.array
+
+        """
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return self.store.get_elem_node_labels(self.labels)
+
+    def getByBoundingBox(self, xMin=-np.inf, yMin=-np.inf, zMin=-np.inf,
+                         xMax=np.inf, yMax=np.inf, zMax=np.inf):
+        if len(self) == 0:
+            return self.from_labels(self.store, self.labels, self.offset)
+        elem_nodes = self.store.elem_nodes[self.store.get_elem_inds(self.labels)]
+        has_node = elem_nodes >= 0
+        coords = self.store.get_coords(elem_nodes[has_node])
+        if self.offset is not None:
+            coords = coords + self.offset
+        node_inside = np.ones(elem_nodes.shape, dtype=bool)
+        node_inside[has_node] = get_inside_box(coords, [xMin, yMin, zMin], [xMax, yMax, zMax])
+        inside = np.all(node_inside, axis=1)
+        return self.from_labels(self.store, self.labels[inside], self.offset)
+
+
+def get_inside_box(coords, low, high):
+    """ Check which coordinates are inside a bounding box (inclusive)
+
+    :param coords: The coordinates, shape [num_points, 3]
+    :type coords: np.array
+
+    :param low: The lower corner of the bounding box
+    :type low: list[ float ] (len=3)
+
+    :param high: The upper corner of the bounding box
+    :type high: list[ float ] (len=3)
+
+    :returns: Mask that is True for points inside the box
+    :rtype: np.array
+
+    """
+    low = np.array([-np.inf if v is None else v for v in low], dtype=np.float64)
+    high = np.array([np.inf if v is None else v for v in high], dtype=np.float64)
+    return np.all(np.logical_and(coords >= low, coords <= high), axis=1)
+
+
+class ElemType():
+    """ Element type specification, see the Abaqus ElemType object.
+    """
+    def __init__(self, elemCode, elemLibrary=const.STANDARD, **kwargs):
+        """
+        :param elemCode: The element code, e.g. C3D8
+        :type elemCode: SymbolicConstant
+
+        :param elemLibrary: The element library
+        :type elemLibrary: SymbolicConstant
+
+        :returns: Instance of ElemType class
+        :rtype: ElemType
+
+        """
+        self.elemCode = elemCode
+        self.elemLibrary = elemLibrary
+        self.options = kwargs
+        if str(elemCode) not in ELEMENT_NODES:
+            raise ValueError('Element code ' + str(elemCode) + ' is not supported')
+        self.num_nodes = ELEMENT_NODES[str(elemCode)]
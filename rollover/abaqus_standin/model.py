@@ -0,0 +1,1201 @@
+"""Model database objects of the Abaqus stand-in, registered as `abaqus`
+by :py:func:`rollover.abaqus_standin.install`.
+
+The objects mirror the subset of the Abaqus scripting interface used
+by the rollover package: the model database (:py:data:`mdb`), models,
+orphan mesh parts, sets, surfaces, the assembly with instances, steps,
+boundary conditions, loads, constraints, interactions, materials,
+sections and the keyword block. Geometry (sketches, faces, cells) and
+running analyses are not supported.
+
+The keyword block is created from the model when first used (or by
+`synchVersions`), and written by `Job.writeInput`. It follows the
+Abaqus input file layout (parts, assembly, materials, steps), such that
+the direct input file editing in the rollover package can be tested.
+It is not intended to be run by Abaqus.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+from collections import OrderedDict
+import numpy as np
+
+from rollover.abaqus_standin import constants as const
+from rollover.abaqus_standin import mesh
+
+__all__ = ['mdb', 'Mdb', 'session', 'Session']
+
+GEOMETRY_KEYS = ['cells', 'faces', 'edges', 'vertices', 'referencePoints', 'xVertices',
+                 'xEdges', 'xFaces', 'side1Faces', 'side2Faces', 'side1Edges', 'side2Edges']
+
+
+class Repository(OrderedDict):
+    """ Ordered dictionary used for the Abaqus repositories (e.g.
+    `model.parts`). As in Abaqus (Python 2), `keys`, `values` and
+    `items` return lists, such that items can be deleted while looping
+    over the keys.
+    """
+    def keys(self):
+        return list(OrderedDict.keys(self))
+
+    def values(self):
+        return list(OrderedDict.values(self))
+
+    def items(self):
+        return list(OrderedDict.items(self))
+
+
+def check_no_geometry(kwargs):
+    """ Raise NotImplementedError if geometry based input is given
+
+    :param kwargs: The keyword arguments to check
+    :type kwargs: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    for key in kwargs:
+        if key in GEOMETRY_KEYS and kwargs[key] is not None:
+            raise NotImplementedError('Geometry (' + key + ') is not supported by the '
+                                      + 'Abaqus stand-in, use orphan meshes')
+
+
+def get_labels(items):
+    """ Get the labels of mesh items given in any of the ways accepted
+    by Abaqus, i.e. as a mesh array, a sequence of mesh items, a
+    sequence of mesh arrays, or None.
+
+    :param items: The mesh items
+    :type items: MeshArray / list[ MeshNode / MeshElement / MeshArray ]
+
+    :returns: The store containing the items (None if no items), and
+              the labels
+    :rtype: list[ MeshStore, np.array ]
+
+    """
+    if items is None:
+        return None, np.zeros(0, dtype=np.int64)
+    if isinstance(items, mesh.MeshArray):
+        return items.store, items.labels
+    store = None
+    labels = []
+    for item in items:
+        if isinstance(item, mesh.MeshArray):
+            item_labels = item.labels
+        else:
+            item_labels = np.array([item.label], dtype=np.int64)
+        if len(item_labels) > 0:
+            if store is not None and item.store is not store:
+                raise ValueError('All mesh items must belong to the same mesh')
+            store = item.store
+            labels.append(item_labels)
+    if len(labels) == 0:
+        return None, np.zeros(0, dtype=np.int64)
+    return store, np.concatenate(labels)
+
+
+def get_region_elements(region):
+    """ Get the element labels of a region given as a mesh element
+    array, set or region object.
+
+    :param region: The region
+    :type region: MeshElementArray / Set / Region
+
+    :returns: The element labels
+    :rtype: np.array
+
+    """
+    if isinstance(region, (Set, Region)):
+        region = region.elements
+    return get_labels(region)[1]
+
+
+class Set():
+    """ Node and element set, see the Abaqus Set object. The set refers
+    to the nodes and elements by label. Nodes and elements that have
+    been deleted after the set was created are not included. If created
+    with elements, the nodes of the elements are included in the set.
+    """
+    def __init__(self, name, store, node_labels=None, elem_labels=None, instance=None):
+        """
+        :param name: The name of the set
+        :type name: str
+
+        :param store: The mesh store of the part
+        :type store: MeshStore
+
+        :param node_labels: The node labels
+        :type node_labels: np.array
+
+        :param elem_labels: The element labels
+        :type elem_labels: np.array
+
+        :param instance: The instance if the set is viewed from an
+                         instance.
+        :type instance: PartInstance
+
+        :returns: Instance of Set class
+        :rtype: Set
+
+        """
+        self.name = name
+        self.store = store
+        node_labels = np.zeros(0, dtype=np.int64) if node_labels is None else node_labels
+        self.elem_labels = np.zeros(0, dtype=np.int64) if elem_labels is None else elem_labels
+        if len(self.elem_labels) > 0:
+            node_labels = np.concatenate((node_labels,
+                                          store.get_elem_node_labels(self.elem_labels)))
+        self.node_labels = np.unique(node_labels)
+        self.instance = instance
+
+    def get_view(self, instance):
+        """ Get the set as seen from an instance (not part of the
+        Abaqus API)
+
+        :param instance: The instance
+        :type instance: PartInstance
+
+        :returns: The set with coordinates translated as the instance
+        :rtype: Set
+
+        """
+        view = self.__class__.__new__(self.__class__)
+        view.__dict__.update(self.__dict__)
+        view.instance = instance
+        return view
+
+    def get_inp_name(self):
+        """ Get the name used for the set in the input file (not part
+        of the Abaqus API)
+
+        :returns: The set name, prefixed by the instance name if viewed
+                  from an instance.
+        :rtype: str
+
+        """
+        if self.instance is None:
+            return self.name
+        return self.instance.name + '.' + self.name
+
+    @property
+    def nodes(self):
+        if self.store is None:
+            return mesh.MeshNodeArray()
+        labels = self.node_labels[self.store.has_nodes(self.node_labels)]
+        offset = None if self.instance is None else self.instance.translation
+        return mesh.MeshNodeArray.from_labels(self.store, labels, offset)
+
+    @property
+    def elements(self):
+        if self.store is None:
+            return mesh.MeshElementArray()
+        labels = self.elem_labels[self.store.has_elements(self.elem_labels)]
+        offset = None if self.instance is None else self.instance.translation
+        return mesh.MeshElementArray.from_labels(self.store, labels, offset)
+
+
+class Surface(Set):
+    """ Element based surface, see the Abaqus Surface object. The nodes
+    of the surface are the nodes on the element faces.
+    """
+    def __init__(self, name, store, elem_labels, sides, instance=None):
+        """
+        :param name: The name of the surface
+        :type name: str
+
+        :param store: The mesh store of the part
+        :type store: MeshStore
+
+        :param elem_labels: The element label for each element face
+        :type elem_labels: np.array
+
+        :param sides: The side (e.g. FACE1, SIDE1) of each element face
+        :type sides: list[ SymbolicConstant ]
+
+        :param instance: The instance if the surface is viewed from an
+                         instance.
+        :type instance: PartInstance
+
+        :returns: Instance of Surface class
+        :rtype: Surface
+
+        """
+        self.name = name
+        self.store = store
+        self.elem_labels = elem_labels
+        self.sides = tuple(sides)
+        self.faces = ()
+        self.edges = ()
+        face_nodes = store.get_face_node_labels(elem_labels, sides) if len(sides) > 0 else []
+        if len(face_nodes) > 0:
+            self.node_labels = np.unique(np.concatenate(face_nodes))
+        else:
+            self.node_labels = np.zeros(0, dtype=np.int64)
+        self.instance = instance
+
+
+class Region():
+    """ Region used e.g. for section assignments, see the Abaqus Region
+    object (regionToolset).
+    """
+    def __init__(self, elements=None, nodes=None, **kwargs):
+        """
+        :param elements: The elements in the region
+        :type elements: MeshElementArray
+
+        :param nodes: The nodes in the region
+        :type nodes: MeshNodeArray
+
+        :returns: Instance of Region class
+        :rtype: Region
+
+        """
+        check_no_geometry(kwargs)
+        self.elements = mesh.MeshElementArray() if elements is None else elements
+        self.nodes = mesh.MeshNodeArray() if nodes is None else nodes
+        self.options = kwargs
+
+
+class Part():
+    """ Orphan mesh part, see the Abaqus Part object. The mesh is saved
+    in a :py:class:`rollover.abaqus_standin.mesh.MeshStore`.
+    """
+    def __init__(self, name, dimensionality=const.THREE_D, type=const.DEFORMABLE_BODY):
+        """
+        :param name: The name of the part
+        :type name: str
+
+        :param dimensionality: The dimensionality of the part
+        :type dimensionality: SymbolicConstant
+
+        :param type: The type of part
+        :type type: SymbolicConstant
+
+        :returns: Instance of Part class
+        :rtype: Part
+
+        """
+        self.name = name
+        self.space = dimensionality
+        self.type = type
+        self.store = mesh.MeshStore()
+        self.sets = Repository()
+        self.surfaces = Repository()
+        self.sectionAssignments = []
+        self.num_changes = 0
+
+    def copy(self, name):
+        """ Get a copy of the part (not part of the Abaqus API)
+
+        :param name: The name of the new part
+        :type name: str
+
+        :returns: The copy
+        :rtype: Part
+
+        """
+        the_copy = Part(name, self.space, self.type)
+        the_copy.store = self.store.copy()
+        for repo_name in ['sets', 'surfaces']:
+            for key, item in getattr(self, repo_name).items():
+                item_copy = item.get_view(None)
+                item_copy.store = the_copy.store
+                getattr(the_copy, repo_name)[key] = item_copy
+        the_copy.sectionAssignments = list(self.sectionAssignments)
+        return the_copy
+
+    def changed(self):
+        """ Mark the part as changed, such that the assembly becomes
+        out of date (not part of the Abaqus API)
+        """
+        self.num_changes += 1
+
+    @property
+    def nodes(self):
+        return mesh.MeshNodeArray.from_labels(self.store, self.store.get_labels()[0])
+
+    @property
+    def elements(self):
+        return mesh.MeshElementArray.from_labels(self.store, self.store.get_labels()[1])
+
+    def Node(self, coordinates, label=None):
+        labels = self.store.add_nodes([coordinates], None if label is None else [label])
+        self.changed()
+        return mesh.MeshNode(self.store, labels[0])
+
+    def Element(self, nodes, elemShape, label=None):
+        store, node_labels = get_labels(nodes)
+        if store is not self.store:
+            raise ValueError('The element nodes must belong to the part')
+        type_name = mesh.SHAPE_ELEMENTS[str(elemShape)]
+        labels = self.store.add_elements([node_labels], type_name,
+                                         None if label is None else [label])
+        self.changed()
+        return mesh.MeshElement(self.store, labels[0])
+
+    def addNodes(self, coordinates, labels=None, nodeSetName=None):
+        labels = self.store.add_nodes(coordinates, labels)
+        if nodeSetName is not None:
+            self.sets[nodeSetName] = Set(nodeSetName, self.store, node_labels=labels)
+        self.changed()
+        return mesh.MeshNodeArray.from_labels(self.store, labels)
+
+    def addElements(self, connectivity, type, labels=None, elementSet=None):
+        labels = self.store.add_elements(connectivity, type, labels)
+        if elementSet is not None:
+            self.sets[elementSet] = Set(elementSet, self.store, elem_labels=labels)
+        self.changed()
+        return mesh.MeshElementArray.from_labels(self.store, labels)
+
+    def Set(self, name, nodes=None, elements=None, **kwargs):
+        check_no_geometry(kwargs)
+        for items in [nodes, elements]:
+            store = get_labels(items)[0]
+            if store is not None and store is not self.store:
+                raise ValueError('The set items must belong to the part')
+        self.sets[name] = Set(name, self.store, node_labels=get_labels(nodes)[1],
+                              elem_labels=get_labels(elements)[1])
+        self.changed()
+        return self.sets[name]
+
+    def SetByBoolean(self, name, sets, operation=const.UNION):
+        combine = {'UNION': np.union1d, 'INTERSECTION': np.intersect1d,
+                   'DIFFERENCE': np.setdiff1d}[str(operation)]
+        node_labels = sets[0].node_labels
+        elem_labels = sets[0].elem_labels
+        for the_set in sets[1:]:
+            node_labels = combine(node_labels, the_set.node_labels)
+            elem_labels = combine(elem_labels, the_set.elem_labels)
+        self.sets[name] = Set(name, self.store, node_labels=node_labels)
+        self.sets[name].elem_labels = elem_labels
+        self.changed()
+        return self.sets[name]
+
+    def Surface(self, name, **kwargs):
+        check_no_geometry(kwargs)
+        elem_labels = []
+        sides = []
+        for key in sorted(kwargs):
+            if not key.endswith('Elements'):
+                raise NotImplementedError('Surface input ' + key + ' is not supported')
+            side = key[:-len('Elements')].upper()
+            labels = get_region_elements(kwargs[key])
+            elem_labels.append(labels)
+            sides.extend([const.SymbolicConstant(side)]*len(labels))
+        elem_labels = np.concatenate(elem_labels) if len(elem_labels) > 0 else np.zeros(0)
+        self.surfaces[name] = Surface(name, self.store, elem_labels.astype(np.int64), sides)
+        self.changed()
+        return self.surfaces[name]
+
+    def setElementType(self, regions, elemTypes):
+        labels = np.concatenate([get_region_elements(region) for region in regions])
+        inds = self.store.get_elem_inds(labels)
+        solid_types = np.array([mesh.is_solid(tn) for tn in self.store.type_names], dtype=bool)
+        is_solid = solid_types[self.store.elem_types[inds]]
+        num_nodes = self.store.elem_num_nodes[inds]
+        for elem_type in elemTypes:
+            match = np.logical_and(num_nodes == elem_type.num_nodes,
+                                   is_solid == mesh.is_solid(elem_type.elemCode))
+            self.store.set_element_type(labels[match], elem_type.elemCode)
+
+    def SectionAssignment(self, region, sectionName, **kwargs):
+        self.sectionAssignments.append({'region': region, 'sectionName': sectionName,
+                                        'options': kwargs})
+
+    def editNode(self, nodes, coordinate1=None, coordinate2=None, coordinate3=None,
+                 offset1=None, offset2=None, offset3=None, **kwargs):
+        self.store.edit_nodes(get_labels(nodes)[1],
+                              coordinates=[coordinate1, coordinate2, coordinate3],
+                              offset=[offset1, offset2, offset3])
+        self.changed()
+
+    def deleteNode(self, nodes, **kwargs):
+        self.store.delete_nodes(get_labels(nodes)[1])
+        self.changed()
+
+    def deleteElement(self, elements, **kwargs):
+        self.store.delete_elements(get_labels(elements)[1])
+        self.changed()
+
+    def generateMeshByOffset(self, region, initialOffset=0.0, meshType=const.SHELL,
+                             distanceBetweenLayers=0.0, numLayers=1, **kwargs):
+        if numLayers != 1 or str(meshType) != 'SHELL':
+            raise NotImplementedError('Only a single layer of shell elements is supported')
+        if not isinstance(region, Surface):
+            raise NotImplementedError('Only offset from element based surfaces is supported')
+        face_nodes = self.store.get_face_node_labels(region.elem_labels, region.sides)
+        old_labels = np.unique(np.concatenate(face_nodes))
+        coords = self.store.get_coords(old_labels)
+        if initialOffset != 0.0:
+            coords = coords + initialOffset*get_node_normals(coords, old_labels, face_nodes)
+        new_labels = self.store.add_nodes(coords)
+        elem_labels = []
+        for num_nodes in sorted(set([len(fn) for fn in face_nodes])):
+            conn = np.array([fn for fn in face_nodes if len(fn) == num_nodes])
+            conn = new_labels[np.searchsorted(old_labels, conn)]
+            elem_labels.append(self.store.add_elements(conn, mesh.OFFSET_ELEMENTS[num_nodes]))
+        self.changed()
+        return mesh.MeshElementArray.from_labels(self.store, np.concatenate(elem_labels))
+
+
+def get_node_normals(coords, labels, face_nodes):
+    """ Get the average unit normal of the faces connected to each node
+
+    :param coords: The node coordinates, shape [len(labels), 3]
+    :type coords: np.array
+
+    :param labels: The sorted node labels
+    :type labels: np.array
+
+    :param face_nodes: The node labels of each face, with corner nodes
+                       first. As for the faces of solid elements, the
+                       corner nodes are ordered clockwise when viewed
+                       from outside.
+    :type face_nodes: list[ np.array ]
+
+    :returns: The outward unit normal for each node, shape
+              [len(labels), 3]
+    :rtype: np.array
+
+    """
+    normals = np.zeros(coords.shape)
+    for nodes in face_nodes:
+        inds = np.searchsorted(labels, nodes)
+        normal = np.cross(coords[inds[2]] - coords[inds[0]], coords[inds[1]] - coords[inds[0]])
+        normals[inds] += normal/np.linalg.norm(normal)
+    return normals/np.linalg.norm(normals, axis=1, keepdims=True)
+
+
+class InstanceRepository():
+    """ Read-only repository giving the sets or surfaces of a part as
+    seen from an instance of the part.
+    """
+    def __init__(self, repository, instance):
+        """
+        :param repository: The part's repository
+        :type repository: Repository
+
+        :param instance: The instance
+        :type instance: PartInstance
+
+        :returns: Instance of InstanceRepository class
+        :rtype: InstanceRepository
+
+        """
+        self.repository = repository
+        self.instance = instance
+
+    def keys(self):
+        return self.repository.keys()
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def __getitem__(self, key):
+        return self.repository[key].get_view(self.instance)
+
+    def __contains__(self, key):
+        return key in self.repository
+
+    def __iter__(self):
+        return iter(self.repository.keys())
+
+    def __len__(self):
+        return len(self.repository)
+
+
+class PartInstance():
+    """ Instance of a part in the assembly, see the Abaqus PartInstance
+    object. Only dependent instances are supported.
+    """
+    def __init__(self, name, part, dependent=const.ON):
+        """
+        :param name: The name of the instance
+        :type name: str
+
+        :param part: The part
+        :type part: Part
+
+        :param dependent: Is the instance dependent?
+        :type dependent: SymbolicConstant
+
+        :returns: Instance of PartInstance class
+        :rtype: PartInstance
+
+        """
+        if dependent != const.ON:
+            raise NotImplementedError('Only dependent instances are supported')
+        self.name = name
+        self.part = part
+        self.partName = part.name
+        self.dependent = dependent
+        self.translation = np.zeros(3)
+        self.sets = InstanceRepository(part.sets, self)
+        self.surfaces = InstanceRepository(part.surfaces, self)
+
+    @property
+    def nodes(self):
+        return mesh.MeshNodeArray.from_labels(self.part.store, self.part.store.get_labels()[0],
+                                              self.translation)
+
+    @property
+    def elements(self):
+        return mesh.MeshElementArray.from_labels(self.part.store,
+                                                 self.part.store.get_labels()[1],
+                                                 self.translation)
+
+    def translate(self, vector):
+        # Change in-place, such that existing views are translated
+        self.translation += np.array(vector, dtype=np.float64)
+
+
+class Assembly():
+    """ The root assembly of a model, see the Abaqus Assembly object.
+    Mesh items directly in the assembly are not supported.
+    """
+    def __init__(self):
+        """
+        :returns: Instance of Assembly class
+        :rtype: Assembly
+
+        """
+        self.instances = Repository()
+        self.sets = Repository()
+        self.surfaces = Repository()
+        self.nodes = mesh.MeshNodeArray()
+        self.elements = mesh.MeshElementArray()
+        self.regenerated_changes = {}
+
+    @property
+    def isOutOfDate(self):
+        return any([self.regenerated_changes.get(inst.name, 0) != inst.part.num_changes
+                    for inst in self.instances.values()])
+
+    def regenerate(self):
+        self.regenerated_changes = dict([(inst.name, inst.part.num_changes)
+                                         for inst in self.instances.values()])
+
+    def Instance(self, name, part, dependent=const.ON):
+        self.instances[name] = PartInstance(name, part, dependent)
+        self.regenerated_changes[name] = part.num_changes
+        return self.instances[name]
+
+    def translate(self, instanceList, vector):
+        for name in instanceList:
+            self.instances[name].translate(vector)
+
+    def Set(self, name, nodes=None, elements=None, **kwargs):
+        check_no_geometry(kwargs)
+        store, node_labels = get_labels(nodes)
+        elem_store, elem_labels = get_labels(elements)
+        store = elem_store if store is None else store
+        instance = None
+        for inst in self.instances.values():
+            if inst.part.store is store:
+                instance = inst
+        self.sets[name] = Set(name, store, node_labels, elem_labels, instance)
+        return self.sets[name]
+
+    def get_set(self, name):
+        """ Get a set by its input file name, i.e. 'SET' for assembly
+        sets and 'INSTANCE.SET' for instance sets (not part of the
+        Abaqus API)
+
+        :param name: The set name
+        :type name: str
+
+        :returns: The set
+        :rtype: Set
+
+        """
+        if name in self.sets:
+            return self.sets[name]
+        inst_name, set_name = name.split('.', 1) if '.' in name else (None, name)
+        if inst_name not in self.instances or set_name not in self.instances[inst_name].sets:
+            raise KeyError('The set "' + name + '" does not exist in the assembly')
+        return self.instances[inst_name].sets[set_name]
+
+
+class Feature():
+    """ General model feature (e.g. section, boundary condition, load,
+    step, interaction) that saves its options. Step dependent features
+    save the values set in each step.
+    """
+    def __init__(self, name, kind, **kwargs):
+        """
+        :param name: The name of the feature
+        :type name: str
+
+        :param kind: The kind of feature, i.e. the name of the Abaqus
+                     method that created it (e.g. 'DisplacementBC')
+        :type kind: str
+
+        :param kwargs: The options of the feature
+
+        :returns: Instance of Feature class
+        :rtype: Feature
+
+        """
+        self.name = name
+        self.kind = kind
+        self.options = kwargs
+        self.step_values = OrderedDict()
+        self.model = None
+        for key in kwargs:
+            setattr(self, key, kwargs[key])
+
+    def setValues(self, **kwargs):
+        self.options.update(kwargs)
+        for key in kwargs:
+            setattr(self, key, kwargs[key])
+
+    def setValuesInStep(self, stepName, **kwargs):
+        if self.model is not None and stepName not in self.model.steps:
+            raise KeyError('The step "' + stepName + '" does not exist')
+        self.step_values.setdefault(stepName, {}).update(kwargs)
+
+
+class BehaviorContainer(Feature):
+    """ Feature with behaviors (e.g. material or contact property),
+    where each method call (e.g. `Elastic(table=...)`) adds a behavior.
+    As in Abaqus, the behavior is then available with a lowercase first
+    letter (e.g. `plastic`), and can have sub-options (e.g.
+    `plastic.CyclicHardening(...)`).
+    """
+    def __init__(self, name, kind, **kwargs):
+        Feature.__init__(self, name, kind, **kwargs)
+        self.behaviors = OrderedDict()
+
+    def __getattr__(self, key):
+        if key.startswith('_') or not key[0].isupper():
+            raise AttributeError(key)
+
+        def add_behavior(*args, **kwargs):
+            behavior = BehaviorContainer(key, key, **kwargs)
+            self.behaviors[key] = behavior
+            setattr(self, key[0].lower() + key[1:], behavior)
+            return behavior
+
+        return add_behavior
+
+
+class Model():
+    """ A model, see the Abaqus Model object.
+    """
+    def __init__(self, name, modelType=const.STANDARD_EXPLICIT, **kwargs):
+        """
+        :param name: The name of the model
+        :type name: str
+
+        :param modelType: The type of model
+        :type modelType: SymbolicConstant
+
+        :returns: Instance of Model class
+        :rtype: Model
+
+        """
+        self.name = name
+        self.modelType = modelType
+        self.parts = Repository()
+        self.materials = Repository()
+        self.sections = Repository()
+        self.steps = Repository()
+        self.steps['Initial'] = Feature('Initial', 'InitialStep')
+        self.boundaryConditions = Repository()
+        self.loads = Repository()
+        self.constraints = Repository()
+        self.interactions = Repository()
+        self.interactionProperties = Repository()
+        self.fieldOutputRequests = Repository()
+        self.historyOutputRequests = Repository()
+        self.rootAssembly = Assembly()
+        self.keywordBlock = KeywordBlock(self)
+
+    def Part(self, name, dimensionality=const.THREE_D, type=const.DEFORMABLE_BODY,
+             objectToCopy=None, **kwargs):
+        if isinstance(dimensionality, Part):   # Part(name, objectToCopy)
+            objectToCopy = dimensionality
+        if objectToCopy is not None:
+            self.parts[name] = objectToCopy.copy(name)
+        else:
+            self.parts[name] = Part(name, dimensionality, type)
+        return self.parts[name]
+
+    def Material(self, name, **kwargs):
+        self.materials[name] = BehaviorContainer(name, 'Material', **kwargs)
+        return self.materials[name]
+
+    def copyMaterials(self, sourceModel, materialsToCopy=None):
+        for key in (sourceModel.materials.keys() if materialsToCopy is None
+                    else materialsToCopy):
+            self.materials[key] = sourceModel.materials[key]
+
+    def copySections(self, sourceModel, sectionsToCopy=None):
+        for key in (sourceModel.sections.keys() if sectionsToCopy is None
+                    else sectionsToCopy):
+            self.sections[key] = sourceModel.sections[key]
+
+    def add_feature(self, repository, name, kind, **kwargs):
+        """ Add a feature to a repository (not part of the Abaqus API)
+
+        :param repository: The repository, e.g. self.boundaryConditions
+        :type repository: Repository
+
+        :param name: The name of the feature
+        :type name: str
+
+        :param kind: The kind of feature (the Abaqus method name)
+        :type kind: str
+
+        :returns: The feature
+        :rtype: Feature
+
+        """
+        if 'createStepName' in kwargs and kwargs['createStepName'] not in self.steps:
+            raise KeyError('The step "' + kwargs['createStepName'] + '" does not exist')
+        if 'region' in kwargs and kwargs['region'] is None:
+            raise ValueError('The region of "' + name + '" is None')
+        repository[name] = Feature(name, kind, **kwargs)
+        repository[name].model = self
+        return repository[name]
+
+    def HomogeneousSolidSection(self, name, material, **kwargs):
+        return self.add_feature(self.sections, name, 'HomogeneousSolidSection',
+                                material=material, **kwargs)
+
+    def MembraneSection(self, name, material, **kwargs):
+        return self.add_feature(self.sections, name, 'MembraneSection',
+                                material=material, **kwargs)
+
+    def HomogeneousShellSection(self, name, material, **kwargs):
+        return self.add_feature(self.sections, name, 'HomogeneousShellSection',
+                                material=material, **kwargs)
+
+    def StaticStep(self, name, previous, **kwargs):
+        if previous not in self.steps:
+            raise KeyError('The step "' + previous + '" does not exist')
+        new_step = Feature(name, 'StaticStep', previous=previous, **kwargs)
+        items = self.steps.items()
+        self.steps.clear()
+        for key, item in items:
+            self.steps[key] = item
+            if key == previous:
+                self.steps[name] = new_step
+        if len(self.steps) == 2:    # First analysis step, Abaqus adds default output
+            self.FieldOutputRequest('F-Output-1', createStepName=name,
+                                    variables=const.PRESELECT)
+            self.HistoryOutputRequest('H-Output-1', createStepName=name,
+                                      variables=const.PRESELECT)
+        return new_step
+
+    def FieldOutputRequest(self, name, createStepName, **kwargs):
+        return self.add_feature(self.fieldOutputRequests, name, 'FieldOutputRequest',
+                                createStepName=createStepName, **kwargs)
+
+    def HistoryOutputRequest(self, name, createStepName, **kwargs):
+        return self.add_feature(self.historyOutputRequests, name, 'HistoryOutputRequest',
+                                createStepName=createStepName, **kwargs)
+
+    def DisplacementBC(self, name, createStepName, region, **kwargs):
+        return self.add_feature(self.boundaryConditions, name, 'DisplacementBC',
+                                createStepName=createStepName, region=region, **kwargs)
+
+    def VelocityBC(self, name, createStepName, region, **kwargs):
+        return self.add_feature(self.boundaryConditions, name, 'VelocityBC',
+                                createStepName=createStepName, region=region, **kwargs)
+
+    def ConcentratedForce(self, name, createStepName, region, **kwargs):
+        return self.add_feature(self.loads, name, 'ConcentratedForce',
+                                createStepName=createStepName, region=region, **kwargs)
+
+    def Equation(self, name, terms):
+        for term in terms:
+            self.rootAssembly.get_set(term[1])
+        return self.add_feature(self.constraints, name, 'Equation', terms=terms)
+
+    def Tie(self, name, master, slave, **kwargs):
+        return self.add_feature(self.constraints, name, 'Tie', master=master, slave=slave,
+                                **kwargs)
+
+    def ContactProperty(self, name):
+        self.interactionProperties[name] = BehaviorContainer(name, 'ContactProperty')
+        return self.interactionProperties[name]
+
+    def SurfaceToSurfaceContactStd(self, name, createStepName, master, slave,
+                                   interactionProperty, **kwargs):
+        if interactionProperty not in self.interactionProperties:
+            raise KeyError('The interaction property "' + interactionProperty
+                           + '" does not exist')
+        return self.add_feature(self.interactions, name, 'SurfaceToSurfaceContactStd',
+                                createStepName=createStepName, master=master, slave=slave,
+                                interactionProperty=interactionProperty, **kwargs)
+
+
+class KeywordBlock():
+    """ The keyword block of a model, see the Abaqus KeywordBlock
+    object. The blocks are created from the model when first accessed
+    or when calling `synchVersions`. Blocks that have been edited are
+    not overwritten by `synchVersions`.
+    """
+    def __init__(self, model):
+        """
+        :param model: The model
+        :type model: Model
+
+        :returns: Instance of KeywordBlock class
+        :rtype: KeywordBlock
+
+        """
+        self.model = model
+        self.blocks = None
+        self.edited = False
+
+    @property
+    def sieBlocks(self):
+        if self.blocks is None:
+            self.synchVersions(storeNodesAndElements=True)
+        return tuple(self.blocks)
+
+    def synchVersions(self, storeNodesAndElements=True):
+        if not self.edited:
+            self.blocks = get_keyword_blocks(self.model, storeNodesAndElements)
+
+    def insert(self, position, text):
+        if self.blocks is None:
+            self.synchVersions()
+        self.blocks.insert(position + 1, text)
+        self.edited = True
+
+    def replace(self, position, text):
+        if self.blocks is None:
+            self.synchVersions()
+        self.blocks[position] = text
+        self.edited = True
+
+
+def format_rows(rows, num_per_line=16):
+    """ Format rows of integers as input file data lines, with at most
+    `num_per_line` values per line.
+
+    :param rows: The rows of integers
+    :type rows: list[ list[ int ] ]
+
+    :param num_per_line: Maximum number of values per line
+    :type num_per_line: int
+
+    :returns: The data lines
+    :rtype: str
+
+    """
+    lines = []
+    for row in rows:
+        for i in range(0, len(row), num_per_line):
+            line = ', '.join([str(v) for v in row[i:i+num_per_line]])
+            lines.append(line + (',' if i + num_per_line < len(row) else ''))
+    return '\n'.join(lines)
+
+
+def get_part_blocks(part, store_mesh):
+    """ Get the keyword blocks of a part
+
+    :param part: The part
+    :type part: Part
+
+    :param store_mesh: Include nodes and elements?
+    :type store_mesh: bool
+
+    :returns: The keyword blocks
+    :rtype: list[ str ]
+
+    """
+    blocks = ['*Part, name=' + part.name]
+    store = part.store
+    node_labels, elem_labels = store.get_labels()
+    if store_mesh and len(node_labels) > 0:
+        coords = store.node_coords[:store.num_nodes]
+        blocks.append('*Node\n' + '\n'.join(['%d, %.12g, %.12g, %.12g' % (lab, x, y, z)
+                                             for lab, (x, y, z) in zip(node_labels.tolist(),
+                                                                       coords.tolist())]))
+    if store_mesh and len(elem_labels) > 0:
+        for code, type_name in enumerate(store.type_names):
+            inds = np.where(store.elem_types[:store.num_elems] == code)[0]
+            if len(inds) == 0:
+                continue
+            rows = [[lab] + nodes[:num].tolist() for lab, nodes, num in
+                    zip(elem_labels[inds].tolist(), store.elem_nodes[inds],
+                        store.elem_num_nodes[inds])]
+            blocks.append('*Element, type=' + type_name + '\n' + format_rows(rows))
+    for the_set in part.sets.values():
+        if len(the_set.nodes) > 0:
+            blocks.append('*Nset, nset=' + the_set.name + '\n'
+                          + format_rows([the_set.nodes.labels.tolist()]))
+        if len(the_set.elements) > 0:
+            blocks.append('*Elset, elset=' + the_set.name + '\n'
+                          + format_rows([the_set.elements.labels.tolist()]))
+    for surf in part.surfaces.values():
+        sides = [str(side).replace('FACE', 'S').replace('SIDE1', 'SPOS').replace('SIDE2', 'SNEG')
+                 for side in surf.sides]
+        blocks.append('*Surface, type=ELEMENT, name=' + surf.name + '\n'
+                      + '\n'.join([str(lab) + ', ' + side
+                                   for lab, side in zip(surf.elem_labels.tolist(), sides)]))
+    for assignment in part.sectionAssignments:
+        blocks.append('** Section: ' + assignment['sectionName'])
+    blocks.append('*End Part')
+    return blocks
+
+
+def get_region_name(region):
+    """ Get the input file name of a region
+
+    :param region: The region
+    :type region: Set / Region
+
+    :returns: The name of the set, or 'REGION' if not a set
+    :rtype: str
+
+    """
+    return region.get_inp_name() if isinstance(region, Set) else 'REGION'
+
+
+def get_step_blocks(model, step_name):
+    """ Get the keyword blocks of the boundary conditions, loads and
+    interactions created or modified in a step.
+
+    :param model: The model
+    :type model: Model
+
+    :param step_name: The name of the step
+    :type step_name: str
+
+    :returns: The keyword blocks
+    :rtype: list[ str ]
+
+    """
+    dof_names = ['u1', 'u2', 'u3', 'ur1', 'ur2', 'ur3', 'v1', 'v2', 'v3', 'cf1', 'cf2', 'cf3']
+    blocks = []
+    for feature in model.boundaryConditions.values() + model.loads.values():
+        values = {}
+        if feature.createStepName == step_name:
+            values.update(feature.options)
+        values.update(feature.step_values.get(step_name, {}))
+        dofs = [(name, values[name]) for name in dof_names if name in values
+                and values[name] not in [const.UNSET, None]]
+        if len(dofs) == 0:
+            continue
+        region = get_region_name(feature.region)
+        lines = []
+        for name, value in dofs:
+            dof = int(name[-1]) + (3 if name.startswith('ur') else 0)
+            if value == const.FREED:
+                continue
+            elif value == const.SET or values.get('distributionType') == const.USER_DEFINED:
+                lines.append('%s, %d, %d' % (region, dof, dof))
+            else:
+                lines.append('%s, %d, %d, %.12g' % (region, dof, dof, value))
+        keyword = {'DisplacementBC': '*Boundary', 'VelocityBC': '*Boundary, type=VELOCITY',
+                   'ConcentratedForce': '*Cload'}[feature.kind]
+        if values.get('distributionType') == const.USER_DEFINED:
+            keyword = keyword + ', user'
+        blocks.append('** Name: ' + feature.name + ' Type: ' + feature.kind)
+        blocks.append(keyword + ', op=NEW\n' + '\n'.join(lines))
+    for interaction in model.interactions.values():
+        if interaction.createStepName == step_name:
+            blocks.append('*Contact Pair, interaction=' + interaction.interactionProperty
+                          + ', type=SURFACE TO SURFACE\n'
+                          + get_region_name(interaction.slave) + ', '
+                          + get_region_name(interaction.master))
+    for request in model.fieldOutputRequests.values():
+        if request.createStepName == step_name:
+            blocks.append('*Output, field, variable=PRESELECT')
+    for request in model.historyOutputRequests.values():
+        if request.createStepName == step_name:
+            blocks.append('*Output, history, variable=PRESELECT')
+    return blocks
+
+
+def get_behavior_blocks(container):
+    """ Get the keyword blocks for the behaviors of a material, followed
+    by their sub-options
+
+    :param container: The material or behavior
+    :type container: BehaviorContainer
+
+    :returns: The keyword blocks
+    :rtype: list[ str ]
+
+    """
+    blocks = []
+    for behavior in container.behaviors.values():
+        table = behavior.options.get('table', ())
+        blocks.append('*' + behavior.kind + '\n' + '\n'.join([', '.join([str(v) for v in row])
+                                                              for row in table]))
+        blocks.extend(get_behavior_blocks(behavior))
+    return blocks
+
+
+def get_keyword_blocks(model, store_mesh=True):
+    """ Get the keyword blocks of a model, following the layout of an
+    Abaqus input file.
+
+    :param model: The model
+    :type model: Model
+
+    :param store_mesh: Include nodes and elements?
+    :type store_mesh: bool
+
+    :returns: The keyword blocks
+    :rtype: list[ str ]
+
+    """
+    blocks = ['*Heading', '** Job name: ' + model.name + ' Model name: ' + model.name,
+              '*Preprint, echo=NO, model=NO, history=NO, contact=NO', '**\n** PARTS\n**']
+    for part in model.parts.values():
+        blocks.extend(get_part_blocks(part, store_mesh))
+
+    blocks.append('**\n** ASSEMBLY\n**')
+    assy = model.rootAssembly
+    blocks.append('*Assembly, name=Assembly')
+    for inst in assy.instances.values():
+        inst_str = '*Instance, name=' + inst.name + ', part=' + inst.partName
+        if np.any(inst.translation != 0.0):
+            inst_str = inst_str + '\n%.12g, %.12g, %.12g' % tuple(inst.translation.tolist())
+        blocks.extend([inst_str, '*End Instance'])
+    for the_set in assy.sets.values():
+        blocks.append('*Nset, nset=' + the_set.name + ', internal\n'
+                      + format_rows([the_set.nodes.labels.tolist()]))
+    for constraint in model.constraints.values():
+        blocks.append('** Constraint: ' + constraint.name)
+        if constraint.kind == 'Equation':
+            blocks.append('*Equation\n' + str(len(constraint.terms)) + '\n'
+                          + '\n'.join(['%s, %d, %.12g' % (set_name, dof, coeff)
+                                       for coeff, set_name, dof in constraint.terms]))
+        else:
+            blocks.append('*Tie, name=' + constraint.name + ', adjust=yes\n'
+                          + get_region_name(constraint.slave) + ', '
+                          + get_region_name(constraint.master))
+    blocks.append('*End Assembly')
+
+    blocks.append('**\n** MATERIALS\n**')
+    for material in model.materials.values():
+        blocks.append('*Material, name=' + material.name)
+        blocks.extend(get_behavior_blocks(material))
+    for prop in model.interactionProperties.values():
+        blocks.append('*Surface Interaction, name=' + prop.name)
+
+    blocks.append('**\n** BOUNDARY CONDITIONS\n**')
+    blocks.extend(get_step_blocks(model, 'Initial'))
+    for step_name in model.steps.keys()[1:]:
+        step = model.steps[step_name]
+        opts = step.options
+        # As Abaqus, the step comment is part of the block with the keyword
+        blocks.append('** ' + 64*'-' + '\n** \n** STEP: ' + step_name + '\n** \n'
+                      + '*Step, name=' + step_name + ', nlgeom='
+                      + ('YES' if opts.get('nlgeom') == const.ON else 'NO')
+                      + ', inc=' + str(opts.get('maxNumInc', 100)))
+        blocks.append('*Static\n%.12g, %.12g, %.12g, %.12g'
+                      % tuple([opts.get(key, 1.0) for key in
+                               ['initialInc', 'timePeriod', 'minInc', 'maxInc']]))
+        blocks.extend(get_step_blocks(model, step_name))
+        blocks.append('*End Step')
+    return blocks
+
+
+class Job():
+    """ Analysis job, see the Abaqus Job object. Only writing the input
+    file is supported.
+    """
+    def __init__(self, name, model, **kwargs):
+        """
+        :param name: The name of the job
+        :type name: str
+
+        :param model: The name of the model
+        :type model: str
+
+        :returns: Instance of Job class
+        :rtype: Job
+
+        """
+        self.name = name
+        self.model = model
+        self.options = kwargs
+        self.status = None
+
+    def writeInput(self, consistencyChecking=const.ON):
+        with open(self.name + '.inp', 'w') as fid:
+            fid.write('\n'.join(mdb.models[self.model].keywordBlock.sieBlocks) + '\n')
+
+    def submit(self, **kwargs):
+        raise NotImplementedError('The Abaqus stand-in cannot run analyses')
+
+    def waitForCompletion(self):
+        pass
+
+
+class Mdb():
+    """ The model database, see the Abaqus Mdb object. Use
+    :py:data:`mdb` rather than creating a new instance.
+    """
+    def __init__(self):
+        """
+        :returns: Instance of Mdb class
+        :rtype: Mdb
+
+        """
+        self.reset()
+
+    def reset(self):
+        """ Delete all models and jobs, and create the default model
+        (not part of the Abaqus API)
+
+        :returns: None
+        :rtype: None
+
+        """
+        self.models = Repository()
+        self.models['Model-1'] = Model('Model-1')
+        self.jobs = Repository()
+        self.pathName = None
+
+    def Model(self, name, modelType=const.STANDARD_EXPLICIT, **kwargs):
+        self.models[name] = Model(name, modelType, **kwargs)
+        return self.models[name]
+
+    def Job(self, name, model, **kwargs):
+        self.jobs[name] = Job(name, model, **kwargs)
+        return self.jobs[name]
+
+    def saveAs(self, pathName):
+        # Nothing is saved, the stand-in model database only exists in memory
+        self.pathName = pathName
+
+    def save(self):
+        pass
+
+    def openAuxMdb(self, pathName):
+        raise NotImplementedError('Cannot open .cae files with the Abaqus stand-in, '
+                                  + 'use a mesh bundle (.npz) instead')
+
+
+mdb = Mdb()
+
+
+class Session():
+    """ The session object, see the Abaqus Session object. The stand-in
+    has no viewports or output databases, such that only the
+    repositories are available.
+    """
+    def __init__(self):
+        """
+        :returns: Instance of Session class
+        :rtype: Session
+
+        """
+        self.odbs = Repository()
+        self.viewports = Repository()
+
+
+session = Session()
@@ -0,0 +1,8 @@
+"""Numerical core of the rollover package. The modules in this package
+do not import Abaqus, and can be used from plain Python (2 and 3), e.g.
+in process pool workers, post-processing tools and tests. The modules
+in :py:mod:`rollover.three_d` import the functions from here and
+only import Abaqus when setting up the model.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
@@ -0,0 +1,175 @@
+"""Abaqus-free part of the loading setup: the files read by the user
+subroutine DISP and by :py:mod:`rollover.utils.inp_cycles`, and the
+lookup of the loading parameters for a given cycle. The steps and
+boundary conditions are created in
+:py:mod:`rollover.three_d.utils.loading`.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+from bisect import bisect_right
+
+from rollover.utils import naming_mod as names
+from rollover.utils import json_io
+
+
+def write_loading_file(initial_depression_speed, rolling_length, rolling_radius,
+                       cycles, load, speed, slip, rail_ext, merge_return=False):
+    """Write the loading file, `names.loading_file`, used by the user 
+    subroutine DISP. If `cycles` is empty, the user subroutine reads 
+    the parameters for each cycle from `names.load_table_file`, see 
+    :py:func:`rollover.utils.load_spectrum.write_table`.
+    
+    :param initial_depression_speed: The speed at which the wheel is 
+                                     lowered during the initial 
+                                     depression step
+    :type initial_depression_speed: float
+    
+    :param rolling_length: The length the wheel shall roll (not 
+                           accounting for rail extensions)
+    :type rolling_length: float
+    
+    :param rolling_radius: The rolling radius used to calculate wheel 
+                           rotation as function of slip.
+    :type rolling_radius: float
+    
+    :param cycles: List of cycle numbers where new load parameters are
+                   specified.
+    :type cycles: list[ int ]
+    
+    :param load: List of vertical wheel loads for each cycle in cycles.
+    :type load: list[ float ]
+    
+    :param speed: List of linear wheel speeds for each cycle in cycles.
+    :type speed: list[ float ]
+    
+    :param slip: List of wheel slips for each cycle in cycles.
+    :type slip: float / list[ float ]
+    
+    :param rail_ext: List of rail extension length for each cycle in 
+                     cycles.
+    :type rail_ext: list[ float ]
+    
+    :param merge_return: Use the merged cycle layout, written on the 
+                         last line (0: separate, 1: merged)
+    :type merge_return: bool
+    
+    :returns: None
+    :rtype: None
+    
+    """
+    
+    with open(names.loading_file, 'w') as fid:
+        fid.write('%25.15e\n' % (rolling_length))
+        fid.write('%25.15e\n' % (-initial_depression_speed))
+        fid.write('%0.0f\n' % (len(cycles)))
+        for c, v, s, rext in zip(cycles, speed, slip, rail_ext):
+            rolling_time = rolling_length/v
+            rot_per_length = (1+s)/rolling_radius
+            fid.write(('%0.0f' + 3*', %25.15e' + '\n') % (c, rolling_time, rot_per_length, rext))
+        fid.write('%0.0f\n' % (1 if merge_return else 0))
+    
+    
+def read_merge_return(loading_file=names.loading_file):
+    """Read the cycle layout from the last line of the loading file,
+    written by :py:func:`write_loading_file`. Loading files without
+    this line use the separate cycle layout, as in
+    `usub/step_type_mod.f90`.
+    
+    :param loading_file: The name of the loading file
+    :type loading_file: str
+    
+    :returns: True if the merged cycle layout is used, False if the
+              separate cycle layout is used, and None if the loading
+              file does not exist.
+    :rtype: bool
+    
+    """
+    try:
+        with open(loading_file, 'r') as fid:
+            lines = [line.strip() for line in fid if len(line.strip()) > 0]
+    except IOError:
+        return None
+    
+    num_cycle_lines = int(float(lines[2]))
+    if len(lines) > 3 + num_cycle_lines:
+        return int(float(lines[3 + num_cycle_lines])) == 1
+    return False
+    
+    
+def write_cycle_schedule(num_cycles, template_cycle, rolling_length, cycles, load, speed, 
+                         min_incr, max_incr, merge_return=False):
+    """Write the schedule file, `names.cycle_schedule_file`, used to 
+    expand the cycles in the input file, see 
+    :py:func:`rollover.utils.inp_cycles.expand`. 
+    
+    :param num_cycles: Total number of rollover cycles
+    :type num_cycles: int
+    
+    :param template_cycle: The last cycle created in the model, used as
+                           template for the remaining cycles. 
+    :type template_cycle: int
+    
+    :param rolling_length: The length the wheel shall roll
+    :type rolling_length: float
+    
+    :param cycles: List of cycle numbers where new load parameters are
+                   specified.
+    :type cycles: list[ int ]
+    
+    :param load: List of vertical wheel loads for each cycle in cycles.
+    :type load: list[ float ]
+    
+    :param speed: List of linear wheel speeds for each cycle in cycles.
+    :type speed: list[ float ]
+    
+    :param min_incr: Min number of increments during the rolling step
+    :type min_incr: int
+    
+    :param max_incr: Max number of increments during the rolling step
+    :type max_incr: int
+    
+    :param merge_return: Is the merged cycle layout used?
+    :type merge_return: bool
+    
+    :returns: None
+    :rtype: None
+    
+    """
+    
+    json_io.save(names.cycle_schedule_file, 
+                 {'num_cycles': num_cycles, 'template_cycle': template_cycle,
+                  'rolling_length': rolling_length, 'cycles': list(cycles), 
+                  'vertical_load': list(load), 'speed': list(speed),
+                  'min_incr': min_incr, 'max_incr': max_incr, 
+                  'merge_return': merge_return})
+    
+    
+def get_cycle_data(cycle_nr, cycles, cycle_data):
+    """ Given a list of cycle data, give the relevant data for 
+    `cycle_nr`
+    
+    :param cycle_nr: The cycle number for which the cycle data should be 
+                     extracted
+    :type cycle_nr: int
+    
+    :param cycles: List of cycles for which the items in cycle data are
+                   specified for.
+    :type cycles: list[ int ]
+    
+    :param cycle_data: List of cycle data. 
+    
+                       Each cycle data is a list with the same length as
+                       cycles.
+    :type cycle_data: list[ list [float/int] ]
+    
+    :returns: A list containing the items in each list in cycle data on 
+              the position `i` in cycle_nr before `cycle_nr < cycles[i]`
+    :rtype: list[ float/int ]
+    
+    """
+    ind = bisect_right(cycles, cycle_nr) - 1
+    
+    return [data[ind] for data in cycle_data]
@@ -0,0 +1,262 @@
+"""Abaqus-free part of the wheel mesh generation: revolve a 2d mesh
+of a section in the xy-plane around the x-axis into a 3d mesh, and save
+it to an input file. Only quadratic elements are supported. The mesh is
+extracted from and imported to Abaqus in
+:py:mod:`rollover.three_d.wheel.three_d_mesh`.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import numpy as np
+
+from rollover.utils import naming_mod as names
+
+
+def make_3d_mesh_quad(mesh_2d, mesh_size):
+    """ Revolve a 2d-mesh into a 3d-mesh 
+    
+    :param mesh_2d: Mesh specification with the following fields:
+              
+                    - nodes: np.array with node coordinates
+                    - elements: dictionary with keys according to number 
+                      of nodes in element: N3,N4,N6,N8. 
+                      Each item contains a list of list of node labels
+                    - edge_nodes: list of labels of nodes that belong to 
+                      the edges of the elements (and not the corners)
+                    - corner_nodes: list of labels of nodes that belong 
+                      to the corners of the elements. 
+    :type mesh_2d: dict
+    
+    :param mesh_size: The circumferential mesh size at largest radius
+    :type mesh_size: float
+    
+    :returns: Mesh specification with the following fields:
+              
+              - nodes: np.array with node coordinates
+              - elements: dictionary with keys according to number 
+                of nodes in element: N15, N20. Each item contains a list
+                of list of node labels
+              - angles: np.array of angles for angular increments of 
+                elements. 
+    :rtype: dict
+    
+    """
+    
+    nodes_2d = mesh_2d['nodes']
+    elems_2d = mesh_2d['elements']
+    edge_node_num_2d = mesh_2d['edge_nodes']
+    corner_node_num_2d = mesh_2d['corner_nodes']
+    
+    r_outer = np.max(np.abs(nodes_2d[:, 1]))
+    num_angles = int(r_outer*2*np.pi/mesh_size)
+    angles = np.linspace(0, 2*np.pi, num_angles+1)[:-1]
+    delta_angle = angles[1]-angles[0]
+    
+    # Calculate size of mesh and allocate variables
+    num_corner_nodes_2d = len(corner_node_num_2d)
+    num_edge_nodes_2d = len(edge_node_num_2d)
+    num_nodes_per_section = 2*num_corner_nodes_2d + num_edge_nodes_2d
+    
+    nodes = np.zeros((num_nodes_per_section*num_angles, 3), dtype=float)
+    
+    corner_node_num = np.zeros((num_corner_nodes_2d, num_angles), dtype=int)
+    edge_ip_node_num = np.zeros((num_edge_nodes_2d, num_angles), dtype=int)
+    edge_op_node_num = np.zeros((num_corner_nodes_2d, num_angles), dtype=int)
+    
+    corner_coords_2d = nodes_2d[np.array(corner_node_num_2d, dtype=int), :]
+    edge_coords_2d = nodes_2d[np.array(edge_node_num_2d, dtype=int), :]
+    
+    edge_op_node_num[-1,-1] = -1    # Used the first iteration in the loop
+    for i, ang in enumerate(angles):
+        # Corner nodes
+        corner_node_num[:, i] = edge_op_node_num[-1,i-1] + 1 + np.arange(num_corner_nodes_2d)
+        nodes[corner_node_num[:, i], :] = rotate_coords(corner_coords_2d, ang)
+        
+        # Edge nodes (in plane)
+        edge_ip_node_num[:, i] = corner_node_num[-1,i] + 1 + np.arange(num_edge_nodes_2d)
+        nodes[edge_ip_node_num[:, i], :] = rotate_coords(edge_coords_2d, ang)
+            
+        # Edge nodes (out of plane, i.e. between angle increments, 
+        # stemming from corner nodes in 2d)
+        edge_op_node_num[:, i] = edge_ip_node_num[-1,i] + 1 + np.arange(num_corner_nodes_2d)
+        nodes[edge_op_node_num[:, i], :] = rotate_coords(corner_coords_2d, 
+                                                         ang + delta_angle/2.0)
+
+    angle_inds = np.arange(num_angles+1)
+    angle_inds[-1] = 0
+    hex20_elems = get_elements(elems_2d['N8'], angle_inds, corner_node_num_2d, 
+                                 edge_node_num_2d, corner_node_num, edge_ip_node_num, 
+                                 edge_op_node_num)
+                                 
+    wedge15_elems = get_elements(elems_2d['N6'], angle_inds, corner_node_num_2d, 
+                                 edge_node_num_2d, corner_node_num, edge_ip_node_num, 
+                                 edge_op_node_num)
+    
+    mesh_3d = {'nodes': nodes,
+               'elements': {'N15': wedge15_elems, 'N20': hex20_elems},
+               'angles': angles}
+    
+    return mesh_3d
+    
+
+def get_elements(elem_2d_con, angle_inds, corner_node_num_2d, edge_node_num_2d, 
+                 corner_node_num, edge_ip_node_num, edge_op_node_num):
+    """ Get the node lists of the revolved elements belonging to a given
+    set of node lists of elements from the 2d mesh.
+    
+    :param elem_2d_con: list of list of 2d nodes for each element
+    :type elem_2d_con: list[ list[ int ] ]
+    
+    :param angle_inds: indices of angles, counting 0, 1, 2, ..., N, 0
+    :type angle_inds: np.array
+    
+    :param corner_node_num_2d: node numbers of corner nodes from 2d
+    :type corner_node_num_2d: list[ int ]
+    
+    :param edge_node_num_2d: node numbers for edge nodes from 2d
+    :type edge_node_num_2d: list[ int ]
+    
+    :param corner_node_num: array of node numbers for corner nodes in 
+                            3d. First index refers to index in 
+                            corner_node_num_2d and second index to 
+                            angle_inds
+    :type corner_node_num: np.array( int )
+    
+    :param edge_ip_node_num: array of node numbers for in-plane nodes in
+                             3d. First index refers to index in 
+                             edge_node_num_2d and second to angle_inds
+    :type edge_ip_node_num: np.array( int )
+    
+    :param edge_op_node_num: array of node numbers for out-of-plane 
+                             nodes in 3d. First index refers to index
+                             in corner_node_num_2d and second to 
+                             angle_inds. 
+    :type edge_op_node_num: np.array( int )
+    
+    :returns: list of list containing element node labels for 3d mesh
+    :rtype: np.array
+    
+    """
+    elems = []
+    n = len(elem_2d_con[0])//2
+    corner_row_of = dict([(node_num, i) for i, node_num in enumerate(corner_node_num_2d)])
+    edge_row_of = dict([(node_num, i) for i, node_num in enumerate(edge_node_num_2d)])
+    
+    for enodes in elem_2d_con:
+        corner_rows = [corner_row_of[node_num] for node_num in enodes[:n]]
+        edge_rows = [edge_row_of[node_num] for node_num in enodes[n:]]
+        for i in range(len(angle_inds)-1):
+            elems.append([])
+            # Corner nodes
+            for j in range(2):
+                for cr in corner_rows:
+                    elems[-1].append(corner_node_num[cr, angle_inds[i+(1-j)]])
+            # Edge nodes in plane
+            for j in range(2):
+                for er in edge_rows:
+                    elems[-1].append(edge_ip_node_num[er, angle_inds[i+(1-j)]])
+            # Edge nodes between planes
+            for cr in corner_rows:
+                elems[-1].append(edge_op_node_num[cr, angle_inds[i]])
+        
+    return np.array(elems)
+    
+
+def rotate_coords(coords, angles):
+    """ Rotate 2d coords in the xy-plane around the x-axis. 
+    
+    .. note::
+        
+        The function supports either a list of coordinates or a list of
+        angles, not both at the same time
+    
+    :param coords: Coordinates in xy-plane to be rotated. Can also 
+                   contain z-coordinate, but this is ignored. 
+                   Can be either a single coordinate, or 2d array. In 
+                   the latter case, the last index should give the axis,
+                   i.e. size [N,2] or [N,3] where N is number of coords
+    :type coords: np.array
+    
+    :param angles: List of angles to rotate a single coordinate with. 
+    :type angles: float, int, list, np.array
+    
+    :returns: An array of rotated coordinates: [N, 3], where N is number
+              of coordinates, i.e. N=max(len(angles), coords.shape[0])
+    :rtype: np.array
+    
+    """
+    if isinstance(angles, (float, int)):
+        rot_ang = [angles]
+    else:
+        rot_ang = angles
+        
+    if len(coords.shape) == 1:
+        coords_rotated = np.zeros((len(rot_ang), 3))
+        coords_rotated[:,0] = coords[0]*np.ones((len(rot_ang)))
+        coords_rotated[:,1] = coords[1]*np.cos(rot_ang)
+        coords_rotated[:,2] = coords[1]*np.sin(rot_ang)
+    elif len(rot_ang) == 1:
+        coords_rotated = np.zeros((coords.shape[0], 3))
+        coords_rotated[:,0] = coords[:, 0]
+        coords_rotated[:,1] = coords[:, 1]*np.cos(rot_ang[0])
+        coords_rotated[:,2] = coords[:, 1]*np.sin(rot_ang[0])
+    else:
+        raise ValueError('Cannot specify both multiple coordinates and angles')
+        
+    return coords_rotated
+    
+
+def save_3d_mesh_to_inp(mesh_3d):
+    """ Given a specification of the 3d mesh, save this to an input file
+    for use when generating substructure.
+    
+    :param mesh_3d: Mesh specification with the following fields:
+              
+                    - nodes: np.array with node coordinates
+                    - elements: dictionary with keys according to number 
+                      of nodes in element: N15, N20. Each item contains 
+                      a list of list of node labels
+                    - angles: np.array of angles for angular increments 
+                      of elements. 
+    :type mesh_3d: dict
+    
+    :returns: Relative path of input file
+    :rtype: str
+    
+    """
+    
+    input_file = 'wheel_3d_mesh.inp'
+    with open(input_file, 'w') as inp:
+        inp.write('** Input file to save mesh (faster than creating mesh in abaqus cae)\n')
+        inp.write('*Heading\n')
+        inp.write('*Preprint, echo=NO, history=NO, contact=NO\n')
+        inp.write('*Part, name=' + names.wheel_part + '\n')
+        
+        # Write node coordinates
+        inp.write('*Node\n')
+        for i, node in enumerate(mesh_3d['nodes']):
+            inp.write(('{:7.0f}' + 3*', {:25.15e}' + '\n').format(i+1, *node))
+        
+        # Write element connectivity
+        ecodes = {'N6': 'C3D6',     # Linear wedge elements
+                  'N8': 'C3D8',     # Linear hex elements
+                  'N15': 'C3D15',   # Quadratic wedge elements
+                  'N20': 'C3D20',   # Quadratic hex elements
+                  }
+        enum = 1
+        for etype in mesh_3d['elements']:
+            ecode = ecodes[etype]
+            elems = mesh_3d['elements'][etype]
+            nnods = len(elems[0])
+            inp.write('*Element, type=' + ecode + '\n')
+            for i, elem in enumerate(elems):
+                elem_nn = elem + 1  # Because abaqus numbering starts from 1
+                inp.write(('{:7.0f}' + nnods*', {:7.0f}' + '\n').format(i+enum, *elem_nn))
+            enum = enum + len(elems)
+        inp.write('*End Part\n')
+        
+        # Unsure if assy required to import part?
+        
+    return input_file
@@ -10,6 +10,7 @@ from abaqusConstants import *
 from rollover import local_paths
 from rollover.utils import naming_mod as names
 from rollover.utils import abaqus_python_tools as apt
+from rollover.utils import output_schedule
 from rollover.three_d.rail import basic as rail_basic
 from rollover.three_d.rail import mesher as rail_mesh
 from rollover.three_d.utils import symmetric_mesh_module as sm
@@ -275,24 +276,63 @@ def create_rollover(rail, shadow, use_rp, wheel, trans, stiffness,
           'speed': get_csv(speed, float),
           'slip': get_csv(slip, float),
           'rail_ext': get_csv(rail_ext, float)}
-          
-        
+    
+    # Start timing if trace file given by apt.TRACE_ENV_VAR
+    apt.start_trace()
+    try:
+        with apt.span('create_rollover'):
+            setup_rollover(rp, wp, cp, lp, output_table)
+    finally:
+        apt.stop_trace()
+    
+    
+def setup_rollover(rp, wp, cp, lp, output_table):
+    """Setup the rollover model, write the input file and save the 
+    model database. See create_rollover for a description of the input
+    
+    :param rp: Rail parameters, see 
+               :py:func:`rollover.three_d.rail.include.from_file`
+    :type rp: dict
+    
+    :param wp: Wheel parameters, see
+               :py:func:`rollover.three_d.wheel.include.from_folder`
+    :type wp: dict
+    
+    :param cp: Contact parameters, see
+               :py:func:`rollover.three_d.utils.contact.setup`
+    :type cp: dict
+    
+    :param lp: Loading parameters, see
+               :py:func:`rollover.three_d.utils.loading.setup`
+    :type lp: dict
+    
+    :param output_table: Field output data specification
+    :type output_table: tuple
+    
+    :returns: None
+    
+    """
     # Create model
-    rollover_model = apt.create_model(names.model)
+    with apt.span('create_model'):
+        rollover_model = apt.create_model(names.model)
     
     # Include rail
-    num_nodes, num_elems = rail_include.from_file(rollover_model, **rp)
+    with apt.span('rail_include.from_file'):
+        num_nodes, num_elems = rail_include.from_file(rollover_model, **rp)
     
     # Include wheel
     start_lab = (num_nodes+1, num_elems+1)
-    wheel_stiffness = wheel_include.from_folder(rollover_model, 
-                                                start_labels=start_lab,
-                                                **wp)
+    with apt.span('wheel_include.from_folder'):
+        wheel_stiffness = wheel_include.from_folder(rollover_model, 
+                                                    start_labels=start_lab,
+                                                    **wp)
     # Setup contact
-    contact.setup(rollover_model, **cp)
+    with apt.span('contact.setup'):
+        contact.setup(rollover_model, **cp)
     
     # Setup loading
-    num_cycles = loading.setup(rollover_model, **lp)
+    with apt.span('loading.setup'):
+        num_cycles = loading.setup(rollover_model, **lp)
     
     # Setup field outputs (if requested)
     if len(output_table) > 0:
@@ -308,15 +348,18 @@ def create_rollover(rail, shadow, use_rp, wheel, trans, stiffness,
                 
         #op = {row[0]: {head:val for head, val in zip(heads, row[1:])} 
         #      for row in output_table}
-        odb_output.add(rollover_model, op, num_cycles)
+        with apt.span('odb_output.add'):
+            odb_output.add(rollover_model, op)
     
     # Add wheel uel to input file
-    wheel_include.add_wheel_super_element_to_inp(rollover_model, 
-                                                 wheel_stiffness, 
-                                                 wp['folder'],
-                                                 wp['translation'])
+    with apt.span('wheel_include.add_wheel_super_element_to_inp'):
+        wheel_include.add_wheel_super_element_to_inp(rollover_model, 
+                                                     wheel_stiffness, 
+                                                     wp['folder'],
+                                                     wp['translation'])
     # Add output to .fil file
-    fil_output.add(rollover_model, num_cycles)
+    with apt.span('fil_output.add'):
+        fil_output.add(rollover_model, num_cycles)
     
     # Write reference point coordinates to file:
     with open(names.rp_coord_file, 'w') as fid:
@@ -331,9 +374,16 @@ def create_rollover(rail, shadow, use_rp, wheel, trans, stiffness,
     
     the_job = mdb.Job(name=names.job, model=names.model,
                       userSubroutine=usub)
-    the_job.writeInput(consistencyChecking=OFF)
+    with apt.span('write_input_file'):
+        the_job.writeInput(consistencyChecking=OFF)
+    
+    # Add field outputs to input file (if requested)
+    if len(output_table) > 0:
+        with apt.span('output_schedule.inject'):
+            output_schedule.inject(names.job + '.inp')
     
     # Save model database
-    mdb.saveAs(pathName=names.model + '.cae')
+    with apt.span('save_cae'):
+        mdb.saveAs(pathName=names.model + '.cae')
     
 
@@ -42,7 +42,8 @@ def create_from_param(rail_param):
     return create(**create_param)
     
 
-def create(rail_profile, rail_length, refine_region=None, sym_dir=None, material=default_material):
+def create(rail_profile, rail_length, refine_region=None, sym_dir=None, material=default_material,
+           max_size_ratio=None):
     """Create a new model containing a simple rail geometry.
     
     The model is named 'RAIL' and the profile is created by importing the sketch rail_profile and 
@@ -55,8 +56,9 @@ def create(rail_profile, rail_length, refine_region=None, sym_dir=None, material
     :type rail_length: float
     
     :param refine_region: Rectangle specifying partition with mesh refinement in contact region, 
-                          defaults to None implying no refined region
-    :type refine_region: list(list(float)), optional
+                          defaults to None implying no refined region. Can also be a list of 
+                          nested refinement zones, see :py:func:`get_refine_zones`
+    :type refine_region: list(list(float)), list(dict), optional
     
     :param sym_dir: Vector specifying the normal direction if symmetry is used in the rail profile
     :type sym_dir: list(float) (len=3)
@@ -65,6 +67,11 @@ def create(rail_profile, rail_length, refine_region=None, sym_dir=None, material
                      'material_model' and 'mpar'. See :py:mod:`setup_material_mod` for detailed 
                      requirements
     :type material: dict
+    
+    :param max_size_ratio: Maximum mesh size ratio between neighbouring refinement zones, 
+                           transition zones are added if exceeded. See 
+                           :py:func:`get_refine_zones`
+    :type max_size_ratio: float
         
     :returns: The model database containing the rail part
     :rtype: Model (Abaqus object)
@@ -77,10 +84,12 @@ def create(rail_profile, rail_length, refine_region=None, sym_dir=None, material
     profile_sketch = sketch_tools.import_sketch(rail_model, rail_profile, name='rail_profile')
     rail_part = rail_model.Part(name=names.rail_part, dimensionality=THREE_D, type=DEFORMABLE_BODY)
     rail_part.BaseSolidExtrude(sketch=profile_sketch, depth=rail_length)
-    if refine_region is not None:
-        create_partition(rail_model, rail_part, refine_region)
+    refine_zones = get_refine_zones(refine_region, max_size_ratio=max_size_ratio)
+    for i, zone in enumerate(refine_zones):
+        create_partition(rail_model, rail_part, zone['region'], 
+                         sketch_name='partition_sketch' + ('' if i == 0 else str(i)))
     
-    create_sets(rail_part, rail_length, refine_region, sym_dir)
+    create_sets(rail_part, rail_length, refine_zones, sym_dir)
     
     add_material_and_section(rail_model, rail_part, material)
     
@@ -99,8 +108,10 @@ def create_sets(rail_part, rail_length, refine_region=None, sym_dir=None):
     :type rail_length: float
     
     :param refine_region: Rectangle specifying partition with mesh refinement in contact region, 
-                          defaults to None implying no refined region
-    :type refine_region: list(list(float)), optional
+                          defaults to None implying no refined region. Can also be a list of 
+                          nested refinement zones, see :py:func:`get_refine_zones`. The contact 
+                          surface is then taken from all refinement zones.
+    :type refine_region: list(list(float)), list(dict), optional
     
     :param sym_dir: Vector specifying the normal direction if symmetry is used in the rail profile
     :type sym_dir: list(float) (len=3)
@@ -113,13 +124,17 @@ def create_sets(rail_part, rail_length, refine_region=None, sym_dir=None):
         faces = get_end_faces(rail_part, zpos=z)
         rail_part.Set(name=set_name, faces=faces)
         
-    if refine_region is None:
-        contact_cell = rail_part.cells[0]
+    refine_zones = get_refine_zones(refine_region)
+    if len(refine_zones) == 0:
+        contact_cells = [rail_part.cells[0]]
     else:
-        partition_face, point_on_partition_face = get_partition_face(rail_part, refine_region)
-        contact_cell = rail_part.cells.findAt(point_on_partition_face)
+        contact_cells = []
+        for zone in refine_zones:
+            partition_face, point_on_partition_face = get_partition_face(rail_part, 
+                                                                         zone['region'])
+            contact_cells.append(rail_part.cells.findAt(point_on_partition_face))
     
-    create_contact_face_set(rail_part, contact_cell, exclude_dir=sym_dir)
+    create_contact_face_set(rail_part, contact_cells, exclude_dir=sym_dir)
     
     bottom_faces = get_bottom_faces(rail_part)
     rail_part.Set(name=names.rail_bottom_nodes, faces=part.FaceArray(faces=bottom_faces))
@@ -157,15 +172,15 @@ def get_bottom_faces(rail_part):
     return bottom_faces
     
     
-def create_contact_face_set(rail_part, contact_cell, exclude_dir=None):
+def create_contact_face_set(rail_part, contact_cells, exclude_dir=None):
     """ Create a face set and a surface for the contact region. 
     
     :param rail_part: The rail part
     :type rail_part: Part object (Abaqus)
     
-    :param contact_cell: The cell in the rail part that has the contact
-                         faces.
-    :type contact_cell: Cell object (Abaqus)
+    :param contact_cells: The cells in the rail part that have the 
+                          contact faces. A single cell is also accepted.
+    :type contact_cells: list[ Cell object (Abaqus) ]
     
     :param exclude_dir: Normalized vector. If not none, and a face 
                         normal aligns with this direction, the face is 
@@ -175,27 +190,19 @@ def create_contact_face_set(rail_part, contact_cell, exclude_dir=None):
     :returns: None
                         
     """
-    
-    # Get all faces on the contact cell
-    contact_cell_faces = [rail_part.faces[f_ind] 
-                          for f_ind in contact_cell.getFaces()]
-    
-    # Get all faces in the neighbouring cells
-    neighbouring_cells = contact_cell.getAdjacentCells()
-    if len(neighbouring_cells) > 0:        
-        neighbouring_faces = []
-        for nc in neighbouring_cells:
-            for f_ind in nc.getFaces():
-                neighbouring_faces.append(rail_part.faces[f_ind])
-                
-        # Get all faces in contact_cell that are external 
-        # (i.e. not shared by neighbouring cells)
-        external_faces = []
-        for cf in contact_cell_faces:
-            if cf not in neighbouring_faces:
-                external_faces.append(cf)
-    else:
-        external_faces = contact_cell_faces
+    if not isinstance(contact_cells, (list, tuple)):
+        contact_cells = [contact_cells]
+    
+    # Count the number of cells that each face belongs to. External 
+    # faces belong to only one cell.
+    num_face_cells = {}
+    for cell in rail_part.cells:
+        for f_ind in cell.getFaces():
+            num_face_cells[f_ind] = num_face_cells.get(f_ind, 0) + 1
+    
+    # Get all external faces on the contact cells
+    external_faces = [rail_part.faces[f_ind] for cell in contact_cells 
+                      for f_ind in cell.getFaces() if num_face_cells[f_ind] == 1]
             
     # Get external faces without normal in z-direction or exclude_dir
     contact_faces = []
@@ -229,9 +236,11 @@ def get_end_faces(rail_part, zpos):
     return faces
     
     
-def create_partition(rail_model, rail_part, refine_region):
+def create_partition(rail_model, rail_part, refine_region, sketch_name='partition_sketch'):
     """Create a partition by extruding the rectangle specified by 
-    refine_region
+    refine_region. The partitioned cell is the cell containing the 
+    rectangle, such that nested partitions are obtained by calling this
+    function with the outermost rectangle first. 
         
     :param rail_model: The model to which the sketch will be added
     :type rail_model: Model (Abaqus object)
@@ -243,12 +252,16 @@ def create_partition(rail_model, rail_part, refine_region):
                           refinement in contact region
     :type refine_region: list(list(float))
     
+    :param sketch_name: Name of the partition sketch
+    :type sketch_name: str
+    
     :returns: None
     :rtype: None
 
     """
-    rail_cell = rail_part.cells[0]                      # Should only be 1 before partitioning
-    rail_face = get_end_faces(rail_part, zpos=0.0)[0]   # Should only be 1 before partitioning
+    # Before partitioning, the face (and cell) found is the one containing refine_region
+    rail_face, point_in_region = get_partition_face(rail_part, refine_region)
+    rail_cell = rail_part.cells.findAt(tuple(point_in_region))
     
     extrude_axis = rail_part.DatumAxisByPrincipalAxis(principalAxis=ZAXIS)
     extrude_axis = rail_part.datums[extrude_axis.id]
@@ -259,7 +272,7 @@ def create_partition(rail_model, rail_part, refine_region):
                                                     sketchUpEdge=vertical_axis, 
                                                     sketchPlaneSide=SIDE1)
                                                     
-    partition_sketch = rail_model.ConstrainedSketch(name='partition_sketch', sheetSize=200.0,
+    partition_sketch = rail_model.ConstrainedSketch(name=sketch_name, sheetSize=200.0,
                                                     transform=sketch_position)
     partition_sketch.rectangle(point1=refine_region[0], point2=refine_region[1])
     
@@ -321,6 +334,80 @@ def get_partition_face(rail_part, refine_region):
     raise ValueError('Could not find the partition face')
 
 
+def get_refine_zones(refine_region, fine_mesh=None, max_size_ratio=None):
+    """ Convert the refine_region input to a list of nested refinement
+    zones, ordered with the outermost zone first. 
+    
+    refine_region can be given as
+    
+    - None: No refinement zones, an empty list is returned
+    - A rectangle [[x1,y1],[x2,y2]]: One refinement zone with size 
+      fine_mesh
+    - A list of nested zones, each a dictionary with the fields 
+      'region' (a rectangle as above) and 'size' (the mesh size in the 
+      zone). The order is arbitrary, but each zone must be contained 
+      in the next larger zone. 
+    
+    If max_size_ratio is given, transition zones are added between 
+    neighbouring zones whose mesh size ratio exceeds max_size_ratio. 
+    The transition zones' rectangles are linearly interpolated between
+    the neighbouring rectangles and their sizes geometrically. 
+    Transitions between the outermost zone and the coarse mesh are not
+    added, as the rectangle must be within the rail profile. 
+    
+    :param refine_region: The refinement region(s), see above
+    :type refine_region: list(list(float)), list(dict)
+    
+    :param fine_mesh: The mesh size, used if refine_region is a single
+                      rectangle
+    :type fine_mesh: float
+    
+    :param max_size_ratio: The maximum mesh size ratio between 
+                           neighbouring zones. 
+    :type max_size_ratio: float
+    
+    :returns: List of dictionaries with fields 'region' and 'size'
+    :rtype: list[ dict ]
+    
+    """
+    if refine_region is None:
+        return []
+    
+    if not isinstance(refine_region[0], dict):
+        return [{'region': refine_region, 'size': fine_mesh}]
+    
+    def sorted_rect(region):
+        return [[min(region[0][i], region[1][i]) for i in range(2)],
+                [max(region[0][i], region[1][i]) for i in range(2)]]
+    
+    def area(region):
+        return (region[1][0] - region[0][0])*(region[1][1] - region[0][1])
+        
+    zones = sorted([{'region': sorted_rect(zone['region']), 'size': zone['size']} 
+                    for zone in refine_region], key=lambda z: -area(z['region']))
+    
+    for outer, inner in zip(zones[:-1], zones[1:]):
+        if (any([inner['region'][0][i] < outer['region'][0][i] for i in range(2)]) 
+            or any([inner['region'][1][i] > outer['region'][1][i] for i in range(2)])):
+            raise ValueError('The refinement zones must be nested, ' + str(inner['region']) 
+                             + ' is not inside ' + str(outer['region']))
+    
+    if max_size_ratio is None or len(zones) < 2:
+        return zones
+    
+    all_zones = [zones[0]]
+    for outer, inner in zip(zones[:-1], zones[1:]):
+        ratio = float(outer['size'])/inner['size']
+        num_trans = int(np.ceil(np.log(ratio)/np.log(max_size_ratio) - 1.e-9)) - 1
+        for k in range(1, num_trans + 1):
+            xi = float(k)/(num_trans + 1)
+            region = (np.array(outer['region'])*(1 - xi) + np.array(inner['region'])*xi).tolist()
+            all_zones.append({'region': region, 'size': outer['size']*ratio**(-xi)})
+        all_zones.append(inner)
+    
+    return all_zones
+    
+
 def add_material_and_section(rail_model, rail_part, material):
     """ Create the material specified and create one section for the 
     entire rail.
@@ -337,8 +424,8 @@ def add_material_and_section(rail_model, rail_part, material):
     :type material: dict
     
     """
-    setup_material.add_material(rail_model, material_spec=material, name='RAIL_MATERIAL')
-    rail_model.HomogeneousSolidSection(name=names.rail_sect, material='RAIL_MATERIAL')
+    setup_material.add_material(rail_model, material_spec=material, name=names.rail_material)
+    rail_model.HomogeneousSolidSection(name=names.rail_sect, material=names.rail_material)
     region = regionToolset.Region(cells=rail_part.cells)
     rail_part.SectionAssignment(region=region, sectionName=names.rail_sect)
 
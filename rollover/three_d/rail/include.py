@@ -6,12 +6,16 @@ rollover analysis
 
 from abaqus import mdb
 from abaqusConstants import *
+import regionToolset
 
 from rollover.local_paths import data_path
 from rollover.utils import naming_mod as names
+from rollover.utils import abaqus_python_tools as apt
 from rollover.three_d.rail import shadow_regions as rail_shadow_regions
 from rollover.three_d.rail import constraints as rail_constraints
 from rollover.three_d.rail import substructure as rail_substruct
+from rollover.three_d.utils import mesh_bundle
+from rollover.three_d.utils import orphan_mesh
 
 
 def from_file(the_model, model_file, shadow_extents, use_rail_rp=False):
@@ -24,7 +28,8 @@ def from_file(the_model, model_file, shadow_extents, use_rail_rp=False):
     
     :param model_file: The path to the model database (.cae file)
                        containing a model: names.rail_model that again 
-                       contains the part names.rail_part. 
+                       contains the part names.rail_part. Alternatively,
+                       the path to a mesh bundle (.npz file).
     :type model_file: str
     
     :param shadow_extents: How far to extend the shadow mesh in each 
@@ -41,12 +46,14 @@ def from_file(the_model, model_file, shadow_extents, use_rail_rp=False):
 
     """
     
-    has_substruct = get_part_from_file(the_model, model_file)
+    with apt.span('get_part_from_file'):
+        has_substruct = get_part_from_file(the_model, model_file)
     
     rail_part = the_model.parts[names.rail_part]
     rail_length = get_rail_z_extent(rail_part)
     
-    rail_shadow_regions.create(the_model, shadow_extents)
+    with apt.span('shadow_regions.create'):
+        rail_shadow_regions.create(the_model, shadow_extents)
     num_nodes = len(rail_part.nodes)
     num_elems = len(rail_part.elements)
     if has_substruct:
@@ -61,7 +68,8 @@ def from_file(the_model, model_file, shadow_extents, use_rail_rp=False):
     rail_inst = the_model.rootAssembly.Instance(name=names.rail_inst, part=rail_part, dependent=ON)
     num_nodes += len(the_model.rootAssembly.nodes)
     
-    rail_constraints.create(the_model, rail_length, use_rail_rp, has_substruct)
+    with apt.span('constraints.create'):
+        rail_constraints.create(the_model, rail_length, use_rail_rp, has_substruct)
     
     if has_substruct:
         # Apply tie between the compatible meshes
@@ -92,29 +100,40 @@ def get_rail_z_extent(rail_part):
     
 def get_part_from_file(the_model, model_file):
     """Add the rail part from the rail_model_file, along with materials
-    and sections, to the_model. 
+    and sections, to the_model. A rail part meshed on geometry is 
+    converted to an orphan mesh part, see :py:func:`make_orphan_mesh`.
     
     :param the_model: The full model 
     :type the_model: Model object (Abaqus)
     
     :param model_file: The path to the model database (.cae file)
                        containing a model: names.rail_model that again 
-                       contains the part names.rail_part. 
+                       contains the part names.rail_part. Alternatively,
+                       the path to a mesh bundle (.npz file), see 
+                       :py:func:`rollover.three_d.rail.mesher.export_bundle`
     :type model_file: str
     
-    :returns: None
-    :rtype: None
+    :returns: True if a rail substructure is included
+    :rtype: bool
 
     """
     if model_file.startswith(':/'):
         model_file = data_path + model_file[1:]
+    
+    if model_file.endswith('.npz'):
+        mesh_bundle.import_part(the_model, model_file, names.rail_part)
+        return False
+    
     mdb.openAuxMdb(pathName=model_file)
     mdb.copyAuxMdbModel(fromName=names.rail_model, toName=names.rail_model)
     mdb.closeAuxMdb()
     source_rail_model = mdb.models[names.rail_model]
-    the_model.Part(names.rail_part, source_rail_model.parts[names.rail_part])
+    rail_part = the_model.Part(names.rail_part, source_rail_model.parts[names.rail_part])
     the_model.copyMaterials(sourceModel=source_rail_model)
     the_model.copySections(sourceModel=source_rail_model)
+    if len(rail_part.cells) > 0:
+        with apt.span('make_orphan_mesh'):
+            make_orphan_mesh(rail_part)
     
     has_substruct = names.rail_substructure in source_rail_model.parts.keys()
     if has_substruct:
@@ -122,4 +141,32 @@ def get_part_from_file(the_model, model_file):
     
     del mdb.models[names.rail_model]
 
-    return has_substruct
\ No newline at end of file
+    return has_substruct
+
+
+def make_orphan_mesh(rail_part):
+    """Convert `rail_part` to an orphan mesh part, such that the 
+    geometry is not touched when the shadow regions and constraints are
+    added. Sets and surfaces are kept, see 
+    :py:func:`rollover.three_d.utils.orphan_mesh.convert_to`, and the 
+    section is reassigned to the elements.
+    
+    :param rail_part: The rail part, meshed on geometry
+    :type rail_part: Part object (Abaqus)
+    
+    :returns: None
+    :rtype: None
+    
+    """
+    section_names = set([sa.sectionName for sa in rail_part.sectionAssignments])
+    if len(section_names) != 1:
+        raise ValueError('The rail part must have exactly one section, found '
+                         + str(sorted(section_names)))
+    
+    orphan_mesh.convert_to(rail_part)
+    
+    # The section assignment refers to the suppressed geometry
+    for i in reversed(range(len(rail_part.sectionAssignments))):
+        del rail_part.sectionAssignments[i]
+    region = regionToolset.Region(elements=rail_part.elements)
+    rail_part.SectionAssignment(region=region, sectionName=section_names.pop())
@@ -19,6 +19,7 @@ from rollover.utils import get_utils as get
 from rollover.utils import abaqus_python_tools as apt
 from rollover.three_d.rail import basic as basic_rail
 from rollover.three_d.utils import symmetric_mesh_module as sm
+from rollover.three_d.utils import mesh_bundle
 
 def create_basic_from_param(rail_part, rail_param):
     """ Call :py:func:`~rollover.three_d.rail.mesh.create_basic` with 
@@ -40,7 +41,12 @@ def create_basic_from_param(rail_part, rail_param):
                        mesh is applied to the entire rail. 
                        'refine_region' is a list of two points in the 
                        xy-plane, describing the rectangle used to 
-                       partition the rail. 
+                       partition the rail. It can also be a list of 
+                       nested refinement zones, which are meshed by 
+                       :py:func:`create_zoned`. In that case, the 
+                       optional 'max_size_ratio' is used to add 
+                       transition zones, see 
+                       :py:func:`rollover.three_d.rail.basic.get_refine_zones`
                        
     :type rail_param: dict
     
@@ -51,6 +57,11 @@ def create_basic_from_param(rail_part, rail_param):
     if refine_region is None:
         # Find any point in the rail
         point_in_refine_cell = rail_part.edges[0].pointOn() 
+    elif isinstance(refine_region[0], dict):
+        refine_zones = basic_rail.get_refine_zones(refine_region, 
+                                                   max_size_ratio=rail_param.get('max_size_ratio'))
+        create_zoned(rail_part, refine_zones, rail_param['coarse_mesh'])
+        return
     else:
         # Get a point on the partition face
         f, p = basic_rail.get_partition_face(rail_part, refine_region)
@@ -83,30 +94,111 @@ def create_basic(rail_part, point_in_refine_cell, fine_mesh, coarse_mesh):
 
     """
     
-    mesh_parameters = [{'point': None,
-                        'size': coarse_mesh,
-                        'mc': {'elemShape': TET,
-                               'technique': FREE,
-                               #'algorithm': ADVANCING_FRONT
-                              },
-                        'et': {'element_order': 2,
-                               'reduced_integration': False
-                              }
-                        },
-                        {'point': point_in_refine_cell,
-                         'size': fine_mesh,
-                         'mc': {'elemShape': TET,
-                                'technique': FREE,
-                                #'algorithm': ADVANCING_FRONT
-                               },
-                         'et': {'element_order': 2,
-                                'reduced_integration': False
-                               }
-                         }
-                        ]
+    mesh_parameters = [get_basic_mesh_parameters(None, coarse_mesh),
+                       get_basic_mesh_parameters(point_in_refine_cell, fine_mesh)]
     create_mesh(rail_part, mesh_parameters)
     
 
+def create_zoned(rail_part, refine_zones, coarse_mesh):
+    """Mesh the rail with nested refinement zones
+    
+    The global mesh seed is set to coarse_mesh, and the cells in each 
+    refinement zone get the zone's size. As the zones are given with 
+    the outermost first, the inner zones' edge seeds are retained on 
+    the shared edges. 
+    
+    :param rail_part: The part in which the sets will be created
+    :type rail_part: Part (Abaqus object)
+    
+    :param refine_zones: The refinement zones, see 
+                         :py:func:`rollover.three_d.rail.basic.get_refine_zones`
+    :type refine_zones: list[ dict ]
+    
+    :param coarse_mesh: global mesh size
+    :type coarse_mesh: float
+        
+    :returns: The element count report, see :py:func:`get_zone_report`
+    :rtype: list[ dict ]
+
+    """
+    mesh_parameters = [get_basic_mesh_parameters(None, coarse_mesh)]
+    for zone in refine_zones:
+        f, point_in_zone = basic_rail.get_partition_face(rail_part, zone['region'])
+        mesh_parameters.append(get_basic_mesh_parameters(point_in_zone, zone['size']))
+    
+    create_mesh(rail_part, mesh_parameters)
+    
+    return get_zone_report(rail_part, refine_zones, coarse_mesh)
+    
+    
+def get_basic_mesh_parameters(point, size):
+    """Get the basic mesh parameters for the cell containing point, see
+    :py:func:`create_mesh`. Free meshing with quadratic tetrahedral 
+    elements is used. 
+    
+    :param point: x,y,z coordinates of a point within the cell. None
+                  gives the global settings. 
+    :type point: iterable(float)
+    
+    :param size: mesh size in the cell
+    :type size: float
+    
+    :returns: The mesh parameters
+    :rtype: dict
+    
+    """
+    return {'point': point,
+            'size': size,
+            'mc': {'elemShape': TET,
+                   'technique': FREE,
+                   #'algorithm': ADVANCING_FRONT
+                  },
+            'et': {'element_order': 2,
+                   'reduced_integration': False
+                  }
+            }
+    
+    
+def get_zone_report(rail_part, refine_zones, coarse_mesh):
+    """Count the number of elements in each refinement zone of the 
+    meshed rail_part, and log the results. The remaining elements are 
+    reported as the coarse zone. 
+    
+    :param rail_part: The meshed rail part
+    :type rail_part: Part (Abaqus object)
+    
+    :param refine_zones: The refinement zones, see 
+                         :py:func:`rollover.three_d.rail.basic.get_refine_zones`
+    :type refine_zones: list[ dict ]
+    
+    :param coarse_mesh: global mesh size
+    :type coarse_mesh: float
+        
+    :returns: List of dictionaries with the fields 'region', 'size' 
+              and 'num_elements', the first item is the coarse zone 
+              (with region None)
+    :rtype: list[ dict ]
+
+    """
+    report = [{'region': None, 'size': coarse_mesh, 'num_elements': len(rail_part.elements)}]
+    for zone in refine_zones:
+        f, point_in_zone = basic_rail.get_partition_face(rail_part, zone['region'])
+        zone_cell = rail_part.cells.findAt(tuple(point_in_zone))
+        zone_set = rail_part.Set(name='_TMP_zone_cell', cells=part.CellArray(cells=[zone_cell]))
+        report.append({'region': zone['region'], 'size': zone['size'], 
+                       'num_elements': len(zone_set.elements)})
+        report[0]['num_elements'] -= report[-1]['num_elements']
+        del rail_part.sets['_TMP_zone_cell']
+    
+    apt.log('Rail mesh, ' + str(len(rail_part.elements)) + ' elements in total')
+    for zone in report:
+        region_str = 'outside zones' if zone['region'] is None else str(zone['region'])
+        apt.log('size = %6.3f, %8d elements, %s' % (zone['size'], zone['num_elements'], 
+                                                     region_str))
+    
+    return report
+        
+
 def create_mesh(rail_part, mesh_parameters):
     """Mesh the rail with advanced settings given by mesh_parameters
     
@@ -202,4 +294,32 @@ def get_elem_types(order, reduced):
     
     elem_types = [mesh.ElemType(elemCode=ec, elemLibrary=STANDARD) for ec in elem_codes]
     
-    return elem_types
\ No newline at end of file
+    return elem_types
+
+
+def export_bundle(rail_model, filename, material):
+    """Export the meshed rail part to a mesh bundle that can be used 
+    instead of the .cae file in 
+    :py:func:`rollover.three_d.rail.include.from_file`. See 
+    :py:mod:`rollover.utils.mesh_bundle_io` for the file format. 
+    
+    :param rail_model: The model containing the meshed rail part
+    :type rail_model: Model (Abaqus object)
+    
+    :param filename: The name of the mesh bundle file (.npz)
+    :type filename: str
+    
+    :param material: The material specification dictionary used to 
+                     create the rail, see 
+                     :py:func:`rollover.three_d.rail.basic.create`
+    :type material: dict
+        
+    :returns: None
+    :rtype: None
+
+    """
+    if names.rail_substructure in rail_model.parts.keys():
+        raise ValueError('Mesh bundles are not supported for rails with substructure')
+    
+    mesh_bundle.export_part(rail_model.parts[names.rail_part], filename, material, 
+                            section_name=names.rail_sect, material_name=names.rail_material)
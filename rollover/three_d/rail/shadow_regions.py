@@ -156,10 +156,18 @@ def create_mesh(rail_part, contact_surface, z_shift, shadow_size=None, set_name=
         
     delete_elems = []
     tmpname = '1' if z_shift > 0 else '0'
-    for source_face in contact_surface.faces:
-        source_region = mt.get_source_region(source_face)
-        shadow_elems_tmp, offset_vector = mt.create_offset_mesh(rail_part, source_face, source_region, 
-                                                                offset_distance=0.0)
+    if len(contact_surface.faces) > 0:
+        offset_meshes = []
+        for source_face in contact_surface.faces:
+            source_region = mt.get_source_region(source_face)
+            shadow_elems_tmp, offset_vector = mt.create_offset_mesh(rail_part, source_face, 
+                                                                    source_region, 
+                                                                    offset_distance=0.0)
+            offset_meshes.append(shadow_elems_tmp)
+    else:   # Orphan mesh surface, e.g. from a mesh bundle
+        offset_meshes = [mt.create_offset_mesh_from_surface(rail_part, contact_surface)]
+    
+    for shadow_elems_tmp in offset_meshes:
         for shadow_elem in shadow_elems_tmp:
             if zmax is not None:
                 append_element = all([n.coordinates[2] < zmax for n in shadow_elem.getNodes()])
@@ -197,11 +205,15 @@ def add_membrane_elements(rail_part, contact_surface, set_name):
     """
     elem_shapes = {3: TRI3, 4: QUAD4, 6: TRI6, 8: QUAD8}
     elems = []
-    for face in contact_surface.faces:
-        for ef in face.getElementFaces():
-            ef_nodes = ef.getNodes()
-            elem_shape = elem_shapes[len(ef_nodes)]
-            elems.append(rail_part.Element(nodes=ef.getNodes(), elemShape=elem_shape))
+    if len(contact_surface.faces) > 0:
+        elem_faces = [ef for face in contact_surface.faces for ef in face.getElementFaces()]
+    else:   # Orphan mesh surface, e.g. from a mesh bundle
+        elem_faces = mt.get_surface_element_faces(contact_surface)
+    
+    for ef in elem_faces:
+        ef_nodes = ef.getNodes()
+        elem_shape = elem_shapes[len(ef_nodes)]
+        elems.append(rail_part.Element(nodes=ef_nodes, elemShape=elem_shape))
     
     rail_part.Set(name=set_name, elements=mesh.MeshElementArray(elements=elems))
     
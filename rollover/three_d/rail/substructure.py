@@ -12,6 +12,7 @@ Steps:
 .. codeauthor:: Knut Andreas Meyer
 """
 from __future__ import print_function
+import os
 import numpy as np
 
 from abaqusConstants import *
@@ -21,6 +22,7 @@ import part, mesh, regionToolset
 from rollover.utils import naming_mod as names
 from rollover.utils import json_io
 from rollover.three_d.rail import constraints
+from rollover.three_d.rail import substructure_cache
 from rollover.three_d.utils import mesh_tools
 
 
@@ -41,26 +43,70 @@ def add_interface_pattern_plugin():
     add_interface_mesh(rail_part)
     
 
-def create(rail_model, regenerate=True):
+def create(rail_model, regenerate=True, cache_folder=None, max_cache_size=None,
+           Emod=210.e3, nu=0.3):
+    """ Create the rail substructure and use it in the rail part.
+
+    :param rail_model: The rail model containing the rail part
+    :type rail_model: Model object (Abaqus)
+
+    :param regenerate: Should the substructure be generated? If False,
+                       the substructure files in the current directory
+                       (or in the cache) are used.
+    :type regenerate: bool
+
+    :param cache_folder: Folder for caching the substructure files,
+                         see :py:mod:`substructure_cache`. If None, the
+                         cache is not used.
+    :type cache_folder: str
+
+    :param max_cache_size: Maximum total size of the cache in bytes.
+                           If None, no entries are removed.
+    :type max_cache_size: int
+
+    :param Emod: Elastic modulus of the substructure
+    :type Emod: float
+
+    :param nu: Poisson's ratio of the substructure
+    :type nu: float
+
+    :returns: None
+    :rtype: None
+
+    """
     # Get key dimensions/information for current rail part
     rail_part = rail_model.parts[names.rail_part]
     rail_info = get_info(rail_part)
-    
-    if regenerate:
-        generate(rail_model, rail_info)
-    
-    use_substructure(rail_model, sub_str_job=names.rail_sub_job, sub_str_id=names.rail_sub_id)
-    
-    
-def use_substructure(rail_model, sub_str_job, sub_str_id):
+
+    sub_str_folder = None
+    if cache_folder is not None:
+        cache_key = get_cache_key(rail_part, Emod, nu)
+        sub_str_folder = substructure_cache.lookup(cache_key, cache_folder)
+        if sub_str_folder is not None:
+            print('Using cached rail substructure ' + cache_key)
+
+    if sub_str_folder is None:
+        sub_str_folder = os.getcwd()
+        if regenerate:
+            generate(rail_model, rail_info, Emod=Emod, nu=nu)
+            if cache_folder is not None:
+                substructure_cache.store(cache_key, cache_folder, max_size=max_cache_size)
+
+    use_substructure(rail_model, sub_str_job=names.rail_sub_job, sub_str_id=names.rail_sub_id,
+                     folder=sub_str_folder)
+
+
+def use_substructure(rail_model, sub_str_job, sub_str_id, folder='.'):
     # Import substructure
+    sim_file, odb_file, interface_mesh_file = substructure_cache.get_files(sub_str_job, 
+                                                                           sub_str_id)
     rail_model.PartFromSubstructure(name=names.rail_substructure, 
-                                    substructureFile=sub_str_job + '_Z' + str(sub_str_id) + '.sim',
-                                    odbFile=sub_str_job + '.odb')
+                                    substructureFile=os.path.join(folder, sim_file),
+                                    odbFile=os.path.join(folder, odb_file))
     rail_part = rail_model.parts[names.rail_part]
     remove_substructure_geometry(rail_part)
     
-    add_interface_mesh(rail_part)
+    add_interface_mesh(rail_part, os.path.join(folder, interface_mesh_file))
 
     
 def remove_substructure_geometry(rail_part):
@@ -81,6 +127,42 @@ def remove_substructure_geometry(rail_part):
         del rail_part.sets[aux_set_name[key]]
     
     
+def get_cache_key(rail_part, Emod, nu):
+    """ Get the cache key for the substructure of the rail part, see
+    :py:func:`substructure_cache.get_key`. The retained nodes are taken
+    as the nodes shared between the substructure elements and the
+    remaining elements.
+
+    :param rail_part: The meshed rail part
+    :type rail_part: Part object (Abaqus)
+
+    :param Emod: Elastic modulus of the substructure
+    :type Emod: float
+
+    :param nu: Poisson's ratio of the substructure
+    :type nu: float
+
+    :returns: The cache key
+    :rtype: str
+
+    """
+    coords = np.array([n.coordinates for n in rail_part.nodes])
+    sub_elem_labels = set([e.label for e in rail_part.sets[names.rail_substructure].elements])
+
+    connectivity = []
+    other_nodes = set()
+    for elem in rail_part.elements:
+        if elem.label in sub_elem_labels:
+            connectivity.append(elem.connectivity)
+        else:
+            other_nodes.update(elem.connectivity)
+
+    sub_nodes = set([i for elem in connectivity for i in elem])
+    retained = sorted(sub_nodes.intersection(other_nodes))
+
+    return substructure_cache.get_key(coords, connectivity, coords[retained], Emod, nu)
+
+
 def get_info(rail_part):
     
     # Put bounding box with xMin, xMax, yMin, ... format in rail_info:
@@ -93,7 +175,7 @@ def get_info(rail_part):
     return rail_info
 
     
-def generate(rail_model, rail_info, run_job=True):
+def generate(rail_model, rail_info, run_job=True, Emod=210.e3, nu=0.3):
     substructure_model = mdb.Model(name='RAIL_SUBSTRUCTURE', objectToCopy=rail_model)
     
     rail_part = substructure_model.parts[names.rail_part]
@@ -112,7 +194,7 @@ def generate(rail_model, rail_info, run_job=True):
     
     renumber_nodes(rail_part)
     
-    setup_elastic_section(substructure_model, rail_part, Emod=210.e3, nu=0.3)
+    setup_elastic_section(substructure_model, rail_part, Emod=Emod, nu=nu)
     
     assy = substructure_model.rootAssembly
     rail_inst = assy.Instance(name=names.rail_inst, part=rail_part, dependent=ON)
@@ -326,9 +408,9 @@ def save_interface_mesh(the_part, set_name):
     the_part.deleteNode(nodes=orphan_nodes)
     
 
-def add_interface_mesh(rail_part):
+def add_interface_mesh(rail_part, interface_mesh_file=names.substructure_interface_mesh_file):
     try:
-        interface_mesh = json_io.read(names.substructure_interface_mesh_file)
+        interface_mesh = json_io.read(interface_mesh_file)
     except IOError as e:
         print('Could not find/read the interface, IOError was:')
         print(e)
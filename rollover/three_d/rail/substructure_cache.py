@@ -0,0 +1,329 @@
+"""This module is used to cache the results from the rail substructure
+generation, such that the substructure job only has to be run when the
+substructure mesh, its elastic properties or the retained interface
+nodes change.
+
+Each cache entry is a folder, named by the cache key, containing the
+substructure files (see :py:func:`get_files`) and the entry information
+file `names.rail_sub_cache_entry_file`. The cache does not depend on
+Abaqus, the key is calculated from numpy arrays extracted from the rail
+part by :py:func:`rollover.three_d.rail.substructure.get_cache_key`.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import os, shutil, time, hashlib
+import numpy as np
+
+from rollover.utils import naming_mod as names
+from rollover.utils import json_io
+from rollover.local_paths import data_path
+
+POS_TOL = 1.e-6     # Tolerance used to quantize coordinates
+
+
+def get_key(node_coords, connectivity, retained_coords, Emod, nu):
+    """ Calculate the cache key for a substructure
+
+    :param node_coords: Coordinates of the nodes in the substructure
+                        cells, shape [num_nodes, 3]
+    :type node_coords: np.array
+
+    :param connectivity: For each element, the indices of its nodes in
+                         node_coords
+    :type connectivity: list[ list[ int ] ]
+
+    :param retained_coords: Coordinates of the retained interface
+                            nodes, shape [num_retained, 3]
+    :type retained_coords: np.array
+
+    :param Emod: Elastic modulus of the substructure
+    :type Emod: float
+
+    :param nu: Poisson's ratio of the substructure
+    :type nu: float
+
+    :returns: The cache key (hexadecimal sha1 hash)
+    :rtype: str
+
+    """
+
+    node_keys = quantize(node_coords)
+
+    # Make the key independent of the node and element ordering by
+    # describing each element by the sorted coordinate keys of its
+    # nodes, and sort the elements.
+    elem_keys = sorted([tuple(sorted([tuple(node_keys[i]) for i in elem]))
+                        for elem in connectivity])
+    retained_keys = sorted([tuple(c) for c in quantize(retained_coords)])
+
+    sha = hashlib.sha1()
+    sha.update(np.array([len(e) for e in elem_keys], dtype=np.int64).tobytes())
+    for elem_key in elem_keys:
+        sha.update(np.array(elem_key, dtype=np.int64).tobytes())
+    sha.update(np.array(retained_keys, dtype=np.int64).tobytes())
+    sha.update(('%.10e, %.10e' % (Emod, nu)).encode('ascii'))
+
+    return sha.hexdigest()
+
+
+def quantize(coords):
+    """ Convert coordinates to integers by quantizing them with the
+    tolerance `POS_TOL`
+
+    :param coords: Coordinates, shape [num_points, 3]
+    :type coords: np.array
+
+    :returns: Quantized coordinates, shape [num_points, 3]
+    :rtype: np.array
+
+    """
+    coords = np.array(coords, dtype=np.float64).reshape((-1, 3))
+    return np.round(coords/POS_TOL).astype(np.int64)
+
+
+def get_files(sub_str_job=names.rail_sub_job, sub_str_id=names.rail_sub_id):
+    """ Get the names of the files that are produced by the substructure
+    generation and required to use the substructure
+
+    :param sub_str_job: Name of the substructure generation job
+    :type sub_str_job: str
+
+    :param sub_str_id: Substructure identifier
+    :type sub_str_id: int
+
+    :returns: List of file names
+    :rtype: list[ str ]
+
+    """
+    return [sub_str_job + '_Z' + str(sub_str_id) + '.sim',
+            sub_str_job + '.odb',
+            names.substructure_interface_mesh_file]
+
+
+def get_folder(cache_folder=None):
+    """ Get the absolute path to the cache folder.
+
+    :param cache_folder: Path to cache folder, a path starting with
+                         ':/' is relative the data folder. If None,
+                         `names.rail_sub_cache_folder` is used.
+    :type cache_folder: str
+
+    :returns: The absolute path to the cache folder
+    :rtype: str
+
+    """
+    if cache_folder is None:
+        cache_folder = names.rail_sub_cache_folder
+    if cache_folder.startswith(':/'):
+        cache_folder = data_path + cache_folder[1:]
+
+    return os.path.abspath(cache_folder)
+
+
+def lookup(key, cache_folder=None, files=None):
+    """ Find a cache entry. If found, the entry's usage information is
+    updated. The cache statistics are updated in either case.
+
+    :param key: The cache key, see :py:func:`get_key`
+    :type key: str
+
+    :param cache_folder: The cache folder, see :py:func:`get_folder`
+    :type cache_folder: str
+
+    :param files: The files that must exist in the entry. If None, the
+                  default from :py:func:`get_files` is used.
+    :type files: list[ str ]
+
+    :returns: The path to the cache entry folder, None if not found
+    :rtype: str
+
+    """
+    cache_folder = get_folder(cache_folder)
+    files = get_files() if files is None else files
+    entry_folder = os.path.join(cache_folder, key)
+
+    entry_file = os.path.join(entry_folder, names.rail_sub_cache_entry_file)
+    found = os.path.exists(entry_file) and all([os.path.exists(os.path.join(entry_folder, f))
+                                                for f in files])
+    if found:
+        entry = json_io.read(entry_file)
+        entry['last_used'] = time.time()
+        entry['hits'] = entry['hits'] + 1
+        json_io.save(entry_file, entry)
+
+    update_statistics(cache_folder, hit=found)
+
+    return entry_folder if found else None
+
+
+def store(key, cache_folder=None, files=None, src_folder='.', max_size=None):
+    """ Copy the substructure files to a new cache entry, and remove the
+    least recently used entries if the cache size exceeds max_size.
+
+    :param key: The cache key, see :py:func:`get_key`
+    :type key: str
+
+    :param cache_folder: The cache folder, see :py:func:`get_folder`
+    :type cache_folder: str
+
+    :param files: The files to store. If None, the default from
+                  :py:func:`get_files` is used.
+    :type files: list[ str ]
+
+    :param src_folder: The folder containing the files to store
+    :type src_folder: str
+
+    :param max_size: The maximum total size of the cache in bytes. If
+                     None, no entries are removed.
+    :type max_size: int
+
+    :returns: The path to the cache entry folder
+    :rtype: str
+
+    """
+    cache_folder = get_folder(cache_folder)
+    files = get_files() if files is None else files
+    entry_folder = os.path.join(cache_folder, key)
+
+    if os.path.exists(entry_folder):
+        shutil.rmtree(entry_folder)
+    os.makedirs(entry_folder)
+
+    size = 0
+    for f in files:
+        shutil.copy2(os.path.join(src_folder, f), entry_folder)
+        size += os.path.getsize(os.path.join(entry_folder, f))
+
+    # Entry file written last, such that incomplete entries are not found
+    entry = {'key': key, 'files': files, 'size': size,
+             'created': time.time(), 'last_used': time.time(), 'hits': 0}
+    json_io.save(os.path.join(entry_folder, names.rail_sub_cache_entry_file), entry)
+
+    if max_size is not None:
+        evict(max_size, cache_folder, keep=[key])
+
+    return entry_folder
+
+
+def get_entries(cache_folder=None):
+    """ Get the information about all entries in the cache
+
+    :param cache_folder: The cache folder, see :py:func:`get_folder`
+    :type cache_folder: str
+
+    :returns: List of entry dictionaries, see :py:func:`store`
+    :rtype: list[ dict ]
+
+    """
+    cache_folder = get_folder(cache_folder)
+    if not os.path.exists(cache_folder):
+        return []
+
+    entries = []
+    for key in os.listdir(cache_folder):
+        entry_file = os.path.join(cache_folder, key, names.rail_sub_cache_entry_file)
+        if os.path.exists(entry_file):
+            entries.append(json_io.read(entry_file))
+
+    return entries
+
+
+def evict(max_size, cache_folder=None, keep=None):
+    """ Remove the least recently used entries until the total cache
+    size is below max_size.
+
+    :param max_size: The maximum total size of the cache in bytes
+    :type max_size: int
+
+    :param cache_folder: The cache folder, see :py:func:`get_folder`
+    :type cache_folder: str
+
+    :param keep: Keys of entries that should not be removed
+    :type keep: list[ str ]
+
+    :returns: The keys of the removed entries
+    :rtype: list[ str ]
+
+    """
+    cache_folder = get_folder(cache_folder)
+    keep = [] if keep is None else keep
+    entries = sorted(get_entries(cache_folder), key=lambda e: e['last_used'])
+    total_size = sum([e['size'] for e in entries])
+
+    removed = []
+    for entry in entries:
+        if total_size <= max_size:
+            break
+        if entry['key'] in keep:
+            continue
+        shutil.rmtree(os.path.join(cache_folder, entry['key']))
+        total_size -= entry['size']
+        removed.append(entry['key'])
+
+    if len(removed) > 0:
+        update_statistics(cache_folder, evicted=len(removed))
+
+    return removed
+
+
+def update_statistics(cache_folder, hit=None, evicted=0):
+    """ Update the cache statistics file
+
+    :param cache_folder: The (absolute) cache folder
+    :type cache_folder: str
+
+    :param hit: True if a lookup was a hit, False if a miss, and None
+                if no lookup was made.
+    :type hit: bool
+
+    :param evicted: Number of evicted entries
+    :type evicted: int
+
+    :returns: None
+    :rtype: None
+
+    """
+    if not os.path.exists(cache_folder):
+        os.makedirs(cache_folder)
+
+    stats_file = os.path.join(cache_folder, names.rail_sub_cache_stats_file)
+    stats = json_io.read(stats_file) if os.path.exists(stats_file) else {}
+    for key in ['hits', 'misses', 'evicted']:
+        stats[key] = stats.get(key, 0)
+
+    if hit is not None:
+        stats['hits' if hit else 'misses'] += 1
+    stats['evicted'] += evicted
+
+    json_io.save(stats_file, stats)
+
+
+def get_statistics(cache_folder=None):
+    """ Get the cache statistics
+
+    :param cache_folder: The cache folder, see :py:func:`get_folder`
+    :type cache_folder: str
+
+    :returns: Dictionary with the following fields:
+
+              - 'num_entries': Number of entries in the cache
+              - 'total_size': Total size of the entries in bytes
+              - 'hits': Number of lookups that found an entry
+              - 'misses': Number of lookups that did not find an entry
+              - 'evicted': Number of evicted entries
+
+    :rtype: dict
+
+    """
+    cache_folder = get_folder(cache_folder)
+    entries = get_entries(cache_folder)
+    stats_file = os.path.join(cache_folder, names.rail_sub_cache_stats_file)
+    stats = json_io.read(stats_file) if os.path.exists(stats_file) else {}
+
+    statistics = {'num_entries': len(entries),
+                  'total_size': sum([e['size'] for e in entries])}
+    for key in ['hits', 'misses', 'evicted']:
+        statistics[key] = stats.get(key, 0)
+
+    return statistics
@@ -0,0 +1,305 @@
+"""This module estimates the wheel-rail contact patch with Hertz theory,
+and proposes the size of the regions that must be resolved in the
+model: The rail's `refine_region`, the wheel's `wheel_contact_pos` and
+`wheel_angles`, and the rail's `shadow_extents`.
+
+The principal radii of curvature are taken from the profile sketches
+(.sat files). The rail profile is given in the xy-plane with the rail
+head pointing in positive y-direction, and the wheel profile is given
+in the xy-plane with the wheel center at the origin (i.e. the running
+surface at negative y). The rolling direction is the z-direction.
+
+The Hertz solution uses the approximations by Hamrock and Brewe (1983)
+for the elliptic integrals, see e.g. Johnson, Contact Mechanics (1985).
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import numpy as np
+
+from rollover.local_paths import data_path
+
+POS_TOL = 1.e-3     # Tolerance for matching profile points (mm)
+
+
+def read_sat_geometry(sat_file):
+    """Read the points and circular arcs (ellipse-curves) from an ACIS
+    text file (.sat).
+
+    :param sat_file: Path to the .sat file, a path starting with ':/'
+                     is relative the data folder.
+    :type sat_file: str
+
+    :returns: Dictionary with the following fields:
+
+              - 'points': np.array with point coordinates, shape [N, 3]
+              - 'arcs': list of dictionaries with fields 'center'
+                (np.array, len=3) and 'radius' (float). For ellipses,
+                the major radius is given.
+
+    :rtype: dict
+
+    """
+    if sat_file.startswith(':/'):
+        sat_file = data_path + sat_file[1:]
+
+    with open(sat_file, 'r') as fid:
+        contents = fid.read()
+
+    points = []
+    arcs = []
+    for record in contents.split('#'):
+        tokens = record.split()
+        if len(tokens) < 2:
+            continue
+        if tokens[1] == 'point':
+            points.append([float(t) for t in get_numbers(tokens)[-3:]])
+        elif tokens[1] == 'ellipse-curve':
+            # center (3), normal (3), major axis (3), radius ratio (1)
+            values = [float(t) for t in get_numbers(tokens)[-10:]]
+            arcs.append({'center': np.array(values[0:3]),
+                         'radius': np.linalg.norm(values[6:9])})
+
+    return {'points': np.array(points), 'arcs': arcs}
+
+
+def get_numbers(tokens):
+    """Get the numeric tokens at the end of an ACIS record, ignoring
+    any trailing non-numeric tokens (e.g. 'I I' for unbounded curves).
+
+    :param tokens: The tokens in the record
+    :type tokens: list[ str ]
+
+    :returns: The trailing numeric tokens
+    :rtype: list[ str ]
+
+    """
+    def is_number(token):
+        try:
+            float(token)
+            return True
+        except ValueError:
+            return False
+
+    end = len(tokens)
+    while end > 0 and not is_number(tokens[end-1]):
+        end -= 1
+    start = end
+    while start > 0 and is_number(tokens[start-1]):
+        start -= 1
+
+    return tokens[start:end]
+
+
+def get_profile_crown(sat_file, direction):
+    """Get the extreme point of the profile in the given y-direction,
+    and the transverse radius of curvature at that point.
+
+    :param sat_file: Path to the profile .sat file
+    :type sat_file: str
+
+    :param direction: 1 to find the top of a rail profile, -1 to find
+                      the bottom of a wheel profile
+    :type direction: int
+
+    :returns: Dictionary with fields 'x' and 'y' (the coordinates of the
+              extreme point), and 'radius' (the transverse radius of
+              curvature, np.inf if flat)
+    :rtype: dict
+
+    """
+    geom = read_sat_geometry(sat_file)
+    points = geom['points']
+    y_ext = direction*np.max(direction*points[:, 1])
+    x_min, x_max = np.min(points[:, 0]), np.max(points[:, 0])
+
+    # Find the convex arc reaching furthest in the given direction,
+    # with its extreme point within the profile
+    crown = {'x': np.mean(points[np.abs(points[:, 1] - y_ext) < POS_TOL, 0]),
+             'y': y_ext, 'radius': np.inf}
+    for arc in geom['arcs']:
+        arc_ext = arc['center'][1] + direction*arc['radius']
+        if (direction*(arc_ext - crown['y']) > -POS_TOL
+            and x_min - POS_TOL < arc['center'][0] < x_max + POS_TOL):
+            crown = {'x': arc['center'][0], 'y': arc_ext, 'radius': arc['radius']}
+
+    return crown
+
+
+def get_hertz_contact(radii_1, radii_2, load, Emod, nu):
+    """Calculate the Hertzian contact ellipse between two bodies with
+    the same elastic properties.
+
+    :param radii_1: Principal radii of body 1, [rolling, transverse].
+                    Use np.inf for flat, and negative for concave.
+    :type radii_1: list[ float ]
+
+    :param radii_2: Principal radii of body 2, [rolling, transverse].
+    :type radii_2: list[ float ]
+
+    :param load: The normal contact force
+    :type load: float
+
+    :param Emod: Elastic modulus
+    :type Emod: float
+
+    :param nu: Poisson's ratio
+    :type nu: float
+
+    :returns: Dictionary with the fields
+
+              - 'a_roll': Semi-axis in the rolling direction
+              - 'a_trans': Semi-axis in the transverse direction
+              - 'p_max': Maximum contact pressure
+              - 'approach': Mutual approach of the bodies
+
+    :rtype: dict
+
+    """
+    curv = [1.0/r1 + 1.0/r2 for r1, r2 in zip(radii_1, radii_2)]
+    if min(curv) < 0 or max(curv) <= 0:
+        raise ValueError('Invalid contact geometry, relative curvatures: ' + str(curv))
+    if min(curv) == 0:
+        raise ValueError('Line contact is not supported')
+
+    Estar = Emod/(1 - nu**2)   # E' for equal materials
+    R_eff = 1.0/(curv[0] + curv[1])
+    alpha = max(curv)/min(curv)         # Relative radii ratio >= 1
+    k = alpha**(2.0/np.pi)              # Ellipticity (a_major/a_minor)
+    ell_E = 1.0 + (np.pi/2 - 1)/alpha   # Elliptic integral, 2nd kind
+    ell_F = np.pi/2 + (np.pi/2 - 1)*np.log(alpha)   # 1st kind
+
+    a_major = (6*k**2*ell_E*load*R_eff/(np.pi*Estar))**(1.0/3)
+    a_minor = (6*ell_E*load*R_eff/(np.pi*k*Estar))**(1.0/3)
+    approach = ell_F*(9/(2*ell_E*R_eff)*(load/(np.pi*k*Estar))**2)**(1.0/3)
+
+    # The major axis is in the direction of the smallest curvature
+    a_roll, a_trans = (a_major, a_minor) if curv[0] < curv[1] else (a_minor, a_major)
+
+    return {'a_roll': a_roll, 'a_trans': a_trans,
+            'p_max': 3*load/(2*np.pi*a_major*a_minor), 'approach': approach}
+
+
+def propose_settings(rail_profile, wheel_profile, load, Emod, nu, rolling_length,
+                     rolling_radius=None, max_slip=0.0, margin=0.5, depth_factor=1.5):
+    """Propose the model regions required to resolve the contact patch
+
+    :param rail_profile: Path to the rail profile (.sat)
+    :type rail_profile: str
+
+    :param wheel_profile: Path to the wheel profile (.sat)
+    :type wheel_profile: str
+
+    :param load: The maximum vertical load
+    :type load: float
+
+    :param Emod: Elastic modulus
+    :type Emod: float
+
+    :param nu: Poisson's ratio
+    :type nu: float
+
+    :param rolling_length: The length the wheel rolls in each cycle
+    :type rolling_length: float
+
+    :param rolling_radius: The wheel's rolling radius. If None, it is
+                           taken from the wheel profile.
+    :type rolling_radius: float
+
+    :param max_slip: The maximum slip, increases the wheel rotation
+    :type max_slip: float
+
+    :param margin: Relative margin added to the contact semi-axes
+    :type margin: float
+
+    :param depth_factor: The depth of the refine region below the rail
+                         surface as factor of the smallest semi-axis.
+                         The maximum von Mises stress is found at a
+                         depth of about 0.5-0.8 times the smallest
+                         semi-axis.
+    :type depth_factor: float
+
+    :returns: Dictionary with the fields
+
+              - 'contact': The Hertz solution, see
+                :py:func:`get_hertz_contact`
+              - 'refine_region': see
+                :py:func:`rollover.three_d.rail.basic.create`
+              - 'wheel_contact_pos': see
+                :py:func:`rollover.three_d.wheel.substructure.generate_2d_mesh`
+              - 'wheel_angles': see
+                :py:func:`rollover.three_d.wheel.substructure.create_retained_set`
+              - 'shadow_extents': see
+                :py:func:`rollover.three_d.rail.include.from_file`
+
+    :rtype: dict
+
+    """
+    rail_crown = get_profile_crown(rail_profile, direction=1)
+    wheel_crown = get_profile_crown(wheel_profile, direction=-1)
+    if rolling_radius is None:
+        rolling_radius = -wheel_crown['y']
+
+    contact = get_hertz_contact(radii_1=[np.inf, rail_crown['radius']],
+                                radii_2=[rolling_radius, wheel_crown['radius']],
+                                load=load, Emod=Emod, nu=nu)
+
+    half_trans = (1 + margin)*contact['a_trans']
+    half_roll = (1 + margin)*contact['a_roll']
+    depth = depth_factor*min(contact['a_trans'], contact['a_roll'])
+
+    x_rail = rail_crown['x']
+    y_rail = rail_crown['y']
+    refine_region = [[x_rail - half_trans, y_rail - depth],
+                     [x_rail + half_trans, y_rail + half_trans]]
+
+    x_wheel = wheel_crown['x']
+    wheel_contact_pos = [x_wheel - half_trans, x_wheel + half_trans]
+
+    max_rotation = rolling_length*(1 + abs(max_slip))/rolling_radius
+    wheel_angles = [-half_roll/rolling_radius, max_rotation + half_roll/rolling_radius]
+
+    shadow_extents = [half_roll, half_roll]
+
+    def to_float(values):
+        return [to_float(v) if isinstance(v, list) else float(v) for v in values]
+
+    return {'contact': contact,
+            'refine_region': to_float(refine_region),
+            'wheel_contact_pos': to_float(wheel_contact_pos),
+            'wheel_angles': to_float(wheel_angles),
+            'shadow_extents': to_float(shadow_extents)}
+
+
+def get_size_measures(refine_region, wheel_contact_pos, wheel_angles, shadow_extents,
+                      rolling_radius):
+    """Get measures proportional to the model size for a given set of
+    settings. The mesh sizes are assumed constant.
+
+    :returns: Dictionary with the fields
+
+              - 'rail_fine_elements': Area of refine_region (the number
+                of fine rail elements is proportional)
+              - 'wheel_retained_nodes': Area of the retained wheel
+                surface (the number of retained nodes is proportional)
+              - 'wheel_stiffness_entries': Square of the above (the
+                size of the wheel's stiffness matrix is proportional)
+              - 'shadow_elements': Width times length of the shadow
+                regions (the number of membrane elements is
+                proportional)
+
+    :rtype: dict
+
+    """
+    rail_area = abs((refine_region[1][0] - refine_region[0][0])
+                    *(refine_region[1][1] - refine_region[0][1]))
+    width = abs(wheel_contact_pos[1] - wheel_contact_pos[0])
+    wheel_area = width*abs(wheel_angles[1] - wheel_angles[0])*rolling_radius
+    shadow_area = abs(refine_region[1][0] - refine_region[0][0])*sum(shadow_extents)
+
+    return {'rail_fine_elements': rail_area,
+            'wheel_retained_nodes': wheel_area,
+            'wheel_stiffness_entries': wheel_area**2,
+            'shadow_elements': shadow_area}
@@ -13,7 +13,7 @@ from rollover.utils import naming_mod as names
 from rollover.utils import inp_file_edit as inp_edit
 
 
-def add(the_model, num_cycles):
+def add(the_model, num_cycles, rail_contact=False):
     """ Add .fil output to input file for each rolling step. 
     For the first, add node coordinates and displacements. For the 
     remaining, add only displacements. 
@@ -26,31 +26,38 @@ def add(the_model, num_cycles):
     :param num_cycles: Number of rollover cycles to simulate
     :type num_cycles: int
     
+    :param rail_contact: Should the rail contact nodes also be output?
+                         These are not used by the user subroutine, but
+                         by :py:mod:`rollover.utils.surface_deformation`
+    :type rail_contact: bool
+    
     """
     
     assy = the_model.rootAssembly
     if assy.isOutOfDate:
         assy.regenerate()
     
-    kwb = the_model.keywordBlock
+    kwi = inp_edit.KeywordIndex(the_model.keywordBlock)
     use_substr = names.rail_substructure in the_model.parts.keys()
     rail_rp = names.rail_rp_set if names.rail_rp_set in assy.sets.keys() else None
     
     # Setup output after first rollover
-    add_to_step(kwb, 'COORD, U', names.get_step_rolling(1), rail_rp, use_substr)
+    add_to_step(kwi, 'COORD, U', names.get_step_rolling(1), rail_rp, use_substr, rail_contact)
     
     
     for cycle_nr in range(2,num_cycles+1):
-        add_to_step(kwb, '', names.get_step_return(cycle_nr), rail_rp, use_substr)
-        add_to_step(kwb, 'U', names.get_step_rolling(cycle_nr), rail_rp, use_substr)
+        add_to_step(kwi, '', names.get_step_return(cycle_nr), rail_rp, use_substr, rail_contact)
+        add_to_step(kwi, 'U', names.get_step_rolling(cycle_nr), rail_rp, use_substr, rail_contact)
+    
+    kwi.apply()
         
         
-def add_to_step(kwb, varstr, step_name, rail_rp=None, use_substr=False):
-    """ Add output specified to given step. 
+def add_to_step(kwi, varstr, step_name, rail_rp=None, use_substr=False, rail_contact=False):
+    """ Queue output specified to given step. The output is added 
+    when `kwi.apply()` is called. 
     
-    :param kwb: The keyword block that can be used to edit input file
-                directly.
-    :type kwb: KeywordBlock object (Abaqus)
+    :param kwi: The keyword index used to edit input file directly.
+    :type kwi: KeywordIndex object (:py:mod:`rollover.utils.inp_file_edit`)
     
     :param varstr: The string specifying which variables to add to 
                    output
@@ -66,6 +73,12 @@ def add_to_step(kwb, varstr, step_name, rail_rp=None, use_substr=False):
     :param use_substr: Is a rail substructure used?
     :type use_substr: bool
     
+    :param rail_contact: Should the rail contact nodes be output? They
+                         are added last, such that the user subroutine
+                         can identify the wheel contact nodes as the
+                         first set with more than one node.
+    :type rail_contact: bool
+    
     """
     sep = '_' if use_substr else '.'
     wheel_cn_set = names.wheel_inst + sep + names.wheel_contact_nodes
@@ -74,10 +87,12 @@ def add_to_step(kwb, varstr, step_name, rail_rp=None, use_substr=False):
     sets = [wheel_cn_set, wheel_rp_set]
     if rail_rp is not None:
         sets.append(rail_rp)
+    if rail_contact:
+        sets.append(names.rail_inst + sep + names.rail_contact_nodes)
     
     for set in sets:
         add_str = get_node_file_output_str(set, varstr)
-        inp_edit.add_at_end_of_cat(kwb, add_str, category='Step', name=step_name)
+        kwi.add_at_end_of_cat(add_str, category='Step', name=step_name)
     
     
 def get_node_file_output_str(nset, varstr, frequency=99999999):
@@ -1,16 +1,22 @@
-from __future__ import print_function
-import numpy as np
+"""Setup the steps, boundary conditions and loads for the rollover
+simulation. The files read by the user subroutine and the lookup of the
+loading parameters for each cycle are defined in
+:py:mod:`rollover.core.loading` and imported here. Abaqus is imported 
+when setting up the model, not when importing this module.
 
-from abaqusConstants import *
-import step, load
+"""
+from __future__ import print_function
 
 from rollover.utils import naming_mod as names
+from rollover.utils import load_spectrum
+from rollover.core.loading import write_loading_file, write_cycle_schedule, get_cycle_data
 
 
 def setup(the_model, rolling_length, rolling_radius, vertical_load, 
           cycles=[1], speed=1.0, slip=0.0, rail_ext=0.0, num_cycles=1, 
           initial_depression=0.1, inbetween_step_time=1.e-6, inbetween_max_incr=100,
-          max_incr=1000, min_incr=100):
+          max_incr=1000, min_incr=100, expand_cycles=False, spectrum_file=None,
+          merge_return=False):
     """Setup the loading for the rollover simulation
     
     "cycle data type": If value is scalar, the same value will be 
@@ -70,11 +76,37 @@ def setup(the_model, rolling_length, rolling_radius, vertical_load,
     :param min_incr: Min number of increments during the rolling step
     :type min_incr: int
     
-    
-    :returns: Number of cycles used
+    :param expand_cycles: If True, only the first two cycles are 
+                          created. The remaining cycles are added to the
+                          input file by 
+                          :py:func:`rollover.utils.inp_cycles.expand`
+                          according to the schedule written to 
+                          `names.cycle_schedule_file`.
+    :type expand_cycles: bool
+    
+    :param spectrum_file: Path to a load spectrum file (.csv or .npy) 
+                          giving the load parameters for every cycle, 
+                          see :py:mod:`rollover.utils.load_spectrum`.
+                          If given, `cycles` is ignored and parameters 
+                          not in the spectrum file are taken from the 
+                          first value of the corresponding argument. 
+                          The user subroutine reads the parameters from
+                          the binary table `names.load_table_file`.
+    :type spectrum_file: str
+    
+    :param merge_return: If True, the wheel load is reapplied (changing 
+                         to force control) already in the moving back 
+                         step, such that each cycle contains 3 instead 
+                         of 4 steps (rolling, return and release). This
+                         saves at least one equilibrium iteration of the
+                         full model per cycle. 
+    :type merge_return: bool
+    
+    :returns: Number of cycles created in the model
     :rtype: int
     
     """
+    from abaqusConstants import SET, UNSET, FREED, STEP, USER_DEFINED
     
     # Change floats to lists
     vertical_load = [vertical_load] if isinstance(vertical_load, (int, float)) else vertical_load
@@ -82,9 +114,30 @@ def setup(the_model, rolling_length, rolling_radius, vertical_load,
     slip = [slip] if isinstance(slip, (int, float)) else slip
     rail_ext = [rail_ext] if isinstance(rail_ext, (int, float)) else rail_ext
     
-    # Write loading file
+    # Use the spectrum for each cycle if given
+    if spectrum_file is not None:
+        defaults = {'vertical_load': vertical_load[0], 'speed': speed[0], 
+                    'slip': slip[0], 'rail_ext': rail_ext[0]}
+        spectrum = load_spectrum.read(spectrum_file, defaults)
+        if len(spectrum['speed']) < num_cycles:
+            raise ValueError('The spectrum file "' + spectrum_file + '" contains ' 
+                             + str(len(spectrum['speed'])) + ' cycles, but num_cycles = '
+                             + str(num_cycles))
+        vertical_load, speed, slip, rail_ext = [spectrum[key][:num_cycles].tolist() 
+                                                for key in load_spectrum.SPECTRUM_KEYS]
+        cycles = list(range(1, num_cycles+1))
+        load_spectrum.write_table(rolling_length, rolling_radius, speed, slip, rail_ext)
+    
+    # Write loading file (without cycle specifications if the table is used)
     write_loading_file(initial_depression/inbetween_step_time, rolling_length, 
-                       rolling_radius, cycles, vertical_load, speed, slip, rail_ext)
+                       rolling_radius, [] if spectrum_file is not None else cycles,
+                       vertical_load, speed, slip, rail_ext, merge_return)
+    
+    # Only create the template cycle if the cycles will be expanded
+    if expand_cycles:
+        write_cycle_schedule(num_cycles, min(num_cycles, 2), rolling_length, cycles, 
+                             vertical_load, speed, min_incr, max_incr, merge_return)
+        num_cycles = min(num_cycles, 2)
     
     # Check if rail substructure is used
     use_rail_substructure = names.rail_substructure in the_model.parts.keys()
@@ -185,7 +238,8 @@ def setup(the_model, rolling_length, rolling_radius, vertical_load,
         step_name = setup_step(the_model, names.get_step_return(cycle_nr+1), step_name, 
                                inbetween_step_time, min_num=1, max_num=inbetween_max_incr,
                                amp=STEP)
-        wheel_rp_bc.setValuesInStep(stepName=step_name, u2=0.0)
+        if not merge_return:    # Else: Keep force control (load reapplied in this step)
+            wheel_rp_bc.setValuesInStep(stepName=step_name, u2=0.0)
         
         if cycle_nr == 1:   # Setup bc for first time
             wheel_cn_bc = the_model.DisplacementBC(name='WHEEL_CN_BC', createStepName=step_name,
@@ -204,12 +258,13 @@ def setup(the_model, rolling_length, rolling_radius, vertical_load,
         if sym_bc:
             rail_cn_bcs[1].setValuesInStep(stepName=step_name, v2=0.0, v3=0.0)
         
-        # 3: REAPPLY WHEEL RP LOAD STEP --------------------------------
-        step_name = setup_step(the_model, names.get_step_reapply(cycle_nr+1), step_name, 
-                               inbetween_step_time, min_num=1, max_num=inbetween_max_incr,
-                               amp=STEP)
-        # Release u2 for wheel reference point changing to force control
-        wheel_rp_bc.setValuesInStep(stepName=step_name, u2=FREED)
+        # 3: REAPPLY WHEEL RP LOAD STEP (only if not merged) -----------
+        if not merge_return:
+            step_name = setup_step(the_model, names.get_step_reapply(cycle_nr+1), step_name, 
+                                   inbetween_step_time, min_num=1, 
+                                   max_num=inbetween_max_incr, amp=STEP)
+            # Release u2 for wheel reference point changing to force control
+            wheel_rp_bc.setValuesInStep(stepName=step_name, u2=FREED)
         
         # 4: RELEASE CONTACT NODES STEP --------------------------------
         step_name = setup_step(the_model, names.get_step_release(cycle_nr+1), step_name, 
@@ -227,88 +282,7 @@ def setup(the_model, rolling_length, rolling_radius, vertical_load,
     return num_cycles
 
 
-def write_loading_file(initial_depression_speed, rolling_length, rolling_radius,
-                       cycles, load, speed, slip, rail_ext):
-    """Write the loading file, `names.loading_file`, used by the user 
-    subroutine DISP.
-    
-    :param initial_depression_speed: The speed at which the wheel is 
-                                     lowered during the initial 
-                                     depression step
-    :type initial_depression_speed: float
-    
-    :param rolling_length: The length the wheel shall roll (not 
-                           accounting for rail extensions)
-    :type rolling_length: float
-    
-    :param rolling_radius: The rolling radius used to calculate wheel 
-                           rotation as function of slip.
-    :type rolling_radius: float
-    
-    :param cycles: List of cycle numbers where new load parameters are
-                   specified.
-    :type cycles: list[ int ]
-    
-    :param load: List of vertical wheel loads for each cycle in cycles.
-    :type load: list[ float ]
-    
-    :param speed: List of linear wheel speeds for each cycle in cycles.
-    :type speed: list[ float ]
-    
-    :param slip: List of wheel slips for each cycle in cycles.
-    :type slip: float / list[ float ]
-    
-    :param rail_ext: List of rail extension length for each cycle in 
-                     cycles.
-    :type rail_ext: list[ float ]
-    
-    :returns: None
-    :rtype: None
-    
-    """
-    
-    with open(names.loading_file, 'w') as fid:
-        fid.write('%25.15e\n' % (rolling_length))
-        fid.write('%25.15e\n' % (-initial_depression_speed))
-        fid.write('%0.0f\n' % (len(cycles)))
-        for c, v, s, rext in zip(cycles, speed, slip, rail_ext):
-            rolling_time = rolling_length/v
-            rot_per_length = (1+s)/rolling_radius
-            fid.write(('%0.0f' + 3*', %25.15e' + '\n') % (c, rolling_time, rot_per_length, rext))
-    
-    
-def get_cycle_data(cycle_nr, cycles, cycle_data):
-    """ Given a list of cycle data, give the relevant data for 
-    `cycle_nr`
-    
-    :param cycle_nr: The cycle number for which the cycle data should be 
-                     extracted
-    :type cycle_nr: int
-    
-    :param cycles: List of cycles for which the items in cycle data are
-                   specified for.
-    :type cycles: list[ int ]
-    
-    :param cycle_data: List of cycle data. 
-    
-                       Each cycle data is a list with the same length as
-                       cycles.
-    :type cycle_data: list[ list [float/int] ]
-    
-    :returns: A list containing the items in each list in cycle data on 
-              the position `i` in cycle_nr before `cycle_nr < cycles[i]`
-    :rtype: list[ float/int ]
-    
-    """
-    search_cycles = cycles[:]
-    search_cycles.append(np.iinfo(np.int).max)  # Append max int possible
-    
-    ind = np.argmax(cycle_nr < np.array(search_cycles))-1
-    
-    return [data[ind] for data in cycle_data]
-
-    
-def setup_step(the_model, name, prev_name, step_time, min_num, max_num, amp=step.RAMP):
+def setup_step(the_model, name, prev_name, step_time, min_num, max_num, amp=None):
     """
 
     Setup a new step.
@@ -331,11 +305,14 @@ def setup_step(the_model, name, prev_name, step_time, min_num, max_num, amp=step
     :param max_num: The maximum number of increments to take
     :type max_num: int
     
-    :param amp: Which amplitude type to use, defaults to ramping
+    :param amp: Which amplitude type to use, defaults to ramping 
+                (RAMP)
     :type amp: int (Abaqus constant)
     
     """
+    from abaqusConstants import ON, RAMP
     
+    amp = RAMP if amp is None else amp
     the_model.StaticStep(name=name, previous=prev_name,
                          timePeriod=step_time,
                          initialInc=step_time/min_num,
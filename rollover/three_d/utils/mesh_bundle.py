@@ -0,0 +1,169 @@
+"""This module is used to export a meshed part to a mesh bundle, and to
+import an orphan mesh part from a mesh bundle. See
+:py:mod:`rollover.utils.mesh_bundle_io` for a description of the mesh
+bundle format.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import numpy as np
+
+from abaqusConstants import *
+import regionToolset
+
+from rollover.utils import mesh_bundle_io
+from rollover.utils import setup_material_mod as setup_material
+
+
+def export_part(the_part, filename, material, section_name, material_name):
+    """Export the_part to a mesh bundle file
+
+    :param the_part: The meshed part to export
+    :type the_part: Part object (Abaqus)
+
+    :param filename: The name of the mesh bundle file (.npz)
+    :type filename: str
+
+    :param material: The material specification dictionary, see
+                     material_spec in
+                     :py:func:`~rollover.utils.setup_material_mod.add_material`
+    :type material: dict
+
+    :param section_name: The name of the section assigned to all
+                         elements
+    :type section_name: str
+
+    :param material_name: The name of the material used by the section
+    :type material_name: str
+
+    :returns: None
+    :rtype: None
+
+    """
+    mesh_bundle_io.save(filename, get_bundle(the_part, material, section_name, material_name))
+
+
+def get_bundle(the_part, material, section_name, material_name):
+    """Get the mesh bundle describing the_part, see
+    :py:func:`export_part` for description of input parameters.
+
+    :returns: The mesh bundle
+    :rtype: dict
+
+    """
+    node_labels = np.array([n.label for n in the_part.nodes], dtype=np.int64)
+    node_coords = np.array([n.coordinates for n in the_part.nodes], dtype=np.float64)
+
+    # Element connectivity refers to node indices, convert to labels
+    elem_data = {}
+    for elem in the_part.elements:
+        etype = str(elem.type)
+        if etype not in elem_data:
+            elem_data[etype] = {'labels': [], 'connectivity': []}
+        elem_data[etype]['labels'].append(elem.label)
+        elem_data[etype]['connectivity'].append(elem.connectivity)
+
+    elements = {}
+    for etype in elem_data:
+        conn = np.array(elem_data[etype]['connectivity'], dtype=np.int64)
+        elements[etype] = {'labels': np.array(elem_data[etype]['labels'], dtype=np.int64),
+                           'connectivity': node_labels[conn]}
+
+    sets = {}
+    for key in the_part.sets.keys():
+        the_set = the_part.sets[key]
+        sets[key] = {'nodes': np.array([n.label for n in the_set.nodes], dtype=np.int64),
+                     'elements': np.array([e.label for e in the_set.elements], dtype=np.int64)}
+
+    surfaces = {}
+    for key in the_part.surfaces.keys():
+        surfaces[key] = get_surface_face_elements(the_part.surfaces[key])
+
+    return {'node_labels': node_labels, 'node_coords': node_coords,
+            'elements': elements, 'sets': sets, 'surfaces': surfaces,
+            'material': material,
+            'section': {'name': section_name, 'material': material_name}}
+
+
+def get_surface_face_elements(the_surf):
+    """Get the element labels for each element face in the_surf
+
+    :param the_surf: The surface
+    :type the_surf: Surface object (Abaqus)
+
+    :returns: Dictionary with element face number (1 to 6) as key and
+              element labels (np.array) as values.
+    :rtype: dict
+
+    """
+    face_elements = {}
+    if len(the_surf.faces) > 0:     # Geometry based surface
+        for face in the_surf.faces:
+            for ef in face.getElementFaces():
+                face_nr = int(str(ef.face)[4:])
+                face_elements.setdefault(face_nr, []).append(ef.getElements()[0].label)
+    else:                           # Mesh based surface
+        for elem, side in zip(the_surf.elements, the_surf.sides):
+            face_nr = int(str(side)[4:])
+            face_elements.setdefault(face_nr, []).append(elem.label)
+
+    return {face_nr: np.array(face_elements[face_nr], dtype=np.int64)
+            for face_nr in face_elements}
+
+
+def import_part(the_model, filename, part_name):
+    """Create an orphan mesh part in the_model from a mesh bundle file,
+    including sets, surfaces, material and section.
+
+    :param the_model: The model to which the part is added
+    :type the_model: Model object (Abaqus)
+
+    :param filename: The name of the mesh bundle file (.npz)
+    :type filename: str
+
+    :param part_name: The name of the created part
+    :type part_name: str
+
+    :returns: The created part
+    :rtype: Part object (Abaqus)
+
+    """
+    bundle = mesh_bundle_io.read(filename)
+
+    the_part = the_model.Part(name=part_name, dimensionality=THREE_D, type=DEFORMABLE_BODY)
+    the_part.addNodes(labels=bundle['node_labels'].tolist(),
+                      coordinates=bundle['node_coords'].tolist())
+    for etype in bundle['elements']:
+        elems = bundle['elements'][etype]
+        the_part.addElements(labels=elems['labels'].tolist(),
+                             connectivity=elems['connectivity'].tolist(),
+                             type=etype)
+
+    for set_name in bundle['sets']:
+        kwargs = {}
+        labels = bundle['sets'][set_name]
+        if len(labels['nodes']) > 0:
+            kwargs['nodes'] = the_part.nodes.sequenceFromLabels(labels['nodes'].tolist())
+        if len(labels['elements']) > 0:
+            kwargs['elements'] = the_part.elements.sequenceFromLabels(labels['elements'].tolist())
+        if len(kwargs) > 0:
+            the_part.Set(name=set_name, **kwargs)
+
+    for surf_name in bundle['surfaces']:
+        surf = bundle['surfaces'][surf_name]
+        kwargs = {'face' + str(face_nr) + 'Elements':
+                  the_part.elements.sequenceFromLabels(surf[face_nr].tolist())
+                  for face_nr in surf if len(surf[face_nr]) > 0}
+        if len(kwargs) > 0:
+            the_part.Surface(name=surf_name, **kwargs)
+
+    section = bundle['section']
+    if section['material'] not in the_model.materials.keys():
+        setup_material.add_material(the_model, material_spec=bundle['material'],
+                                    name=section['material'])
+    if section['name'] not in the_model.sections.keys():
+        the_model.HomogeneousSolidSection(name=section['name'], material=section['material'])
+    region = regionToolset.Region(elements=the_part.elements)
+    the_part.SectionAssignment(region=region, sectionName=section['name'])
+
+    return the_part
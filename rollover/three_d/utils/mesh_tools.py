@@ -117,6 +117,54 @@ def create_offset_mesh(the_part, source_face, source_region, offset_distance=20.
     return shadow_elems, offset_vector
     
     
+def create_offset_mesh_from_surface(the_part, the_surf, offset_distance=0.0):
+    """Create an offsetted orphan mesh from an element based surface. 
+    This is used instead of :py:func:`create_offset_mesh` for orphan 
+    mesh parts, where the surface is not associated with any faces. 
+    
+    :param the_part: The part
+    :type the_part: Part (Abaqus object)
+    
+    :param the_surf: The element based surface whose mesh will be offset
+    :type the_surf: Surface (Abaqus object)
+    
+    :param offset_distance: The distance to offset the mesh by. As the 
+                            surface may be curved, only 0.0 ensures
+                            that all new elements are found.
+    :type offset_distance: float, optional
+    
+    :returns: The created offsetted orphan elements
+    :rtype: MeshElementArray (Abaqus object)
+
+    """
+    old_labels = set([e.label for e in the_part.elements])
+    
+    the_part.generateMeshByOffset(region=the_surf, initialOffset=offset_distance,
+                                  meshType=SHELL, distanceBetweenLayers=0.0, numLayers=1)
+    
+    return mesh.MeshElementArray(elements=[e for e in the_part.elements 
+                                           if e.label not in old_labels])
+    
+    
+def get_surface_element_faces(the_surf):
+    """Get the element faces of an element based surface
+    
+    :param the_surf: The element based surface
+    :type the_surf: Surface (Abaqus object)
+    
+    :returns: The element faces in the_surf
+    :rtype: list[ MeshFace (Abaqus object) ]
+
+    """
+    elem_faces = []
+    for elem, side in zip(the_surf.elements, the_surf.sides):
+        for ef in elem.getElemFaces():
+            if str(ef.face) == str(side):
+                elem_faces.append(ef)
+    
+    return elem_faces
+    
+    
 # Utility functions
 def convert_bounding_box(bb_from_get):
     """Convert bounding box specified by by {'low': (x_min, y_min, z_min), 'high': (x_max, y_max, 
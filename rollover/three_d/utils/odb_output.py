@@ -1,8 +1,9 @@
-"""This module is used to control the output to the Abaqus result 
-(`.fil`) file
+"""This module is used to control the output to the Abaqus output 
+database (`.odb`) file
 
-.. note:: Uses direct editing of input and should be called after all
-          cae options have been set.
+.. note:: The output requests are compiled to a schedule file, and 
+          added to the input file after it has been written by calling
+          :py:func:`rollover.utils.output_schedule.inject`. 
 
 .. codeauthor:: Knut Andreas Meyer
 """
@@ -12,12 +13,14 @@ from __future__ import print_function
 from abaqusConstants import *
 
 from rollover.utils import naming_mod as names
-from rollover.utils import inp_file_edit as inp_edit
-from rollover.utils import abaqus_python_tools as apt
+from rollover.utils import output_schedule
 
-def add(the_model, field_output_requests, num_cycles):
+def add(the_model, field_output_requests):
     """Add the user specified field output requests. Default outputs are
-    deleted. 
+    deleted. Instead of creating field output requests in the model, 
+    the requests are compiled and saved to 
+    `names.odb_output_schedule_file`, see 
+    :py:mod:`rollover.utils.output_schedule`. 
     
     :param the_model: The model to which the output requests will be 
                       added
@@ -42,7 +45,10 @@ def add(the_model, field_output_requests, num_cycles):
                                     for only last increment.
                                   - `cycle`: How often to output cycles,
                                     i.e. 1 implies every cycle, 10 
-                                    implies every 10th cycle, etc. 
+                                    implies every 10th cycle, etc. Can 
+                                    also be a list of [start, n] pairs 
+                                    to change the output density, see
+                                    :py:mod:`rollover.utils.output_schedule`
     :type field_output_requests: dict
     
     :returns: None
@@ -51,44 +57,30 @@ def add(the_model, field_output_requests, num_cycles):
     """
     
     assy = the_model.rootAssembly
-    wheel_inst = assy.instances[names.wheel_inst]
     rail_inst = assy.instances[names.rail_inst]
+    use_substr = names.rail_substructure in the_model.parts.keys()
+    sep = '_' if use_substr else '.'
     
     # Delete default outputs
     for fo in the_model.fieldOutputRequests.keys():
         del the_model.fieldOutputRequests[fo]
     for ho in the_model.historyOutputRequests.keys():
         del the_model.historyOutputRequests[ho]
-
-    # Add user specified outputs
+    
+    # Get the set names to use in the input file
+    set_info = {}
     for foname in field_output_requests:
-        fout = field_output_requests[foname]
-        if fout['set'] == 'FULL_MODEL':
-            region = MODEL
-        elif fout['set'] == 'WHEEL_RP':
-            region = wheel_inst.sets[names.wheel_rp_set]
+        set_name = field_output_requests[foname]['set']
+        if set_name == 'FULL_MODEL':
+            set_info[set_name] = {'nset': None, 'elset': None}
+        elif set_name == 'WHEEL_RP':
+            set_info[set_name] = {'nset': names.wheel_inst + sep + names.wheel_rp_set, 
+                                  'elset': False}
         else:
-            region = rail_inst.sets[fout['set']]
-        
-        freq = LAST_INCREMENT if fout['freq']==-1 else fout['freq']
-        
-        fout_obj = the_model.FieldOutputRequest(createStepName=names.step1, name=foname,
-                                                    frequency=freq, variables=fout['var'],
-                                                    region=region)
-        
-        if fout['cycle'] > 1:
-            fout_obj.deactivate(names.get_step_return(2))
-            prev_step_deactive = names.get_step_return(2)
-            prev_step_active = names.step1
-            for cnr in range(1, num_cycles+1, fout['cycle'])[1:]:
-                fout_obj = the_model.FieldOutputRequest(name=foname + names.cycle_str(cnr),
-                                                        objectToCopy=fout_obj)
-                fout_obj.reset(prev_step_deactive)
-                fout_obj.move(fromStepName=prev_step_active, toStepName=names.get_step_rolling(cnr))
-                try:
-                    fout_obj.deactivate(names.get_step_return(cnr+1))
-                except:
-                    pass    # This is ok if it is the last cycle, then no subsequent step exists
-                
-                prev_step_active = names.get_step_rolling(cnr)
-                prev_step_deactive = names.get_step_return(cnr+1)
\ No newline at end of file
+            inp_name = names.rail_inst + sep + set_name
+            has_elements = len(rail_inst.sets[set_name].elements) > 0
+            set_info[set_name] = {'nset': inp_name, 
+                                  'elset': inp_name if has_elements else False}
+    
+    compiled = output_schedule.compile_requests(field_output_requests, set_info)
+    output_schedule.save(compiled)
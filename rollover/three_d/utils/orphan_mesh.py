@@ -1,8 +1,26 @@
+"""This module is used to convert a meshed part to an orphan mesh part,
+while maintaining its sets and surfaces.
 
+Node and element labels may change when the mesh is disassociated from
+the geometry. Sets and surfaces are therefore saved with keys that are
+independent of the labels: Nodes are identified by their coordinates,
+quantized with the tolerance `POS_TOL`, and elements by their quantized
+centroid and number of nodes. All lookups are done in dictionaries,
+such that the conversion scales linearly with the mesh size.
 
+.. codeauthor:: Knut Andreas Meyer
+"""
 
+from __future__ import print_function
+import numpy as np
 
-def convert_to(the_part, exclude_cells):
+from abaqusConstants import *
+import regionToolset
+
+POS_TOL = 1.e-6     # Tolerance used to quantize coordinates
+
+
+def convert_to(the_part, exclude_cells=None):
     """ Convert part of a meshed part to an orphan mesh part 
     maintaining sets and surfaces
     
@@ -10,23 +28,124 @@ def convert_to(the_part, exclude_cells):
     :type the_part: Part object (Abaqus)
     
     :param exclude_cells: Cells in the_part that should not be included
-                          in the orphan mesh
+                          in the orphan mesh. If None, all cells are
+                          included.
     :type exclude_cells: list[ Cell object (Abaqus) ]
     
+    :returns: None
+    :rtype: None
+    
     """
     
     # Save key set and surface information
-    sets_info = {key: get_set_info(the_part, key) for key in the_part.sets.keys()}
-    surfs_info = {key: get_surf_info(the_part.surfaces[key]) for key in the_part.surfaces.keys()}
+    mesh_info = get_mesh_info(the_part)
+    sets_info = {key: get_set_info(the_part.sets[key], mesh_info)
+                 for key in the_part.sets.keys()}
+    surfs_info = {key: get_surf_info(the_part.surfaces[key], mesh_info)
+                  for key in the_part.surfaces.keys()}
     
     # Make orphan mesh part
-    
+    make_orphan(the_part, exclude_cells)
     
     # Redefine sets and surfaces
+    mesh_info = get_mesh_info(the_part)
+    node_labels = {key: label for label, key in mesh_info['node_keys'].items()}
+    elem_labels = {key: label for label, key in mesh_info['elem_keys'].items()}
+    
+    for key in sets_info:
+        del the_part.sets[key]
+        restore_set(the_part, key, sets_info[key], node_labels, elem_labels)
+    
+    for key in surfs_info:
+        del the_part.surfaces[key]
+        restore_surface(the_part, key, surfs_info[key], elem_labels)
+    
+    
+def make_orphan(the_part, exclude_cells=None):
+    """ Delete the mesh in `exclude_cells`, remove the association
+    between the remaining mesh and the geometry, and suppress all
+    geometric features.
+    
+    :param the_part: The part to be converted
+    :type the_part: Part object (Abaqus)
+    
+    :param exclude_cells: Cells in the_part whose mesh should be deleted
+    :type exclude_cells: list[ Cell object (Abaqus) ]
+    
+    :returns: None
+    :rtype: None
+    
+    """
+    
+    if exclude_cells is not None and len(exclude_cells) > 0:
+        the_part.deleteMesh(regions=exclude_cells)
+    
+    ents = regionToolset.Region(cells=the_part.cells)
+    the_part.deleteMeshAssociationWithGeometry(geometricEntities=ents,
+                                               addBoundingEntities=True)
+    
+    for key in the_part.features.keys():
+        the_part.features[key].suppress()
         
     
+def get_mesh_info(the_part):
+    """ Get the label independent keys for all nodes and elements in
+    the_part.
+    
+    :param the_part: The meshed part
+    :type the_part: Part object (Abaqus)
+    
+    :returns: Dictionary with the following fields:
+    
+              - 'node_keys': dict with node label as key and the
+                quantized coordinates (tuple[ int ]) as value
+              - 'elem_keys': dict with element label as key and the
+                quantized centroid and number of nodes (tuple[ int ])
+                as value
+    
+    :rtype: dict
+    
+    """
+    
+    node_labels = [n.label for n in the_part.nodes]
+    coords = np.array([n.coordinates for n in the_part.nodes])
+    keys = get_coord_keys(coords)
+    node_keys = dict(zip(node_labels, keys))
+    
+    # Element connectivity refers to the node indices in the_part.nodes
+    elem_labels = [e.label for e in the_part.elements]
+    connectivity = [e.connectivity for e in the_part.elements]
+    elem_keys = {}
+    for num_nodes in set([len(c) for c in connectivity]):
+        inds = [i for i, c in enumerate(connectivity) if len(c) == num_nodes]
+        conn = np.array([connectivity[i] for i in inds], dtype=int)
+        centroids = np.average(coords[conn], axis=1)
+        for i, key in zip(inds, get_coord_keys(centroids)):
+            elem_keys[elem_labels[i]] = key + (num_nodes, )
+    
+    return {'node_keys': node_keys, 'elem_keys': elem_keys}
+
+
+def get_coord_keys(coords):
+    """ Convert coordinates to hashable keys by quantizing them with the
+    tolerance `POS_TOL`
+    
+    :param coords: Coordinates, shape [num_points, 3]
+    :type coords: np.array
+    
+    :returns: List of keys
+    :rtype: list[ tuple[ int ] ]
     
-def get_set_info(the_set):
+    """
+    if len(coords) == 0:
+        return []
+    
+    int_coords = np.round(np.array(coords)/POS_TOL).astype(np.int64)
+    
+    return [tuple(c) for c in int_coords.tolist()]
+
+
+def get_set_info(the_set, mesh_info):
     """ Get information about the set, such that it can be regenerated 
     even after the mesh is redefined (i.e. after changes to node and 
     element numbering)
@@ -34,45 +153,28 @@ def get_set_info(the_set):
     :param the_set: The set to aquire info about
     :type the_set: Set object (Abaqus)
     
+    :param mesh_info: The mesh information from
+                      :py:func:`get_mesh_info`
+    :type mesh_info: dict
+    
     :returns: Dictionary with the following fields:
     
-    * 'nodes': list of lists (len=3) with node coordinates for all nodes
-      involved in the_set (either inside, or part of element)
-    * 'node_inds': Indicies in list 'nodes' that belong to the set
-      themselves (i.e. excluding those only part of an element)
-    * 'elems': list of lists with indices corresponding to list 'nodes'
+              - 'nodes': list of node keys for nodes in the_set
+              - 'elems': list of element keys for elements in the_set
       
     :rtype: dict
     
     """
     
-    set_info = {'nodes': [], 'node_inds': [], 'elems': []}
-    old_nodes = []
-    old_set_nodes = the_set.nodes
-    for elem in the_set.elements:
-        set_info['elems'].append([])
-        for enod in elem.getNodes():
-            try: 
-                ind = old_nodes.index(enod)
-            except ValueError:
-                # Could not find enod in old_nodes, add it
-                old_nodes.append(enod)
-                ind = len(old_nodes)-1
-                
-                # Also add the node coordinates 
-                set_info['nodes'].append(enod.coordinates)
-                
-                # If node inside set, add its new index to 'node_inds'
-                if enod in old_set_nodes:
-                    set_info['node_inds'].append(ind)
-                    
-                
-            set_info['elems'][-1].append(ind)
+    node_keys = mesh_info['node_keys']
+    elem_keys = mesh_info['elem_keys']
+    set_info = {'nodes': [node_keys[n.label] for n in the_set.nodes],
+                'elems': [elem_keys[e.label] for e in the_set.elements]}
     
     return set_info
     
 
-def get_surf_info(the_surf):
+def get_surf_info(the_surf, mesh_info):
     """ Get information about the_surf, such that it can be regenerated 
     even after the mesh is redefined (i.e. after changes to node and 
     element numbering)
@@ -80,31 +182,108 @@ def get_surf_info(the_surf):
     :param the_surf: The surface to aquire info about
     :type the_surf: Surface object (Abaqus)
     
-    :returns: Dictionary with the following fields:
+    :param mesh_info: The mesh information from
+                      :py:func:`get_mesh_info`
+    :type mesh_info: dict
     
-    * 'nodes': list of lists (len=3) with node coordinates for all nodes
-      involved in the_set (either inside, or part of element)
-    * 'elem_faces': list of list of indicies in list 'nodes' that belong 
-      to the surface for each element face. 
+    :returns: Dictionary with the element face number (1 to 6) as key
+              and a list of element keys as values.
       
     :rtype: dict
     
     """
     
-    surf_info = {'nodes': [], 'elem_faces': []}
-    old_nodes = []
-    for face in the_surf.faces:
-        for ef in face.getElementFaces():
-            surf_info['elem_faces'].append([])
-            for ef_nod in ef.getNodes():
-                try:
-                    ind = old_nodes.index(ef_nod)
-                except ValueError:
-                    old_nodes.append(ef_nod)
-                    ind = len(old_nodes) - 1
-                    
-                    surf_info['nodes'].append(ef_nod.coordinates)
-                    
-                surf_info['elem_faces'][-1].append(ind)
+    elem_keys = mesh_info['elem_keys']
+    surf_info = {}
+    if len(the_surf.faces) > 0:     # Geometry based surface
+        for face in the_surf.faces:
+            for ef in face.getElementFaces():
+                face_nr = int(str(ef.face)[4:])
+                elem_label = ef.getElements()[0].label
+                surf_info.setdefault(face_nr, []).append(elem_keys[elem_label])
+    else:                           # Mesh based surface
+        for elem, side in zip(the_surf.elements, the_surf.sides):
+            face_nr = int(str(side)[4:])
+            surf_info.setdefault(face_nr, []).append(elem_keys[elem.label])
     
     return surf_info
+
+
+def restore_set(the_part, name, set_info, node_labels, elem_labels):
+    """ Create a set in the_part from the information given by
+    :py:func:`get_set_info`. Nodes and elements that no longer exist
+    are skipped.
+    
+    :param the_part: The part in which the set is created
+    :type the_part: Part object (Abaqus)
+    
+    :param name: Name of the set
+    :type name: str
+    
+    :param set_info: The set information
+    :type set_info: dict
+    
+    :param node_labels: Dictionary with node key as key and node label
+                        as value
+    :type node_labels: dict
+    
+    :param elem_labels: Dictionary with element key as key and element
+                        label as value
+    :type elem_labels: dict
+    
+    :returns: The created set
+    :rtype: Set object (Abaqus)
+    
+    """
+    
+    nlabels = [node_labels[k] for k in set_info['nodes'] if k in node_labels]
+    elabels = [elem_labels[k] for k in set_info['elems'] if k in elem_labels]
+    
+    kwargs = {}
+    if len(nlabels) > 0:
+        kwargs['nodes'] = the_part.nodes.sequenceFromLabels(nlabels)
+    if len(elabels) > 0:
+        kwargs['elements'] = the_part.elements.sequenceFromLabels(elabels)
+    
+    if len(kwargs) == 0:
+        print('Set "' + name + '" is empty after conversion and is not restored')
+        return None
+    
+    return the_part.Set(name=name, **kwargs)
+
+
+def restore_surface(the_part, name, surf_info, elem_labels):
+    """ Create a surface in the_part from the information given by
+    :py:func:`get_surf_info`. Element faces that no longer exist are
+    skipped.
+    
+    :param the_part: The part in which the surface is created
+    :type the_part: Part object (Abaqus)
+    
+    :param name: Name of the surface
+    :type name: str
+    
+    :param surf_info: The surface information
+    :type surf_info: dict
+    
+    :param elem_labels: Dictionary with element key as key and element
+                        label as value
+    :type elem_labels: dict
+    
+    :returns: The created surface
+    :rtype: Surface object (Abaqus)
+    
+    """
+    
+    kwargs = {}
+    for face_nr in surf_info:
+        elabels = [elem_labels[k] for k in surf_info[face_nr] if k in elem_labels]
+        if len(elabels) > 0:
+            key = 'face' + str(face_nr) + 'Elements'
+            kwargs[key] = the_part.elements.sequenceFromLabels(elabels)
+    
+    if len(kwargs) == 0:
+        print('Surface "' + name + '" is empty after conversion and is not restored')
+        return None
+    
+    return the_part.Surface(name=name, **kwargs)
@@ -140,30 +140,29 @@ def add_wheel_super_element_to_inp(the_model, stiffness, wheel_folder,
     print('syncing...')
     kwb.synchVersions(storeNodesAndElements=True)
     print('sync done')
+    kwi = inp_edit.KeywordIndex(kwb)
     
     # Add element definition at beginning of input file
-    inp_edit.add_after(kwb, get_inp_str_element_definition(wheel_part))
-    print('elem def added')
+    kwi.add_after(get_inp_str_element_definition(wheel_part))
     # Search 
-    find_strings = ['*Part', 'name='+names.wheel_part]
-    elem_conn = get_inp_str_element_connectivity(wheel_part, wheel_folder)
     try:
-        inp_edit.add_at_end_of_cat(kwb, elem_conn, 
-                                   category='Part', name=names.wheel_part)
-        inp_edit.add_at_end_of_cat(kwb, get_inp_str_element_property(stiffness), 
-                                   category='Part', name=names.wheel_part)
-    except: # If no parts exists, then try to add for case without parts
-            # In that case only instances are put in, and labels should
-            # be taken from those. 
+        elem_conn = get_inp_str_element_connectivity(wheel_part, wheel_folder)
+        kwi.add_at_end_of_cat(elem_conn, category='Part', name=names.wheel_part)
+        kwi.add_at_end_of_cat(get_inp_str_element_property(stiffness), 
+                              category='Part', name=names.wheel_part)
+    except ValueError:  # If no parts exists, then try to add for case without parts
+                        # In that case only instances are put in, and labels should
+                        # be taken from those. 
         print('Could not add wheel as part, trying as instance')
         wheel_inst = assy.instances[names.wheel_inst]
         find_strings = ['*Nset, nset=' + names.wheel_inst + '_' + names.wheel_rp_set]
         elem_conn = get_inp_str_element_connectivity(wheel_inst, wheel_folder, wheel_translation)
-        inp_edit.add_before(kwb, get_inp_str_element_property(stiffness), find_strings)
-        inp_edit.add_before(kwb, elem_conn, find_strings)
+        kwi.add_before(get_inp_str_element_property(stiffness), find_strings)
+        kwi.add_before(elem_conn, find_strings)
         print('Wheel element added as instance')
-        
-    print('elem connectivity added')
+    
+    kwi.apply()
+    print('elem def and connectivity added')
 
     
     
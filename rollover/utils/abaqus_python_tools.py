@@ -1,5 +1,5 @@
 from __future__ import print_function
-import os, sys
+import os, sys, time, json
 from datetime import datetime
 
 from abaqus import mdb
@@ -46,6 +46,165 @@ def log(message, log_file='abaqus_python.log'):
         log(message, log_file)
 
 
+# Stage timing
+TRACE_ENV_VAR = 'ROLLOVER_TRACE'
+_trace = {'enabled': False, 'file': None, 'events': [], 'start': 0.0}
+
+
+def start_trace(trace_file=None):
+    """ Start recording spans to a trace file. If trace_file is not 
+    given, the environment variable TRACE_ENV_VAR is used instead. If
+    neither is given, tracing remains off and span only costs a flag
+    check.
+    
+    :param trace_file: Path to the json trace file to write on 
+                       stop_trace
+    :type trace_file: str
+    
+    :returns: True if tracing was started
+    :rtype: bool
+    
+    """
+    if trace_file is None:
+        trace_file = os.environ.get(TRACE_ENV_VAR, None)
+    if not trace_file:
+        return False
+    
+    _trace['enabled'] = True
+    _trace['file'] = trace_file
+    _trace['events'] = []
+    _trace['start'] = time.time()
+    return True
+    
+
+def stop_trace():
+    """ Stop recording spans and write the trace file. The file follows
+    the Chrome trace event format (complete events, "ph": "X"), and can
+    be viewed as a flame chart with e.g. https://ui.perfetto.dev or 
+    https://www.speedscope.app
+    
+    :returns: Path to the written trace file, None if not tracing
+    :rtype: str
+    
+    """
+    if not _trace['enabled']:
+        return None
+    
+    _trace['enabled'] = False
+    trace = {'traceEvents': _trace['events'], 'displayTimeUnit': 'ms'}
+    with open(_trace['file'], 'w') as fid:
+        json.dump(trace, fid, indent=1)
+    
+    return _trace['file']
+    
+
+def get_cpu_time():
+    """ Get the user plus system cpu time of the current process
+    
+    :returns: cpu time in seconds
+    :rtype: float
+    
+    """
+    times = os.times()
+    return times[0] + times[1]
+    
+    
+def get_rss():
+    """ Get the current resident set size (memory usage) of the current 
+    process. Uses psutil if available, otherwise /proc/self/statm 
+    (linux only).
+    
+    :returns: Resident set size in MB, None if not available
+    :rtype: float
+    
+    """
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss/1024.0**2
+    except ImportError:
+        pass
+    
+    try:
+        with open('/proc/self/statm', 'r') as fid:
+            num_pages = int(fid.read().split()[1])
+        return num_pages*os.sysconf('SC_PAGE_SIZE')/1024.0**2
+    except (IOError, OSError, ValueError, IndexError, AttributeError):
+        return None
+        
+
+class span():
+    """ Time a stage of the preprocessing, either as context manager or
+    as decorator. Nested spans become sub-stages in the trace. Nothing
+    is recorded unless start_trace has been called.
+    
+    .. code-block:: python
+    
+        apt.start_trace('rollover_trace.json')
+        with apt.span('rail_include.from_file'):
+            rail_include.from_file(the_model, **rail_param)
+        apt.stop_trace()
+        
+        @apt.span('create_substructure')
+        def create_substructure(...):
+            ...
+    
+    """
+    def __init__(self, name, **args):
+        """ Create a span
+        
+        :param name: Name of the stage
+        :type name: str
+        
+        :param args: Additional info to save with the span, must be 
+                     json serializable.
+        :type args: dict
+        
+        :returns: Instance of span class
+        
+        """
+        self.name = name
+        self.args = args
+        self.active = False
+        
+    def __enter__(self):
+        self.active = _trace['enabled']
+        if self.active:
+            self.rss = get_rss()
+            self.cpu = get_cpu_time()
+            self.wall = time.time()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not (self.active and _trace['enabled']):
+            return False
+        
+        wall = time.time()
+        args = dict(self.args)
+        args['cpu_time'] = get_cpu_time() - self.cpu
+        args['rss_start_mb'] = self.rss
+        args['rss_end_mb'] = get_rss()
+        if exc_type is not None:
+            args['error'] = exc_type.__name__
+        
+        _trace['events'].append({'name': self.name, 'ph': 'X', 
+                                 'ts': 1.e6*(self.wall - _trace['start']),
+                                 'dur': 1.e6*(wall - self.wall),
+                                 'pid': os.getpid(), 'tid': 0,
+                                 'args': args})
+        return False
+    
+    def __call__(self, function):
+        def wrapper(*args, **kwargs):
+            if not _trace['enabled']:
+                return function(*args, **kwargs)
+            with span(self.name, **self.args):
+                return function(*args, **kwargs)
+        
+        wrapper.__name__ = function.__name__
+        wrapper.__doc__ = function.__doc__
+        return wrapper
+        
+
 # General use functions
 def create_model(model_name):
     """ Create a model, delete model if already existing in active mdb.
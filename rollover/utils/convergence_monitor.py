@@ -0,0 +1,119 @@
+"""This module writes the settings for the convergence monitor in the
+user subroutine, and reads its log. At the end of each rolling step,
+the user subroutine URDFIL evaluates the change since the previous
+cycle of the selected metrics. The available metrics are
+
+- `rail_surface`: The vertical displacement (u2) of the wheel reference
+  point, i.e. the change in rail surface height below the wheel
+  (ratcheting of the rail surface), including the wheel deformation
+- `contact_height`: The lowest vertical coordinate (y) of the deformed
+  wheel contact nodes, i.e. the rail surface height in the contact
+
+The other wheel reference point dofs (e.g. the lateral displacement and
+the rotation) and all rail reference point dofs are prescribed by the
+user subroutine DISP during rolling, and are therefore not available as
+metrics.
+
+The metrics to check are selected by the keys of `criteria`. When all
+selected metrics are below their tolerance for `num_consecutive`
+consecutive cycles, the analysis is stopped. The selected metrics for
+each cycle are written to the log file
+`rollover.utils.naming_mod.convergence_log_file`, such that the cutoff
+can be audited.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import os, csv
+
+from rollover.utils import naming_mod as names
+
+METRICS = ['rail_surface', 'contact_height']
+
+
+def write_settings(criteria, num_consecutive, settings_file=names.convergence_file):
+    """Write the settings file read by the user subroutine
+
+    :param criteria: The tolerance for each metric to check, see
+                     `METRICS`. Metrics not given are not checked,
+                     and not written to the log.
+    :type criteria: dict
+
+    :param num_consecutive: The number of consecutive cycles for which
+                            all criteria must be fulfilled before the
+                            analysis is stopped.
+    :type num_consecutive: int
+
+    :param settings_file: The name of the settings file
+    :type settings_file: str
+
+    :returns: None
+    :rtype: None
+
+    """
+    unknown_metrics = [key for key in criteria if key not in METRICS]
+    if len(unknown_metrics) > 0:
+        raise ValueError('Unknown convergence metrics ' + str(unknown_metrics)
+                         + ', supported metrics are ' + str(METRICS))
+    if len(criteria) == 0:
+        raise ValueError('At least one convergence criterion must be given')
+    if num_consecutive < 1:
+        raise ValueError('num_consecutive must be positive')
+
+    metrics = [key for key in METRICS if key in criteria]
+    if any([criteria[key] < 0 for key in metrics]):
+        raise ValueError('The tolerances must be non-negative')
+
+    with open(settings_file, 'w') as fid:
+        fid.write('%0.0f\n' % num_consecutive)
+        fid.write('%0.0f\n' % len(metrics))
+        for key in metrics:
+            fid.write('%s, %25.15e\n' % (key, criteria[key]))
+
+
+def read_log(log_file=names.convergence_log_file):
+    """Read the log written by the user subroutine
+
+    :param log_file: The name of the log file
+    :type log_file: str
+
+    :returns: Dictionary with a list for each column: 'cycle', the
+              checked `METRICS` (negative if not available),
+              'num_consecutive' and 'converged'
+    :rtype: dict
+
+    """
+    with open(log_file, 'r') as fid:
+        reader = csv.reader(fid, skipinitialspace=True)
+        header = [key.strip() for key in next(reader)]
+        log = {key: [] for key in header}
+        for row in reader:
+            if len(row) < len(header):
+                continue
+            for key, value in zip(header, row):
+                log[key].append(float(value) if key in METRICS else int(value))
+
+    return log
+
+
+def get_converged_cycle(log_file=names.convergence_log_file):
+    """Get the cycle after which the analysis was stopped
+
+    :param log_file: The name of the log file
+    :type log_file: str
+
+    :returns: The cycle number, None if not converged (or no log)
+    :rtype: int
+
+    """
+    if not os.path.exists(log_file):
+        return None
+
+    log = read_log(log_file)
+    for cycle_nr, converged in zip(log['cycle'], log['converged']):
+        if converged:
+            return cycle_nr
+
+    return None
@@ -0,0 +1,334 @@
+"""This module builds and uses an index of the increments in an Abaqus
+results file (.fil), such that the data for a given increment or cycle
+can be read without decoding the earlier records, see
+:py:mod:`rollover.utils.fil_reader`.
+
+The index is saved in a binary file next to the results file, with the
+suffix `INDEX_SUFFIX`. It consists of a header (`HEADER_DTYPE`),
+followed by one entry (`ENTRY_DTYPE`) for each increment with the byte
+offsets in the results file of the increment start (2000) and increment
+end (2001) records, as well as the step and increment numbers. The
+header contains the position up to which the results file has been
+scanned. When the results file grows, e.g. during a running job,
+:py:func:`update` only scans the new part and appends the new entries.
+As URDFIL allows Abaqus to overwrite increments in place (see
+:py:mod:`rollover.utils.fil_reader`), :py:func:`update` first checks
+that the first and last indexed increment start records are unchanged,
+and rebuilds the index otherwise. :py:func:`read_increment` raises an
+error if the increment read does not match its index entry.
+
+Lookups of an increment by position, or by step and increment number
+via :py:func:`get_lookup`, are constant time. Many increments or cycles
+can be read in parallel processes with :py:func:`extract`.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import os
+import multiprocessing
+import numpy as np
+
+from rollover.utils import naming_mod as names
+from rollover.utils import fil_reader
+from rollover.utils import solver_stats
+
+INDEX_SUFFIX = '.filidx'
+INDEX_MAGIC = b'FILIDX01'
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('scanned_word', '<i8'), ('fil_size', '<i8')])
+ENTRY_DTYPE = np.dtype([('start', '<i8'), ('end', '<i8'), ('step', '<i8'),
+                        ('increment', '<i8'), ('total_time', '<f8')])
+
+
+def get_index_file(fil_file):
+    """Get the name of the index file for a results file
+
+    :param fil_file: The name of the results file
+    :type fil_file: str
+
+    :returns: The name of the index file
+    :rtype: str
+
+    """
+    return os.path.splitext(fil_file)[0] + INDEX_SUFFIX
+
+
+def scan(fil_file, start_word=0):
+    """Scan the results file for complete increments
+
+    :param fil_file: The name of the results file
+    :type fil_file: str
+
+    :param start_word: The position (in words) to start scanning from,
+                       must be at the start of a record
+    :type start_word: int
+
+    :returns: The index entries (see `ENTRY_DTYPE`) and the position
+              (in words) after the last complete increment
+    :rtype: tuple( np.array, int )
+
+    """
+    entries = []
+    scanned_word = start_word
+    start = None
+    for word_offset, key, records in fil_reader.iter_record_runs(fil_file, start_word):
+        length = records.shape[1]
+        if key == fil_reader.FIL_INCREMENT_START:
+            start = word_offset + (len(records) - 1)*length
+            info = fil_reader.get_increment_info(records[-1])
+        elif key == fil_reader.FIL_INCREMENT_END and start is not None:
+            entries.append((fil_reader.get_byte_offset(start),
+                            fil_reader.get_byte_offset(word_offset),
+                            info['step'], info['increment'], info['total_time']))
+            scanned_word = word_offset + len(records)*length
+            start = None
+
+    return np.array(entries, dtype=ENTRY_DTYPE), scanned_word
+
+
+def read(index_file):
+    """Read the index file
+
+    :param index_file: The name of the index file
+    :type index_file: str
+
+    :returns: The header (see `HEADER_DTYPE`) and the entries (see
+              `ENTRY_DTYPE`)
+    :rtype: tuple( np.void, np.array )
+
+    """
+    with open(index_file, 'rb') as fid:
+        header = np.fromfile(fid, dtype=HEADER_DTYPE, count=1)
+        entries = np.fromfile(fid, dtype=ENTRY_DTYPE)
+
+    if len(header) == 0 or header[0]['magic'] != INDEX_MAGIC:
+        raise ValueError('"' + index_file + '" is not a results file index')
+
+    return header[0], entries
+
+
+def check_entry(fil_file, entry):
+    """Check that the increment start record at the position given by
+    the index entry matches the entry, i.e. that the increment has not
+    been overwritten since it was indexed.
+
+    :param fil_file: The name of the results file
+    :type fil_file: str
+
+    :param entry: The index entry, see `ENTRY_DTYPE`
+    :type entry: np.void
+
+    :returns: True if the record matches the entry
+    :rtype: bool
+
+    """
+    start_word = fil_reader.get_word_offset(int(entry['start']))
+    end_word = start_word + fil_reader.INCREMENT_START_LENGTH
+    for word_offset, key, records in fil_reader.iter_record_runs(fil_file, start_word, end_word):
+        if word_offset != start_word or key != fil_reader.FIL_INCREMENT_START:
+            return False
+        return matches_entry(fil_reader.get_increment_info(records[0]), entry)
+
+    return False
+
+
+def matches_entry(info, entry):
+    """Check if the increment info matches the index entry
+
+    :param info: The increment info, see
+                 :py:func:`rollover.utils.fil_reader.get_increment_info`
+    :type info: dict
+
+    :param entry: The index entry, see `ENTRY_DTYPE`
+    :type entry: np.void
+
+    :returns: True if the step, increment and total time are equal
+    :rtype: bool
+
+    """
+    return (info['step'] == int(entry['step']) and info['increment'] == int(entry['increment'])
+            and info['total_time'] == float(entry['total_time']))
+
+
+def update(fil_file, index_file=None):
+    """Create or update the index of a results file. If the index exists,
+    the results file has not been replaced by a smaller file, and the
+    first and last indexed increments have not been overwritten (see
+    :py:func:`check_entry`), only the part written after the last
+    update is scanned. Otherwise, the index is rebuilt.
+
+    :param fil_file: The name of the results file
+    :type fil_file: str
+
+    :param index_file: The name of the index file, defaults to
+                       :py:func:`get_index_file`
+    :type index_file: str
+
+    :returns: All entries in the index, see `ENTRY_DTYPE`
+    :rtype: np.array
+
+    """
+    index_file = get_index_file(fil_file) if index_file is None else index_file
+    fil_size = os.path.getsize(fil_file)
+
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header['magic'] = INDEX_MAGIC
+    old_entries = np.zeros(0, dtype=ENTRY_DTYPE)
+    if os.path.exists(index_file):
+        try:
+            old_header, old_entries = read(index_file)
+            last_entries = old_entries[[0, -1]] if len(old_entries) > 0 else old_entries
+            if old_header['fil_size'] <= fil_size and all([check_entry(fil_file, entry)
+                                                           for entry in last_entries]):
+                header[0] = old_header
+            else:   # Results file replaced or overwritten, rebuild the index
+                old_entries = np.zeros(0, dtype=ENTRY_DTYPE)
+        except ValueError:
+            old_entries = np.zeros(0, dtype=ENTRY_DTYPE)
+
+    new_entries, scanned_word = scan(fil_file, int(header[0]['scanned_word']))
+    header['scanned_word'] = scanned_word
+    header['fil_size'] = fil_size
+
+    mode = 'r+b' if len(old_entries) > 0 else 'wb'
+    with open(index_file, mode) as fid:
+        header.tofile(fid)
+        fid.seek(HEADER_DTYPE.itemsize + len(old_entries)*ENTRY_DTYPE.itemsize)
+        new_entries.tofile(fid)
+
+    return np.concatenate((old_entries, new_entries))
+
+
+def get_lookup(entries):
+    """Get a dictionary to look up entries by step and increment number
+
+    :param entries: The index entries, see `ENTRY_DTYPE`
+    :type entries: np.array
+
+    :returns: Dictionary with the position in `entries` for each
+              (step, increment) pair, and for each step (last increment
+              in the step)
+    :rtype: dict
+
+    """
+    lookup = {}
+    for nr, (step, increment) in enumerate(zip(entries['step'].tolist(),
+                                               entries['increment'].tolist())):
+        lookup[(step, increment)] = nr
+        lookup[step] = nr
+
+    return lookup
+
+
+def get_cycle_entries(entries, inp_file, cycles):
+    """Get the entries for the last increment of the rolling step in
+    each cycle.
+
+    :param entries: The index entries, see `ENTRY_DTYPE`
+    :type entries: np.array
+
+    :param inp_file: The input file of the job, used to get the step
+                     numbers of the rolling steps
+    :type inp_file: str
+
+    :param cycles: The cycle numbers
+    :type cycles: list[ int ]
+
+    :returns: The entries for each cycle
+    :rtype: np.array
+
+    """
+    step_numbers = solver_stats.get_step_numbers(inp_file)
+    lookup = get_lookup(entries)
+    rows = []
+    for cycle_nr in cycles:
+        step_nr = step_numbers.get(names.get_step_rolling(cycle_nr), None)
+        if step_nr not in lookup:
+            raise ValueError('No results for cycle ' + str(cycle_nr) + ' in the index')
+        rows.append(lookup[step_nr])
+
+    return entries[rows]
+
+
+def read_increment(fil_file, entry, keys=(fil_reader.FIL_NODE_DISP, fil_reader.FIL_NODE_COORD)):
+    """Read the data for one increment, only decoding the blocks that
+    contain this increment.
+
+    :param fil_file: The name of the results file
+    :type fil_file: str
+
+    :param entry: The index entry for the increment, see `ENTRY_DTYPE`
+    :type entry: np.void
+
+    :param keys: The node record keys to read, see
+                 :py:func:`rollover.utils.fil_reader.iter_increments`
+    :type keys: list[ int ]
+
+    :returns: The increment data, see
+              :py:func:`rollover.utils.fil_reader.iter_increments`
+    :rtype: dict
+
+    """
+    start_word = fil_reader.get_word_offset(int(entry['start']))
+    end_word = fil_reader.get_word_offset(int(entry['end'])) + 2
+    for increment in fil_reader.iter_increments(fil_file, keys, start_word, end_word):
+        if not matches_entry(increment, entry):
+            raise ValueError('Found step ' + str(increment['step']) + ', increment '
+                             + str(increment['increment']) + ' instead of step '
+                             + str(entry['step']) + ', increment ' + str(entry['increment'])
+                             + ' at byte ' + str(entry['start']) + ' in "' + fil_file
+                             + '", the index is outdated (update it)')
+        return increment
+
+    raise ValueError('Could not read the increment at byte ' + str(entry['start'])
+                     + ' in "' + fil_file + '", is the index outdated?')
+
+
+def extract(fil_file, entries, keys=(fil_reader.FIL_NODE_DISP, fil_reader.FIL_NODE_COORD),
+            num_processes=1):
+    """Read the data for multiple increments, optionally in parallel
+
+    :param fil_file: The name of the results file
+    :type fil_file: str
+
+    :param entries: The index entries for the increments to read, e.g.
+                    from :py:func:`get_cycle_entries`
+    :type entries: np.array
+
+    :param keys: The node record keys to read, see
+                 :py:func:`rollover.utils.fil_reader.iter_increments`
+    :type keys: list[ int ]
+
+    :param num_processes: The number of processes to use
+    :type num_processes: int
+
+    :returns: The data for each increment, see
+              :py:func:`rollover.utils.fil_reader.iter_increments`
+    :rtype: list[ dict ]
+
+    """
+    args = [(fil_file, entry, keys) for entry in entries]
+    if num_processes <= 1 or len(args) <= 1:
+        return [read_increment_args(a) for a in args]
+
+    pool = multiprocessing.Pool(min(num_processes, len(args)))
+    try:
+        return pool.map(read_increment_args, args)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def read_increment_args(args):
+    """Call :py:func:`read_increment` with a tuple of arguments, as
+    required by `multiprocessing.Pool.map`
+
+    :param args: The arguments `fil_file`, `entry` and `keys`
+    :type args: tuple
+
+    :returns: The increment data
+    :rtype: dict
+
+    """
+    return read_increment(*args)
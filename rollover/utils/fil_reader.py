@@ -0,0 +1,347 @@
+"""This module reads the Abaqus results file (.fil) in binary format,
+e.g. as requested by :py:func:`rollover.three_d.utils.fil_output.add`,
+without requiring Abaqus.
+
+The binary results file is written in blocks of 512 words, where each
+word is 8 bytes. Each block is written as a Fortran record, i.e. with a
+4 byte marker before and after, see `BLOCK_DTYPE`. The data in the
+blocks is a sequence of records, each starting with the record length
+(number of words, including the first two words) and the record type
+key, followed by the attributes. Integers are stored as 8 byte integers
+and floating point values as 8 byte floats.
+
+The file is memory-mapped, and the blocks are decoded in chunks of
+`CHUNK_BLOCKS` blocks, such that files larger than the available memory
+can be scanned. Consecutive records with the same length and key (e.g.
+the displacements of all nodes in a node set) are returned as one
+2d-array view, such that the node data is decoded without looping over
+the nodes.
+
+.. note:: The user subroutine URDFIL allows Abaqus to overwrite the
+          results of each increment that it has read. The .fil file of a
+          rollover simulation therefore only contains the last rolling
+          step, unless this flag (`lovrwrt`) is changed.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import os
+import numpy as np
+
+# Record type keys
+FIL_NODE_DISP = 101         # Node displacements, attributes = [Node num, u1, u2, ...]
+FIL_NODE_COORD = 107        # Node (deformed) coordinates, attributes = [Node num, x1, x2, ...]
+FIL_INCREMENT_START = 2000  # Written at start of increment with output requests
+FIL_INCREMENT_END = 2001    # Written at end of increment with output requests
+NODE_VARIABLES = {FIL_NODE_DISP: 'U', FIL_NODE_COORD: 'COORD'}
+
+# File layout
+WORD_DTYPE = np.dtype('<i8')
+FLOAT_DTYPE = np.dtype('<f8')
+WORDS_PER_BLOCK = 512
+BLOCK_DTYPE = np.dtype([('head', '<i4'), ('words', WORD_DTYPE, (WORDS_PER_BLOCK,)),
+                        ('tail', '<i4')])
+CHUNK_BLOCKS = 2048         # Number of blocks (8 MB) to decode at once
+
+# Attributes of the increment start record (excluding the 80 character subheading)
+INCREMENT_START_DTYPE = np.dtype([('length', '<i8'), ('key', '<i8'),
+                                  ('total_time', '<f8'), ('step_time', '<f8'),
+                                  ('creep_rate', '<f8'), ('amplitude', '<f8'),
+                                  ('procedure', '<i8'), ('step', '<i8'), ('increment', '<i8'),
+                                  ('perturbation', '<i8'), ('lpf', '<f8'),
+                                  ('frequency', '<f8'), ('time_increment', '<f8')])
+INCREMENT_START_LENGTH = 23
+
+
+def get_blocks(fil_file):
+    """Memory-map the complete blocks in the results file. An incomplete
+    last block, e.g. while the file is written, is not included.
+
+    :param fil_file: The name of the results file
+    :type fil_file: str
+
+    :returns: The blocks, see `BLOCK_DTYPE`
+    :rtype: np.memmap / np.array
+
+    """
+    num_blocks = os.path.getsize(fil_file)//BLOCK_DTYPE.itemsize
+    if num_blocks == 0:
+        return np.zeros(0, dtype=BLOCK_DTYPE)
+
+    return np.memmap(fil_file, dtype=BLOCK_DTYPE, mode='r', shape=(num_blocks,))
+
+
+def get_byte_offset(word_offset):
+    """Get the position in the file of a word, accounting for the block
+    markers
+
+    :param word_offset: The position of the word in the data (excluding
+                        block markers)
+    :type word_offset: int
+
+    :returns: The position in bytes in the file
+    :rtype: int
+
+    """
+    block_nr, word_nr = divmod(word_offset, WORDS_PER_BLOCK)
+    return (block_nr*BLOCK_DTYPE.itemsize + BLOCK_DTYPE.fields['words'][1]
+            + word_nr*WORD_DTYPE.itemsize)
+
+
+def get_word_offset(byte_offset):
+    """Get the position of a word in the data, i.e. the inverse of
+    :py:func:`get_byte_offset`
+
+    :param byte_offset: The position in bytes in the file
+    :type byte_offset: int
+
+    :returns: The position of the word in the data (excluding block
+              markers)
+    :rtype: int
+
+    """
+    block_nr, block_byte = divmod(byte_offset, BLOCK_DTYPE.itemsize)
+    return (block_nr*WORDS_PER_BLOCK
+            + (block_byte - BLOCK_DTYPE.fields['words'][1])//WORD_DTYPE.itemsize)
+
+
+def iter_record_runs(fil_file, start_word=0, end_word=None):
+    """Iterate over the records in the results file. Consecutive records
+    with the same length and key are given together as one run. Zero
+    padding is skipped until the next block.
+
+    :param fil_file: The name of the results file
+    :type fil_file: str
+
+    :param start_word: The position (in words, excluding block markers)
+                       of the first record to read
+    :type start_word: int
+
+    :param end_word: The position (in words) where reading stops, None
+                     to read until the end of the file
+    :type end_word: int
+
+    :returns: Generator giving the word offset of the first record, the
+              record key, and the records as 2d-array of words (one row
+              per record)
+    :rtype: generator
+
+    """
+    blocks = get_blocks(fil_file)
+    if end_word is not None:
+        blocks = blocks[:-(-end_word//WORDS_PER_BLOCK)]
+    first_block = start_word//WORDS_PER_BLOCK
+    offset = first_block*WORDS_PER_BLOCK   # Word offset of words[0]
+    pos = start_word - offset
+    carry = np.zeros(0, dtype=WORD_DTYPE)
+    for block_nr in range(first_block, len(blocks), CHUNK_BLOCKS):
+        chunk = blocks['words'][block_nr:block_nr+CHUNK_BLOCKS].reshape(-1)
+        words = np.concatenate((carry, chunk)) if len(carry) > 0 else chunk
+        while pos + 2 <= len(words):
+            if end_word is not None and offset + pos >= end_word:
+                return
+            length = int(words[pos])
+            if length < 2:  # Padding, continue in next block
+                pos = (offset + pos)//WORDS_PER_BLOCK*WORDS_PER_BLOCK + WORDS_PER_BLOCK - offset
+                continue
+            if pos + length > len(words):
+                break
+            key = int(words[pos+1])
+            num_records = get_run_length(words, pos, length, key)
+            yield offset + pos, key, words[pos:pos+num_records*length].reshape(num_records,
+                                                                                length)
+            pos += num_records*length
+
+        carry = words[pos:]
+        offset += pos
+        pos = 0
+
+
+def get_run_length(words, pos, length, key):
+    """Get the number of consecutive records with the same length and
+    key, starting at `pos`
+
+    :param words: The words to search
+    :type words: np.array
+
+    :param pos: The position of the first record
+    :type pos: int
+
+    :param length: The record length
+    :type length: int
+
+    :param key: The record key
+    :type key: int
+
+    :returns: The number of records
+    :rtype: int
+
+    """
+    num_max = (len(words) - pos)//length
+    num_records = 1
+    while num_records < num_max:
+        num_try = min(max(2*num_records, 16), num_max)
+        records = words[pos:pos+num_try*length].reshape(num_try, length)
+        mismatch = np.nonzero((records[:, 0] != length) | (records[:, 1] != key))[0]
+        if len(mismatch) > 0:
+            return int(mismatch[0])
+        num_records = num_try
+
+    return num_records
+
+
+def get_increment_info(record):
+    """Decode the increment start record
+
+    :param record: The words of the increment start record
+    :type record: np.array
+
+    :returns: Dictionary with the fields 'step', 'increment',
+              'step_time', 'total_time' and 'time_increment'
+    :rtype: dict
+
+    """
+    num_words = len(INCREMENT_START_DTYPE.names)
+    info = np.ascontiguousarray(record[:num_words]).view(INCREMENT_START_DTYPE)[0]
+    return {'step': int(info['step']), 'increment': int(info['increment']),
+            'step_time': float(info['step_time']), 'total_time': float(info['total_time']),
+            'time_increment': float(info['time_increment'])}
+
+
+def iter_increments(fil_file, keys=(FIL_NODE_DISP, FIL_NODE_COORD), start_word=0,
+                    end_word=None):
+    """Iterate over the increments in the results file. The node data
+    for one increment at a time is kept in memory.
+
+    :param fil_file: The name of the results file
+    :type fil_file: str
+
+    :param keys: The node record keys to read, see `NODE_VARIABLES`
+    :type keys: list[ int ]
+
+    :param start_word: The position (in words) of an increment start
+                       record to start reading from, see
+                       :py:func:`iter_record_runs`
+    :type start_word: int
+
+    :param end_word: The position (in words) where reading stops, see
+                     :py:func:`iter_record_runs`
+    :type end_word: int
+
+    :returns: Generator giving a dictionary for each increment, see
+              :py:func:`get_increment_info`. In addition, for each
+              variable in `NODE_VARIABLES` found in the increment, a
+              dictionary with the node labels ('labels', np.array [N])
+              and values ('values', np.array [N, num_components])
+    :rtype: generator
+
+    """
+    increment = None
+    for word_offset, key, records in iter_record_runs(fil_file, start_word, end_word):
+        if key == FIL_INCREMENT_START:
+            increment = get_increment_info(records[-1])
+            node_records = {}
+        elif increment is None:
+            continue
+        elif key == FIL_INCREMENT_END:
+            for node_key in node_records:
+                increment[NODE_VARIABLES[node_key]] = get_node_data(node_records[node_key])
+            yield increment
+            increment = None
+        elif key in keys:
+            node_records.setdefault(key, []).append(np.array(records))
+
+
+def get_node_data(runs):
+    """Combine runs of node records to node labels and values. If the
+    runs have different number of components, missing values are NaN.
+
+    :param runs: The node records, see :py:func:`iter_record_runs`
+    :type runs: list[ np.array ]
+
+    :returns: Dictionary with the node labels ('labels') and values
+              ('values')
+    :rtype: dict
+
+    """
+    num_comp = max([run.shape[1] for run in runs]) - 3
+    values = np.full((sum([len(run) for run in runs]), num_comp), np.nan)
+    row = 0
+    for run in runs:
+        values[row:row+len(run), :run.shape[1]-3] = run[:, 3:].view(FLOAT_DTYPE)
+        row += len(run)
+
+    return {'labels': np.concatenate([run[:, 2] for run in runs]), 'values': values}
+
+
+def get_increment_words(increment):
+    """Get the records for an increment as words, for writing synthetic
+    results files.
+
+    :param increment: The increment data, with the same format as given
+                      by :py:func:`iter_increments`
+    :type increment: dict
+
+    :returns: The words
+    :rtype: np.array
+
+    """
+    start = np.zeros(1, dtype=INCREMENT_START_DTYPE)
+    start['length'] = INCREMENT_START_LENGTH
+    start['key'] = FIL_INCREMENT_START
+    start['procedure'] = 1     # Static
+    for key in ['step', 'increment', 'step_time', 'total_time', 'time_increment']:
+        start[key] = increment.get(key, 0)
+    start_words = np.zeros(INCREMENT_START_LENGTH, dtype=WORD_DTYPE)
+    start_words[:len(INCREMENT_START_DTYPE.names)] = start.view(WORD_DTYPE)
+
+    records = [start_words]
+    for key in sorted(NODE_VARIABLES.keys()):
+        if NODE_VARIABLES[key] not in increment:
+            continue
+        data = increment[NODE_VARIABLES[key]]
+        values = np.asarray(data['values'], dtype=FLOAT_DTYPE)
+        node_records = np.zeros((len(values), 3 + values.shape[1]), dtype=WORD_DTYPE)
+        node_records[:, 0] = node_records.shape[1]
+        node_records[:, 1] = key
+        node_records[:, 2] = data['labels']
+        node_records[:, 3:] = values.view(WORD_DTYPE)
+        records.append(node_records.reshape(-1))
+
+    records.append(np.array([2, FIL_INCREMENT_END], dtype=WORD_DTYPE))
+
+    return np.concatenate(records)
+
+
+def write(fil_file, increments, append=False):
+    """Write a synthetic results file, e.g. for testing. The last block
+    is padded with zeros.
+
+    :param fil_file: The name of the results file
+    :type fil_file: str
+
+    :param increments: The increments to write, with the same format as
+                       given by :py:func:`iter_increments`
+    :type increments: list[ dict ]
+
+    :param append: Should the increments be appended to `fil_file`?
+    :type append: bool
+
+    :returns: The number of blocks written
+    :rtype: int
+
+    """
+    words = np.concatenate([get_increment_words(increment) for increment in increments])
+    num_blocks = -(-len(words)//WORDS_PER_BLOCK)
+    padded_words = np.zeros(num_blocks*WORDS_PER_BLOCK, dtype=WORD_DTYPE)
+    padded_words[:len(words)] = words
+    blocks = np.zeros(num_blocks, dtype=BLOCK_DTYPE)
+    blocks['head'] = WORDS_PER_BLOCK*WORD_DTYPE.itemsize
+    blocks['tail'] = WORDS_PER_BLOCK*WORD_DTYPE.itemsize
+    blocks['words'] = padded_words.reshape(num_blocks, WORDS_PER_BLOCK)
+    with open(fil_file, 'ab' if append else 'wb') as fid:
+        blocks.tofile(fid)
+
+    return num_blocks
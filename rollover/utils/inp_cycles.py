@@ -0,0 +1,233 @@
+"""This module expands the rollover cycles in an input file written by
+Abaqus. When `expand_cycles` is used in
+:py:func:`rollover.three_d.utils.loading.setup`, only the first cycles
+are created in the model database. After the input file has been
+written, the steps of the last created cycle are compiled to a text
+template. This template is then used to write the remaining cycles
+according to the loading schedule saved in the file
+`rollover.utils.naming_mod.cycle_schedule_file`.
+
+Each cycle, :math:`c`, in the template consists of the steps
+`rolling_c`, `return_c+1`, `reapply_c+1` and `release_c+1`, see
+:py:mod:`rollover.utils.naming_mod`. With `merge_return`, the
+`reapply_c+1` step is not included. For each expanded cycle, the step
+names, the time incrementation of the rolling step (`*Static`) and the
+vertical wheel load (`*Cload`) are updated. All other content, e.g.
+boundary conditions and output requests, is copied from the template.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import re, shutil
+
+from rollover.utils import json_io
+from rollover.utils import naming_mod as names
+from rollover.core.loading import get_cycle_data
+
+STEP_REGEX = re.compile(r'^\*Step, name=([A-Za-z]+)_(\d+)', re.IGNORECASE)
+WRITE_CHUNK = 100       # Number of cycles to write at once
+
+
+def expand(inp_file, schedule_file=names.cycle_schedule_file, out_file=None):
+    """Expand the cycles in `inp_file` up to the number of cycles given
+    in the schedule file.
+
+    :param inp_file: The name of the input file written by Abaqus
+    :type inp_file: str
+
+    :param schedule_file: The name of the schedule file, written by
+                          :py:func:`rollover.three_d.utils.loading.setup`
+    :type schedule_file: str
+
+    :param out_file: The name of the expanded input file. If None, the
+                     cycles are appended to `inp_file`.
+    :type out_file: str
+
+    :returns: The number of cycles in the expanded input file
+    :rtype: int
+
+    """
+    schedule = json_io.read(schedule_file)
+    num_cycles = schedule['num_cycles']
+    template_cycle = schedule['template_cycle']
+
+    if out_file is not None:
+        shutil.copyfile(inp_file, out_file)
+    else:
+        out_file = inp_file
+
+    if num_cycles <= template_cycle:
+        return num_cycles
+
+    with open(inp_file, 'r') as fid:
+        template = compile_template(fid.readlines(), template_cycle,
+                                    schedule.get('merge_return', False))
+
+    with open(out_file, 'a') as fid:
+        cycle_strs = []
+        for cycle_nr in range(template_cycle+1, num_cycles+1):
+            cycle_strs.append(get_cycle_str(template, cycle_nr, schedule))
+            if len(cycle_strs) == WRITE_CHUNK:
+                fid.write(''.join(cycle_strs))
+                cycle_strs = []
+        fid.write(''.join(cycle_strs))
+
+    return num_cycles
+
+
+def compile_template(inp_lines, template_cycle, merge_return=False):
+    """Compile the steps of `template_cycle` to a template string.
+    The cycle must be the last in the input file. Comment lines are
+    removed.
+
+    :param inp_lines: The lines in the input file
+    :type inp_lines: list[ str ]
+
+    :param template_cycle: The cycle number to use as template
+    :type template_cycle: int
+
+    :param merge_return: Is the merged cycle layout used? See
+                         :py:func:`rollover.utils.naming_mod.get_steps_inbetween`
+    :type merge_return: bool
+
+    :returns: Dictionary with the fields
+
+              - 'text': Template string with the replacement fields
+                `c0` and `c1` (cycle strings for the current and next
+                cycle), `static` (data line for `*Static`) and
+                `cload` (data line for `*Cload`)
+              - 'load_node': The node (set) for the vertical load
+
+    :rtype: dict
+
+    """
+    start = find_line(inp_lines, '*Step, name=' + names.get_step_rolling(template_cycle))
+    load_node = get_load_node(inp_lines[:start])
+
+    template_lines = []
+    num_steps = 0
+    in_rolling_step = False
+    skip_data_lines = False
+    add_static = False
+    for line in inp_lines[start:]:
+        if line.startswith('**'):
+            continue
+
+        if line.startswith('*'):
+            skip_data_lines = False
+        elif skip_data_lines:
+            continue
+        elif add_static:
+            # Data line for *Static in the rolling step
+            template_lines.append('{static}\n*Cload\n{cload}\n')
+            add_static = False
+            continue
+
+        step_match = STEP_REGEX.match(line)
+        if step_match:
+            num_steps += 1
+            step_type, cycle_nr = step_match.group(1), int(step_match.group(2))
+            if cycle_nr - template_cycle not in [0, 1]:
+                raise ValueError('Unexpected step "' + step_type + '_' + step_match.group(2)
+                                 + '" in template cycle ' + str(template_cycle))
+            in_rolling_step = step_type.lower() == 'rolling'
+            field = '{c' + str(cycle_nr - template_cycle) + '}'
+            template_lines.append(escape(line[:step_match.start(2)]) + field
+                                  + escape(line[step_match.end(2):]))
+        elif in_rolling_step and line.lower().startswith('*static'):
+            template_lines.append(escape(line))
+            add_static = True
+        elif in_rolling_step and line.lower().startswith('*cload'):
+            # Replaced by the load added after *Static
+            skip_data_lines = True
+        else:
+            template_lines.append(escape(line))
+
+    num_steps_per_cycle = 1 + len(names.get_steps_inbetween(merge_return=merge_return))
+    if num_steps != num_steps_per_cycle:
+        raise ValueError('Template cycle ' + str(template_cycle) + ' contains '
+                         + str(num_steps) + ' steps, expected ' + str(num_steps_per_cycle))
+
+    return {'text': ''.join(template_lines), 'load_node': load_node}
+
+
+def get_cycle_str(template, cycle_nr, schedule):
+    """Get the input file text for cycle `cycle_nr`
+
+    :param template: The compiled template, see
+                     :py:func:`compile_template`
+    :type template: dict
+
+    :param cycle_nr: The cycle number
+    :type cycle_nr: int
+
+    :param schedule: The loading schedule, see
+                     :py:func:`rollover.core.loading.write_cycle_schedule`
+    :type schedule: dict
+
+    :returns: The text to write to the input file
+    :rtype: str
+
+    """
+    fz, v = get_cycle_data(cycle_nr, schedule['cycles'], 
+                           [schedule['vertical_load'], schedule['speed']])
+    step_time = schedule['rolling_length']/v
+    max_inc = step_time/schedule['min_incr']
+    min_inc = step_time/schedule['max_incr']
+    static_str = '%0.15g, %0.15g, %0.15g, %0.15g' % (max_inc, step_time, min_inc, max_inc)
+    cload_str = '%s, 2, %0.15g' % (template['load_node'], -fz)
+
+    return template['text'].format(c0=names.cycle_str(cycle_nr),
+                                   c1=names.cycle_str(cycle_nr+1),
+                                   static=static_str, cload=cload_str)
+
+
+def get_load_node(inp_lines):
+    """Get the node (set) to which the vertical load is applied, i.e.
+    the node in the first `*Cload` definition.
+
+    :param inp_lines: The lines in the input file before the template
+    :type inp_lines: list[ str ]
+
+    :returns: The node label or node set name
+    :rtype: str
+
+    """
+    ind = find_line(inp_lines, '*Cload')
+    return inp_lines[ind+1].split(',')[0].strip()
+
+
+def find_line(inp_lines, start_str):
+    """Find the first line starting with `start_str` (case insensitive)
+
+    :param inp_lines: The lines to search
+    :type inp_lines: list[ str ]
+
+    :param start_str: The start of the line to find
+    :type start_str: str
+
+    :returns: The index of the line
+    :rtype: int
+
+    """
+    start_str = start_str.lower()
+    for n, line in enumerate(inp_lines):
+        if line.lower().startswith(start_str):
+            return n
+
+    raise ValueError('Could not find a line starting with "' + start_str + '"')
+
+
+def escape(line):
+    """Escape braces such that the line can be used in a format string
+
+    :param line: The line to escape
+    :type line: str
+
+    :returns: The escaped line
+    :rtype: str
+
+    """
+    return line.replace('{', '{{').replace('}', '}}')
@@ -1,136 +1,322 @@
-"""This module enable direct editing of input keywords in the input 
-file. Options not available in CAE can therefore be added via the 
+"""This module enable direct editing of input keywords in the input
+file. Options not available in CAE can therefore be added via the
 scripting interface.
 
+For many edits, use :py:class:`KeywordIndex`. It finds the positions of
+the categories (e.g. parts and steps) once, and applies all queued
+insertions in one pass. The functions :py:func:`add_at_end_of_cat`,
+:py:func:`add_after` and :py:func:`add_before` apply a single insertion.
+
+This module does not require Abaqus, :py:class:`FakeKeywordBlock` can
+be used instead of the Abaqus keywordBlock for testing.
+
 .. codeauthor:: Knut Andreas Meyer
 """
 
 from __future__ import print_function
-import sys, os, inspect
-from abaqusConstants import *
-import abaqus
+import re
+
+
+class KeywordIndex():
+    """ Index of the categories in a keyword block with a queue of
+    insertions. Usage
+
+    kwi = KeywordIndex(the_model.keywordBlock)
+    kwi.add_at_end_of_cat(string_to_add, 'Step', 'Step-1')  # Queue
+    kwi.apply()     # Insert all queued strings
+
+    All positions refer to the keyword block when the index was created
+    (or last applied). Strings queued for the same position are inserted
+    in the order they were queued. The keyword may be preceded by
+    comment lines (`**`) in the same block.
+    """
+
+    CATEGORY_REGEX = re.compile(r'^\*(\w+), name=([^,\s]+)', re.MULTILINE)
+    END_REGEX = re.compile(r'^\*End (\w+)', re.MULTILINE)
+
+    def __init__(self, keyword_block):
+        """
+        :param keyword_block: The Abaqus keywordBlock that contains the
+                              keywords to be written to the input file
+        :type keyword_block: KeywordBlock object (Abaqus)
+
+        :returns: Instance of KeywordIndex class
+        :rtype: KeywordIndex
+
+        """
+        self.keyword_block = keyword_block
+        self.queue = []
+        self.parse()
+
+    def parse(self):
+        """ Find the start and end positions of all named categories in
+        the keyword block.
+
+        :returns: None
+        :rtype: None
+
+        """
+        self.blocks = list(self.keyword_block.sieBlocks)
+        self.categories = {}
+        open_categories = {}
+        for n, block in enumerate(self.blocks):
+            cat_match = self.CATEGORY_REGEX.search(block)
+            if cat_match:
+                key = (cat_match.group(1), cat_match.group(2))
+                open_categories[cat_match.group(1)] = key
+                if key not in self.categories:
+                    self.categories[key] = [n, None]
+                continue
+
+            end_match = self.END_REGEX.search(block)
+            if end_match and end_match.group(1) in open_categories:
+                key = open_categories.pop(end_match.group(1))
+                if self.categories[key][1] is None:
+                    self.categories[key][1] = n
+
+    def get_position(self, category, name):
+        """ Get the start and end position of the category of type
+        `category` with name `name`.
+
+        :param category: The category (E.g. Part, Step)
+        :type category: str
+
+        :param name: The name of the category (E.g. Part1-1, Step-1)
+        :type name: str
+
+        :returns: The start position and the position of the
+                  '*End <category>' line
+        :rtype: list[ int ]
+
+        """
+        key = (category, name)
+        if key not in self.categories or self.categories[key][1] is None:
+            raise ValueError('Could not find category "*' + category + ', name=' + name + '"')
+        return self.categories[key]
+
+    def find(self, find_strings, min_ind=0):
+        """ Find the lowest position >= min_ind of a block that contains
+        all strings in `find_strings`, see
+        :py:func:`find_strings_in_iterable`
+
+        :param find_strings: List of strings that the block must
+                             contain
+        :type find_strings: list[ str ]
+
+        :param min_ind: The position from which the search will start
+        :type min_ind: int
+
+        :returns: The position of the block
+        :rtype: int
+
+        """
+        return find_strings_in_iterable(self.blocks, find_strings, min_ind)
+
+    def insert(self, position, string_to_add):
+        """ Queue `string_to_add` to be inserted after `position`
+
+        :param position: The position in the keyword block
+        :type position: int
+
+        :param string_to_add: The string to add to the input file
+        :type string_to_add: str
+
+        :returns: None
+        :rtype: None
+
+        """
+        self.queue.append((position, len(self.queue), string_to_add))
+
+    def add_at_end_of_cat(self, string_to_add, category, name):
+        """ Queue `string_to_add` to be added just before the end of the
+        category of type `category` with name `name`.
+        See :py:func:`add_at_end_of_cat`
+
+        """
+        self.insert(self.get_position(category, name)[1] - 1, string_to_add)
+
+    def add_after(self, string_to_add, find_strings=None):
+        """ Queue `string_to_add` to be added after the first block that
+        contains all strings in `find_strings`.
+        See :py:func:`add_after`
+
+        """
+        position = 0 if find_strings is None else self.find(find_strings)
+        self.insert(position, string_to_add)
+
+    def add_before(self, string_to_add, find_strings=None):
+        """ Queue `string_to_add` to be added before the first block
+        that contains all strings in `find_strings`.
+        See :py:func:`add_before`
+
+        """
+        if find_strings is None:
+            position = len(self.blocks)
+        else:
+            position = self.find(find_strings) - 1
+        self.insert(position, string_to_add)
+
+    def apply(self):
+        """ Insert all queued strings, starting from the end such that
+        the positions remain valid. Thereafter, the index is updated.
+
+        :returns: The number of inserted strings
+        :rtype: int
+
+        """
+        num_inserted = len(self.queue)
+        for position, nr, string_to_add in sorted(self.queue, reverse=True):
+            self.keyword_block.insert(position, string_to_add)
+
+        self.queue = []
+        if num_inserted > 0:
+            self.parse()
+
+        return num_inserted
+
+
+class FakeKeywordBlock():
+    """ Keyword block with the same interface as the Abaqus keywordBlock
+    used by this module, i.e. `sieBlocks` and `insert`. Used for testing
+    without Abaqus.
+    """
+
+    def __init__(self, sie_blocks=None):
+        """
+        :param sie_blocks: The initial blocks
+        :type sie_blocks: list[ str ]
+
+        :returns: Instance of FakeKeywordBlock class
+        :rtype: FakeKeywordBlock
+
+        """
+        self.sieBlocks = [] if sie_blocks is None else list(sie_blocks)
+
+    def insert(self, position, text):
+        """ Insert text after the block at position
+
+        :param position: The position in sieBlocks
+        :type position: int
+
+        :param text: The text to insert
+        :type text: str
+
+        :returns: None
+        :rtype: None
+
+        """
+        self.sieBlocks.insert(position + 1, text)
 
-from rollover.utils import abaqus_python_tools as apt
 
 def add_at_end_of_cat(keyword_block, string_to_add, category, name):
-    """Add `string_to_add` just before the end of the category of type 
-    `category` with name `name`. 
-    
-    :param keyword_block: The Abaqus keywordBlock that contains the 
+    """Add `string_to_add` just before the end of the category of type
+    `category` with name `name`.
+
+    :param keyword_block: The Abaqus keywordBlock that contains the
                           keyword to be written to the input file
     :type keyword_block: KeywordBlock object (Abaqus)
-    
+
     :param string_to_add: The string to add to the input file
     :type string_to_add: str
-    
+
     :param category: The category to search for (E.g. Part, Step)
     :type category: str
-    
+
     :param name: The name of the category to find (E.g. Part1-1, Step-1)
     :type name: str
-    
+
     :returns: None
     :rtype: None
 
     """
-    
-    find_strings = ['*' + category, 'name=' + name]
-    sie_blocks = keyword_block.sieBlocks
-    category_start_line = find_strings_in_iterable(sie_blocks, find_strings)
-    add_line_num = find_strings_in_iterable(sie_blocks, ['*End ' + category], 
-                                            min_ind=category_start_line) - 1
-    
-    keyword_block.insert(add_line_num, string_to_add)
-    
+
+    kwi = KeywordIndex(keyword_block)
+    kwi.add_at_end_of_cat(string_to_add, category, name)
+    kwi.apply()
+
 
 def add_after(keyword_block, string_to_add, find_strings=None):
-    """Add `string_to_add` after the first line in to keyword_block that 
-    contains all strings in `find_strings`. 
-    
-    :param keyword_block: The Abaqus keywordBlock that contains the 
+    """Add `string_to_add` after the first line in to keyword_block that
+    contains all strings in `find_strings`.
+
+    :param keyword_block: The Abaqus keywordBlock that contains the
                           keyword to be written to the input file
     :type keyword_block: KeywordBlock object (Abaqus)
-    
+
     :param string_to_add: The string to add to the input file
     :type string_to_add: str
-    
-    :param find_strings: List of strings that the line prior after which 
-                         `string_to_add` should be added must contain. 
-                         If `find_strings` = None, add in beginning of 
+
+    :param find_strings: List of strings that the line prior after which
+                         `string_to_add` should be added must contain.
+                         If `find_strings` = None, add in beginning of
                          the input file
     :type find_strings: list[ str ]
-    
+
     :returns: None
     :rtype: None
-    
+
     """
-    
-    if find_strings is None:
-        line_num = 0
-    else:
-        line_num = find_strings_in_iterable(keyword_block.sieBlocks, find_strings)
-    
-    keyword_block.insert(line_num, string_to_add)
+
+    kwi = KeywordIndex(keyword_block)
+    kwi.add_after(string_to_add, find_strings)
+    kwi.apply()
 
 
 def add_before(keyword_block, string_to_add, find_strings=None):
-    """Add `string_to_add` before the first line in to keyword_block 
-    that contains all strings in `find_strings`. 
-    
-    :param keyword_block: The Abaqus keywordBlock that contains the 
+    """Add `string_to_add` before the first line in to keyword_block
+    that contains all strings in `find_strings`.
+
+    :param keyword_block: The Abaqus keywordBlock that contains the
                           keyword to be written to the input file
     :type keyword_block: KeywordBlock object (Abaqus)
-    
+
     :param string_to_add: The string to add to the input file
     :type string_to_add: str
-    
+
     :param find_strings: List of strings that the line prior after which
-                         `string_to_add` should be added must contain. 
-                         If `find_strings` = None, add in beginning of 
+                         `string_to_add` should be added must contain.
+                         If `find_strings` = None, add in beginning of
                          the input file
     :type find_strings: list[ str ]
-    
+
     :returns: None
     :rtype: None
-    
+
     """
-    
-    if find_strings is None:
-        line_num = len(keyword_block.sieBlocks)
-    else:
-        line_num = find_strings_in_iterable(keyword_block.sieBlocks, find_strings)-1
-    
-    keyword_block.insert(line_num, string_to_add)
-    
+
+    kwi = KeywordIndex(keyword_block)
+    kwi.add_before(string_to_add, find_strings)
+    kwi.apply()
+
 
 def find_strings_in_iterable(iterable, find_strings, min_ind=0):
-    """Find the lowest index >= min_ind of a string in `iterable` that 
+    """Find the lowest index >= min_ind of a string in `iterable` that
     contains all strings in `find_strings`
-    
-    :param iterable: An iterable object containing strings. Must support 
-                    iteration (i.e. :code:`for item in iterable`) and 
-                    be subscriptable (i.e. :code:`iterable[3:]`). 
+
+    :param iterable: An iterable object containing strings. Must support
+                    iteration (i.e. :code:`for item in iterable`) and
+                    be subscriptable (i.e. :code:`iterable[3:]`).
     :type iterable: An iterable of strings
-    
+
     :param find_strings: List of strings that the the item in `iterable`
-                         must contain to be found. 
+                         must contain to be found.
     :type category: list[ str ]
-    
+
     :param min_ind: The index from which the search will start
-    
-    :returns: None
-    :rtype: None
-    
+
+    :returns: The index of the first matching item
+    :rtype: int
+
     """
-    
-    for n, line in enumerate(iterable[min_ind:]):
+
+    for n in range(min_ind, len(iterable)):
+        line = iterable[n]
         if all([find_string in line for find_string in find_strings]):
-            return n + min_ind
-    
+            return n
+
     # If no match found, print out problem and raise ValueError
     log_str = 'Could not find a line containing the following strings:'
     for find_string in find_strings:
         log_str = log_str + '\n* "' + find_string + '"'
-    
-    raise ValueError(log_str)
 
+    raise ValueError(log_str)
@@ -0,0 +1,450 @@
+"""This module follows a running rollover job, and keeps a summary for
+each cycle with the solver statistics, the wall clock time, and the
+displacements of the wheel and rail reference points at the end of the
+rolling step. It does not open the odb file, and can therefore be used
+while Abaqus is writing to it.
+
+The status (.sta) and message (.msg) files are tailed: only the lines
+written since the last update are read, see :py:class:`FileTail`. The
+results file (.fil) is scanned from the start of the last increment
+read, see :py:mod:`rollover.utils.fil_index`. The user subroutine
+URDFIL allows Abaqus to overwrite this increment (see
+:py:mod:`rollover.utils.fil_reader`), such that the new increment
+starts at the same position. If the file has grown instead, the last
+increment is only scanned again. The node data is only decoded for new
+increments at the end of rolling steps.
+
+The memory usage does not grow with the length of the run: only the
+summaries of the last `max_cycles` cycles are kept.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import os, time, json, threading
+from collections import OrderedDict
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:     # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from rollover.utils import naming_mod as names
+from rollover.utils import fil_reader
+from rollover.utils import fil_index
+from rollover.utils import solver_stats
+
+CHUNK_BYTES = 2**20     # Maximum number of bytes to read from a text file at once
+STA_COMPLETED = 'THE ANALYSIS HAS COMPLETED SUCCESSFULLY'
+STA_NOT_COMPLETED = 'THE ANALYSIS HAS NOT BEEN COMPLETED'
+
+
+class FileTail():
+    """ Read the lines appended to a text file since the last read. The
+    position of the last complete line is kept, and an incomplete last
+    line is kept until it is completed. If the file is replaced by a
+    smaller file, it is read from the start again.
+    """
+
+    def __init__(self, filename):
+        """
+        :param filename: The name of the file to follow. The file does
+                         not have to exist yet.
+        :type filename: str
+
+        :returns: Instance of FileTail class
+        :rtype: FileTail
+
+        """
+        self.filename = filename
+        self.position = 0
+        self.remainder = ''
+
+    def read_lines(self):
+        """ Read the new complete lines
+
+        :returns: Generator giving each new line (without line ending)
+        :rtype: generator
+
+        """
+        if not os.path.exists(self.filename):
+            return
+        size = os.path.getsize(self.filename)
+        if size < self.position:
+            self.position = 0
+            self.remainder = ''
+
+        with open(self.filename, 'rb') as fid:
+            fid.seek(self.position)
+            while self.position < size:
+                data = fid.read(min(CHUNK_BYTES, size - self.position))
+                if len(data) == 0:
+                    break
+                self.position += len(data)
+                lines = (self.remainder + data.decode('latin-1')).split('\n')
+                self.remainder = lines.pop()
+                for line in lines:
+                    yield line.rstrip('\r')
+
+    def get_mtime(self):
+        """ Get the time the file was last modified
+
+        :returns: The modification time (seconds since the epoch), None
+                  if the file does not exist
+        :rtype: float
+
+        """
+        return os.path.getmtime(self.filename) if os.path.exists(self.filename) else None
+
+
+class LiveMonitor():
+    """ Summary of a running rollover job, usage
+
+    monitor = LiveMonitor('rollover')
+    while True:
+        monitor.update()
+        save_summary(monitor.get_summary(), json_file)
+        time.sleep(10)
+
+    The summary for each cycle contains
+
+    - 'cycle': The cycle number
+    - 'increments', 'cutbacks', 'severe_iterations',
+      'equilibrium_iterations': For the rolling step, see
+      :py:func:`rollover.utils.solver_stats.parse_sta`
+    - 'inbetween_increments', 'inbetween_cutbacks': For the steps
+      between the previous and this rolling step
+    - 'wall_time': The wall clock time (seconds) from the last status
+      line of the previous cycle to the last status line of this
+      cycle. The time is taken from the modification time of the status
+      file when the lines are read, and is therefore only accurate to
+      the update interval.
+    - 'wheel_rp', 'rail_rp': The displacements of the reference points
+      at the end of the rolling step, None if not (yet) available
+    """
+
+    def __init__(self, job=names.job, inp_file=None, max_cycles=1000, settle_time=1.0):
+        """
+        :param job: The job name, the files `job`.sta, `job`.msg and
+                    `job`.fil are followed
+        :type job: str
+
+        :param inp_file: The input file of the job, used to get the
+                         steps in each cycle. Defaults to `job`.inp
+        :type inp_file: str
+
+        :param max_cycles: The maximum number of cycle summaries to
+                           keep. Older cycles are removed.
+        :type max_cycles: int
+
+        :param settle_time: The results file is only read if it has not
+                            been modified for this time (seconds), to
+                            avoid reading an increment while Abaqus is
+                            writing it.
+        :type settle_time: float
+
+        :returns: Instance of LiveMonitor class
+        :rtype: LiveMonitor
+
+        """
+        self.job = job
+        self.max_cycles = max_cycles
+        self.settle_time = settle_time
+        self.step_cycles = get_step_cycles(job + '.inp' if inp_file is None else inp_file)
+        self.sta_tail = FileTail(job + '.sta')
+        self.msg_tail = FileTail(job + '.msg')
+        self.fil_file = job + '.fil'
+        self.fil_word = 0
+        self.fil_last = None
+        self.rp_labels = None
+        self.cycles = OrderedDict()
+        self.last_sta_time = None
+        self.status = {'state': 'running', 'warnings': 0, 'errors': 0, 'wallclock_time': None}
+        self.lock = threading.Lock()    # The summary may be requested from another thread
+
+    def update(self):
+        """ Read the new data in the status, message and results files
+
+        :returns: The numbers of the cycles that have been updated
+        :rtype: list[ int ]
+
+        """
+        with self.lock:
+            updated = self.update_sta()
+            self.update_msg()
+            updated.extend([c for c in self.update_fil() if c not in updated])
+        return sorted(updated)
+
+    def update_sta(self):
+        """ Read the new lines in the status file
+
+        :returns: The numbers of the cycles that have been updated
+        :rtype: list[ int ]
+
+        """
+        updated = []
+        for line in self.sta_tail.read_lines():
+            match = solver_stats.STA_REGEX.match(line + '\n')
+            if match is None:
+                if STA_COMPLETED in line:
+                    self.status['state'] = 'completed'
+                elif STA_NOT_COMPLETED in line:
+                    self.status['state'] = 'aborted'
+                continue
+
+            step_nr = int(match.group(1))
+            if step_nr not in self.step_cycles:
+                continue
+            cycle_nr, is_rolling = self.step_cycles[step_nr]
+            cycle = self.get_cycle(cycle_nr)
+            prefix = '' if is_rolling else 'inbetween_'
+            if match.group(4) == 'U':
+                cycle[prefix + 'cutbacks'] += 1
+            else:
+                cycle[prefix + 'increments'] += 1
+            if is_rolling:
+                cycle['severe_iterations'] += int(match.group(5))
+                cycle['equilibrium_iterations'] += int(match.group(6))
+            if cycle_nr not in updated:
+                updated.append(cycle_nr)
+
+        if len(updated) > 0:
+            sta_time = self.sta_tail.get_mtime()
+            for cycle_nr in updated:
+                cycle = self.cycles.get(cycle_nr, None)
+                if cycle is None:
+                    continue
+                if cycle['start_time'] is None:
+                    cycle['start_time'] = self.last_sta_time
+                cycle['end_time'] = sta_time
+                if cycle['start_time'] is not None:
+                    cycle['wall_time'] = cycle['end_time'] - cycle['start_time']
+            self.last_sta_time = sta_time
+
+        return updated
+
+    def update_msg(self):
+        """ Read the new lines in the message file, and update the number
+        of warnings and errors, as well as the total wall clock time when
+        the job has finished.
+
+        :returns: None
+        :rtype: None
+
+        """
+        for line in self.msg_tail.read_lines():
+            if '***WARNING' in line:
+                self.status['warnings'] += 1
+            elif '***ERROR' in line:
+                self.status['errors'] += 1
+            else:
+                match = solver_stats.WALLCLOCK_REGEX.search(line)
+                if match is not None:
+                    self.status['wallclock_time'] = float(match.group(1))
+
+    def update_fil(self):
+        """ Read the increments in the results file written since the
+        last update, and save the reference point displacements at the
+        end of each rolling step.
+
+        :returns: The numbers of the cycles that have been updated
+        :rtype: list[ int ]
+
+        """
+        if not os.path.exists(self.fil_file):
+            return []
+        if time.time() - os.path.getmtime(self.fil_file) < self.settle_time:
+            return []
+        if fil_reader.get_byte_offset(self.fil_word) > os.path.getsize(self.fil_file):
+            self.fil_word = 0   # Results file replaced
+        if self.rp_labels is None:
+            if not os.path.exists(names.usub_state_file):
+                return []       # Written by the user subroutine after the first rolling step
+            self.rp_labels = read_rp_labels(names.usub_state_file)
+
+        entries, scanned_word = fil_index.scan(self.fil_file, self.fil_word)
+        updated = []
+        for entry in entries:
+            key = (int(entry['step']), int(entry['increment']), float(entry['total_time']))
+            if self.fil_last is not None and key[2] <= self.fil_last[2]:
+                continue
+            self.fil_last = key
+            cycle_nr, is_rolling = self.step_cycles.get(key[0], (None, False))
+            if not is_rolling:
+                continue
+            increment = fil_index.read_increment(self.fil_file, entry,
+                                                 keys=(fil_reader.FIL_NODE_DISP,))
+            cycle = self.get_cycle(cycle_nr)
+            for rp, label in self.rp_labels.items():
+                cycle[rp] = get_node_values(increment, label)
+            updated.append(cycle_nr)
+
+        if len(entries) > 0:
+            self.fil_word = fil_reader.get_word_offset(int(entries['start'][-1]))
+
+        return updated
+
+    def get_cycle(self, cycle_nr):
+        """ Get the summary for a cycle, create it if it does not exist.
+        If more than `max_cycles` summaries exist, the oldest is removed.
+
+        :param cycle_nr: The cycle number
+        :type cycle_nr: int
+
+        :returns: The cycle summary
+        :rtype: dict
+
+        """
+        if cycle_nr not in self.cycles:
+            self.cycles[cycle_nr] = {'cycle': cycle_nr, 'increments': 0, 'cutbacks': 0,
+                                     'severe_iterations': 0, 'equilibrium_iterations': 0,
+                                     'inbetween_increments': 0, 'inbetween_cutbacks': 0,
+                                     'start_time': None, 'end_time': None, 'wall_time': None,
+                                     'wheel_rp': None, 'rail_rp': None}
+            while len(self.cycles) > self.max_cycles:
+                self.cycles.popitem(last=False)
+        return self.cycles[cycle_nr]
+
+    def get_summary(self):
+        """ Get the current summary of the job
+
+        :returns: Dictionary with the job name, the time of the summary,
+                  the job status ('state', number of 'warnings' and
+                  'errors', and the total 'wallclock_time' when
+                  finished), and the 'cycles' summaries (list)
+        :rtype: dict
+
+        """
+        with self.lock:
+            return {'job': self.job, 'time': time.time(), 'status': dict(self.status),
+                    'cycles': [dict(cycle) for cycle in self.cycles.values()]}
+
+
+def get_step_cycles(inp_file):
+    """ Get the cycle for each step number in the input file. The steps
+    between two rolling steps belong to the cycle of the latter.
+
+    :param inp_file: The name of the input file
+    :type inp_file: str
+
+    :returns: Dictionary with (cycle number, is rolling step) for each
+              step number. Steps before the first cycle are not included.
+    :rtype: dict
+
+    """
+    step_cycles = {}
+    for step_name, step_nr in solver_stats.get_step_numbers(inp_file).items():
+        cycle_nr = step_name.rpartition('_')[2]
+        if cycle_nr.isdigit():
+            step_cycles[step_nr] = (int(cycle_nr), solver_stats.is_rolling_step(step_name))
+
+    return step_cycles
+
+
+def read_rp_labels(state_file=names.usub_state_file):
+    """ Read the node labels of the wheel and rail reference points from
+    the state file written by the user subroutine.
+
+    :param state_file: The name of the state file
+    :type state_file: str
+
+    :returns: Dictionary with the node label for 'wheel_rp', and for
+              'rail_rp' if the rail has a reference point
+    :rtype: dict
+
+    """
+    with open(state_file, 'r') as fid:
+        tokens = fid.read().split()
+
+    # kstep, mesh_size(2), element_order, angle_incr, rp labels(2), ...
+    rp_labels = {'wheel_rp': int(tokens[5])}
+    if int(tokens[6]) > 0:
+        rp_labels['rail_rp'] = int(tokens[6])
+
+    return rp_labels
+
+
+def get_node_values(increment, label):
+    """ Get the displacements of a node in an increment
+
+    :param increment: The increment data, see
+                      :py:func:`rollover.utils.fil_reader.iter_increments`
+    :type increment: dict
+
+    :param label: The node label
+    :type label: int
+
+    :returns: The displacement components, None if not found
+    :rtype: list[ float ]
+
+    """
+    if 'U' not in increment:
+        return None
+    inds = (increment['U']['labels'] == label).nonzero()[0]
+    if len(inds) == 0:
+        return None
+    return increment['U']['values'][inds[0]].tolist()
+
+
+def save_summary(summary, json_file):
+    """ Save the summary to a json file. The summary is first written to
+    a temporary file that then replaces `json_file`, such that readers
+    never see a partially written file.
+
+    :param summary: The summary, see :py:meth:`LiveMonitor.get_summary`
+    :type summary: dict
+
+    :param json_file: The name of the json file
+    :type json_file: str
+
+    :returns: None
+    :rtype: None
+
+    """
+    tmp_file = json_file + '.tmp'
+    with open(tmp_file, 'w') as fid:
+        json.dump(summary, fid, indent=4)
+    try:
+        os.replace(tmp_file, json_file)
+    except AttributeError:  # Python 2
+        if os.path.exists(json_file):
+            os.remove(json_file)
+        os.rename(tmp_file, json_file)
+
+
+def start_server(get_summary, port, host='localhost'):
+    """ Serve the summary as json on http://`host`:`port`/ in a
+    background thread.
+
+    :param get_summary: Function returning the current summary, e.g.
+                        :py:meth:`LiveMonitor.get_summary`
+    :type get_summary: function
+
+    :param port: The port to listen on
+    :type port: int
+
+    :param host: The host name or address to listen on
+    :type host: str
+
+    :returns: The server, stop with `server.shutdown()`
+    :rtype: HTTPServer
+
+    """
+    class SummaryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            contents = json.dumps(get_summary(), indent=4).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(contents)))
+            self.end_headers()
+            self.wfile.write(contents)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer((host, port), SummaryHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
@@ -0,0 +1,138 @@
+"""This module reads load spectra, i.e. load parameters specified for
+every cycle, and writes the per-cycle table read by the user
+subroutine.
+
+A spectrum file is either a csv file or a numpy (.npy) file. The csv
+file must have a header row with the column names, and each following
+row gives the parameters for one cycle, starting with cycle 1. The
+supported columns are `vertical_load`, `speed`, `slip` and `rail_ext`.
+A .npy file contains either a structured array with these field names,
+or a 2d-array where the columns are given in the order above (trailing
+columns may be omitted). Parameters not given in the spectrum file are
+taken from the scalar settings.
+
+The table file, `rollover.utils.naming_mod.load_table_file`, is a
+binary file with three little-endian double precision values (rolling
+time, rotation per rolling length, and rail extension) per cycle. The
+user subroutine reads the record for each cycle directly from its
+position in the file, such that the lookup cost is constant and only
+one cycle is kept in memory.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import numpy as np
+
+from rollover.utils import naming_mod as names
+
+SPECTRUM_KEYS = ['vertical_load', 'speed', 'slip', 'rail_ext']
+TABLE_DTYPE = '<f8'
+
+
+def read(spectrum_file, defaults):
+    """Read the spectrum file
+
+    :param spectrum_file: Path to the spectrum file (.csv or .npy)
+    :type spectrum_file: str
+
+    :param defaults: Values for the parameters in `SPECTRUM_KEYS` that
+                     are not given in the spectrum file.
+    :type defaults: dict
+
+    :returns: Dictionary with an np.array (one value per cycle) for each
+              key in `SPECTRUM_KEYS`
+    :rtype: dict
+
+    """
+    if spectrum_file.lower().endswith('.npy'):
+        data = np.load(spectrum_file)
+        if data.dtype.names is not None:
+            columns = {key: data[key] for key in data.dtype.names}
+        else:
+            data = data.reshape((data.shape[0], -1))
+            columns = {key: data[:, nr] for nr, key in enumerate(SPECTRUM_KEYS[:data.shape[1]])}
+    else:
+        data = np.genfromtxt(spectrum_file, delimiter=',', names=True, ndmin=1)
+        columns = {key: data[key] for key in data.dtype.names}
+
+    unknown_keys = [key for key in columns if key not in SPECTRUM_KEYS]
+    if len(unknown_keys) > 0:
+        raise ValueError('Unknown columns ' + str(unknown_keys) + ' in "' + spectrum_file
+                         + '", supported columns are ' + str(SPECTRUM_KEYS))
+
+    num_cycles = len(columns[list(columns.keys())[0]])
+    spectrum = {}
+    for key in SPECTRUM_KEYS:
+        if key in columns:
+            spectrum[key] = np.array(columns[key], dtype=float)
+        else:
+            spectrum[key] = defaults[key]*np.ones(num_cycles)
+
+    if np.any(spectrum['speed'] <= 0):
+        raise ValueError('The speed must be positive for all cycles in "' + spectrum_file + '"')
+
+    return spectrum
+
+
+def write_table(rolling_length, rolling_radius, speed, slip, rail_ext,
+                table_file=names.load_table_file):
+    """Write the per-cycle table read by the user subroutine
+
+    :param rolling_length: The length the wheel shall roll
+    :type rolling_length: float
+
+    :param rolling_radius: The rolling radius used to calculate wheel
+                           rotation as function of slip.
+    :type rolling_radius: float
+
+    :param speed: The linear wheel speed for each cycle
+    :type speed: np.array
+
+    :param slip: The wheel slip for each cycle
+    :type slip: np.array
+
+    :param rail_ext: The rail extension for each cycle
+    :type rail_ext: np.array
+
+    :param table_file: The name of the table file
+    :type table_file: str
+
+    :returns: The number of cycles in the table
+    :rtype: int
+
+    """
+    table = np.zeros((len(speed), 3), dtype=TABLE_DTYPE)
+    table[:, 0] = rolling_length/np.asarray(speed)
+    table[:, 1] = (1 + np.asarray(slip))/rolling_radius
+    table[:, 2] = rail_ext
+    table.tofile(table_file)
+
+    return table.shape[0]
+
+
+def read_table(cycle_nr, table_file=names.load_table_file):
+    """Read the record for `cycle_nr` from the table file, in the same
+    way as the user subroutine. Cycles after the last in the table use
+    the last record.
+
+    :param cycle_nr: The cycle number (starting at 1)
+    :type cycle_nr: int
+
+    :param table_file: The name of the table file
+    :type table_file: str
+
+    :returns: The rolling time, rotation per rolling length and rail
+              extension
+    :rtype: list[ float ]
+
+    """
+    record_size = 3*np.dtype(TABLE_DTYPE).itemsize
+    with open(table_file, 'rb') as fid:
+        fid.seek(0, 2)
+        num_records = fid.tell()//record_size
+        fid.seek((min(cycle_nr, num_records) - 1)*record_size)
+        record = np.frombuffer(fid.read(record_size), dtype=TABLE_DTYPE)
+
+    return [float(r) for r in record]
@@ -0,0 +1,204 @@
+""" Module for saving and loading mesh bundles. A mesh bundle is a
+compact binary (numpy .npz) description of a meshed part, containing
+
+- Node labels and coordinates
+- Element labels and connectivity (node labels), grouped by element
+  type
+- Node and element sets (labels)
+- Element based surfaces (element labels for each element face)
+- A json description with the material specification, see
+  :py:func:`rollover.utils.setup_material_mod.add_material`, the
+  section name and the names of the sets and surfaces.
+
+The bundle can be loaded without Abaqus, and the part definition can be
+written directly in the Abaqus input file format by
+:py:func:`get_inp_part_str`. When the rail is included in a rollover
+model, see :py:func:`rollover.three_d.rail.include.from_file`, the part
+is instead created in the model database as an orphan mesh by
+:py:func:`rollover.three_d.utils.mesh_bundle.import_part`, because the
+shadow regions, contact surfaces and constraints are added to it.
+
+The bundle is given as a dictionary with the following fields:
+
+- 'node_labels': np.array (int), shape [num_nodes]
+- 'node_coords': np.array (float), shape [num_nodes, 3]
+- 'elements': dict with element type (e.g. 'C3D10') as key, and a dict
+  with fields 'labels' (np.array, shape [num_elems]) and 'connectivity'
+  (np.array, shape [num_elems, num_elem_nodes]) as values.
+- 'sets': dict with set name as key, and a dict with fields 'nodes' and
+  'elements' (np.array with labels) as values.
+- 'surfaces': dict with surface name as key, and a dict with element
+  face number (1-6) as key and element labels (np.array) as values.
+- 'material': The material specification dictionary
+- 'section': dict with fields 'name' and 'material', giving the names
+  of the section assigned to all elements and of its material.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import json
+import numpy as np
+
+from rollover.utils import json_io
+
+BUNDLE_VERSION = 1
+
+
+def save(filename, bundle):
+    """Save the bundle to filename with the numpy .npz format
+
+    :param filename: The name of the file to be saved, '.npz' will be
+                     appended if not already present.
+    :type filename: str
+
+    :param bundle: The mesh bundle, see module description
+    :type bundle: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    arrays = {'node_labels': np.asarray(bundle['node_labels'], dtype=np.int64),
+              'node_coords': np.asarray(bundle['node_coords'], dtype=np.float64)}
+    info = {'version': BUNDLE_VERSION,
+            'material': bundle['material'],
+            'section': bundle['section'],
+            'elements': [], 'sets': [], 'surfaces': []}
+
+    for i, etype in enumerate(sorted(bundle['elements'])):
+        elems = bundle['elements'][etype]
+        info['elements'].append(etype)
+        arrays['elem' + str(i) + '_labels'] = np.asarray(elems['labels'], dtype=np.int64)
+        arrays['elem' + str(i) + '_conn'] = np.asarray(elems['connectivity'], dtype=np.int64)
+
+    for i, set_name in enumerate(sorted(bundle['sets'])):
+        info['sets'].append(set_name)
+        for key in ['nodes', 'elements']:
+            arrays['set' + str(i) + '_' + key] = np.asarray(bundle['sets'][set_name][key],
+                                                            dtype=np.int64)
+
+    for i, surf_name in enumerate(sorted(bundle['surfaces'])):
+        faces = sorted(bundle['surfaces'][surf_name])
+        info['surfaces'].append([surf_name, faces])
+        for face_nr in faces:
+            arrays['surf' + str(i) + '_face' + str(face_nr)] = np.asarray(
+                bundle['surfaces'][surf_name][face_nr], dtype=np.int64)
+
+    arrays['info'] = np.frombuffer(json.dumps(info).encode('utf-8'), dtype=np.uint8)
+
+    np.savez(filename, **arrays)
+
+
+def read(filename):
+    """Load the mesh bundle from filename
+
+    :param filename: The name of the file to be loaded
+    :type filename: str
+
+    :returns: The mesh bundle, see module description
+    :rtype: dict
+
+    """
+    with np.load(filename) as arrays:
+        info = json_io.u_to_str_in_dict(json.loads(arrays['info'].tobytes().decode('utf-8')))
+        if info['version'] != BUNDLE_VERSION:
+            raise ValueError('Mesh bundle version ' + str(info['version']) + ' not supported')
+
+        bundle = {'node_labels': arrays['node_labels'],
+                  'node_coords': arrays['node_coords'],
+                  'material': info['material'],
+                  'section': info['section'],
+                  'elements': {}, 'sets': {}, 'surfaces': {}}
+
+        for i, etype in enumerate(info['elements']):
+            bundle['elements'][str(etype)] = {'labels': arrays['elem' + str(i) + '_labels'],
+                                              'connectivity': arrays['elem' + str(i) + '_conn']}
+
+        for i, set_name in enumerate(info['sets']):
+            bundle['sets'][str(set_name)] = {key: arrays['set' + str(i) + '_' + key]
+                                             for key in ['nodes', 'elements']}
+
+        for i, (surf_name, faces) in enumerate(info['surfaces']):
+            bundle['surfaces'][str(surf_name)] = {face_nr: arrays['surf' + str(i) + '_face'
+                                                                  + str(face_nr)]
+                                                  for face_nr in faces}
+
+    return bundle
+
+
+def get_inp_part_str(bundle, part_name):
+    """Get the part definition in the Abaqus input file format
+
+    :param bundle: The mesh bundle, see module description
+    :type bundle: dict
+
+    :param part_name: The name of the part
+    :type part_name: str
+
+    :returns: The part definition, starting with `*Part` and ending
+              with `*End Part`. Note that the material, named
+              bundle['section']['material'], must be defined in the
+              model data.
+    :rtype: str
+
+    """
+
+    lines = ['*Part, name=' + part_name, '*Node']
+    node_data = np.column_stack((bundle['node_labels'], bundle['node_coords']))
+    lines.extend(['%d, %.12g, %.12g, %.12g' % tuple(row) for row in node_data])
+
+    all_elset = '_' + part_name + '_ALL'
+    for etype in sorted(bundle['elements']):
+        elems = bundle['elements'][etype]
+        lines.append('*Element, type=' + etype + ', elset=' + all_elset)
+        elem_data = np.column_stack((elems['labels'], elems['connectivity']))
+        lines.extend([get_data_lines(row) for row in elem_data])
+
+    for set_name in sorted(bundle['sets']):
+        for key, kw in zip(['nodes', 'elements'], ['*Nset, nset=', '*Elset, elset=']):
+            labels = bundle['sets'][set_name][key]
+            if len(labels) > 0:
+                lines.append(kw + set_name)
+                lines.append(get_data_lines(labels))
+
+    for surf_name in sorted(bundle['surfaces']):
+        surf = bundle['surfaces'][surf_name]
+        surf_lines = []
+        for face_nr in sorted(surf):
+            if len(surf[face_nr]) > 0:
+                elset = '_' + surf_name + '_S' + str(face_nr)
+                lines.append('*Elset, elset=' + elset + ', internal')
+                lines.append(get_data_lines(surf[face_nr]))
+                surf_lines.append(elset + ', S' + str(face_nr))
+        lines.append('*Surface, type=ELEMENT, name=' + surf_name)
+        lines.extend(surf_lines)
+
+    lines.append('** Section: ' + bundle['section']['name'])
+    lines.append('*Solid Section, elset=' + all_elset + ', material='
+                 + bundle['section']['material'])
+    lines.append(',')
+    lines.append('*End Part')
+
+    return '\n'.join(lines) + '\n'
+
+
+def get_data_lines(values, max_per_line=16):
+    """Format integer values as comma separated data lines with at
+    most max_per_line values per line.
+
+    :param values: The values to format
+    :type values: np.array (int)
+
+    :param max_per_line: Maximum number of values per line (Abaqus
+                         allows at most 16)
+    :type max_per_line: int
+
+    :returns: The data lines (without trailing newline)
+    :rtype: str
+
+    """
+    values = [str(v) for v in np.asarray(values, dtype=np.int64).tolist()]
+    rows = [', '.join(values[i:i+max_per_line]) for i in range(0, len(values), max_per_line)]
+
+    # A line ending with a comma continues the element definition
+    return ',\n'.join(rows)
@@ -18,6 +18,7 @@ rail_part = 'RAIL'
 wheel_inst = wheel_part
 rail_inst = rail_part
 rail_sect = rail_part
+rail_material = 'RAIL_MATERIAL'
 rail_shadow_sect = 'SHADOW_RAIL'
 wheel_dummy_contact_sect = 'WHEEL_DUMMY_CONTACT'
 
@@ -117,11 +118,41 @@ def get_step_release(cycle_nr=2):
     return 'release_' + cycle_str(cycle_nr)
 
 
+def get_steps_inbetween(cycle_nr=2, merge_return=False):
+    """ Get the names of the steps between the rolling steps in cycle
+    cycle_nr-1 and cycle_nr. If merge_return, the load is reapplied in
+    the return step, and there is no reapply step. This corresponds to
+    the cycle layouts in `usub/step_type_mod.f90`.
+    
+    :param cycle_nr: The cycle number
+    :type cycle_nr: int
+    
+    :param merge_return: Use the merged cycle layout
+    :type merge_return: bool
+    
+    :returns: The step names
+    :rtype: list[ str ]
+    """
+    if merge_return:
+        return [get_step_return(cycle_nr), get_step_release(cycle_nr)]
+    else:
+        return [get_step_return(cycle_nr), get_step_reapply(cycle_nr), 
+                get_step_release(cycle_nr)]
+
+
 # File names
 ## Rolover files
 rollover_settings_file = 'rollover_settings.json'
 loading_file = 'load_param.txt'
+load_table_file = 'load_table.bin'
+convergence_file = 'convergence.txt'
+convergence_log_file = 'convergence_log.csv'
+cycle_schedule_file = 'cycle_schedule.json'
+odb_output_schedule_file = 'odb_output_schedule.json'
 rp_coord_file = 'rp_coord.txt'
+usub_state_file = 'usub_state.txt'
+restart_chain_folder = 'restart_chain'
+restart_chain_file = 'restart_chain.json'
 
 ## Rail files
 rail_settings_file = 'rail_settings.json'
@@ -138,4 +169,7 @@ uel_coordinates_file = 'uel_coordinates.npy'
 uel_elements_file = 'uel_elements.npy'
 
 ## Rail substructure
-substructure_interface_mesh_file = 'interface_mesh.json'
\ No newline at end of file
+substructure_interface_mesh_file = 'interface_mesh.json'
+rail_sub_cache_folder = ':/rail_substructure_cache'
+rail_sub_cache_entry_file = 'cache_entry.json'
+rail_sub_cache_stats_file = 'cache_stats.json'
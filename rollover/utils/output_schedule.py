@@ -0,0 +1,311 @@
+"""This module compiles the field output requests, specified by
+`"field_output"` in the rollover settings, to `*Output, field` blocks
+for each step. Instead of creating field output requests in the model
+database for each output cycle, the compiled requests are saved to the
+file `rollover.utils.naming_mod.odb_output_schedule_file` by
+:py:func:`rollover.three_d.utils.odb_output.add`. The output blocks are
+then injected in the input file by :py:func:`inject` in a single pass
+after the input file has been written (and expanded, see
+:py:mod:`rollover.utils.inp_cycles`).
+
+The `cycle` for each request is either an integer, `n`, giving output
+every `n` cycles starting with cycle 1, or a list of `[start, n]`
+pairs. In the latter case, output is given every `n` cycles starting
+from the cycle `start` until the next `start`. For example,
+`[[1, 1], [11, 10], [101, 100]]` gives output the first 10 cycles,
+thereafter every 10th cycle until cycle 100, and thereafter every 100th
+cycle.
+
+A request is active in the rolling step of each output cycle. The
+steps before the first rolling step are active if cycle 1 is an output
+cycle. The steps between two rolling steps (return, reapply and
+release) are active if both rolling steps are active. Output blocks are
+only written for steps where the active requests change, using
+`op=NEW` to remove the requests of previous steps.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import os, shutil
+from bisect import bisect_right
+
+from rollover.utils import json_io
+from rollover.utils import naming_mod as names
+
+# Variables written with *Node Output, *Contact Output, and all others with *Element Output
+NODE_VARIABLES = ['U', 'UT', 'UR', 'V', 'VT', 'VR', 'A', 'AT', 'AR', 'RF', 'RT', 'RM',
+                  'CF', 'CM', 'COORD', 'NT', 'TF', 'VF', 'POR']
+# Contact variables, with the output variable that contains them
+CONTACT_VARIABLES = {'CSTRESS': 'CSTRESS', 'CPRESS': 'CSTRESS', 'CSHEAR': 'CSTRESS',
+                     'CSHEAR1': 'CSTRESS', 'CSHEAR2': 'CSTRESS', 'CDSTRESS': 'CDSTRESS',
+                     'CDISP': 'CDISP', 'COPEN': 'CDISP', 'CSLIP': 'CDISP', 'CSLIP1': 'CDISP',
+                     'CSLIP2': 'CDISP', 'CFORCE': 'CFORCE', 'CNORMF': 'CFORCE',
+                     'CSHEARF': 'CFORCE', 'CSTATUS': 'CSTATUS', 'CNAREA': 'CNAREA',
+                     'CFN': 'CFN', 'CFS': 'CFS', 'CAREA': 'CAREA'}
+LAST_INCREMENT_FREQ = 99999999  # Output at the end of the step only
+
+
+def compile_requests(field_output_requests, set_info):
+    """Compile the field output requests
+
+    :param field_output_requests: The field output requests, see
+                                  :py:func:`rollover.three_d.utils.odb_output.add`
+    :type field_output_requests: dict
+
+    :param set_info: Dictionary with an item for each `set` in the
+                     requests. Each item is a dictionary with the fields
+                     'nset' and 'elset', the set names to use in the
+                     input file. None gives the entire model, and False
+                     that no output of that type should be given.
+    :type set_info: dict
+
+    :returns: Dictionary with an item for each request. Each item is a
+              dictionary with the fields 'frequency' (int), 'body'
+              (the output request lines after `*Output, field`), and
+              'cycle' (list of [start, n] pairs)
+    :rtype: dict
+
+    Contact variables (see `CONTACT_VARIABLES`) are written with
+    `*Contact Output`, where components (e.g. CPRESS) are replaced by
+    the output variable that contains them (e.g. CSTRESS).
+
+    """
+    compiled = {}
+    for foname in field_output_requests:
+        fout = field_output_requests[foname]
+        info = set_info[fout['set']]
+        node_var = [v for v in fout['var'] if v in NODE_VARIABLES]
+        contact_var = []
+        for v in fout['var']:
+            if v in CONTACT_VARIABLES and CONTACT_VARIABLES[v] not in contact_var:
+                contact_var.append(CONTACT_VARIABLES[v])
+        elem_var = [v for v in fout['var'] if v not in NODE_VARIABLES + list(CONTACT_VARIABLES)]
+        if info['elset'] is False and len(elem_var) > 0:
+            raise ValueError('Element variables ' + str(elem_var) + ' requested for "'
+                             + foname + '", but set "' + fout['set'] + '" has no elements')
+
+        body = ''
+        if len(node_var) > 0:
+            body += '*Node Output' + get_set_str('nset', info['nset']) + '\n'
+            body += ', '.join(node_var) + '\n'
+        if len(elem_var) > 0:
+            body += '*Element Output' + get_set_str('elset', info['elset']) + ', directions=YES\n'
+            body += ', '.join(elem_var) + '\n'
+        if len(contact_var) > 0:
+            body += '*Contact Output' + get_set_str('nset', info['nset']) + '\n'
+            body += ', '.join(contact_var) + '\n'
+
+        freq = LAST_INCREMENT_FREQ if fout['freq'] == -1 else fout['freq']
+        compiled[foname] = {'frequency': freq,
+                            'body': body,
+                            'cycle': get_cycle_ranges(fout['cycle'])}
+
+    return compiled
+
+
+def get_set_str(set_type, set_name):
+    """Get the set parameter for output keywords
+
+    :param set_type: 'nset' or 'elset'
+    :type set_type: str
+
+    :param set_name: The set name, None for the entire model
+    :type set_name: str
+
+    :returns: The parameter string, e.g. ', nset=SET_NAME'
+    :rtype: str
+
+    """
+    return '' if set_name is None else ', ' + set_type + '=' + set_name
+
+
+def get_cycle_ranges(cycle):
+    """Convert the cycle specification to a list of [start, n] pairs
+
+    :param cycle: The cycle specification, see module description
+    :type cycle: int / list[ list[ int ] ]
+
+    :returns: List of [start, n] pairs, with the first start equal to 1
+    :rtype: list[ list[ int ] ]
+
+    """
+    if isinstance(cycle, int):
+        cycle_ranges = [[1, cycle]]
+    else:
+        cycle_ranges = [[int(c[0]), int(c[1])] for c in cycle]
+
+    starts = [c[0] for c in cycle_ranges]
+    if starts[0] != 1 or any([s1 >= s2 for s1, s2 in zip(starts[:-1], starts[1:])]):
+        raise ValueError('The cycle ranges must start with cycle 1 and be increasing, got '
+                         + str(starts))
+    if any([c[1] < 1 for c in cycle_ranges]):
+        raise ValueError('The number of cycles between output must be positive')
+
+    return cycle_ranges
+
+
+def is_output_cycle(cycle_nr, cycle_ranges):
+    """Check if output should be given in cycle `cycle_nr`
+
+    :param cycle_nr: The cycle number
+    :type cycle_nr: int
+
+    :param cycle_ranges: List of [start, n] pairs, see
+                         :py:func:`get_cycle_ranges`
+    :type cycle_ranges: list[ list[ int ] ]
+
+    :returns: True if output should be given
+    :rtype: bool
+
+    """
+    ind = bisect_right([c[0] for c in cycle_ranges], cycle_nr) - 1
+    if ind < 0:
+        return False
+    start, n = cycle_ranges[ind]
+    return (cycle_nr - start) % n == 0
+
+
+def is_active(step_name, cycle_ranges):
+    """Check if a request with `cycle_ranges` is active in the step
+    `step_name`, see module description.
+
+    :param step_name: The step name
+    :type step_name: str
+
+    :param cycle_ranges: List of [start, n] pairs, see
+                         :py:func:`get_cycle_ranges`
+    :type cycle_ranges: list[ list[ int ] ]
+
+    :returns: True if active, None if the step is not a rollover step
+    :rtype: bool
+
+    """
+    if step_name in [names.step1, names.step2]:
+        return is_output_cycle(1, cycle_ranges)
+
+    step_type, sep, cycle_str = step_name.rpartition('_')
+    if not cycle_str.isdigit():
+        return None
+
+    cycle_nr = int(cycle_str)
+    if step_name == names.get_step_rolling(cycle_nr):
+        return is_output_cycle(cycle_nr, cycle_ranges)
+    elif step_name in [names.get_step_return(cycle_nr), names.get_step_reapply(cycle_nr),
+                       names.get_step_release(cycle_nr)]:
+        return is_output_cycle(cycle_nr-1, cycle_ranges) and is_output_cycle(cycle_nr,
+                                                                             cycle_ranges)
+    return None
+
+
+def get_step_output_str(active_requests, compiled):
+    """Get the output blocks for a step
+
+    :param active_requests: Names of the active requests
+    :type active_requests: list[ str ]
+
+    :param compiled: The compiled requests, see
+                     :py:func:`compile_requests`
+    :type compiled: dict
+
+    :returns: The output blocks to add to the step
+    :rtype: str
+
+    """
+    if len(active_requests) == 0:
+        return '*Output, field, op=NEW, frequency=0\n'
+
+    output_str = ''
+    for nr, foname in enumerate(active_requests):
+        op_str = ', op=NEW' if nr == 0 else ''
+        output_str += ('** FIELD OUTPUT: ' + foname + '\n*Output, field' + op_str
+                       + ', frequency=%0.0f\n' % compiled[foname]['frequency']
+                       + compiled[foname]['body'])
+
+    return output_str
+
+
+def save(compiled, schedule_file=names.odb_output_schedule_file):
+    """Save the compiled requests to the schedule file
+
+    :param compiled: The compiled requests, see
+                     :py:func:`compile_requests`
+    :type compiled: dict
+
+    :param schedule_file: The name of the schedule file
+    :type schedule_file: str
+
+    :returns: None
+    :rtype: None
+
+    """
+    json_io.save(schedule_file, compiled)
+
+
+def inject(inp_file, schedule_file=names.odb_output_schedule_file, out_file=None):
+    """Add the scheduled output blocks to the steps in the input file
+
+    :param inp_file: The name of the input file
+    :type inp_file: str
+
+    :param schedule_file: The name of the schedule file, see
+                          :py:func:`save`
+    :type schedule_file: str
+
+    :param out_file: The name of the resulting input file. If None,
+                     `inp_file` is overwritten.
+    :type out_file: str
+
+    :returns: The number of steps to which output blocks were added
+    :rtype: int
+
+    """
+    compiled = json_io.read(schedule_file)
+    request_names = sorted(compiled.keys())
+    tmp_file = inp_file + '.tmp' if out_file is None else out_file
+
+    num_added = 0
+    prev_active = []    # Default requests are deleted in the model
+    step_active = []
+    with open(inp_file, 'r') as inp, open(tmp_file, 'w') as out:
+        for line in inp:
+            lower_line = line.lower()
+            if lower_line.startswith('*step,'):
+                step_name = get_step_name(line)
+                active = [is_active(step_name, compiled[foname]['cycle'])
+                          for foname in request_names]
+                if None in active:
+                    step_active = prev_active   # Not a rollover step, keep the requests
+                else:
+                    step_active = [foname for foname, a in zip(request_names, active) if a]
+            elif lower_line.startswith('*end step'):
+                if step_active != prev_active:
+                    out.write(get_step_output_str(step_active, compiled))
+                    num_added += 1
+                prev_active = step_active
+            out.write(line)
+
+    if out_file is None:
+        os.remove(inp_file)
+        shutil.move(tmp_file, inp_file)
+
+    return num_added
+
+
+def get_step_name(step_line):
+    """Get the step name from the `*Step` keyword line
+
+    :param step_line: The keyword line
+    :type step_line: str
+
+    :returns: The step name
+    :rtype: str
+
+    """
+    for param in step_line.split(',')[1:]:
+        key, sep, value = param.partition('=')
+        if key.strip().lower() == 'name':
+            return value.strip()
+
+    raise ValueError('No step name in "' + step_line.strip() + '"')
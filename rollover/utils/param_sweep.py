@@ -0,0 +1,649 @@
+"""This module runs a parameter study (sweep) of rollover simulations on
+the local computer. The sweep is described by a sweep file (json) in
+the study folder, containing
+
+- ``"rollover_settings"`` (mandatory): Path to the base rollover
+  settings file, see :doc:`/using_script`
+- ``"rail_settings"`` (optional): Path to a rail settings file. If
+  given, the rail is created by `create_rail_3d.py`, and the
+  ``"model_file"`` in the rollover settings is replaced by the created
+  rail (the mesh bundle if ``"mesh_bundle"`` is true, else the .cae
+  file).
+- ``"wheel_settings"`` (optional): Path to a wheel settings file. If
+  given, the wheel is created by `create_wheel_3d.py`, and the wheel
+  ``"folder"`` in the rollover settings is replaced by the created
+  wheel folder.
+- ``"grid"`` (optional): The values of each parameter to vary, all
+  combinations are run. E.g.
+  ``{"loading.slip": [[0.01], [0.02]], "contact.friction_coefficient": [0.3, 0.5]}``
+- ``"variants"`` (optional): A list of parameter combinations, e.g.
+  ``[{"loading.vertical_load": [1.e5], "loading.speed": [1.e4]}, ...]``.
+  If both ``"variants"`` and ``"grid"`` are given, each variant is
+  combined with each grid point.
+- ``"job_cpus"`` (optional): The number of cpus for each Abaqus job,
+  defaults to 1.
+
+Paths are relative to the folder of the sweep file. Parameters are given
+by their keys joined by dots, as in
+:py:func:`rollover.utils.study_postprocess.get_settings_params`. The
+prefixes ``rail_settings.`` and ``wheel_settings.`` give parameters in
+the rail and wheel settings, e.g. ``"wheel_settings.mesh_sizes"``, all
+other parameters are in the rollover settings.
+
+:py:func:`setup` creates one task for each step of the workflow:
+
+1. ``rail`` and ``wheel``: Create the rail and wheel in the folder
+   `ARTIFACT_FOLDER`/<kind>_<key>, where the key is the hash of the
+   content of the rail or wheel settings, including the content of
+   files they refer to (e.g. the profile sketch). Variants with the same
+   rail or wheel settings share the created rail or wheel, which is
+   only created once.
+2. ``model``: Create the input file in the variant folder
+   `VARIANT_FOLDER`/v_<key> with `create_rollover_3d.py`, where the key
+   is the hash of the variant's rollover settings.
+3. ``job``: Run the Abaqus job in the variant folder.
+
+:py:func:`run` runs the tasks on a process pool. A task is started when
+the tasks it depends on are done, and when the number of used cpus and
+license tokens (if `max_tokens` is given) allow it. Each job uses
+`job_cpus` cpus and :py:func:`get_tokens` tokens, and each cae task 1
+cpu and `cae_tokens` tokens. Hence, the study throughput scales with
+the number of cores (and tokens). The status of each task is saved in
+the SQLite database `SWEEP_DB_FILE` in the study folder. Calling
+:py:func:`run` again continues the study: Done tasks are skipped, while
+failed tasks and tasks that were interrupted are run again. Use the
+stand-in command (:py:func:`rollover.abaqus_standin.command.get_cmd`)
+instead of the abaqus command to test a sweep without Abaqus. The
+variant folders can be post-processed by
+:py:mod:`rollover.utils.study_postprocess`.
+
+This module does not require Abaqus, but :py:func:`run` requires the
+abaqus command.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import os, json, time, copy, hashlib, itertools, sqlite3, subprocess
+import multiprocessing
+
+from rollover.utils import json_io
+from rollover.utils import naming_mod as names
+from rollover.utils import restart_chain
+from rollover.utils.study_postprocess import get_checksum
+
+SWEEP_DB_FILE = 'sweep.sqlite'
+ARTIFACT_FOLDER = 'artifacts'
+VARIANT_FOLDER = 'variants'
+TASK_LOG_FILE = 'sweep_task.log'
+KEY_LENGTH = 12     # Number of hash characters used in folder names
+TASK_KINDS = ['rail', 'wheel', 'model', 'job']
+SCRIPTS = {'rail': 'create_rail_3d.py', 'wheel': 'create_wheel_3d.py',
+           'model': 'create_rollover_3d.py'}
+PREP_SETTINGS = {'rail': names.rail_settings_file, 'wheel': names.wheel_settings_file}
+PREP_PARAMS = {'rail': 'rail.model_file', 'wheel': 'wheel.folder'}   # In rollover settings
+
+TASK_COLUMNS = ['key', 'kind', 'folder', 'depends', 'cpus', 'tokens', 'status',
+                'attempts', 'return_code', 'start_time', 'end_time']
+TASKS_TABLE = ('CREATE TABLE IF NOT EXISTS tasks (key TEXT PRIMARY KEY, kind TEXT, '
+               + 'folder TEXT, depends TEXT, cpus INTEGER, tokens INTEGER, status TEXT, '
+               + 'attempts INTEGER, return_code INTEGER, start_time REAL, end_time REAL)')
+VARIANTS_TABLE = ('CREATE TABLE IF NOT EXISTS variants (key TEXT PRIMARY KEY, '
+                  + 'folder TEXT, params TEXT, rail TEXT, wheel TEXT)')
+
+
+def get_tokens(cpus):
+    """Get the number of Abaqus analysis license tokens required to run
+    a job on `cpus` cpus, int(5*cpus^0.422)
+
+    :param cpus: The number of cpus
+    :type cpus: int
+
+    :returns: The number of tokens
+    :rtype: int
+
+    """
+    return int(5*cpus**0.422)
+
+
+def get_variants(grid=None, variants=None):
+    """Get the parameters of each variant in the sweep
+
+    :param grid: The values of each parameter, all combinations are
+                 included. The parameters are sorted by name, and the
+                 last parameter varies fastest.
+    :type grid: dict
+
+    :param variants: The parameter combinations, each is combined with
+                     each combination from `grid`.
+    :type variants: list[ dict ]
+
+    :returns: The parameters of each variant
+    :rtype: list[ dict ]
+
+    """
+    grid = {} if grid is None else grid
+    variants = [{}] if variants is None or len(variants) == 0 else variants
+    keys = sorted(grid.keys())
+    all_params = []
+    for variant in variants:
+        for values in itertools.product(*[grid[key] for key in keys]):
+            params = dict(variant)
+            params.update(dict(zip(keys, values)))
+            all_params.append(params)
+
+    return all_params
+
+
+def set_param(settings, key, value):
+    """Set the parameter `key` in the (nested) settings
+
+    :param settings: The settings to modify
+    :type settings: dict
+
+    :param key: The parameter name, with the keys of each level joined
+                by dots, e.g. 'loading.vertical_load'
+    :type key: str
+
+    :param value: The new value
+    :type value: object
+
+    :returns: None
+    :rtype: None
+
+    """
+    keys = key.split('.')
+    for sub_key in keys[:-1]:
+        settings = settings.setdefault(sub_key, {})
+    settings[keys[-1]] = value
+
+
+def get_variant_settings(base_settings, params):
+    """Get the rollover, rail and wheel settings of a variant
+
+    :param base_settings: The base settings with the keys 'rollover',
+                          'rail' and 'wheel' (None if not created by
+                          the sweep)
+    :type base_settings: dict
+
+    :param params: The parameters of the variant, see
+                   :py:func:`get_variants`
+    :type params: dict
+
+    :returns: The settings with the same keys as `base_settings`
+    :rtype: dict
+
+    """
+    settings = copy.deepcopy(base_settings)
+    for key, value in params.items():
+        kind, sep, sub_key = key.partition('_settings.')
+        if len(sep) > 0 and kind in PREP_SETTINGS:
+            if settings[kind] is None:
+                raise ValueError('"' + key + '" requires "' + kind + '_settings" in the '
+                                 + 'sweep file')
+            set_param(settings[kind], sub_key, value)
+        else:
+            set_param(settings['rollover'], key, value)
+
+    return settings
+
+
+def resolve_files(settings, base_dir):
+    """Get the settings where each string value that is the path
+    (relative to `base_dir`) of an existing file or folder is replaced
+    by its absolute path, and the content key of the settings (the sha1
+    hash of the settings, with the checksum of each file instead of its
+    path).
+
+    :param settings: The settings
+    :type settings: dict
+
+    :param base_dir: The folder to which paths are relative
+    :type base_dir: str
+
+    :returns: The resolved settings, and the content key
+    :rtype: tuple( dict, str )
+
+    """
+    def resolve(value, use_checksum):
+        if isinstance(value, dict):
+            return dict([(k, resolve(v, use_checksum)) for k, v in value.items()])
+        elif isinstance(value, list):
+            return [resolve(v, use_checksum) for v in value]
+        elif isinstance(value, str) and os.path.exists(os.path.join(base_dir, value)):
+            path = os.path.abspath(os.path.join(base_dir, value))
+            if use_checksum and os.path.isfile(path):
+                return 'sha1:' + get_checksum(path)
+            return path
+        return value
+
+    content = json.dumps(resolve(settings, True), sort_keys=True)
+    return resolve(settings, False), hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def get_cmd(kind, abaqus_cmd, usub=None, cpus=1):
+    """Get the command that runs a task
+
+    :param kind: The kind of task, see `TASK_KINDS`
+    :type kind: str
+
+    :param abaqus_cmd: The command to run abaqus
+    :type abaqus_cmd: str
+
+    :param usub: Path to the compiled user subroutine (job only)
+    :type usub: str
+
+    :param cpus: The number of cpus (job only)
+    :type cpus: int
+
+    :returns: The command
+    :rtype: str
+
+    """
+    if kind == 'job':
+        cmd = abaqus_cmd + ' job=' + names.job + ' input=' + names.job + '.inp'
+        if usub is not None:
+            cmd += ' user=' + usub
+        return cmd + ' cpus=' + str(cpus) + ' interactive ask_delete=OFF'
+
+    scripts_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__)))), 'scripts_abq')
+    return abaqus_cmd + ' cae noGUI="' + os.path.join(scripts_path, SCRIPTS[kind]) + '"'
+
+
+def is_task_done(kind, folder):
+    """Check that a task has created its results
+
+    :param kind: The kind of task, see `TASK_KINDS`
+    :type kind: str
+
+    :param folder: The task folder
+    :type folder: str
+
+    :returns: True if the results exist
+    :rtype: bool
+
+    """
+    if kind in PREP_SETTINGS:
+        return os.path.exists(get_prep_result(kind, folder))
+    elif kind == 'model':
+        return os.path.exists(os.path.join(folder, names.job + '.inp'))
+    else:
+        return restart_chain.is_completed(os.path.join(folder, names.job))
+
+
+def get_prep_result(kind, folder):
+    """Get the path of the rail model file or wheel folder created by
+    a rail or wheel task
+
+    :param kind: 'rail' or 'wheel'
+    :type kind: str
+
+    :param folder: The task folder, containing the settings file
+    :type folder: str
+
+    :returns: The absolute path
+    :rtype: str
+
+    """
+    settings = json_io.read(os.path.join(folder, PREP_SETTINGS[kind]))
+    if kind == 'wheel':
+        return os.path.abspath(os.path.join(folder, settings['wheel_name']))
+    rail_name = settings['rail_name']
+    if rail_name.endswith('.cae'):
+        rail_name = rail_name[:-4]
+    suffix = '.npz' if settings.get('mesh_bundle', False) else '.cae'
+    return os.path.abspath(os.path.join(folder, rail_name + suffix))
+
+
+def connect(study_dir):
+    """Open the sweep database of a study, and create the tables if
+    required
+
+    :param study_dir: The study folder
+    :type study_dir: str
+
+    :returns: The database connection
+    :rtype: sqlite3.Connection
+
+    """
+    db = sqlite3.connect(os.path.join(study_dir, SWEEP_DB_FILE))
+    db.execute(TASKS_TABLE)
+    db.execute(VARIANTS_TABLE)
+    db.commit()
+    return db
+
+
+def add_task(db, key, kind, folder, depends, cpus, tokens):
+    """Add a task to the database, unless it already exists
+
+    :param db: The sweep database
+    :type db: sqlite3.Connection
+
+    :param key: The task key
+    :type key: str
+
+    :param kind: The kind of task, see `TASK_KINDS`
+    :type kind: str
+
+    :param folder: The folder in which the task runs (relative to the
+                   study folder)
+    :type folder: str
+
+    :param depends: The keys of the tasks that must be done first
+    :type depends: list[ str ]
+
+    :param cpus: The number of cpus used by the task
+    :type cpus: int
+
+    :param tokens: The number of license tokens used by the task
+    :type tokens: int
+
+    :returns: None
+    :rtype: None
+
+    """
+    db.execute('INSERT OR IGNORE INTO tasks (key, kind, folder, depends, cpus, tokens, '
+               + 'status, attempts) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+               (key, kind, folder, json.dumps(depends), cpus, tokens, 'pending', 0))
+    db.execute('UPDATE tasks SET cpus=?, tokens=? WHERE key=?', (cpus, tokens, key))
+
+
+def setup(sweep_file, cae_tokens=0):
+    """Create the rail and wheel settings, the variant folders with
+    their rollover settings, and the tasks in the sweep database. The
+    study folder is the folder of `sweep_file`. Existing tasks and
+    their status are kept, such that parameters can be added to the
+    sweep file and :py:func:`setup` called again.
+
+    :param sweep_file: The sweep file, see module description
+    :type sweep_file: str
+
+    :param cae_tokens: The number of license tokens used by each cae
+                       task (rail, wheel and model)
+    :type cae_tokens: int
+
+    :returns: The keys of the variants in the sweep
+    :rtype: list[ str ]
+
+    """
+    study_dir = os.path.dirname(os.path.abspath(sweep_file))
+    sweep = json_io.read(sweep_file)
+    job_cpus = sweep.get('job_cpus', 1)
+    base_settings = {}
+    for kind, file_key in [('rollover', 'rollover_settings'), ('rail', 'rail_settings'),
+                           ('wheel', 'wheel_settings')]:
+        settings_file = sweep.get(file_key, None)
+        if settings_file is None and kind != 'rollover':
+            base_settings[kind] = None
+        else:
+            base_settings[kind] = json_io.read(os.path.join(study_dir, settings_file))
+
+    db = connect(study_dir)
+    variant_keys = []
+    for params in get_variants(sweep.get('grid', None), sweep.get('variants', None)):
+        settings = get_variant_settings(base_settings, params)
+        depends = []
+        prep_keys = {}
+        results = {}
+        for kind in ['rail', 'wheel']:
+            if settings[kind] is None:
+                prep_keys[kind] = None
+                continue
+            prep_settings, prep_key = resolve_files(settings[kind], study_dir)
+            prep_keys[kind] = prep_key[:KEY_LENGTH]
+            folder = os.path.join(ARTIFACT_FOLDER, kind + '_' + prep_keys[kind])
+            if not os.path.exists(os.path.join(study_dir, folder)):
+                os.makedirs(os.path.join(study_dir, folder))
+                json_io.save(os.path.join(study_dir, folder, PREP_SETTINGS[kind]),
+                             prep_settings)
+            task_key = kind + ':' + prep_keys[kind]
+            add_task(db, task_key, kind, folder, [], 1, cae_tokens)
+            depends.append(task_key)
+            results[kind] = get_prep_result(kind, os.path.join(study_dir, folder))
+            # Use the task key in the variant key, as the created files
+            # (and their checksums) may not exist yet
+            set_param(settings['rollover'], PREP_PARAMS[kind], task_key)
+
+        rollover_settings, key = resolve_files(settings['rollover'], study_dir)
+        key = key[:KEY_LENGTH]
+        for kind in results:
+            set_param(rollover_settings, PREP_PARAMS[kind], results[kind])
+        folder = os.path.join(VARIANT_FOLDER, 'v_' + key)
+        if not os.path.exists(os.path.join(study_dir, folder)):
+            os.makedirs(os.path.join(study_dir, folder))
+            json_io.save(os.path.join(study_dir, folder, names.rollover_settings_file),
+                         rollover_settings)
+        db.execute('INSERT OR IGNORE INTO variants (key, folder, params, rail, wheel) '
+                   + 'VALUES (?, ?, ?, ?, ?)', (key, folder, json.dumps(params, sort_keys=True),
+                                                prep_keys['rail'], prep_keys['wheel']))
+        add_task(db, 'model:' + key, 'model', folder, depends, 1, cae_tokens)
+        add_task(db, 'job:' + key, 'job', folder, ['model:' + key], job_cpus,
+                 get_tokens(job_cpus))
+        variant_keys.append(key)
+
+    db.commit()
+    db.close()
+    return variant_keys
+
+
+def get_tasks(db):
+    """Get all tasks in the sweep database, ordered by kind (as in
+    `TASK_KINDS`) and key
+
+    :param db: The sweep database
+    :type db: sqlite3.Connection
+
+    :returns: The tasks, each with the keys in `TASK_COLUMNS`
+    :rtype: list[ dict ]
+
+    """
+    rows = db.execute('SELECT ' + ', '.join(TASK_COLUMNS) + ' FROM tasks').fetchall()
+    tasks = [dict(zip(TASK_COLUMNS, row)) for row in rows]
+    for task in tasks:
+        task['depends'] = json.loads(task['depends'])
+
+    return sorted(tasks, key=lambda t: (TASK_KINDS.index(t['kind']), t['key']))
+
+
+def set_status(db, task, status, **kwargs):
+    """Set the status (and other columns) of a task in the database
+
+    :param db: The sweep database
+    :type db: sqlite3.Connection
+
+    :param task: The task, is also updated
+    :type task: dict
+
+    :param status: The new status: 'pending', 'running', 'done',
+                   'failed' or 'blocked' (a task it depends on failed)
+    :type status: str
+
+    :param kwargs: Other columns to set, see `TASK_COLUMNS`
+    :type kwargs: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    task['status'] = status
+    task.update(kwargs)
+    columns = ['status'] + sorted(kwargs.keys())
+    db.execute('UPDATE tasks SET ' + ', '.join([c + '=?' for c in columns]) + ' WHERE key=?',
+               tuple([task[c] for c in columns]) + (task['key'],))
+    db.commit()
+
+
+def run_command(cmd, folder):
+    """Run a command in a folder, writing the output to the log file
+    `TASK_LOG_FILE` in that folder. Called by the workers of the
+    process pool.
+
+    :param cmd: The command
+    :type cmd: str
+
+    :param folder: The folder in which the command is run
+    :type folder: str
+
+    :returns: The return code of the command
+    :rtype: int
+
+    """
+    with open(os.path.join(folder, TASK_LOG_FILE), 'a') as log:
+        log.write(cmd + '\n')
+        log.flush()
+        return subprocess.call(cmd, shell=True, cwd=folder, stdout=log,
+                               stderr=subprocess.STDOUT)
+
+
+def run(study_dir, abaqus_cmd='abaqus', usub=None, max_cpus=None, max_tokens=None,
+        max_retries=1, poll_time=0.2):
+    """Run the tasks in the sweep database, see module description.
+    :py:func:`setup` must be called first.
+
+    :param study_dir: The study folder
+    :type study_dir: str
+
+    :param abaqus_cmd: The command to run abaqus
+    :type abaqus_cmd: str
+
+    :param usub: Path to the compiled user subroutine
+    :type usub: str
+
+    :param max_cpus: The maximum number of cpus to use, defaults to the
+                     number of cores
+    :type max_cpus: int
+
+    :param max_tokens: The maximum number of license tokens to use,
+                       defaults to no limit
+    :type max_tokens: int
+
+    :param max_retries: The maximum number of retries for a failed task
+    :type max_retries: int
+
+    :param poll_time: The time between checking the running tasks (s)
+    :type poll_time: float
+
+    :returns: The number of tasks with each status
+    :rtype: dict
+
+    """
+    max_cpus = multiprocessing.cpu_count() if max_cpus is None else max_cpus
+    db = connect(study_dir)
+    tasks = get_tasks(db)
+    status = dict([(task['key'], task) for task in tasks])
+    for task in tasks:
+        if task['cpus'] > max_cpus or (max_tokens is not None and task['tokens'] > max_tokens):
+            db.close()
+            raise ValueError('Task "' + task['key'] + '" requires more cpus or tokens '
+                             + 'than available')
+        if task['status'] != 'done':    # Retry failed, blocked and interrupted tasks
+            set_status(db, task, 'pending', attempts=0)
+
+    pool = multiprocessing.Pool(max_cpus)
+    running = {}
+    try:
+        while True:
+            for key in list(running.keys()):
+                if not running[key].ready():
+                    continue
+                task = status[key]
+                try:
+                    return_code = running.pop(key).get()
+                except Exception:
+                    return_code = -1
+                ok = return_code == 0 and is_task_done(task['kind'],
+                                                       os.path.join(study_dir, task['folder']))
+                if ok:
+                    set_status(db, task, 'done', return_code=return_code, end_time=time.time())
+                elif task['attempts'] <= max_retries:
+                    set_status(db, task, 'pending', return_code=return_code)
+                else:
+                    set_status(db, task, 'failed', return_code=return_code,
+                               end_time=time.time())
+                print(key + ': ' + task['status'])
+
+            for task in tasks:
+                if task['status'] == 'pending' and any([status[dep]['status'] in
+                                                        ['failed', 'blocked']
+                                                        for dep in task['depends']]):
+                    set_status(db, task, 'blocked')
+
+            used_cpus = sum([status[key]['cpus'] for key in running])
+            used_tokens = sum([status[key]['tokens'] for key in running])
+            for task in tasks:
+                if task['status'] != 'pending' or any([status[dep]['status'] != 'done'
+                                                       for dep in task['depends']]):
+                    continue
+                if used_cpus + task['cpus'] > max_cpus:
+                    continue
+                if max_tokens is not None and used_tokens + task['tokens'] > max_tokens:
+                    continue
+                cmd = get_cmd(task['kind'], abaqus_cmd, usub, task['cpus'])
+                running[task['key']] = pool.apply_async(
+                    run_command, (cmd, os.path.join(study_dir, task['folder'])))
+                used_cpus += task['cpus']
+                used_tokens += task['tokens']
+                set_status(db, task, 'running', attempts=task['attempts'] + 1,
+                           start_time=time.time(), end_time=None, return_code=None)
+
+            if len(running) == 0:
+                break
+            time.sleep(poll_time)
+    finally:
+        # Interrupted tasks are set to pending by the next call
+        if len(running) > 0:
+            pool.terminate()
+        else:
+            pool.close()
+        pool.join()
+        db.close()
+
+    return get_status_count(tasks)
+
+
+def get_status_count(tasks):
+    """Get the number of tasks with each status
+
+    :param tasks: The tasks, see :py:func:`get_tasks`
+    :type tasks: list[ dict ]
+
+    :returns: The number of tasks (value) with each status (key)
+    :rtype: dict
+
+    """
+    count = {}
+    for task in tasks:
+        count[task['status']] = count.get(task['status'], 0) + 1
+
+    return count
+
+
+def get_status(study_dir):
+    """Get the status of the variants in a study
+
+    :param study_dir: The study folder
+    :type study_dir: str
+
+    :returns: For each variant, a dictionary with the keys 'key',
+              'folder', 'params', and the status of its 'rail',
+              'wheel', 'model' and 'job' tasks (None if the variant has
+              no such task)
+    :rtype: list[ dict ]
+
+    """
+    db = connect(study_dir)
+    try:
+        tasks = dict([(task['key'], task) for task in get_tasks(db)])
+        rows = db.execute('SELECT key, folder, params, rail, wheel FROM variants').fetchall()
+    finally:
+        db.close()
+
+    variants = []
+    for key, folder, params, rail, wheel in sorted(rows, key=lambda r: r[1]):
+        variant = {'key': key, 'folder': folder, 'params': json.loads(params)}
+        for kind, task_key in [('rail', rail), ('wheel', wheel), ('model', key), ('job', key)]:
+            task = tasks.get(kind + ':' + str(task_key), None)
+            variant[kind] = None if task is None else task['status']
+        variants.append(variant)
+
+    return variants
@@ -0,0 +1,495 @@
+"""This module splits a long rollover simulation into a chain of
+restarted Abaqus jobs (chunks), each containing `chunk_size` cycles.
+The first chunk contains the model and the steps up to the rolling step
+of cycle `chunk_size`. The following chunks contain
+`*Restart, read` and the steps of the next `chunk_size` cycles. Each
+chunk ends with a rolling step, and restart data is only written at the
+end of that step (`overlay`), such that the restart files are bounded.
+As each chunk has its own odb, the results of completed chunks can be
+post-processed while later chunks are running.
+
+The user subroutines save their state (mesh info and boundary
+conditions) to `rollover.utils.naming_mod.usub_state_file` at the end
+of each rolling step, and restore it when started from a restart. After
+each completed chunk, the state file is copied to the folder
+`rollover.utils.naming_mod.restart_chain_folder`, together with the
+status file `rollover.utils.naming_mod.restart_chain_file`. The load
+parameter, load table and reference point files are copied to the same folder when
+the chain is created, and restored before each chunk is started. Hence,
+a chain can be resumed from the last completed chunk by calling
+:py:func:`run` again. If the convergence monitor (see
+:py:mod:`rollover.utils.convergence_monitor`) stops the analysis, the
+remaining chunks are not run. With `auto_tune`, the time incrementation
+of the rolling steps in the next chunk is tuned based on the solver
+statistics of the completed chunk, see
+:py:mod:`rollover.utils.solver_stats`.
+
+This module does not require Abaqus, but :py:func:`run` requires the
+abaqus command.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import os, shutil
+
+from rollover.utils import json_io
+from rollover.utils import naming_mod as names
+from rollover.utils import convergence_monitor
+from rollover.utils import solver_stats
+from rollover.utils.output_schedule import get_step_name
+
+RESTART_SUFFIXES = ['.res', '.mdl', '.stt', '.prt']
+COMPLETED_STR = 'THE ANALYSIS HAS COMPLETED SUCCESSFULLY'
+LAST_INCREMENT_FREQ = 99999999  # Restart data at the end of the step only
+USUB_INPUT_FILES = [names.loading_file, names.rp_coord_file, names.load_table_file,
+                    names.convergence_file]
+
+
+def get_chunk_job(chunk_nr, job=names.job):
+    """Get the job name for chunk `chunk_nr`
+
+    :param chunk_nr: The chunk number (starting at 1)
+    :type chunk_nr: int
+
+    :param job: The name of the full job
+    :type job: str
+
+    :returns: The job name
+    :rtype: str
+
+    """
+    return job + '_chunk' + str(chunk_nr).zfill(3)
+
+
+def get_step_names(inp_file):
+    """Get the names of all steps in the input file
+
+    :param inp_file: The name of the input file
+    :type inp_file: str
+
+    :returns: The step names, in order
+    :rtype: list[ str ]
+
+    """
+    step_names = []
+    with open(inp_file, 'r') as inp:
+        for line in inp:
+            if line.lower().startswith('*step,'):
+                step_names.append(get_step_name(line))
+
+    return step_names
+
+
+def get_chunks(step_names, chunk_size):
+    """Get the first and last step of each chunk. Each chunk, except the
+    last, ends with the rolling step of every `chunk_size` cycle.
+
+    :param step_names: The step names in the input file
+    :type step_names: list[ str ]
+
+    :param chunk_size: The number of cycles in each chunk
+    :type chunk_size: int
+
+    :returns: List of chunks. Each chunk is a dictionary with the fields
+              'steps' ([first, last] step number, starting at 1) and
+              'cycles' ([first, last] cycle number)
+    :rtype: list[ dict ]
+
+    """
+    if chunk_size < 1:
+        raise ValueError('The chunk size must be positive')
+
+    rolling_steps = {}
+    for nr, name in enumerate(step_names):
+        cycle_str = name.rpartition('_')[2]
+        if cycle_str.isdigit() and name == names.get_step_rolling(int(cycle_str)):
+            rolling_steps[name] = nr + 1
+    num_cycles = len(rolling_steps)
+    if num_cycles == 0:
+        raise ValueError('No rolling steps found')
+
+    chunks = []
+    first_step = 1
+    for first_cycle in range(1, num_cycles + 1, chunk_size):
+        last_cycle = min(first_cycle + chunk_size - 1, num_cycles)
+        if last_cycle == num_cycles:
+            last_step = len(step_names)
+        else:
+            rolling_name = names.get_step_rolling(last_cycle)
+            if rolling_name not in rolling_steps:
+                raise ValueError('Could not find step "' + rolling_name + '"')
+            last_step = rolling_steps[rolling_name]
+        chunks.append({'steps': [first_step, last_step], 'cycles': [first_cycle, last_cycle]})
+        first_step = last_step + 1
+
+    return chunks
+
+
+def write_inputs(inp_file, chunk_size, job=names.job):
+    """Write the input files for each chunk in a single pass through
+    `inp_file`. The restart request of each step, see
+    :py:func:`get_restart_write_str`, replaces an existing
+    `*Restart, write` keyword in the step, or is added at the end of the
+    step.
+
+    :param inp_file: The name of the full input file
+    :type inp_file: str
+
+    :param chunk_size: The number of cycles in each chunk
+    :type chunk_size: int
+
+    :param job: The name of the full job, used to name the chunk jobs,
+                see :py:func:`get_chunk_job`
+    :type job: str
+
+    :returns: List of chunks, see :py:func:`get_chunks`, with the
+              additional fields 'job', 'inp' and 'old_job' (None for the
+              first chunk)
+    :rtype: list[ dict ]
+
+    """
+    chunks = get_chunks(get_step_names(inp_file), chunk_size)
+    for nr, chunk in enumerate(chunks):
+        chunk['job'] = get_chunk_job(nr + 1, job)
+        chunk['inp'] = chunk['job'] + '.inp'
+        chunk['old_job'] = None if nr == 0 else chunks[nr-1]['job']
+
+    chunk_ind = 0
+    step_nr = 0
+    restart_str = ''
+    is_continued = False
+    out = open(chunks[0]['inp'], 'w')
+    try:
+        with open(inp_file, 'r') as inp:
+            for line in inp:
+                if is_continued:    # Continuation of a replaced keyword line
+                    is_continued = line.rstrip().endswith(',')
+                    continue
+                lower_line = line.lower()
+                if lower_line.startswith('*step,'):
+                    step_nr += 1
+                    if step_nr > chunks[chunk_ind]['steps'][1]:
+                        out.close()
+                        chunk_ind += 1
+                        out = open(chunks[chunk_ind]['inp'], 'w')
+                        out.write(get_restart_read_str(chunks[chunk_ind]))
+                    restart_str = get_restart_write_str(chunks[chunk_ind], step_nr)
+                elif is_restart_write(lower_line) and len(restart_str) > 0:
+                    # Update the existing request instead of adding a second one
+                    out.write(restart_str)
+                    restart_str = ''
+                    is_continued = line.rstrip().endswith(',')
+                    continue
+                elif lower_line.startswith('*end step'):
+                    out.write(restart_str)
+                    restart_str = ''
+                out.write(line)
+    finally:
+        out.close()
+
+    return chunks
+
+
+def get_restart_read_str(chunk):
+    """Get the beginning of the input file for a restarted chunk
+
+    :param chunk: The chunk, see :py:func:`write_inputs`
+    :type chunk: dict
+
+    :returns: The heading and `*Restart, read` keyword
+    :rtype: str
+
+    """
+    return ('*Heading\n** Restart of job ' + chunk['old_job'] + ', cycles '
+            + str(chunk['cycles'][0]) + '-' + str(chunk['cycles'][1]) + '\n'
+            + '*Restart, read, step=' + str(chunk['steps'][0] - 1) + '\n')
+
+
+def get_restart_write_str(chunk, step_nr):
+    """Get the restart request to add at the end of step `step_nr`.
+    Restart data is written at the end of the last step in each chunk.
+    In the first step of restarted chunks, the request carried over
+    from the previous chunk is removed.
+
+    :param chunk: The chunk, see :py:func:`write_inputs`
+    :type chunk: dict
+
+    :param step_nr: The step number
+    :type step_nr: int
+
+    :returns: The restart request, empty if not required
+    :rtype: str
+
+    """
+    if step_nr == chunk['steps'][1]:
+        return '*Restart, write, overlay, frequency=%0.0f\n' % LAST_INCREMENT_FREQ
+    elif step_nr == chunk['steps'][0] and chunk['old_job'] is not None:
+        return '*Restart, write, frequency=0\n'
+    return ''
+
+
+def is_restart_write(line):
+    """Check if `line` is a `*Restart, write` keyword line
+
+    :param line: The input file line
+    :type line: str
+
+    :returns: True if `line` requests restart data to be written
+    :rtype: bool
+
+    """
+    params = [param.strip().lower() for param in line.split(',')]
+    return params[0] == '*restart' and 'write' in params[1:]
+
+
+def is_completed(job):
+    """Check if the job has completed successfully, based on its status
+    file (.sta)
+
+    :param job: The job name
+    :type job: str
+
+    :returns: True if completed
+    :rtype: bool
+
+    """
+    if not os.path.exists(job + '.sta'):
+        return False
+    with open(job + '.sta', 'r') as fid:
+        lines = [line.strip() for line in fid.readlines() if len(line.strip()) > 0]
+
+    return len(lines) > 0 and COMPLETED_STR in lines[-1]
+
+
+def setup(inp_file, chunk_size, job=names.job):
+    """Setup the chain: Write the chunk input files, copy the files
+    read by the user subroutines, and save the status file. If a status
+    file for the same input file and chunk size exists, it is returned
+    instead, such that the chain can be resumed.
+
+    :param inp_file: The name of the full input file
+    :type inp_file: str
+
+    :param chunk_size: The number of cycles in each chunk
+    :type chunk_size: int
+
+    :param job: The name of the full job
+    :type job: str
+
+    :returns: The chain status, dictionary with the fields 'inp_file',
+              'chunk_size', 'chunks' (see :py:func:`write_inputs`) and
+              'completed' (the number of completed chunks)
+    :rtype: dict
+
+    """
+    status_file = os.path.join(names.restart_chain_folder, names.restart_chain_file)
+    if os.path.exists(status_file):
+        chain = json_io.read(status_file)
+        if chain['inp_file'] == inp_file and chain['chunk_size'] == chunk_size:
+            return chain
+        raise ValueError('A restart chain for "' + chain['inp_file'] + '" with chunk size '
+                         + str(chain['chunk_size']) + ' exists, remove the folder "'
+                         + names.restart_chain_folder + '" to start a new chain')
+
+    if not os.path.exists(names.restart_chain_folder):
+        os.mkdir(names.restart_chain_folder)
+
+    for file in USUB_INPUT_FILES:
+        if os.path.exists(file):
+            shutil.copy(file, os.path.join(names.restart_chain_folder, file))
+
+    chain = {'inp_file': inp_file, 'chunk_size': chunk_size,
+             'chunks': write_inputs(inp_file, chunk_size, job), 'completed': 0}
+    json_io.save(status_file, chain)
+
+    return chain
+
+
+def run(inp_file, chunk_size, usub, abaqus_cmd='abaqus', options='', keep_restart=1,
+        job=names.job, auto_tune=False):
+    """Run (or resume) the chain of restarted jobs, see module
+    description.
+
+    :param inp_file: The name of the full input file
+    :type inp_file: str
+
+    :param chunk_size: The number of cycles in each chunk
+    :type chunk_size: int
+
+    :param usub: Path to the compiled user subroutine
+    :type usub: str
+
+    :param abaqus_cmd: The command to run abaqus
+    :type abaqus_cmd: str
+
+    :param options: Additional options for the abaqus command,
+                    e.g. 'cpus=4'
+    :type options: str
+
+    :param keep_restart: The number of completed chunks for which the
+                         restart files are kept. Must be at least 1 to
+                         continue the chain.
+    :type keep_restart: int
+
+    :param job: The name of the full job
+    :type job: str
+
+    :param auto_tune: Tune the time incrementation of the rolling steps
+                      in the next chunk, see :py:func:`tune_next_chunk`
+    :type auto_tune: bool
+
+    :returns: The number of run chunks
+    :rtype: int
+
+    """
+    if keep_restart < 1:
+        raise ValueError('The restart files of the last completed chunk must be kept')
+
+    chain = setup(inp_file, chunk_size, job)
+    status_file = os.path.join(names.restart_chain_folder, names.restart_chain_file)
+    chunks = chain['chunks']
+
+    for nr in range(chain['completed'], len(chunks)):
+        chunk = chunks[nr]
+        print('Running chunk ' + str(nr + 1) + '/' + str(len(chunks)) + ' (cycles '
+              + str(chunk['cycles'][0]) + '-' + str(chunk['cycles'][1]) + ')')
+        restore_files(chunk)
+        cmd = (abaqus_cmd + ' job=' + chunk['job'] + ' input=' + chunk['inp']
+               + ' user=' + usub + ' interactive ask_delete=OFF')
+        if chunk['old_job'] is not None:
+            cmd += ' oldjob=' + chunk['old_job']
+        if len(options) > 0:
+            cmd += ' ' + options
+        os.system(cmd)
+
+        converged_cycle = convergence_monitor.get_converged_cycle()
+        if converged_cycle is not None:
+            print('Converged after cycle ' + str(converged_cycle) + ', the chain is stopped')
+            shutil.copy(names.usub_state_file, get_state_copy(chunk))
+            chain['completed'] = len(chunks)
+            chain['converged_cycle'] = converged_cycle
+            json_io.save(status_file, chain)
+            return nr + 1
+
+        if not is_completed(chunk['job']):
+            print('Chunk ' + str(nr + 1) + ' (job "' + chunk['job'] + '") failed, '
+                  + 'the chain can be resumed from this chunk')
+            return chain['completed']
+
+        shutil.copy(names.usub_state_file, get_state_copy(chunk))
+        chain['completed'] = nr + 1
+        if auto_tune and nr + 1 < len(chunks):
+            tune_next_chunk(chunk, chunks[nr + 1])
+        json_io.save(status_file, chain)
+        if nr - keep_restart >= 0:
+            prune(chunks[nr - keep_restart])
+
+    if auto_tune:
+        report_tuning(chunks[:chain['completed']])
+
+    return chain['completed']
+
+
+def tune_next_chunk(chunk, next_chunk):
+    """Tune the time incrementation of the rolling steps in the next
+    chunk, based on the solver statistics of the completed chunk, see
+    :py:func:`rollover.utils.solver_stats.propose_min_incr`. The minimum
+    number of increments is saved as 'min_incr' in both chunks.
+
+    :param chunk: The completed chunk, see :py:func:`write_inputs`
+    :type chunk: dict
+
+    :param next_chunk: The next chunk, whose input file is modified
+    :type next_chunk: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    cycle_stats = solver_stats.get_cycle_stats(chunk['job'], chunk['inp'])
+    if 'min_incr' not in chunk:
+        chunk['min_incr'] = solver_stats.get_min_incr(chunk['inp'])
+    min_incr = solver_stats.propose_min_incr(cycle_stats, chunk['min_incr'])
+    solver_stats.retune(next_chunk['inp'], min_incr)
+    next_chunk['min_incr'] = min_incr
+    if min_incr != chunk['min_incr']:
+        print('Minimum number of increments per rolling step changed from '
+              + str(chunk['min_incr']) + ' to ' + str(min_incr))
+
+
+def report_tuning(chunks):
+    """Print the solver statistics for each cycle in the completed
+    chunks, and the increments and wall clock time saved compared to the
+    original incrementation (of the first chunk).
+
+    :param chunks: The completed chunks, see :py:func:`write_inputs`
+    :type chunks: list[ dict ]
+
+    :returns: The number of increments saved
+    :rtype: int
+
+    """
+    if len(chunks) == 0:
+        return 0
+
+    cycle_stats = {}
+    for chunk in chunks:
+        cycle_stats.update(solver_stats.get_cycle_stats(chunk['job'], chunk['inp']))
+
+    baseline_incr = chunks[0].get('min_incr', solver_stats.get_min_incr(chunks[0]['inp']))
+    time_per_incr = solver_stats.get_time_per_increment(chunks[0]['job'])
+    return solver_stats.report(cycle_stats, baseline_incr, time_per_incr)
+
+
+def get_state_copy(chunk):
+    """Get the path to the copy of the user subroutine state file saved
+    after the chunk completed.
+
+    :param chunk: The chunk, see :py:func:`write_inputs`
+    :type chunk: dict
+
+    :returns: The path to the copy
+    :rtype: str
+
+    """
+    return os.path.join(names.restart_chain_folder, chunk['job'] + '_' + names.usub_state_file)
+
+
+def restore_files(chunk):
+    """Restore the files read by the user subroutines before running the
+    chunk: The load parameters (and table), the reference point
+    coordinates, and
+    (for restarted chunks) the state saved after the previous chunk.
+
+    :param chunk: The chunk, see :py:func:`write_inputs`
+    :type chunk: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    for file in USUB_INPUT_FILES:
+        if os.path.exists(os.path.join(names.restart_chain_folder, file)):
+            shutil.copy(os.path.join(names.restart_chain_folder, file), file)
+
+    if chunk['old_job'] is not None:
+        state_copy = get_state_copy({'job': chunk['old_job']})
+        if not os.path.exists(state_copy):
+            raise IOError('The state file "' + state_copy + '" of the previous chunk '
+                          + 'is missing, cannot restart')
+        shutil.copy(state_copy, names.usub_state_file)
+
+
+def prune(chunk):
+    """Delete the restart files of a completed chunk
+
+    :param chunk: The chunk, see :py:func:`write_inputs`
+    :type chunk: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    for suffix in RESTART_SUFFIXES:
+        if os.path.exists(chunk['job'] + suffix):
+            os.remove(chunk['job'] + suffix)
@@ -0,0 +1,667 @@
+"""This module stores the node results of each cycle in an append-only,
+compressed and columnar archive, such that the evolution of e.g. the
+wheel reference point motion can be studied without opening the odb in
+Abaqus.
+
+The archive contains the tables given by `TABLES`. Each table has a
+fixed set of node labels, and one column per displacement component.
+The results for one cycle are saved as one compressed chunk, and new
+cycles are appended as they finish. Two backends are supported:
+
+- NPZ-directory (default): A folder with `manifest.json` (the columns
+  and cycles of each table), and for each table the node labels
+  (`labels.npy`) and one compressed .npz file per cycle. Only the
+  requested columns are decompressed when reading.
+- HDF5 (if the archive name ends with `.h5` or `.hdf5`): One group per
+  table, with one dataset per column (cycles x nodes), chunked and
+  compressed per cycle. Requires the h5py package.
+
+:py:func:`export_fil` appends the cycles found in the results file
+(.fil), see :py:mod:`rollover.utils.fil_index`, that are not already in
+the archive. The node labels of the wheel tables are then taken from the
+state file written by the user subroutine,
+`rollover.utils.naming_mod.usub_state_file`. The rail contact nodes are
+only written to the results file if requested, see
+:py:func:`rollover.three_d.utils.fil_output.add`. Otherwise, this table
+must be appended with :py:func:`append` from other sources (e.g. the
+odb). As the user subroutine allows Abaqus to overwrite the results of
+earlier rolling steps, :py:func:`export_fil` should be called while the
+job is running, e.g. by :file:`scripts_py/export_results.py`.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import os
+import numpy as np
+
+from rollover.utils import json_io
+from rollover.utils import naming_mod as names
+from rollover.utils import fil_index
+from rollover.utils import solver_stats
+
+TABLES = {'wheel_rp': ['u1', 'u2', 'u3', 'ur1', 'ur2', 'ur3'],
+          'wheel_contact': ['u1', 'u2', 'u3'],
+          'rail_contact': ['u1', 'u2', 'u3']}
+MANIFEST_FILE = 'manifest.json'
+HDF5_SUFFIXES = ['.h5', '.hdf5']
+
+
+def is_hdf5(archive):
+    """Check if the HDF5 backend should be used for `archive`
+
+    :param archive: The name of the archive
+    :type archive: str
+
+    :returns: True if HDF5 backend
+    :rtype: bool
+
+    """
+    return os.path.splitext(archive)[1].lower() in HDF5_SUFFIXES
+
+
+def import_h5py():
+    """Import the h5py package, required for the HDF5 backend
+
+    :returns: The h5py module
+    :rtype: module
+
+    """
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError('The h5py package is required for HDF5 archives, use an '
+                          + 'NPZ-directory archive (no .h5 suffix) instead')
+    return h5py
+
+
+def append(archive, cycle_nr, tables):
+    """Append the results for one cycle to the archive
+
+    :param archive: The name of the archive (folder or HDF5 file)
+    :type archive: str
+
+    :param cycle_nr: The cycle number, must not be in the archive
+    :type cycle_nr: int
+
+    :param tables: Dictionary with an item for each table (see
+                   `TABLES`) to append to. Each item is a dictionary
+                   with the node labels ('labels') and an np.array for
+                   each column.
+    :type tables: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    for table in tables:
+        if table not in TABLES:
+            raise ValueError('Unknown table "' + table + '", supported tables are '
+                             + str(sorted(TABLES.keys())))
+        missing = [col for col in ['labels'] + TABLES[table] if col not in tables[table]]
+        if len(missing) > 0:
+            raise ValueError('Columns ' + str(missing) + ' missing for table "' + table + '"')
+
+    if is_hdf5(archive):
+        hdf5_append(archive, cycle_nr, tables)
+    else:
+        npz_append(archive, cycle_nr, tables)
+
+
+def get_cycles(archive, table):
+    """Get the cycles in a table
+
+    :param archive: The name of the archive
+    :type archive: str
+
+    :param table: The table name, see `TABLES`
+    :type table: str
+
+    :returns: The cycle numbers (empty if the table does not exist)
+    :rtype: list[ int ]
+
+    """
+    if not os.path.exists(archive):
+        return []
+
+    if is_hdf5(archive):
+        with import_h5py().File(archive, 'r') as h5:
+            return [int(c) for c in h5[table]['cycles'][:]] if table in h5 else []
+    else:
+        tables = read_manifest(archive)['tables']
+        return tables[table]['cycles'] if table in tables else []
+
+
+def query(archive, table, columns=None, labels=None, cycles=None):
+    """Read columns from a table. Only the requested columns are read.
+
+    :param archive: The name of the archive
+    :type archive: str
+
+    :param table: The table name, see `TABLES`
+    :type table: str
+
+    :param columns: The columns to read, defaults to all columns
+    :type columns: list[ str ]
+
+    :param labels: The node labels to read (e.g. a node set), defaults
+                   to all nodes in the table
+    :type labels: list[ int ]
+
+    :param cycles: The cycles to read, defaults to all cycles
+    :type cycles: list[ int ]
+
+    :returns: Dictionary with the 'cycles', 'labels', and for each
+              column an np.array [num_cycles, num_nodes]
+    :rtype: dict
+
+    """
+    columns = TABLES[table] if columns is None else columns
+    unknown_columns = [col for col in columns if col not in TABLES[table]]
+    if len(unknown_columns) > 0:
+        raise ValueError('Unknown columns ' + str(unknown_columns) + ' for table "' + table + '"')
+
+    stored_cycles = get_cycles(archive, table)
+    cycles = stored_cycles if cycles is None else list(cycles)
+    missing_cycles = sorted(set(cycles) - set(stored_cycles))
+    if len(missing_cycles) > 0:
+        raise ValueError('Cycles ' + str(missing_cycles) + ' not in table "' + table + '"')
+
+    if is_hdf5(archive):
+        return hdf5_query(archive, table, columns, labels, cycles, stored_cycles)
+    else:
+        return npz_query(archive, table, columns, labels, cycles)
+
+
+def get_node_inds(stored_labels, labels):
+    """Get the position of `labels` in `stored_labels`
+
+    :param stored_labels: The node labels in the table
+    :type stored_labels: np.array
+
+    :param labels: The node labels to find, None for all
+    :type labels: list[ int ]
+
+    :returns: The positions
+    :rtype: np.array
+
+    """
+    if labels is None:
+        return np.arange(len(stored_labels))
+
+    labels = np.asarray(labels)
+    order = np.argsort(stored_labels)
+    inds = np.minimum(np.searchsorted(stored_labels[order], labels), len(order) - 1)
+    found = stored_labels[order][inds] == labels
+    if not np.all(found):
+        raise ValueError('Nodes ' + str(labels[~found].tolist()) + ' not in the table')
+
+    return order[inds]
+
+
+def check_labels(stored_labels, labels, table):
+    """Check that the node labels to append are the same as the stored
+
+    :param stored_labels: The node labels in the table
+    :type stored_labels: np.array
+
+    :param labels: The node labels to append
+    :type labels: np.array
+
+    :param table: The table name
+    :type table: str
+
+    :returns: None
+    :rtype: None
+
+    """
+    if not np.array_equal(stored_labels, np.asarray(labels)):
+        raise ValueError('The node labels for table "' + table + '" differ from the archive')
+
+
+# NPZ-directory backend
+def read_manifest(archive):
+    """Read the manifest of an NPZ-directory archive
+
+    :param archive: The archive folder
+    :type archive: str
+
+    :returns: The manifest, with the field 'tables'. Each table is a
+              dictionary with the fields 'columns' and 'cycles'.
+    :rtype: dict
+
+    """
+    manifest_file = os.path.join(archive, MANIFEST_FILE)
+    if not os.path.exists(manifest_file):
+        return {'tables': {}}
+    return json_io.read(manifest_file)
+
+
+def get_npz_file(archive, table, cycle_nr):
+    """Get the name of the file with the results for one cycle
+
+    :param archive: The archive folder
+    :type archive: str
+
+    :param table: The table name
+    :type table: str
+
+    :param cycle_nr: The cycle number
+    :type cycle_nr: int
+
+    :returns: The file name
+    :rtype: str
+
+    """
+    return os.path.join(archive, table, names.cycle_str(cycle_nr) + '.npz')
+
+
+def npz_append(archive, cycle_nr, tables):
+    """Append one cycle to an NPZ-directory archive. The manifest is
+    updated last, such that an interrupted append is not visible.
+
+    :param archive: The archive folder
+    :type archive: str
+
+    :param cycle_nr: The cycle number
+    :type cycle_nr: int
+
+    :param tables: The results to append, see :py:func:`append`
+    :type tables: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    check_npz_cycles(read_manifest(archive), tables.keys(), [cycle_nr])
+    npz_write_cycle(archive, cycle_nr, tables)
+    npz_register(archive, [cycle_nr], dict([(table, tables[table]['labels'])
+                                            for table in tables]))
+
+
+def npz_write_cycle(archive, cycle_nr, tables):
+    """Write the results for one cycle to an NPZ-directory archive,
+    without adding the cycle to the manifest. Different cycles can be
+    written in parallel processes, and must then be added with
+    :py:func:`npz_register`.
+
+    :param archive: The archive folder
+    :type archive: str
+
+    :param cycle_nr: The cycle number
+    :type cycle_nr: int
+
+    :param tables: The results to write, see :py:func:`append`
+    :type tables: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    for table in tables:
+        table_folder = os.path.join(archive, table)
+        if not os.path.exists(table_folder):
+            try:
+                os.makedirs(table_folder)
+            except OSError:     # Created by another process
+                if not os.path.isdir(table_folder):
+                    raise
+        np.savez_compressed(get_npz_file(archive, table, cycle_nr),
+                            **dict([(col, np.asarray(tables[table][col], dtype=float))
+                                    for col in TABLES[table]]))
+
+
+def npz_register(archive, cycles, table_labels):
+    """Add cycles written by :py:func:`npz_write_cycle` to the manifest
+    of an NPZ-directory archive. The node labels are saved for new
+    tables, and checked for existing tables.
+
+    :param archive: The archive folder
+    :type archive: str
+
+    :param cycles: The cycle numbers
+    :type cycles: list[ int ]
+
+    :param table_labels: The node labels for each table
+    :type table_labels: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    manifest = read_manifest(archive)
+    check_npz_cycles(manifest, table_labels.keys(), cycles)
+    for table, labels in table_labels.items():
+        labels_file = os.path.join(archive, table, 'labels.npy')
+        if table not in manifest['tables']:
+            np.save(labels_file, np.asarray(labels))
+            manifest['tables'][table] = {'columns': TABLES[table], 'cycles': []}
+        else:
+            check_labels(np.load(labels_file), labels, table)
+        manifest['tables'][table]['cycles'] = sorted(manifest['tables'][table]['cycles']
+                                                     + [int(c) for c in cycles])
+
+    json_io.save(os.path.join(archive, MANIFEST_FILE), manifest)
+
+
+def check_npz_cycles(manifest, tables, cycles):
+    """Check that none of the cycles are already in the tables
+
+    :param manifest: The manifest, see :py:func:`read_manifest`
+    :type manifest: dict
+
+    :param tables: The table names
+    :type tables: list[ str ]
+
+    :param cycles: The cycle numbers
+    :type cycles: list[ int ]
+
+    :returns: None
+    :rtype: None
+
+    """
+    for table in tables:
+        if table in manifest['tables']:
+            existing = set(manifest['tables'][table]['cycles']).intersection(cycles)
+            if len(existing) > 0:
+                raise ValueError('Cycles ' + str(sorted(existing)) + ' already in table "'
+                                 + table + '"')
+
+
+def npz_query(archive, table, columns, labels, cycles):
+    """Read columns from an NPZ-directory archive
+
+    :param archive: The archive folder
+    :type archive: str
+
+    :param table: The table name
+    :type table: str
+
+    :param columns: The columns to read
+    :type columns: list[ str ]
+
+    :param labels: The node labels to read, None for all
+    :type labels: list[ int ]
+
+    :param cycles: The cycles to read
+    :type cycles: list[ int ]
+
+    :returns: The results, see :py:func:`query`
+    :rtype: dict
+
+    """
+    stored_labels = np.load(os.path.join(archive, table, 'labels.npy'))
+    inds = get_node_inds(stored_labels, labels)
+
+    result = {col: np.zeros((len(cycles), len(inds))) for col in columns}
+    for row, cycle_nr in enumerate(cycles):
+        with np.load(get_npz_file(archive, table, cycle_nr)) as npz:
+            for col in columns:
+                result[col][row, :] = npz[col][inds]
+
+    result['cycles'] = list(cycles)
+    result['labels'] = stored_labels[inds]
+    return result
+
+
+# HDF5 backend
+def hdf5_append(archive, cycle_nr, tables):
+    """Append one cycle to an HDF5 archive
+
+    :param archive: The archive file
+    :type archive: str
+
+    :param cycle_nr: The cycle number
+    :type cycle_nr: int
+
+    :param tables: The results to append, see :py:func:`append`
+    :type tables: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    h5py = import_h5py()
+    with h5py.File(archive, 'a') as h5:
+        for table in tables:
+            labels = np.asarray(tables[table]['labels'])
+            num_nodes = len(labels)
+            if table not in h5:
+                group = h5.create_group(table)
+                group.create_dataset('labels', data=labels)
+                group.create_dataset('cycles', shape=(0,), maxshape=(None,), dtype='i8',
+                                     chunks=(1024,))
+                for col in TABLES[table]:
+                    group.create_dataset(col, shape=(0, num_nodes), maxshape=(None, num_nodes),
+                                         dtype='f8', chunks=(1, max(num_nodes, 1)),
+                                         compression='gzip')
+            group = h5[table]
+            check_labels(group['labels'][:], labels, table)
+            if cycle_nr in group['cycles'][:]:
+                raise ValueError('Cycle ' + str(cycle_nr) + ' already in table "' + table + '"')
+
+            row = group['cycles'].shape[0]
+            for col in TABLES[table]:
+                group[col].resize((row + 1, num_nodes))
+                group[col][row, :] = np.asarray(tables[table][col], dtype=float)
+            group['cycles'].resize((row + 1,))
+            group['cycles'][row] = cycle_nr
+
+
+def hdf5_query(archive, table, columns, labels, cycles, stored_cycles):
+    """Read columns from an HDF5 archive
+
+    :param archive: The archive file
+    :type archive: str
+
+    :param table: The table name
+    :type table: str
+
+    :param columns: The columns to read
+    :type columns: list[ str ]
+
+    :param labels: The node labels to read, None for all
+    :type labels: list[ int ]
+
+    :param cycles: The cycles to read
+    :type cycles: list[ int ]
+
+    :param stored_cycles: The cycles in the table, in stored order
+    :type stored_cycles: list[ int ]
+
+    :returns: The results, see :py:func:`query`
+    :rtype: dict
+
+    """
+    rows = [stored_cycles.index(cycle_nr) for cycle_nr in cycles]
+    order = np.argsort(rows)
+    with import_h5py().File(archive, 'r') as h5:
+        group = h5[table]
+        stored_labels = group['labels'][:]
+        inds = get_node_inds(stored_labels, labels)
+        result = {}
+        for col in columns:
+            result[col] = np.zeros((len(rows), len(inds)))
+            if len(rows) > 0:
+                # h5py requires increasing row indices
+                result[col][order, :] = group[col][sorted(rows), :][:, inds]
+
+    result['cycles'] = list(cycles)
+    result['labels'] = stored_labels[inds]
+    return result
+
+
+# Export from the results file
+def read_usub_node_sets(state_file=names.usub_state_file):
+    """Read the node labels of the wheel reference point and wheel
+    contact nodes from the state file written by the user subroutine
+    at the end of each rolling step.
+
+    :param state_file: The name of the state file
+    :type state_file: str
+
+    :returns: Dictionary with the node labels for the tables
+              'wheel_rp' and 'wheel_contact'
+    :rtype: dict
+
+    """
+    with open(state_file, 'r') as fid:
+        tokens = fid.read().split()
+
+    # kstep, mesh_size(2), element_order, angle_incr, rp labels(2), rp coords(6), labels
+    mesh_size = [int(t) for t in tokens[1:3]]
+    wheel_rp_label = int(tokens[5])
+    num_nodes = mesh_size[0]*mesh_size[1]
+    contact_labels = np.array([int(t) for t in tokens[13:13+num_nodes]])
+    contact_labels = contact_labels[contact_labels > 0]     # Skip empty mesh positions
+
+    return {'wheel_rp': np.array([wheel_rp_label]), 'wheel_contact': contact_labels}
+
+
+def get_rail_contact_labels(increment, node_sets, state_file=names.usub_state_file):
+    """Get the labels of the rail contact nodes in an increment, i.e.
+    all nodes with displacements that are not in `node_sets` and not the
+    rail reference point. The rail contact nodes are only written to the
+    results file if requested, see
+    :py:func:`rollover.three_d.utils.fil_output.add`.
+
+    :param increment: The increment data, see
+                      :py:func:`rollover.utils.fil_reader.iter_increments`
+    :type increment: dict
+
+    :param node_sets: The node labels of the other tables, see
+                      :py:func:`read_usub_node_sets`
+    :type node_sets: dict
+
+    :param state_file: The name of the state file, used to get the rail
+                       reference point label
+    :type state_file: str
+
+    :returns: The rail contact node labels (sorted)
+    :rtype: np.array
+
+    """
+    with open(state_file, 'r') as fid:
+        rail_rp_label = int(fid.read().split()[6])
+
+    other_labels = np.concatenate([np.asarray(labels) for labels in node_sets.values()]
+                                  + [np.array([rail_rp_label])])
+    labels = np.unique(increment['U']['labels'])
+    return labels[~np.isin(labels, other_labels)]
+
+
+def get_cycle_tables(increment, node_sets):
+    """Split the node displacements of an increment into tables
+
+    :param increment: The increment data, see
+                      :py:func:`rollover.utils.fil_reader.iter_increments`
+    :type increment: dict
+
+    :param node_sets: The node labels for each table to create
+    :type node_sets: dict
+
+    :returns: The tables, see :py:func:`append`
+    :rtype: dict
+
+    """
+    labels = increment['U']['labels']
+    values = increment['U']['values']
+    tables = {}
+    for table, set_labels in node_sets.items():
+        set_values = values[get_node_inds(labels, set_labels), :]
+        tables[table] = {'labels': np.asarray(set_labels)}
+        for nr, col in enumerate(TABLES[table]):
+            tables[table][col] = (set_values[:, nr] if nr < set_values.shape[1]
+                                  else np.nan*np.ones(len(set_labels)))
+
+    return tables
+
+
+def export_fil(archive, fil_file, inp_file, node_sets=None):
+    """Append the cycles in the results file that are not yet in the
+    archive. The last increment of the rolling step is used for each
+    cycle. The results file index is updated, such that this function
+    can be called repeatedly during a running job. A ValueError is
+    raised if an increment read does not match its index entry and the
+    rolling step of its cycle, e.g. if it was overwritten in place.
+
+    :param archive: The name of the archive
+    :type archive: str
+
+    :param fil_file: The name of the results file
+    :type fil_file: str
+
+    :param inp_file: The input file, used to get the step numbers of the
+                     rolling steps
+    :type inp_file: str
+
+    :param node_sets: The node labels for each table to export, defaults
+                      to :py:func:`read_usub_node_sets`, with the rail
+                      contact nodes from :py:func:`get_rail_contact_labels`
+                      if these are in the results file.
+    :type node_sets: dict
+
+    :returns: The appended cycle numbers
+    :rtype: list[ int ]
+
+    """
+    default_sets = node_sets is None
+    node_sets = read_usub_node_sets() if default_sets else node_sets
+    entries = fil_index.update(fil_file)
+    lookup = fil_index.get_lookup(entries)
+    new_cycles = get_new_cycles(archive, node_sets.keys(), lookup, inp_file)
+    if len(new_cycles) == 0:
+        return new_cycles
+
+    step_numbers = solver_stats.get_step_numbers(inp_file)
+    cycle_entries = fil_index.get_cycle_entries(entries, inp_file, new_cycles)
+    for cycle_nr, entry in zip(new_cycles, cycle_entries):
+        increment = fil_index.read_increment(fil_file, entry)
+        step_nr = step_numbers[names.get_step_rolling(cycle_nr)]
+        if (increment['step'] != step_nr or increment['step'] != entry['step']
+                or increment['increment'] != entry['increment']):
+            raise ValueError('Expected step ' + str(step_nr) + ', increment '
+                             + str(entry['increment']) + ' for cycle ' + str(cycle_nr)
+                             + ', but read step ' + str(increment['step']) + ', increment '
+                             + str(increment['increment']) + ' from "' + fil_file + '"')
+        if default_sets and 'rail_contact' not in node_sets:
+            rail_contact_labels = get_rail_contact_labels(increment, node_sets)
+            if len(rail_contact_labels) > 0:
+                node_sets['rail_contact'] = rail_contact_labels
+        append(archive, cycle_nr, get_cycle_tables(increment, node_sets))
+
+    return new_cycles
+
+
+def get_new_cycles(archive, tables, lookup, inp_file):
+    """Get the cycles with results for the rolling step in the results
+    file that are not in all `tables` of the archive
+
+    :param archive: The name of the archive
+    :type archive: str
+
+    :param tables: The table names
+    :type tables: list[ str ]
+
+    :param lookup: The results file index lookup, see
+                   :py:func:`rollover.utils.fil_index.get_lookup`
+    :type lookup: dict
+
+    :param inp_file: The input file, used to get the step numbers of the
+                     rolling steps
+    :type inp_file: str
+
+    :returns: The cycle numbers (sorted)
+    :rtype: list[ int ]
+
+    """
+    archived = set.intersection(*[set(get_cycles(archive, table)) for table in tables])
+    new_cycles = []
+    for step_name, step_nr in solver_stats.get_step_numbers(inp_file).items():
+        if solver_stats.is_rolling_step(step_name) and step_nr in lookup:
+            cycle_nr = int(step_name.rpartition('_')[2])
+            if cycle_nr not in archived:
+                new_cycles.append(cycle_nr)
+
+    return sorted(new_cycles)
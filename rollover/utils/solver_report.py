@@ -0,0 +1,521 @@
+"""This module summarizes where the solver time of a rollover job is
+spent, and writes the summary as json and as a static html report with
+trend plots.
+
+Each step is given a role: 'preload', 'loading', 'rolling', 'return',
+'reapply' or 'release'. The roles are taken from the step names in the
+input file (see :py:mod:`rollover.utils.naming_mod`). Without input
+file, they are determined from the step numbers with the same rules as
+the user subroutine (`usub/step_type_mod.f90`), see
+:py:func:`get_step_role` and :py:func:`get_step_cycle`. The steps
+between two rolling steps belong to the cycle of the latter, as in the
+step names.
+
+The increments, cutbacks and iterations for each step are read from the
+status file (.sta), see :py:func:`rollover.utils.solver_stats.parse_sta`,
+and aggregated by role and by cycle. Abaqus only writes the total user,
+system, cpu and wall clock times to the message (.msg) and data (.dat)
+files. The time for each role and cycle is therefore estimated as the
+total time multiplied by the share of the solver iterations (severe
+discontinuity and equilibrium iterations), as each iteration requires
+solving the full system. The memory estimate is read from the data
+file.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import os, re
+from collections import OrderedDict
+
+try:
+    from html import escape
+except ImportError:     # Python 2
+    from cgi import escape
+
+from rollover.utils import json_io
+from rollover.utils import naming_mod as names
+from rollover.utils import solver_stats
+from rollover.core.loading import read_merge_return
+
+ROLES = ['preload', 'loading', 'rolling', 'return', 'reapply', 'release']
+CYCLE_ROLES = {False: ['rolling', 'return', 'reapply', 'release'],     # See step_type_mod
+               True: ['rolling', 'return', 'release']}
+NUM_STEP_INITIAL = 3    # Number of steps including the first rolling step
+STAT_KEYS = ['increments', 'cutbacks', 'severe_iterations', 'equilibrium_iterations']
+TIME_REGEX = OrderedDict([('user_time', re.compile(r'USER TIME \(SEC\)\s*=\s*([\d.E+-]+)')),
+                          ('system_time', re.compile(r'SYSTEM TIME \(SEC\)\s*=\s*([\d.E+-]+)')),
+                          ('cpu_time', re.compile(r'TOTAL CPU TIME \(SEC\)\s*=\s*([\d.E+-]+)')),
+                          ('wall_time', solver_stats.WALLCLOCK_REGEX)])
+MEMORY_HEADER = 'M E M O R Y   E S T I M A T E'
+MEMORY_REGEX = re.compile(r'^\s*(\d+)\s+([\d.]+E[+-]\d+)\s+(\d+)\s+(\d+)\s*$')
+PLOT_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b']
+
+
+def get_step_role(step_nr, merge_return=False):
+    """Get the role of a step from its number, as `get_step_type` in
+    `usub/step_type_mod.f90`
+
+    :param step_nr: The step number
+    :type step_nr: int
+
+    :param merge_return: Is the merged cycle layout used?
+    :type merge_return: bool
+
+    :returns: The step role, see `ROLES`
+    :rtype: str
+
+    """
+    if step_nr < NUM_STEP_INITIAL:
+        return ROLES[step_nr - 1]
+    cycle_roles = CYCLE_ROLES[merge_return]
+    return cycle_roles[(step_nr - NUM_STEP_INITIAL) % len(cycle_roles)]
+
+
+def get_step_cycle(step_nr, merge_return=False):
+    """Get the cycle number of a step from its number, following the
+    step names (see :py:func:`rollover.utils.naming_mod.get_steps_inbetween`).
+    Note that `get_cycle_nr` in `usub/step_type_mod.f90` gives the
+    previous cycle for the steps between the rolling steps.
+
+    :param step_nr: The step number
+    :type step_nr: int
+
+    :param merge_return: Is the merged cycle layout used?
+    :type merge_return: bool
+
+    :returns: The cycle number, 0 for the steps before the first cycle
+    :rtype: int
+
+    """
+    if step_nr < NUM_STEP_INITIAL:
+        return 0
+    cycle_nr = (step_nr - NUM_STEP_INITIAL)//len(CYCLE_ROLES[merge_return]) + 1
+    if get_step_role(step_nr, merge_return) != 'rolling':
+        cycle_nr += 1
+    return cycle_nr
+
+
+def get_merge_return(loading_file=names.loading_file,
+                     schedule_file=names.cycle_schedule_file):
+    """Get the cycle layout from the loading file read by the user
+    subroutine, see :py:func:`rollover.core.loading.read_merge_return`.
+    If the loading file does not exist, the layout is taken from the
+    cycle schedule file, see
+    :py:func:`rollover.core.loading.write_cycle_schedule`
+
+    :param loading_file: The name of the loading file
+    :type loading_file: str
+
+    :param schedule_file: The name of the cycle schedule file
+    :type schedule_file: str
+
+    :returns: True if the merged cycle layout is used, False if neither
+              file exists
+    :rtype: bool
+
+    """
+    merge_return = read_merge_return(loading_file)
+    if merge_return is not None:
+        return merge_return
+    if not os.path.exists(schedule_file):
+        return False
+    return json_io.read(schedule_file).get('merge_return', False)
+
+
+def get_step_info(inp_file=None, step_numbers=(), merge_return=False):
+    """Get the role and cycle of each step. If the input file exists,
+    these are taken from the step names. Otherwise, they are calculated
+    from the step numbers.
+
+    :param inp_file: The name of the input file
+    :type inp_file: str
+
+    :param step_numbers: The step numbers to get if the input file does
+                         not exist
+    :type step_numbers: list[ int ]
+
+    :param merge_return: Is the merged cycle layout used? (Only used if
+                         the input file does not exist)
+    :type merge_return: bool
+
+    :returns: Dictionary with (role, cycle number) for each step number
+    :rtype: dict
+
+    """
+    if inp_file is None or not os.path.exists(inp_file):
+        return dict([(step_nr, (get_step_role(step_nr, merge_return),
+                                get_step_cycle(step_nr, merge_return)))
+                     for step_nr in step_numbers])
+
+    step_info = {}
+    for step_name, step_nr in solver_stats.get_step_numbers(inp_file).items():
+        if step_name == names.step1:
+            step_info[step_nr] = ('preload', 0)
+        elif step_name == names.step2:
+            step_info[step_nr] = ('loading', 0)
+        else:
+            role, sep, cycle_nr = step_name.rpartition('_')
+            if role in ROLES and cycle_nr.isdigit():
+                step_info[step_nr] = (role, int(cycle_nr))
+
+    return step_info
+
+
+def get_times(job):
+    """Get the total user, system, cpu and wall clock times of a
+    completed job from the message file (.msg), or the data file (.dat)
+    for times not found in the message file.
+
+    :param job: The job name
+    :type job: str
+
+    :returns: Dictionary with the times in `TIME_REGEX` (seconds, None
+              if not found)
+    :rtype: dict
+
+    """
+    times = dict([(key, None) for key in TIME_REGEX])
+    for suffix in ['.msg', '.dat']:
+        if not os.path.exists(job + suffix):
+            continue
+        with open(job + suffix, 'r') as fid:
+            for line in fid:
+                if 'TIME (SEC)' not in line:
+                    continue
+                for key, regex in TIME_REGEX.items():
+                    match = regex.search(line)
+                    if match is not None and (suffix == '.msg' or times[key] is None):
+                        times[key] = float(match.group(1))
+
+    return times
+
+
+def get_memory_estimates(dat_file):
+    """Get the memory estimates from the data file
+
+    :param dat_file: The name of the data file (.dat)
+    :type dat_file: str
+
+    :returns: The estimate for each process, as dictionaries with the
+              fields 'process', 'flops_per_iteration',
+              'minimum_memory_mb' and 'memory_to_minimize_io_mb'. Only
+              the last estimate in the file is returned.
+    :rtype: list[ dict ]
+
+    """
+    estimates = []
+    if not os.path.exists(dat_file):
+        return estimates
+
+    lines_after_header = None
+    with open(dat_file, 'r') as fid:
+        for line in fid:
+            if MEMORY_HEADER in line:
+                estimates = []
+                lines_after_header = 0
+            elif lines_after_header is not None and lines_after_header < 20:
+                lines_after_header += 1
+                match = MEMORY_REGEX.match(line)
+                if match is not None:
+                    estimates.append({'process': int(match.group(1)),
+                                      'flops_per_iteration': float(match.group(2)),
+                                      'minimum_memory_mb': int(match.group(3)),
+                                      'memory_to_minimize_io_mb': int(match.group(4))})
+
+    return estimates
+
+
+def get_empty_stats():
+    """Get statistics with all counts zero
+
+    :returns: Dictionary with the fields 'steps' and `STAT_KEYS`
+    :rtype: dict
+
+    """
+    stats = {'steps': 0}
+    stats.update(dict([(key, 0) for key in STAT_KEYS]))
+    return stats
+
+
+def add_stats(stats, step_stats):
+    """Add the statistics of one step
+
+    :param stats: The statistics to add to, see :py:func:`get_empty_stats`
+    :type stats: dict
+
+    :param step_stats: The statistics of the step, see
+                       :py:func:`rollover.utils.solver_stats.parse_sta`
+    :type step_stats: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    stats['steps'] += 1
+    for key in STAT_KEYS:
+        stats[key] += step_stats[key]
+
+
+def finalize_stats(stats, total_iterations, times):
+    """Add the derived values: 'iterations' (severe discontinuity and
+    equilibrium iterations), 'iterations_per_increment',
+    'iteration_share', and the estimated times (see `TIME_REGEX`)
+
+    :param stats: The statistics, see :py:func:`get_empty_stats`
+    :type stats: dict
+
+    :param total_iterations: The total number of iterations in the job
+    :type total_iterations: int
+
+    :param times: The total times, see :py:func:`get_times`
+    :type times: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    stats['iterations'] = stats['severe_iterations'] + stats['equilibrium_iterations']
+    stats['iterations_per_increment'] = stats['iterations']/float(max(stats['increments'], 1))
+    stats['iteration_share'] = stats['iterations']/float(max(total_iterations, 1))
+    for key, value in times.items():
+        stats[key] = None if value is None else value*stats['iteration_share']
+
+
+def get_summary(job, inp_file=None, merge_return=None):
+    """Get the solver summary of a job
+
+    :param job: The job name
+    :type job: str
+
+    :param inp_file: The input file, defaults to `job`.inp. If it does
+                     not exist, the step roles are calculated from the
+                     step numbers.
+    :type inp_file: str
+
+    :param merge_return: Is the merged cycle layout used? Only used if
+                         the input file does not exist. Defaults to
+                         :py:func:`get_merge_return`.
+    :type merge_return: bool
+
+    :returns: Dictionary with the fields 'job', 'totals' (statistics
+              for all steps, and 'memory' estimates), 'roles'
+              (statistics for each role) and 'cycles' (list with the
+              'cycle' number and the statistics for each role in the
+              cycle)
+    :rtype: dict
+
+    """
+    inp_file = job + '.inp' if inp_file is None else inp_file
+    merge_return = get_merge_return() if merge_return is None else merge_return
+    steps = solver_stats.parse_sta(job + '.sta')
+    step_info = get_step_info(inp_file, steps.keys(), merge_return)
+    times = get_times(job)
+
+    totals = get_empty_stats()
+    roles = OrderedDict([(role, get_empty_stats()) for role in ROLES])
+    cycles = {}
+    for step_nr in sorted(steps):
+        if step_nr not in step_info:
+            continue
+        role, cycle_nr = step_info[step_nr]
+        add_stats(totals, steps[step_nr])
+        add_stats(roles[role], steps[step_nr])
+        if cycle_nr > 0:
+            cycle = cycles.setdefault(cycle_nr, {})
+            add_stats(cycle.setdefault(role, get_empty_stats()), steps[step_nr])
+
+    total_iterations = totals['severe_iterations'] + totals['equilibrium_iterations']
+    finalize_stats(totals, total_iterations, times)
+    for role in ROLES:
+        finalize_stats(roles[role], total_iterations, times)
+    cycle_list = []
+    for cycle_nr in sorted(cycles):
+        for role_stats in cycles[cycle_nr].values():
+            finalize_stats(role_stats, total_iterations, times)
+        cycle_list.append(dict([('cycle', cycle_nr)] + list(cycles[cycle_nr].items())))
+
+    totals['memory'] = get_memory_estimates(job + '.dat')
+    return {'job': job, 'totals': totals,
+            'roles': dict([(role, stats) for role, stats in roles.items()
+                           if stats['steps'] > 0]),
+            'cycles': cycle_list}
+
+
+def get_svg_plot(x, series, title, ylabel, width=640, height=300):
+    """Get a line plot as svg
+
+    :param x: The x values
+    :type x: list[ float ]
+
+    :param series: The label and y values (same length as x, None for
+                   missing values) for each line
+    :type series: list[ tuple( str, list[ float ] ) ]
+
+    :param title: The plot title
+    :type title: str
+
+    :param ylabel: The y axis label
+    :type ylabel: str
+
+    :param width: The width of the plot (pixels)
+    :type width: int
+
+    :param height: The height of the plot (pixels)
+    :type height: int
+
+    :returns: The svg element
+    :rtype: str
+
+    """
+    left, right, top, bottom = 70, 120, 30, 40
+    y_values = [y for label, ys in series for y in ys if y is not None]
+    if len(x) == 0 or len(y_values) == 0:
+        return '<p>' + escape(title) + ': No data</p>'
+    x_min, x_max = min(x), max(x)
+    y_min, y_max = min(0, min(y_values)), max(y_values)
+    x_range = float(x_max - x_min) if x_max > x_min else 1.0
+    y_range = float(y_max - y_min) if y_max > y_min else 1.0
+
+    def get_point(x_val, y_val):
+        return (left + (x_val - x_min)/x_range*(width - left - right),
+                height - bottom - (y_val - y_min)/y_range*(height - top - bottom))
+
+    svg = ['<svg xmlns="http://www.w3.org/2000/svg" width="%d" height="%d">' % (width, height),
+           '<text x="%d" y="18" font-weight="bold">%s</text>' % (left, escape(title)),
+           '<rect x="%d" y="%d" width="%d" height="%d" fill="none" stroke="#888"/>'
+           % (left, top, width - left - right, height - top - bottom)]
+    for y_val in [y_min, y_max]:
+        svg.append('<text x="%d" y="%0.1f" text-anchor="end" font-size="11">%0.4g</text>'
+                   % (left - 4, get_point(x_min, y_val)[1] + 4, y_val))
+    for x_val in [x_min, x_max]:
+        svg.append('<text x="%0.1f" y="%d" text-anchor="middle" font-size="11">%d</text>'
+                   % (get_point(x_val, y_min)[0], height - bottom + 14, x_val))
+    svg.append('<text x="%0.1f" y="%d" text-anchor="middle" font-size="12">cycle</text>'
+               % ((left + width - right)/2.0, height - 6))
+    svg.append('<text x="14" y="%0.1f" font-size="12" transform="rotate(-90 14 %0.1f)" '
+               'text-anchor="middle">%s</text>' % ((top + height - bottom)/2.0,
+                                                    (top + height - bottom)/2.0,
+                                                    escape(ylabel)))
+    for nr, (label, ys) in enumerate(series):
+        color = PLOT_COLORS[nr % len(PLOT_COLORS)]
+        points = ' '.join(['%0.1f,%0.1f' % get_point(x_val, y_val)
+                           for x_val, y_val in zip(x, ys) if y_val is not None])
+        svg.append('<polyline fill="none" stroke="%s" stroke-width="1.5" points="%s"/>'
+                   % (color, points))
+        svg.append('<text x="%d" y="%d" font-size="12" fill="%s">%s</text>'
+                   % (width - right + 8, top + 14 + 16*nr, color, escape(label)))
+    svg.append('</svg>')
+    return '\n'.join(svg)
+
+
+def get_html_table(rows, columns):
+    """Get an html table
+
+    :param rows: The row label and a dictionary with the values for
+                 each row
+    :type rows: list[ tuple( str, dict ) ]
+
+    :param columns: The keys of the values to show
+    :type columns: list[ str ]
+
+    :returns: The table element
+    :rtype: str
+
+    """
+    def format_value(value):
+        if value is None:
+            return '-'
+        elif isinstance(value, float):
+            return '%0.4g' % value
+        return escape(str(value))
+
+    html = ['<table>', '<tr><th></th>' + ''.join(['<th>' + col + '</th>' for col in columns])
+            + '</tr>']
+    for label, values in rows:
+        html.append('<tr><th>' + escape(label) + '</th>'
+                    + ''.join(['<td>' + format_value(values.get(col, None)) + '</td>'
+                               for col in columns]) + '</tr>')
+    html.append('</table>')
+    return '\n'.join(html)
+
+
+def write_html(summary, html_file):
+    """Write the summary as a static html report
+
+    :param summary: The summary, see :py:func:`get_summary`
+    :type summary: dict
+
+    :param html_file: The name of the html file
+    :type html_file: str
+
+    :returns: None
+    :rtype: None
+
+    """
+    columns = ['steps', 'increments', 'cutbacks', 'iterations', 'iterations_per_increment',
+               'iteration_share', 'wall_time', 'cpu_time']
+    rows = [('total', summary['totals'])] + list(summary['roles'].items())
+
+    cycle_nrs = [cycle['cycle'] for cycle in summary['cycles']]
+    cycle_roles = [role for role in ROLES
+                   if any([role in cycle for cycle in summary['cycles']])]
+    plots = []
+    for key, title, ylabel in [('increments', 'Increments per cycle', 'increments'),
+                               ('cutbacks', 'Cutbacks per cycle', 'cutbacks'),
+                               ('iterations_per_increment', 'Iterations per increment',
+                                'iterations/increment'),
+                               ('wall_time', 'Estimated wall clock time per cycle',
+                                'time (s)')]:
+        series = [(role, [cycle[role][key] if role in cycle else None
+                          for cycle in summary['cycles']]) for role in cycle_roles]
+        plots.append(get_svg_plot(cycle_nrs, series, title, ylabel))
+
+    memory = [('process ' + str(estimate['process']), estimate)
+              for estimate in summary['totals']['memory']]
+    html = ['<!DOCTYPE html>', '<html>', '<head>', '<meta charset="utf-8">',
+            '<title>Solver report: ' + escape(summary['job']) + '</title>',
+            '<style>body {font-family: sans-serif;} '
+            'table {border-collapse: collapse; margin-bottom: 1em;} '
+            'td, th {border: 1px solid #ccc; padding: 2px 8px; text-align: right;}</style>',
+            '</head>', '<body>',
+            '<h1>Solver report: ' + escape(summary['job']) + '</h1>',
+            '<h2>Time by step role</h2>',
+            '<p>Times are estimated from the share of solver iterations.</p>',
+            get_html_table(rows, columns),
+            '<h2>Memory estimate</h2>',
+            get_html_table(memory, ['flops_per_iteration', 'minimum_memory_mb',
+                                    'memory_to_minimize_io_mb']) if len(memory) > 0
+            else '<p>No memory estimate in the data file</p>',
+            '<h2>Trends</h2>'] + plots + ['</body>', '</html>']
+
+    with open(html_file, 'w') as fid:
+        fid.write('\n'.join(html) + '\n')
+
+
+def write(job, out_name=None, inp_file=None, merge_return=None):
+    """Write the summary of a job as json and html
+
+    :param job: The job name
+    :type job: str
+
+    :param out_name: The name of the output files, without suffix.
+                     Defaults to `job`_solver_report
+    :type out_name: str
+
+    :param inp_file: The input file, see :py:func:`get_summary`
+    :type inp_file: str
+
+    :param merge_return: The cycle layout, see :py:func:`get_summary`
+    :type merge_return: bool
+
+    :returns: The summary, see :py:func:`get_summary`
+    :rtype: dict
+
+    """
+    out_name = job + '_solver_report' if out_name is None else out_name
+    summary = get_summary(job, inp_file, merge_return)
+    json_io.save(out_name + '.json', summary)
+    write_html(summary, out_name + '.html')
+    return summary
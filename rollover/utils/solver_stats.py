@@ -0,0 +1,339 @@
+"""This module parses the solver statistics of a (running or completed)
+Abaqus job, and tunes the time incrementation of the rolling steps in
+upcoming cycles.
+
+The status file (.sta) gives each attempt of each increment. From this,
+the number of increments, cutbacks (attempts marked `U`) and
+equilibrium iterations are derived for each cycle. The wall clock time
+of a completed job is read from the message file (.msg) or the data
+file (.dat).
+
+The rolling steps are setup with an initial and maximum increment of
+`step_time/min_incr`, see
+:py:func:`rollover.three_d.utils.loading.setup`. When plasticity
+stabilizes, the rolling steps typically converge with this maximum
+increment, without any cutbacks. :py:func:`propose_min_incr` then
+proposes fewer (larger) increments. If cutbacks occur, it proposes the
+number of increments that was required. :py:func:`retune` rewrites the
+`*Static` data lines of the rolling steps in an input file, e.g. for the
+next chunk in a restart chain (see
+:py:mod:`rollover.utils.restart_chain`).
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import os, re, shutil, math
+
+from rollover.utils import naming_mod as names
+from rollover.utils.output_schedule import get_step_name
+
+STA_REGEX = re.compile(r'^\s*(\d+)\s+(\d+)\s+(\d+)(U?)\s+(\d+)\s+(\d+)\s+(\d+)\s')
+WALLCLOCK_REGEX = re.compile(r'WALLCLOCK TIME \(SEC\)\s*=\s*([\d.]+)')
+
+
+def parse_sta(sta_file):
+    """Parse the status file
+
+    :param sta_file: The name of the status file (.sta)
+    :type sta_file: str
+
+    :returns: Dictionary with an item for each step number. Each item is
+              a dictionary with the fields 'increments' (number of
+              converged increments), 'cutbacks' (number of failed
+              attempts), 'severe_iterations' and 'equilibrium_iterations'
+              (summed over all attempts)
+    :rtype: dict
+
+    """
+    steps = {}
+    with open(sta_file, 'r') as fid:
+        for line in fid:
+            match = STA_REGEX.match(line)
+            if match is None:
+                continue
+            step_nr = int(match.group(1))
+            if step_nr not in steps:
+                steps[step_nr] = {'increments': 0, 'cutbacks': 0,
+                                  'severe_iterations': 0, 'equilibrium_iterations': 0}
+            step = steps[step_nr]
+            if match.group(4) == 'U':
+                step['cutbacks'] += 1
+            else:
+                step['increments'] += 1
+            step['severe_iterations'] += int(match.group(5))
+            step['equilibrium_iterations'] += int(match.group(6))
+
+    return steps
+
+
+def get_wallclock_time(job):
+    """Get the wall clock time of a completed job from the message file
+    (.msg), or the data file (.dat) if not found in the message file.
+
+    :param job: The job name
+    :type job: str
+
+    :returns: The wall clock time in seconds, None if not available
+    :rtype: float
+
+    """
+    for suffix in ['.msg', '.dat']:
+        if not os.path.exists(job + suffix):
+            continue
+        with open(job + suffix, 'r') as fid:
+            matches = WALLCLOCK_REGEX.findall(fid.read())
+        if len(matches) > 0:
+            return float(matches[-1])
+
+    return None
+
+
+def get_step_numbers(inp_file):
+    """Get the step number for each step in an input file. For restarted
+    jobs, the numbering continues after the step given by
+    `*Restart, read`.
+
+    :param inp_file: The name of the input file
+    :type inp_file: str
+
+    :returns: Dictionary with the step number for each step name
+    :rtype: dict
+
+    """
+    step_numbers = {}
+    step_nr = 0
+    with open(inp_file, 'r') as inp:
+        for line in inp:
+            lower_line = line.lower()
+            if lower_line.startswith('*restart') and 'read' in lower_line:
+                for param in lower_line.split(',')[1:]:
+                    key, sep, value = param.partition('=')
+                    if key.strip() == 'step':
+                        step_nr = int(value)
+            elif lower_line.startswith('*step,'):
+                step_nr += 1
+                step_numbers[get_step_name(line)] = step_nr
+
+    return step_numbers
+
+
+def get_cycle_stats(job, inp_file=None):
+    """Get the solver statistics of the rolling step in each cycle
+
+    :param job: The job name
+    :type job: str
+
+    :param inp_file: The input file of the job, defaults to `job`.inp
+    :type inp_file: str
+
+    :returns: Dictionary with an item for each cycle with a rolling step
+              in the status file, see :py:func:`parse_sta`
+    :rtype: dict
+
+    """
+    inp_file = job + '.inp' if inp_file is None else inp_file
+    steps = parse_sta(job + '.sta')
+    cycle_stats = {}
+    for step_name, step_nr in get_step_numbers(inp_file).items():
+        if step_nr in steps and is_rolling_step(step_name):
+            cycle_stats[int(step_name.rpartition('_')[2])] = steps[step_nr]
+
+    return cycle_stats
+
+
+def propose_min_incr(cycle_stats, min_incr, lower_limit=1, growth=1.5, window=3):
+    """Propose the minimum number of increments for upcoming rolling
+    steps, based on the last `window` cycles in `cycle_stats`:
+
+    - If any cutbacks occurred, use the largest number of increments
+      required, but at least `min_incr`.
+    - If all cycles converged with `min_incr` increments, reduce it by
+      the factor `growth`, but not below `lower_limit`.
+    - Otherwise, keep `min_incr`.
+
+    :param cycle_stats: The statistics for each cycle, see
+                        :py:func:`get_cycle_stats`
+    :type cycle_stats: dict
+
+    :param min_incr: The current minimum number of increments
+    :type min_incr: int
+
+    :param lower_limit: The lowest allowed minimum number of increments
+    :type lower_limit: int
+
+    :param growth: The factor by which the increment size is increased
+    :type growth: float
+
+    :param window: The number of cycles to consider
+    :type window: int
+
+    :returns: The proposed minimum number of increments
+    :rtype: int
+
+    """
+    recent = [cycle_stats[c] for c in sorted(cycle_stats.keys())[-window:]]
+    if len(recent) == 0:
+        return min_incr
+
+    if any([s['cutbacks'] > 0 for s in recent]):
+        return max(min_incr, max([s['increments'] for s in recent]))
+    if all([s['increments'] <= min_incr for s in recent]):
+        return max(lower_limit, int(math.ceil(min_incr/growth)))
+
+    return min_incr
+
+
+def get_min_incr(inp_file):
+    """Get the minimum number of increments, i.e. step time divided by
+    the maximum increment, of the first rolling step in `inp_file`
+
+    :param inp_file: The name of the input file
+    :type inp_file: str
+
+    :returns: The minimum number of increments, None if no rolling steps
+              were found
+    :rtype: int
+
+    """
+    in_rolling_step = False
+    static_data = False
+    with open(inp_file, 'r') as inp:
+        for line in inp:
+            lower_line = line.lower()
+            if static_data and not line.startswith('**'):
+                values = [float(v) for v in line.split(',')]
+                return int(round(values[1]/values[3]))
+            elif lower_line.startswith('*step,'):
+                in_rolling_step = is_rolling_step(get_step_name(line))
+            elif in_rolling_step and lower_line.startswith('*static'):
+                static_data = True
+
+    return None
+
+
+def is_rolling_step(step_name):
+    """Check if `step_name` is a rolling step
+
+    :param step_name: The step name
+    :type step_name: str
+
+    :returns: True if rolling step
+    :rtype: bool
+
+    """
+    cycle_str = step_name.rpartition('_')[2]
+    return cycle_str.isdigit() and step_name == names.get_step_rolling(int(cycle_str))
+
+
+def retune(inp_file, min_incr, out_file=None):
+    """Rewrite the `*Static` data lines of all rolling steps in
+    `inp_file`, such that the initial and maximum increment is
+    `step_time/min_incr`. The step time and minimum increment are kept.
+
+    :param inp_file: The name of the input file
+    :type inp_file: str
+
+    :param min_incr: The minimum number of increments
+    :type min_incr: int
+
+    :param out_file: The name of the resulting input file. If None,
+                     `inp_file` is overwritten.
+    :type out_file: str
+
+    :returns: The previous minimum number of increments (of the first
+              rolling step), None if no rolling steps were found
+    :rtype: int
+
+    """
+    tmp_file = inp_file + '.tmp' if out_file is None else out_file
+
+    old_min_incr = None
+    in_rolling_step = False
+    static_data = False
+    with open(inp_file, 'r') as inp, open(tmp_file, 'w') as out:
+        for line in inp:
+            lower_line = line.lower()
+            if static_data and not line.startswith('**'):
+                values = [float(v) for v in line.split(',')]
+                if old_min_incr is None:
+                    old_min_incr = int(round(values[1]/values[3]))
+                line = '%0.15g, %0.15g, %0.15g, %0.15g\n' % (values[1]/min_incr, values[1],
+                                                          values[2], values[1]/min_incr)
+                static_data = False
+            elif lower_line.startswith('*step,'):
+                in_rolling_step = is_rolling_step(get_step_name(line))
+            elif in_rolling_step and lower_line.startswith('*static'):
+                static_data = True
+            out.write(line)
+
+    if out_file is None:
+        os.remove(inp_file)
+        shutil.move(tmp_file, inp_file)
+
+    return old_min_incr
+
+
+def get_time_per_increment(job, cycle_stats=None):
+    """Get the average wall clock time per increment of a completed job
+
+    :param job: The job name
+    :type job: str
+
+    :param cycle_stats: If given, only the increments in these cycles
+                        are counted, else all increments in the job.
+    :type cycle_stats: dict
+
+    :returns: The time per increment in seconds, None if the wall clock
+              time is not available
+    :rtype: float
+
+    """
+    wallclock = get_wallclock_time(job)
+    if wallclock is None:
+        return None
+
+    if cycle_stats is None:
+        num_incr = sum([s['increments'] + s['cutbacks'] for s in parse_sta(job + '.sta').values()])
+    else:
+        num_incr = sum([s['increments'] + s['cutbacks'] for s in cycle_stats.values()])
+
+    return wallclock/num_incr if num_incr > 0 else None
+
+
+def report(cycle_stats, baseline_incr, time_per_incr=None):
+    """Print a report of the increments used in each cycle, compared to
+    the baseline number of increments per cycle.
+
+    :param cycle_stats: The statistics for each cycle, see
+                        :py:func:`get_cycle_stats`
+    :type cycle_stats: dict
+
+    :param baseline_incr: The number of increments (including cutbacks)
+                          per cycle without tuning
+    :type baseline_incr: int
+
+    :param time_per_incr: The wall clock time per increment, used to
+                          estimate the time saved
+    :type time_per_incr: float
+
+    :returns: The number of increments saved
+    :rtype: int
+
+    """
+    print('%8s %10s %8s %10s' % ('cycle', 'increments', 'cutbacks', 'iterations'))
+    num_saved = 0
+    for cycle_nr in sorted(cycle_stats.keys()):
+        stats = cycle_stats[cycle_nr]
+        print('%8d %10d %8d %10d' % (cycle_nr, stats['increments'], stats['cutbacks'],
+                                     stats['equilibrium_iterations']))
+        num_saved += baseline_incr - stats['increments'] - stats['cutbacks']
+
+    saved_str = ('Increments saved compared to ' + str(baseline_incr) + ' per cycle: '
+                 + str(num_saved))
+    if time_per_incr is not None:
+        saved_str += ' (about %0.0f s wall clock time)' % (num_saved*time_per_incr)
+    print(saved_str)
+
+    return num_saved
@@ -0,0 +1,451 @@
+"""This module post-processes all rollover jobs in a parameter study in
+parallel. Each job folder (containing `<job>.fil` and `<job>.inp`) is
+exported to its own results archive (see
+:py:mod:`rollover.utils.result_archive`), and the results of all jobs
+are then merged into one study table.
+
+The work is split into tasks that are run by a process pool:
+
+1. Prepare each job (:py:func:`prepare_job`): Check if the results
+   file has changed since the last export, update the results file
+   index (see :py:mod:`rollover.utils.fil_index`) and find the cycles
+   that are not yet exported.
+2. Export the new cycles, split into ranges of `cycles_per_task`
+   cycles (:py:func:`export_cycles`). Each task decodes and writes its
+   own cycles, and the parent process adds them to the archive
+   manifest when all ranges of a job have finished.
+3. Summarize each job (:py:func:`summarize_job`), giving one row per
+   cycle.
+
+As the tasks are independent and only small results are returned to
+the parent process, the throughput scales with the number of processes
+as long as the disk is not the bottleneck. Failed tasks are retried up
+to `max_retries` times. Jobs with failed tasks are not marked as
+exported, and are retried the next time.
+
+A job is skipped if the checksum of its results file equals the
+checksum saved in the state file (`STATE_FILE`, in the study folder) at
+the last export. The checksum is only calculated if the size or
+modification time of the results file has changed.
+
+The study table (`STUDY_TABLE_FILE`) has one row per job and cycle. The
+jobs are identified by the settings (`rollover_settings.json`, see
+:py:func:`get_settings_params`) that differ between the jobs, followed
+by the wheel reference point displacements and, if exported, the mean
+and minimum vertical displacement of the rail contact nodes.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import os, csv, json, hashlib, traceback
+import multiprocessing
+import numpy as np
+
+from rollover.utils import json_io
+from rollover.utils import naming_mod as names
+from rollover.utils import fil_index
+from rollover.utils import result_archive
+
+STATE_FILE = 'postprocess_state.json'
+STUDY_TABLE_FILE = 'study_results.csv'
+CHECKSUM_BLOCK_BYTES = 2**24
+SUMMARY_CHUNK_CYCLES = 50
+
+
+def find_jobs(study_dir, job=names.job):
+    """Find the job folders in the study folder (including subfolders)
+
+    :param study_dir: The study folder
+    :type study_dir: str
+
+    :param job: The job name
+    :type job: str
+
+    :returns: The job folders (sorted)
+    :rtype: list[ str ]
+
+    """
+    job_dirs = []
+    for folder, subfolders, files in os.walk(study_dir):
+        if job + '.fil' in files and job + '.inp' in files:
+            job_dirs.append(folder)
+
+    return sorted(job_dirs)
+
+
+def get_checksum(filename):
+    """Get the sha1 checksum of a file
+
+    :param filename: The name of the file
+    :type filename: str
+
+    :returns: The checksum (hex digest)
+    :rtype: str
+
+    """
+    sha1 = hashlib.sha1()
+    with open(filename, 'rb') as fid:
+        block = fid.read(CHECKSUM_BLOCK_BYTES)
+        while len(block) > 0:
+            sha1.update(block)
+            block = fid.read(CHECKSUM_BLOCK_BYTES)
+
+    return sha1.hexdigest()
+
+
+def get_settings_params(job_dir):
+    """Get the settings of a job as a flat dictionary, e.g.
+    {'loading.vertical_load': '[150000]', ...}. Values that are not
+    numbers or strings are converted to json strings.
+
+    :param job_dir: The job folder
+    :type job_dir: str
+
+    :returns: The settings, empty if the folder does not contain a
+              settings file (`rollover.utils.naming_mod.rollover_settings_file`)
+    :rtype: dict
+
+    """
+    settings_file = os.path.join(job_dir, names.rollover_settings_file)
+    if not os.path.exists(settings_file):
+        return {}
+
+    params = {}
+    def add_params(settings, prefix):
+        for key, value in settings.items():
+            if isinstance(value, dict):
+                add_params(value, prefix + key + '.')
+            elif isinstance(value, (int, float, str)) and not isinstance(value, bool):
+                params[prefix + key] = value
+            else:
+                params[prefix + key] = json.dumps(value)
+
+    add_params(json_io.read(settings_file), '')
+    return params
+
+
+def prepare_job(job_dir, job, archive_name, state):
+    """Check if a job must be exported, and find the cycles to export
+
+    :param job_dir: The job folder
+    :type job_dir: str
+
+    :param job: The job name
+    :type job: str
+
+    :param archive_name: The name of the archive folder in the job folder
+    :type archive_name: str
+
+    :param state: The saved state of the job from the last export, empty
+                  if not exported before
+    :type state: dict
+
+    :returns: Dictionary with the new 'state' (size, modification time
+              and checksum of the results file), 'skip' (unchanged
+              results file), and if not skipped the 'cycles' to export
+              and the 'node_sets' for each table
+    :rtype: dict
+
+    """
+    fil_file = os.path.join(job_dir, job + '.fil')
+    archive = os.path.join(job_dir, archive_name)
+    new_state = {'size': os.path.getsize(fil_file), 'mtime': os.path.getmtime(fil_file)}
+    if (state.get('size', None) == new_state['size']
+            and state.get('mtime', None) == new_state['mtime']):
+        new_state['checksum'] = state['checksum']
+    else:
+        new_state['checksum'] = get_checksum(fil_file)
+
+    if new_state['checksum'] == state.get('checksum', None) and os.path.exists(archive):
+        return {'state': new_state, 'skip': True}
+
+    state_file = os.path.join(job_dir, names.usub_state_file)
+    inp_file = os.path.join(job_dir, job + '.inp')
+    node_sets = result_archive.read_usub_node_sets(state_file)
+    entries = fil_index.update(fil_file)
+    lookup = fil_index.get_lookup(entries)
+    cycles = result_archive.get_new_cycles(archive, node_sets.keys(), lookup, inp_file)
+    if len(cycles) > 0:
+        entry = fil_index.get_cycle_entries(entries, inp_file, cycles[:1])[0]
+        increment = fil_index.read_increment(fil_file, entry)
+        rail_contact_labels = result_archive.get_rail_contact_labels(increment, node_sets,
+                                                                     state_file)
+        if len(rail_contact_labels) > 0:
+            node_sets['rail_contact'] = rail_contact_labels
+
+    return {'state': new_state, 'skip': False, 'cycles': cycles, 'node_sets': node_sets}
+
+
+def export_cycles(job_dir, job, archive_name, cycles, node_sets):
+    """Write the results of some cycles to the archive, without adding
+    them to the manifest, see
+    :py:func:`rollover.utils.result_archive.npz_write_cycle`. The
+    results file index must be up to date, see :py:func:`prepare_job`.
+
+    :param job_dir: The job folder
+    :type job_dir: str
+
+    :param job: The job name
+    :type job: str
+
+    :param archive_name: The name of the archive folder in the job folder
+    :type archive_name: str
+
+    :param cycles: The cycle numbers to export
+    :type cycles: list[ int ]
+
+    :param node_sets: The node labels for each table
+    :type node_sets: dict
+
+    :returns: The exported cycles
+    :rtype: list[ int ]
+
+    """
+    fil_file = os.path.join(job_dir, job + '.fil')
+    inp_file = os.path.join(job_dir, job + '.inp')
+    archive = os.path.join(job_dir, archive_name)
+    header, entries = fil_index.read(fil_index.get_index_file(fil_file))
+    for cycle_nr, entry in zip(cycles, fil_index.get_cycle_entries(entries, inp_file, cycles)):
+        increment = fil_index.read_increment(fil_file, entry)
+        tables = result_archive.get_cycle_tables(increment, node_sets)
+        result_archive.npz_write_cycle(archive, cycle_nr, tables)
+
+    return cycles
+
+
+def summarize_job(job_dir, archive_name):
+    """Get one row per cycle with the wheel reference point
+    displacements, and the mean and minimum vertical rail contact node
+    displacements (if exported)
+
+    :param job_dir: The job folder
+    :type job_dir: str
+
+    :param archive_name: The name of the archive folder in the job folder
+    :type archive_name: str
+
+    :returns: The rows, each a dictionary with the column names as keys
+    :rtype: list[ dict ]
+
+    """
+    archive = os.path.join(job_dir, archive_name)
+    wheel_rp = result_archive.query(archive, 'wheel_rp')
+    rows = []
+    for nr, cycle_nr in enumerate(wheel_rp['cycles']):
+        row = {'cycle': cycle_nr}
+        for col in result_archive.TABLES['wheel_rp']:
+            row['wheel_rp_' + col] = wheel_rp[col][nr, 0]
+        rows.append(row)
+
+    rail_cycles = result_archive.get_cycles(archive, 'rail_contact')
+    rail_rows = dict([(row['cycle'], row) for row in rows if row['cycle'] in rail_cycles])
+    for start in range(0, len(rail_cycles), SUMMARY_CHUNK_CYCLES):
+        rail = result_archive.query(archive, 'rail_contact', ['u2'],
+                                    cycles=rail_cycles[start:start+SUMMARY_CHUNK_CYCLES])
+        for cycle_nr, u2 in zip(rail['cycles'], rail['u2']):
+            if cycle_nr in rail_rows:
+                rail_rows[cycle_nr]['rail_contact_u2_mean'] = np.mean(u2)
+                rail_rows[cycle_nr]['rail_contact_u2_min'] = np.min(u2)
+
+    return rows
+
+
+def run_task(task):
+    """Run a task and catch any exception, such that the pool continues
+    with the other tasks
+
+    :param task: The task key, the function to call, and its arguments
+    :type task: tuple( object, function, tuple )
+
+    :returns: The task key, the result (None if failed), and the error
+              message (None if successful)
+    :rtype: tuple
+
+    """
+    key, function, args = task
+    try:
+        return key, function(*args), None
+    except Exception:
+        return key, None, traceback.format_exc()
+
+
+def run_tasks(pool, tasks, max_retries):
+    """Run the tasks in the pool, and retry the failed tasks
+
+    :param pool: The process pool, None to run in this process
+    :type pool: multiprocessing.Pool
+
+    :param tasks: The tasks, see :py:func:`run_task`
+    :type tasks: list[ tuple ]
+
+    :param max_retries: The maximum number of retries for a task
+    :type max_retries: int
+
+    :returns: The result for each successful task, and the error message
+              for each failed task (by task key)
+    :rtype: tuple( dict, dict )
+
+    """
+    results = {}
+    errors = {}
+    for attempt in range(max_retries + 1):
+        task_map = pool.imap_unordered if pool is not None else map
+        failed = []
+        for key, result, error in task_map(run_task, tasks):
+            if error is None:
+                results[key] = result
+                errors.pop(key, None)
+            else:
+                errors[key] = error
+                failed.append(key)
+        tasks = [task for task in tasks if task[0] in failed]
+        if len(tasks) == 0:
+            break
+
+    return results, errors
+
+
+def run(study_dir, num_processes=None, cycles_per_task=50, max_retries=2, job=names.job,
+        archive_name=None):
+    """Export all jobs in the study folder and write the study table
+
+    :param study_dir: The study folder
+    :type study_dir: str
+
+    :param num_processes: The number of processes, defaults to the
+                          number of cores
+    :type num_processes: int
+
+    :param cycles_per_task: The number of cycles exported by each task
+    :type cycles_per_task: int
+
+    :param max_retries: The maximum number of retries for a task
+    :type max_retries: int
+
+    :param job: The job name
+    :type job: str
+
+    :param archive_name: The name of the archive folder in each job
+                         folder, defaults to `job`_results (as
+                         :file:`scripts_py/export_results.py`)
+    :type archive_name: str
+
+    :returns: The error message for each failed task
+    :rtype: dict
+
+    """
+    archive_name = job + '_results' if archive_name is None else archive_name
+    if result_archive.is_hdf5(archive_name):
+        raise ValueError('Parallel export requires an NPZ-directory archive')
+    num_processes = multiprocessing.cpu_count() if num_processes is None else num_processes
+
+    state_file = os.path.join(study_dir, STATE_FILE)
+    state = json_io.read(state_file) if os.path.exists(state_file) else {}
+    job_dirs = find_jobs(study_dir, job)
+    keys = [os.path.relpath(job_dir, study_dir) for job_dir in job_dirs]
+
+    pool = multiprocessing.Pool(num_processes) if num_processes > 1 else None
+    try:
+        tasks = [(key, prepare_job, (job_dir, job, archive_name, state.get(key, {})))
+                 for key, job_dir in zip(keys, job_dirs)]
+        prepared, errors = run_tasks(pool, tasks, max_retries)
+
+        tasks = []
+        for key, job_dir in zip(keys, job_dirs):
+            if key not in prepared or prepared[key]['skip']:
+                continue
+            cycles = prepared[key]['cycles']
+            for start in range(0, len(cycles), cycles_per_task):
+                args = (job_dir, job, archive_name, cycles[start:start+cycles_per_task],
+                        prepared[key]['node_sets'])
+                tasks.append(((key, start), export_cycles, args))
+        exported, export_errors = run_tasks(pool, tasks, max_retries)
+        errors.update(export_errors)
+
+        for key, job_dir in zip(keys, job_dirs):
+            if key not in prepared:
+                continue
+            job_tasks = [task[0] for task in tasks if task[0][0] == key]
+            if any([task_key not in exported for task_key in job_tasks]):
+                continue
+            if len(job_tasks) > 0:
+                result_archive.npz_register(os.path.join(job_dir, archive_name),
+                                            prepared[key]['cycles'], prepared[key]['node_sets'])
+            state[key] = prepared[key]['state']
+            json_io.save(state_file, state)
+
+        tasks = [(key, summarize_job, (job_dir, archive_name))
+                 for key, job_dir in zip(keys, job_dirs)
+                 if os.path.exists(os.path.join(job_dir, archive_name))]
+        summaries, summary_errors = run_tasks(pool, tasks, max_retries)
+        errors.update(summary_errors)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    job_params = dict([(key, get_settings_params(job_dir))
+                       for key, job_dir in zip(keys, job_dirs) if key in summaries])
+    write_study_table(os.path.join(study_dir, STUDY_TABLE_FILE), job_params,
+                      [(key, summaries[key]) for key in keys if key in summaries])
+
+    return errors
+
+
+def get_varying_params(job_params):
+    """Get the names of the settings that differ between the jobs
+
+    :param job_params: The settings of each job, see
+                       :py:func:`get_settings_params`
+    :type job_params: dict
+
+    :returns: The names of the settings (sorted)
+    :rtype: list[ str ]
+
+    """
+    all_names = set()
+    for params in job_params.values():
+        all_names.update(params.keys())
+
+    varying = []
+    for name in all_names:
+        values = set([json.dumps(params.get(name, None)) for params in job_params.values()])
+        if len(values) > 1:
+            varying.append(name)
+
+    return sorted(varying)
+
+
+def write_study_table(table_file, job_params, job_rows):
+    """Write the study table as csv
+
+    :param table_file: The name of the csv file
+    :type table_file: str
+
+    :param job_params: The settings of each job, see
+                       :py:func:`get_settings_params`
+    :type job_params: dict
+
+    :param job_rows: The job key (folder relative to the study folder)
+                     and the rows from :py:func:`summarize_job` for
+                     each job
+    :type job_rows: list[ tuple( str, list[ dict ] ) ]
+
+    :returns: None
+    :rtype: None
+
+    """
+    param_names = get_varying_params(job_params)
+    result_names = ['cycle'] + ['wheel_rp_' + col for col in result_archive.TABLES['wheel_rp']]
+    if any(['rail_contact_u2_mean' in row for key, rows in job_rows for row in rows]):
+        result_names += ['rail_contact_u2_mean', 'rail_contact_u2_min']
+
+    with open(table_file, 'w') as fid:
+        writer = csv.writer(fid, lineterminator='\n')
+        writer.writerow(['job'] + param_names + result_names)
+        for key, rows in job_rows:
+            params = [job_params[key].get(name, '') for name in param_names]
+            for row in rows:
+                writer.writerow([key] + params + [row.get(name, '') for name in result_names])
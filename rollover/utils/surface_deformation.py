@@ -0,0 +1,382 @@
+"""This module extracts the permanent deformation of the rail contact
+surface (the rail contact nodes, `rollover.utils.naming_mod.rail_contact_nodes`)
+for each cycle. The displacements at the end of each rolling step are
+read in chunks of `CHUNK_CYCLES` cycles, either from a results archive
+(:py:func:`iter_archive_chunks`, see
+:py:mod:`rollover.utils.result_archive`) or directly from the results
+file (:py:func:`iter_fil_chunks`, see
+:py:mod:`rollover.utils.fil_index`). The rail contact nodes are only
+written to the results file if requested, see
+:py:func:`rollover.three_d.utils.fil_output.add`.
+
+The node coordinates are read once, from a mesh bundle of the rail
+(:py:func:`get_bundle_coords`) or from the first increment with
+coordinates in the results file (:py:func:`get_fil_coords`). All
+results for one chunk are then calculated with whole-array operations.
+For each cycle, :py:func:`extract` calculates
+
+- The surface profile: The vertical displacement (u2) averaged over the
+  rail length (z) within `num_bins` lateral (x) bins
+- The ratcheting increment: The change in vertical displacement since
+  the previous cycle, given as the mean over all nodes
+  ('ratchet_mean') and as the value with the largest magnitude
+  ('ratchet_max')
+- The maximum deformation: The vertical displacement with the largest
+  magnitude ('max_u2'), and the x and z coordinates of this node
+  ('max_x' and 'max_z')
+
+The results are saved to a folder. The displacements of all nodes are
+delta-encoded, i.e. the first cycle contains the displacements, and
+each following cycle the change since the previous cycle (the
+ratcheting increments). They are saved to `DELTA_FILE`, which is written
+and read as a memory mapped array, such that only one chunk is kept in
+memory. The profiles (delta-encoded) and the per cycle values are saved
+to `SUMMARY_FILE`. Use :py:func:`read` to get the results.
+
+This module does not require Abaqus.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+from __future__ import print_function
+import os
+import numpy as np
+
+from rollover.utils import naming_mod as names
+from rollover.utils import fil_reader
+from rollover.utils import fil_index
+from rollover.utils import solver_stats
+from rollover.utils import result_archive
+from rollover.utils import mesh_bundle_io
+
+CHUNK_CYCLES = 50   # 50 cycles x 50 000 nodes is 60 MB of displacements
+COMPONENTS = ['u1', 'u2', 'u3']
+DELTA_FILE = 'delta.npy'
+SUMMARY_FILE = 'summary.npz'
+CYCLE_VALUES = ['max_u2', 'max_x', 'max_z', 'ratchet_mean', 'ratchet_max']
+
+
+def get_bundle_coords(bundle_file, set_name=names.rail_contact_nodes):
+    """Get the labels and coordinates of the nodes in a set from a mesh
+    bundle of the rail, see :py:mod:`rollover.utils.mesh_bundle_io`
+
+    :param bundle_file: The name of the mesh bundle file
+    :type bundle_file: str
+
+    :param set_name: The name of the node set
+    :type set_name: str
+
+    :returns: The node labels and coordinates
+    :rtype: tuple( np.array [N], np.array [N, 3] )
+
+    """
+    bundle = mesh_bundle_io.read(bundle_file)
+    if set_name not in bundle['sets']:
+        raise ValueError('The set "' + set_name + '" is not in "' + bundle_file + '"')
+    labels = np.asarray(bundle['sets'][set_name]['nodes'])
+    inds = result_archive.get_node_inds(np.asarray(bundle['node_labels']), labels)
+    return labels, np.asarray(bundle['node_coords'])[inds, :3]
+
+
+def get_fil_coords(fil_file, labels):
+    """Get the initial coordinates of nodes from the first increment in
+    the results file with coordinates (COORD) and displacements (U) for
+    these nodes.
+
+    :param fil_file: The name of the results file
+    :type fil_file: str
+
+    :param labels: The node labels
+    :type labels: np.array
+
+    :returns: The coordinates
+    :rtype: np.array [N, 3]
+
+    """
+    for increment in fil_reader.iter_increments(fil_file):
+        if 'COORD' not in increment or 'U' not in increment:
+            continue
+        if not (np.all(np.isin(labels, increment['COORD']['labels']))
+                and np.all(np.isin(labels, increment['U']['labels']))):
+            continue
+        coord_inds = result_archive.get_node_inds(increment['COORD']['labels'], labels)
+        disp_inds = result_archive.get_node_inds(increment['U']['labels'], labels)
+        return (increment['COORD']['values'][coord_inds, :3]
+                - increment['U']['values'][disp_inds, :3])
+
+    raise ValueError('No increment with coordinates for all nodes in "' + fil_file + '"')
+
+
+def get_archive_cycles(archive):
+    """Get the cycles of the rail contact table in a results archive
+
+    :param archive: The name of the archive
+    :type archive: str
+
+    :returns: The cycle numbers
+    :rtype: list[ int ]
+
+    """
+    return result_archive.get_cycles(archive, 'rail_contact')
+
+
+def iter_archive_chunks(archive, labels, cycles, chunk_cycles=CHUNK_CYCLES):
+    """Read the rail contact node displacements from a results archive
+
+    :param archive: The name of the archive
+    :type archive: str
+
+    :param labels: The node labels
+    :type labels: np.array
+
+    :param cycles: The cycles to read
+    :type cycles: list[ int ]
+
+    :param chunk_cycles: The number of cycles to read at once
+    :type chunk_cycles: int
+
+    :returns: Generator giving the cycle numbers (np.array [C]) and the
+              displacements (np.array [C, N, 3]) for each chunk
+    :rtype: generator
+
+    """
+    for start in range(0, len(cycles), chunk_cycles):
+        data = result_archive.query(archive, 'rail_contact', COMPONENTS, labels,
+                                    cycles[start:start+chunk_cycles])
+        yield np.asarray(data['cycles']), np.stack([data[col] for col in COMPONENTS], axis=-1)
+
+
+def get_fil_cycles(fil_file, inp_file):
+    """Get the cycles with results for the rolling step in the results
+    file. The results file index is updated.
+
+    :param fil_file: The name of the results file
+    :type fil_file: str
+
+    :param inp_file: The input file of the job
+    :type inp_file: str
+
+    :returns: The cycle numbers
+    :rtype: list[ int ]
+
+    """
+    lookup = fil_index.get_lookup(fil_index.update(fil_file))
+    cycles = []
+    for step_name, step_nr in solver_stats.get_step_numbers(inp_file).items():
+        if solver_stats.is_rolling_step(step_name) and step_nr in lookup:
+            cycles.append(int(step_name.rpartition('_')[2]))
+
+    return sorted(cycles)
+
+
+def iter_fil_chunks(fil_file, inp_file, labels, cycles, chunk_cycles=CHUNK_CYCLES):
+    """Read the rail contact node displacements from the results file.
+    One increment at a time is decoded.
+
+    :param fil_file: The name of the results file
+    :type fil_file: str
+
+    :param inp_file: The input file of the job
+    :type inp_file: str
+
+    :param labels: The node labels
+    :type labels: np.array
+
+    :param cycles: The cycles to read, e.g. from :py:func:`get_fil_cycles`
+    :type cycles: list[ int ]
+
+    :param chunk_cycles: The number of cycles to read at once
+    :type chunk_cycles: int
+
+    :returns: Generator giving the cycle numbers (np.array [C]) and the
+              displacements (np.array [C, N, 3]) for each chunk
+    :rtype: generator
+
+    """
+    entries = fil_index.update(fil_file)
+    for start in range(0, len(cycles), chunk_cycles):
+        chunk_cycle_nrs = cycles[start:start+chunk_cycles]
+        disp = np.empty((len(chunk_cycle_nrs), len(labels), len(COMPONENTS)))
+        cycle_entries = fil_index.get_cycle_entries(entries, inp_file, chunk_cycle_nrs)
+        for nr, entry in enumerate(cycle_entries):
+            increment = fil_index.read_increment(fil_file, entry, keys=(fil_reader.FIL_NODE_DISP,))
+            inds = result_archive.get_node_inds(increment['U']['labels'], labels)
+            disp[nr] = increment['U']['values'][inds, :len(COMPONENTS)]
+        yield np.asarray(chunk_cycle_nrs), disp
+
+
+def get_profile_bins(coords, num_bins):
+    """Get the lateral (x) bin of each node for the surface profiles
+
+    :param coords: The node coordinates
+    :type coords: np.array [N, 3]
+
+    :param num_bins: The number of bins
+    :type num_bins: int
+
+    :returns: The bin number of each node, and the x coordinate of each
+              bin center
+    :rtype: tuple( np.array [N], np.array [num_bins] )
+
+    """
+    edges = np.linspace(np.min(coords[:, 0]), np.max(coords[:, 0]), num_bins + 1)
+    bins = np.clip(np.searchsorted(edges, coords[:, 0], side='right') - 1, 0, num_bins - 1)
+    return bins, 0.5*(edges[:-1] + edges[1:])
+
+
+def get_profiles(u2, bins, num_bins):
+    """Get the surface profiles by averaging the vertical displacements
+    of the nodes within each bin
+
+    :param u2: The vertical displacements
+    :type u2: np.array [C, N]
+
+    :param bins: The bin number of each node, see
+                 :py:func:`get_profile_bins`
+    :type bins: np.array [N]
+
+    :param num_bins: The number of bins
+    :type num_bins: int
+
+    :returns: The profiles, NaN for bins without nodes
+    :rtype: np.array [C, num_bins]
+
+    """
+    num_cycles = u2.shape[0]
+    flat_bins = (np.arange(num_cycles)[:, np.newaxis]*num_bins + bins[np.newaxis, :]).ravel()
+    sums = np.bincount(flat_bins, weights=u2.ravel(), minlength=num_cycles*num_bins)
+    counts = np.bincount(bins, minlength=num_bins).astype(float)
+    counts[counts == 0] = np.nan
+    return sums.reshape(num_cycles, num_bins)/counts[np.newaxis, :]
+
+
+def get_largest_magnitude(values):
+    """Get the value with the largest magnitude in each row
+
+    :param values: The values
+    :type values: np.array [C, N]
+
+    :returns: The position in each row, and the values
+    :rtype: tuple( np.array [C], np.array [C] )
+
+    """
+    inds = np.argmax(np.abs(values), axis=1)
+    return inds, values[np.arange(values.shape[0]), inds]
+
+
+def extract(out_dir, labels, coords, cycles, chunks, num_bins=100):
+    """Extract the surface deformation and save it to `out_dir`
+
+    :param out_dir: The folder to save the results to
+    :type out_dir: str
+
+    :param labels: The node labels
+    :type labels: np.array [N]
+
+    :param coords: The initial node coordinates
+    :type coords: np.array [N, 3]
+
+    :param cycles: The cycles given by `chunks`
+    :type cycles: list[ int ]
+
+    :param chunks: Generator giving the cycle numbers and displacements
+                   in chunks, e.g. :py:func:`iter_archive_chunks` or
+                   :py:func:`iter_fil_chunks`
+    :type chunks: generator
+
+    :param num_bins: The number of lateral bins for the surface profiles
+    :type num_bins: int
+
+    :returns: None
+    :rtype: None
+
+    """
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    labels = np.asarray(labels)
+    coords = np.asarray(coords)
+    num_cycles = len(cycles)
+    delta = np.lib.format.open_memmap(os.path.join(out_dir, DELTA_FILE), mode='w+',
+                                      dtype=np.float64,
+                                      shape=(num_cycles, len(labels), len(COMPONENTS)))
+    bins, profile_x = get_profile_bins(coords, num_bins)
+    profiles = np.empty((num_cycles, num_bins))
+    values = dict([(key, np.empty(num_cycles)) for key in CYCLE_VALUES])
+
+    u2 = COMPONENTS.index('u2')
+    previous = np.zeros((len(labels), len(COMPONENTS)))
+    start = 0
+    for chunk_cycles, disp in chunks:
+        stop = start + len(chunk_cycles)
+        if not np.array_equal(chunk_cycles, cycles[start:stop]):
+            raise ValueError('Got cycles ' + str(list(chunk_cycles)) + ', expected '
+                             + str(list(cycles[start:stop])))
+        chunk_delta = np.diff(np.concatenate((previous[np.newaxis], disp)), axis=0)
+        delta[start:stop] = chunk_delta
+        profiles[start:stop] = get_profiles(disp[:, :, u2], bins, num_bins)
+
+        inds, values['max_u2'][start:stop] = get_largest_magnitude(disp[:, :, u2])
+        values['max_x'][start:stop] = coords[inds, 0]
+        values['max_z'][start:stop] = coords[inds, 2]
+        values['ratchet_mean'][start:stop] = np.mean(chunk_delta[:, :, u2], axis=1)
+        values['ratchet_max'][start:stop] = get_largest_magnitude(chunk_delta[:, :, u2])[1]
+
+        previous = disp[-1]
+        start = stop
+
+    if start != num_cycles:
+        raise ValueError('Got ' + str(start) + ' of ' + str(num_cycles) + ' cycles')
+
+    delta.flush()
+    del delta
+    profile_delta = np.diff(np.concatenate((np.zeros((1, num_bins)), profiles)), axis=0)
+    np.savez(os.path.join(out_dir, SUMMARY_FILE), labels=labels, coords=coords,
+             cycles=np.asarray(cycles), profile_x=profile_x, profile_delta=profile_delta,
+             **values)
+
+
+def read(out_dir, cycles=None, chunk_cycles=CHUNK_CYCLES):
+    """Read the results saved by :py:func:`extract`
+
+    :param out_dir: The folder with the results
+    :type out_dir: str
+
+    :param cycles: The cycles for which the displacements of all nodes
+                   should be decoded, defaults to none.
+    :type cycles: list[ int ]
+
+    :param chunk_cycles: The number of cycles to decode at once
+    :type chunk_cycles: int
+
+    :returns: Dictionary with the 'labels', 'coords', 'cycles',
+              'profile_x', 'profiles' (np.array [num_cycles, num_bins]),
+              the values in `CYCLE_VALUES` for each cycle, and the
+              displacements 'u' (np.array [len(cycles), N, 3]) for the
+              requested `cycles`
+    :rtype: dict
+
+    """
+    with np.load(os.path.join(out_dir, SUMMARY_FILE)) as summary:
+        results = dict([(key, summary[key]) for key in summary.files])
+    results['profiles'] = np.cumsum(results.pop('profile_delta'), axis=0)
+    if cycles is None:
+        return results
+
+    stored_cycles = results['cycles'].tolist()
+    missing_cycles = [c for c in cycles if c not in stored_cycles]
+    if len(missing_cycles) > 0:
+        raise ValueError('Cycles ' + str(missing_cycles) + ' not in "' + out_dir + '"')
+
+    delta = np.load(os.path.join(out_dir, DELTA_FILE), mmap_mode='r')
+    positions = [stored_cycles.index(c) for c in cycles]
+    results['u'] = np.empty((len(cycles),) + delta.shape[1:])
+    current = np.zeros(delta.shape[1:])
+    decoded = 0
+    for nr in np.argsort(positions):
+        for start in range(decoded, positions[nr] + 1, chunk_cycles):
+            stop = min(start + chunk_cycles, positions[nr] + 1)
+            current = current + np.sum(delta[start:stop], axis=0)
+        decoded = max(decoded, positions[nr] + 1)
+        results['u'][nr] = current
+
+    return results
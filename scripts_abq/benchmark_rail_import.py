@@ -0,0 +1,64 @@
+"""Running this abaqus script compares the time required to include the
+rail in a model from the .cae file and from the mesh bundle (.npz file).
+
+The rail is given by `'rail_name'` in the rail settings .json file with
+name rollover.utils.naming_mod.rail_settings_file (i.e. the same file as
+used by :py:mod:`create_rail_3d`). Both the .cae and the .npz file must
+exist, the latter is created by :py:mod:`create_rail_3d` if
+`'mesh_bundle'` is true. The time to write the part definition directly
+to the input file format is also reported.
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+
+# System imports
+from __future__ import print_function
+import time
+
+# Abaqus imports
+from abaqus import mdb
+
+# Project library imports
+from rollover.utils import json_io
+from rollover.utils import naming_mod as names
+from rollover.utils import abaqus_python_tools as apt
+from rollover.utils import mesh_bundle_io
+from rollover.three_d.rail import include as rail_include
+
+NUM_REPEATS = 3
+
+
+def main():
+    rail_param = json_io.read(names.rail_settings_file)
+    rail_name = rail_param['rail_name']
+    if rail_name.endswith('.cae'):
+        rail_name = rail_name[:-4]
+
+    times = {}
+    for suffix in ['.cae', '.npz']:
+        times[suffix] = []
+        for i in range(NUM_REPEATS):
+            the_model = apt.create_model('RAIL_IMPORT_BENCHMARK')
+            t0 = time.time()
+            rail_include.get_part_from_file(the_model, rail_name + suffix)
+            times[suffix].append(time.time() - t0)
+            num_nodes = len(the_model.parts[names.rail_part].nodes)
+            del mdb.models['RAIL_IMPORT_BENCHMARK']
+
+    times['.inp'] = []
+    for i in range(NUM_REPEATS):
+        t0 = time.time()
+        bundle = mesh_bundle_io.read(rail_name + '.npz')
+        mesh_bundle_io.get_inp_part_str(bundle, names.rail_part)
+        times['.inp'].append(time.time() - t0)
+
+    apt.log('Rail import benchmark, ' + str(num_nodes) + ' nodes, best of '
+            + str(NUM_REPEATS) + ' runs')
+    for key, description in zip(['.cae', '.npz', '.inp'],
+                                ['From .cae file', 'From mesh bundle',
+                                 'Mesh bundle to .inp part']):
+        apt.log('%-25s: %8.3f s' % (description, min(times[key])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Running this abaqus script compares the number of elements in a rail
+meshed with nested refinement zones with single zone meshes.
+
+The rail settings .json file with name
+rollover.utils.naming_mod.rail_settings_file (see
+:py:mod:`create_rail_3d`) should specify `'refine_region'` as a list of
+nested refinement zones (see
+:py:func:`rollover.three_d.rail.basic.get_refine_zones`). The following
+layouts are meshed and the element count per zone is logged:
+
+- The nested layout
+- A single zone covering the outermost region with the finest mesh size
+- A single zone covering the innermost region with the finest mesh size
+
+.. codeauthor:: Knut Andreas Meyer
+"""
+
+# System imports
+from __future__ import print_function
+
+# Project library imports
+from rollover.utils import json_io
+from rollover.utils import naming_mod as names
+from rollover.utils import abaqus_python_tools as apt
+from rollover.three_d.rail import basic as rail_basic
+from rollover.three_d.rail import mesher as rail_mesh
+
+
+def main():
+    rail_param = json_io.read(names.rail_settings_file)
+    zones = rail_basic.get_refine_zones(rail_param['refine_region'],
+                                        max_size_ratio=rail_param.get('max_size_ratio'))
+    if len(zones) < 2:
+        raise ValueError('At least two nested refinement zones must be given')
+
+    layouts = {'nested': rail_param['refine_region'],
+               'single outer': [{'region': zones[0]['region'], 'size': zones[-1]['size']}],
+               'single inner': [zones[-1]]}
+
+    num_elements = {}
+    for key in ['nested', 'single outer', 'single inner']:
+        apt.log('Layout: ' + key)
+        layout_param = {p: rail_param[p] for p in rail_param}
+        layout_param['refine_region'] = layouts[key]
+        rail_model = rail_basic.create_from_param(layout_param)
+        rail_part = rail_model.parts[names.rail_part]
+        refine_zones = rail_basic.get_refine_zones(layouts[key],
+                                                   max_size_ratio=rail_param.get('max_size_ratio'))
+        rail_mesh.create_zoned(rail_part, refine_zones, rail_param['coarse_mesh'])
+        num_elements[key] = len(rail_part.elements)
+
+    apt.log('Summary, total number of elements')
+    for key in ['nested', 'single outer', 'single inner']:
+        apt.log('%-15s: %8d' % (key, num_elements[key]))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,9 @@ rollover.utils.naming_mod.rail_settings_file should contain keywords
 according to :py:func:`rollover.three_d.rail.basic.create_from_param` 
 and :py:func:`rollover.three_d.rail.mesher.create_basic_from_param` as 
 well as `'rail_name'` giving the name of the cae file to which the model 
-is saved. 
+is saved. If the optional keyword `'mesh_bundle'` is true, the meshed 
+rail is also exported to a mesh bundle with the same name, but with the
+suffix .npz (see :py:func:`rollover.three_d.rail.mesher.export_bundle`).
 
 .. codeauthor:: Knut Andreas Meyer
 """
@@ -22,19 +24,37 @@ from __future__ import print_function
 # Project library imports
 from rollover.utils import json_io
 from rollover.utils import naming_mod as names
+from rollover.utils import abaqus_python_tools as apt
 from rollover.three_d.rail import basic as rail_basic
 from rollover.three_d.rail import mesher as rail_mesh
 
 
 def main():
+    # Start timing if trace file given by apt.TRACE_ENV_VAR
+    apt.start_trace()
+    try:
+        with apt.span('create_rail_3d'):
+            create_rail()
+    finally:
+        apt.stop_trace()
+    
+    
+def create_rail():
     # Read in wheel section parameters
     rail_param = json_io.read(names.rail_settings_file)
-    rail_model = rail_basic.create_from_param(rail_param)
-    rail_mesh.create_basic_from_param(rail_model.parts[names.rail_part], rail_param)
-    if rail_param['rail_name'].endswith('.cae'):
-        mdb.saveAs(pathName=rail_param['rail_name'])
-    else:
-        mdb.saveAs(pathName=rail_param['rail_name'] + '.cae')
+    with apt.span('rail_basic.create_from_param'):
+        rail_model = rail_basic.create_from_param(rail_param)
+    with apt.span('rail_mesh.create_basic_from_param'):
+        rail_mesh.create_basic_from_param(rail_model.parts[names.rail_part], rail_param)
+    rail_name = rail_param['rail_name']
+    if rail_name.endswith('.cae'):
+        rail_name = rail_name[:-4]
+    if rail_param.get('mesh_bundle', False):
+        material = rail_param.get('material', rail_basic.default_material)
+        with apt.span('rail_mesh.export_bundle'):
+            rail_mesh.export_bundle(rail_model, rail_name + '.npz', material)
+    with apt.span('save_cae'):
+        mdb.saveAs(pathName=rail_name + '.cae')
     
     
 if __name__ == '__main__':
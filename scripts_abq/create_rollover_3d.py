@@ -19,6 +19,9 @@ from rollover.utils import json_io
 from rollover.utils import naming_mod as names
 from rollover.utils import abaqus_python_tools as apt
 from rollover.utils import general as gen_tools
+from rollover.utils import inp_cycles
+from rollover.utils import output_schedule
+from rollover.utils import convergence_monitor
 from rollover.three_d.rail import include as rail_include
 from rollover.three_d.wheel import include as wheel_include
 from rollover.three_d.utils import contact
@@ -33,44 +36,80 @@ def main():
     if not check_input(param):
         return
     
+    # Start timing if trace file given by apt.TRACE_ENV_VAR
+    apt.start_trace()
+    try:
+        with apt.span('create_rollover_3d'):
+            create_rollover(param)
+    finally:
+        apt.stop_trace()
+    
+    
+def create_rollover(param):
     # Create the model
-    rollover_model = apt.create_model(names.model)
+    with apt.span('create_model'):
+        rollover_model = apt.create_model(names.model)
     # rollover_model = mdb.models[names.model]
     print('model created')
     # Include the rail part
-    num_nodes, num_elems = rail_include.from_file(rollover_model, **param['rail'])
+    with apt.span('rail_include.from_file'):
+        num_nodes, num_elems = rail_include.from_file(rollover_model, **param['rail'])
     print('rail included')
     # Include the wheel part
-    wheel_stiffness = wheel_include.from_folder(rollover_model, 
-                                                start_labels=(num_nodes+1, num_elems+1),
-                                                **param['wheel'])
+    with apt.span('wheel_include.from_folder'):
+        wheel_stiffness = wheel_include.from_folder(rollover_model, 
+                                                    start_labels=(num_nodes+1, num_elems+1),
+                                                    **param['wheel'])
     print('wheel included')
     # Setup contact
-    contact.setup(rollover_model, **param['contact'])
+    with apt.span('contact.setup'):
+        contact.setup(rollover_model, **param['contact'])
     print('contact setup')
     # Setup loading steps
-    num_cycles = loading.setup(rollover_model, **param['loading'])
+    with apt.span('loading.setup'):
+        num_cycles = loading.setup(rollover_model, **param['loading'])
     print('loading setup')
     # Add odb field output if not standard
     if 'field_output' in param:
-        odb_output.add(rollover_model, param['field_output'], num_cycles)
+        with apt.span('odb_output.add'):
+            odb_output.add(rollover_model, param['field_output'])
     print('field output setup')
     # Add wheel uel to input file
-    wheel_include.add_wheel_super_element_to_inp(rollover_model, wheel_stiffness, 
-                                                 param['wheel']['folder'],
-                                                 param['wheel']['translation'])
+    with apt.span('wheel_include.add_wheel_super_element_to_inp'):
+        wheel_include.add_wheel_super_element_to_inp(rollover_model, wheel_stiffness, 
+                                                     param['wheel']['folder'],
+                                                     param['wheel']['translation'])
                                                  
     print('wheel included in input')
     # Add results file output
-    fil_output.add(rollover_model, num_cycles)
+    with apt.span('fil_output.add'):
+        fil_output.add(rollover_model, num_cycles,
+                       rail_contact=param.get('rail_contact_output', False))
     print('fil output added')
     write_rp_coord(param['wheel']['translation'], [0.0, 0.0, 0.0])
+    # Write the convergence monitor settings (stops the analysis when converged)
+    if 'convergence' in param:
+        convergence_monitor.write_settings(**param['convergence'])
     
-    mdb.saveAs(pathName=names.model + '.cae')
+    with apt.span('save_cae'):
+        mdb.saveAs(pathName=names.model + '.cae')
     
     # Create job after saving cae file, because job will not have sufficient options to run from 
     # cae, in particular user subroutine path.
-    write_input_file()
+    with apt.span('write_input_file'):
+        write_input_file()
+    
+    # Add the cycles not created in the model to the input file
+    if param['loading'].get('expand_cycles', False):
+        with apt.span('inp_cycles.expand'):
+            num_cycles = inp_cycles.expand(names.job + '.inp')
+        print('input file expanded to ' + str(num_cycles) + ' cycles')
+    
+    # Add the field output requests to the input file
+    if 'field_output' in param:
+        with apt.span('output_schedule.inject'):
+            output_schedule.inject(names.job + '.inp')
+        print('field output added to input file')
 
 
 def write_input_file():
@@ -107,6 +146,9 @@ def check_input(param):
     not_ok_list.append(check_param(param['wheel'], wheel_include.from_folder, num_first=1))
     not_ok_list.append(check_param(param['contact'], contact.setup, num_first=1))
     not_ok_list.append(check_param(param['loading'], loading.setup, num_first=1))
+    if 'convergence' in param:
+        not_ok_list.append(check_param(param['convergence'], 
+                                       convergence_monitor.write_settings))
     
     if any(not_ok_list):
         return False
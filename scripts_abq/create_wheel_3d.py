@@ -23,6 +23,7 @@ import part, sketch, mesh, job
 # Project library imports
 from rollover.utils import json_io
 from rollover.utils import naming_mod as names
+from rollover.utils import abaqus_python_tools as apt
 from rollover.three_d.wheel import substructure as wheel_substr
 from rollover.three_d.wheel import super_element as super_wheel
 
@@ -38,21 +39,29 @@ except NameError as ne:   # Will fail for Python 3, but that is ok:
     
 
 def main():
-    # Read in wheel section parameters
-    wheel_param = json_io.read(names.wheel_settings_file)
-    
-    # Create and run the substructure generation job
-    create_substructure(wheel_param)
-    mdb.saveAs(pathName=wheel_param['wheel_name'] + '.cae')
-    
-    # Extract the results from the substructure generation, organize
-    # mesh, and save to files
-    create_user_element(wheel_param)
-    
-    # Create user element folder and copy files to that folder
-    save_user_element(wheel_param)
+    # Start timing if trace file given by apt.TRACE_ENV_VAR
+    apt.start_trace()
+    try:
+        with apt.span('create_wheel_3d'):
+            # Read in wheel section parameters
+            wheel_param = json_io.read(names.wheel_settings_file)
+            
+            # Create and run the substructure generation job
+            create_substructure(wheel_param)
+            with apt.span('save_cae'):
+                mdb.saveAs(pathName=wheel_param['wheel_name'] + '.cae')
+            
+            # Extract the results from the substructure generation, 
+            # organize mesh, and save to files
+            create_user_element(wheel_param)
+            
+            # Create user element folder and copy files to that folder
+            save_user_element(wheel_param)
+    finally:
+        apt.stop_trace()
 
     
+@apt.span('create_substructure')
 def create_substructure(wheel_param):
     job = wheel_substr.generate(wheel_param)
     job.submit()
@@ -62,10 +71,12 @@ def create_substructure(wheel_param):
         raise Exception('Abaqus job failed, please see ' + job.name + '.log')
     
     
+@apt.span('create_user_element')
 def create_user_element(wheel_param):
     super_wheel.get_uel_mesh(wheel_param['quadratic_order'])
     
     
+@apt.span('save_user_element')
 def save_user_element(wheel_param):
     if os.path.exists(wheel_param['wheel_name']):
         shutil.rmtree(wheel_param['wheel_name'])
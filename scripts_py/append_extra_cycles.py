@@ -1,66 +1,279 @@
-import sys, os, re
+""" The script :file:`append_extra_cycles.py` multiplies the number of
+rollover cycles in an input file by repeating the cycles after the first
+cycle. I.e. the steps starting with `rolling_00002` until the end of
+the input file are copied, and the cycle numbers in the step names are
+incremented for each copy. The input file is read once, and all copies
+are written in a single pass. Both cycle layouts are supported (see
+:py:func:`rollover.utils.naming_mod.get_steps_inbetween`): The layout
+is read from the loading file (`load_param.txt`) in the folder of the
+input file. If this file does not exist, the merged layout is assumed
+if the input file has no reapply steps.
+
+The first argument is the multiplication factor (defaults to 2), the
+second the input file (defaults to "rollover.inp"). If a third argument
+is given, the result is written to that file instead of appending to
+the input file.
+
+:command:`python <path_to_append_extra_cycles.py> [<multiplier> [<inp_file> [<out_file>]]]`
+
+To benchmark the script on a generated input file with `cycles`
+cycles (default 2500 cycles, i.e. 10 000 steps with the separate
+layout), call
+
+:command:`python <path_to_append_extra_cycles.py> benchmark [<cycles> [<multiplier> [<merge>]]]`
+
+where `merge` is 1 for the merged cycle layout (default 0).
+
+"""
+from __future__ import print_function
+import sys, os, re, time, tempfile, shutil
 
 repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if not repo_path in sys.path:
     sys.path.append(repo_path)
-    
+
 from rollover.utils import naming_mod as names
+from rollover.core.loading import read_merge_return
+
+STEP_REGEX = re.compile(r'^\*Step, name=([\w]*)_([\d]*)', re.MULTILINE)
+
 
 def main(argv):
-	num_multiply = int(argv[1]) if len(argv) > 1 else 2
-	inp_fname = argv[2] if len(argv) > 2 else 'rollover.inp'
-		
-	step_def_str, num_cycles = get_step_def_str(inp_fname)
-	
-	for n in range(1,num_multiply):
-		step_def_str = increment_step_def_str(step_def_str, num_cycles)
-		append_step_def_str_to_inp(inp_fname, step_def_str)
-        
-	
-def get_step_def_str(inp_fname):
-    step_def_str = ''
-    start_appending = False
-    num_cycles = 0
+    if len(argv) > 1 and argv[1] == 'benchmark':
+        num_cycles = int(argv[2]) if len(argv) > 2 else 2500
+        num_multiply = int(argv[3]) if len(argv) > 3 else 2
+        merge_return = int(argv[4]) == 1 if len(argv) > 4 else False
+        benchmark(num_cycles, num_multiply, merge_return)
+        return
+
+    num_multiply = int(argv[1]) if len(argv) > 1 else 2
+    inp_fname = argv[2] if len(argv) > 2 else 'rollover.inp'
+    out_fname = argv[3] if len(argv) > 3 else None
+
+    num_cycles = multiply_cycles(inp_fname, num_multiply, out_fname)
+    print('Added ' + str(num_cycles*(num_multiply-1)) + ' cycles')
+
+
+def multiply_cycles(inp_fname, num_multiply, out_fname=None, merge_return=None):
+    """ Append `num_multiply`-1 copies of the cycles after the first
+    cycle.
+
+    :param inp_fname: The name of the input file
+    :type inp_fname: str
+
+    :param num_multiply: The multiplication factor
+    :type num_multiply: int
+
+    :param out_fname: The name of the output file. If None, the copies
+                      are appended to `inp_fname`.
+    :type out_fname: str
+
+    :param merge_return: Is the merged cycle layout used? If None, it
+                         is determined as described in the module
+                         description.
+    :type merge_return: bool
+
+    :returns: The number of cycles in each copy
+    :rtype: int
+
+    """
     with open(inp_fname, 'r') as inp:
-        for line in inp:
-            if line.startswith('*Step, name=' + names.get_step_rolling(2)):
-                start_appending = True
-            if start_appending:
-                if not line.startswith('** '):
-                    if line.startswith('*Step, name=return_'):
-                        num_cycles = num_cycles + 1
-                    step_def_str = step_def_str + line
-    
-    return step_def_str, num_cycles
-    
-    
-def increment_step_def_str(step_def_str, num_cycles):
-    # Compile regular expressions to identify new step definitions
-    regex = re.compile('^\*Step, name=([\w]*)_([\d]*)', re.MULTILINE)
-    
-    # Write function to increment the cycle number
-    def incr_str(re_match):
-        str_parts = re_match.group().split('_')
-        str_parts[-1] = str(int(str_parts[-1]) + num_cycles).zfill(5)
-        return '_'.join(str_parts)
-        
-    step_def_str, num_repl = regex.subn(incr_str, step_def_str)
-    
-    if num_repl != 4*num_cycles:
-        print('num_cycles: ', num_cycles)
-        print('num_repl: ', num_repl)
-        print('4*num_cycles: ', 4*num_cycles)
-        print('something went wrong...')
-    
-    return step_def_str
-    
-    
-def append_step_def_str_to_inp(inp_fname, step_def_str):
-    with open(inp_fname, 'a') as inp:
-        inp.write('\n' + step_def_str)
-    
-
-            
-    
+        contents = inp.read()
+
+    if merge_return is None:
+        merge_return = read_merge_return(os.path.join(os.path.dirname(inp_fname),
+                                                      names.loading_file))
+    parts, num_cycles = get_cycle_block(contents, merge_return)
+
+    if out_fname is None:
+        out = open(inp_fname, 'a')
+    else:
+        out = open(out_fname, 'w')
+        out.write(contents)
+
+    with out:
+        if not contents.endswith('\n'):
+            out.write('\n')
+        for n in range(1, num_multiply):
+            out.write(get_copy_str(parts, n*num_cycles))
+
+    return num_cycles
+
+
+def get_step_types(merge_return=False):
+    """ Get the types of the steps in each cycle, starting with the
+    rolling step, see
+    :py:func:`rollover.utils.naming_mod.get_steps_inbetween`
+
+    :param merge_return: Is the merged cycle layout used?
+    :type merge_return: bool
+
+    :returns: The step types
+    :rtype: list[ str ]
+
+    """
+    step_names = [names.get_step_rolling()] + names.get_steps_inbetween(merge_return=merge_return)
+    return [step_name.rsplit('_', 1)[0] for step_name in step_names]
+
+
+def get_cycle_block(contents, merge_return=None):
+    """ Get the cycle block, i.e. the part of the input file starting
+    with the second rolling step. Comment lines are removed.
+
+    :param contents: The contents of the input file
+    :type contents: str
+
+    :param merge_return: Is the merged cycle layout used? If None, the
+                         merged layout is assumed if there are no
+                         reapply steps.
+    :type merge_return: bool
+
+    :returns: A list of the parts in the block, and the number of
+              cycles in the block. Each part is either a string, or an
+              integer giving the cycle number in a step name.
+    :rtype: tuple( list[ str/int ], int )
+
+    """
+    first_step = re.search(r'^\*Step, name=' + names.get_step_rolling(2), contents,
+                           re.MULTILINE)
+    if first_step is None:
+        raise ValueError('Could not find step "' + names.get_step_rolling(2) + '"')
+
+    # Offsets of the lines to copy, merging consecutive lines
+    spans = []
+    pos = first_step.start()
+    while pos < len(contents):
+        end = contents.find('\n', pos) + 1
+        end = len(contents) if end == 0 else end
+        if not contents.startswith('**', pos):
+            if len(spans) > 0 and spans[-1][1] == pos:
+                spans[-1][1] = end
+            else:
+                spans.append([pos, end])
+        pos = end
+
+    # Split the text at the cycle numbers in the step names
+    parts = []
+    steps = {step_type: [] for step_type in get_step_types(merge_return=False)}
+    for start, end in spans:
+        for step_match in STEP_REGEX.finditer(contents, start, end):
+            step_type = step_match.group(1)
+            if step_type not in steps:
+                raise ValueError('Unknown step type in step "' + step_match.group() + '"')
+            steps[step_type].append(int(step_match.group(2)))
+            parts.append(contents[start:step_match.start(2)])
+            parts.append(steps[step_type][-1])
+            start = step_match.end(2)
+        parts.append(contents[start:end])
+
+    if merge_return is None:
+        merge_return = len(steps[names.get_step_reapply().rsplit('_', 1)[0]]) == 0
+    num_cycles = check_steps(steps, merge_return)
+
+    return parts, num_cycles
+
+
+def check_steps(steps, merge_return=False):
+    """ Check that each step type in the cycle layout occurs once per
+    cycle, with consecutive cycle numbers in the correct order, and that
+    no other step types occur.
+
+    :param steps: The cycle numbers for each step type
+    :type steps: dict
+
+    :param merge_return: Is the merged cycle layout used?
+    :type merge_return: bool
+
+    :returns: The number of cycles
+    :rtype: int
+
+    """
+    num_cycles = len(steps['return'])
+    if num_cycles == 0:
+        raise ValueError('No cycles found to copy')
+
+    step_types = get_step_types(merge_return)
+    for step_type in steps:
+        if step_type not in step_types and len(steps[step_type]) > 0:
+            raise ValueError('Found "' + step_type + '" steps, which are not part of the '
+                             + ('merged' if merge_return else 'separate') + ' cycle layout')
+
+    for step_type in step_types:
+        first = 2 if step_type == 'rolling' else 3
+        expected = list(range(first, first + num_cycles))
+        if steps[step_type] != expected:
+            mismatch = [(e, f) for e, f in zip(expected, steps[step_type]) if e != f]
+            found_str = ('cycle ' + str(mismatch[0][1]) + ' instead of ' + str(mismatch[0][0])
+                         if len(mismatch) > 0 else str(len(steps[step_type])) + ' steps')
+            raise ValueError('Renumbering mismatch for "' + step_type + '" steps, expected '
+                             + str(num_cycles) + ' steps numbered ' + str(first) + '-'
+                             + str(expected[-1]) + ', found ' + found_str)
+
+    return num_cycles
+
+
+def get_copy_str(parts, increment):
+    """ Get the string for one copy of the cycle block
+
+    :param parts: The parts of the cycle block, see
+                  :py:func:`get_cycle_block`
+    :type parts: list[ str/int ]
+
+    :param increment: The increment of the cycle numbers
+    :type increment: int
+
+    :returns: The cycle block with incremented cycle numbers
+    :rtype: str
+
+    """
+    return ''.join([names.cycle_str(p + increment) if isinstance(p, int) else p
+                    for p in parts])
+
+
+def benchmark(num_cycles, num_multiply, merge_return=False):
+    """ Time the multiplication of a generated input file with
+    `num_cycles` cycles.
+
+    :param num_cycles: The number of cycles in the generated input file
+    :type num_cycles: int
+
+    :param num_multiply: The multiplication factor
+    :type num_multiply: int
+
+    :param merge_return: Use the merged cycle layout
+    :type merge_return: bool
+
+    :returns: None
+    :rtype: None
+
+    """
+    step_str = ('** STEP: {name}\n*Step, name={name}, nlgeom=YES, inc=1000\n*Static\n'
+                '0.01, 1., 1e-05, 0.01\n** BOUNDARY CONDITIONS\n*Boundary, op=NEW\n'
+                'WHEEL.CONTACT_NODES, 1, 1\n*Node File, nset=WHEEL.CONTACT_NODES\nU\n'
+                '*End Step\n')
+    num_steps_per_cycle = len(get_step_types(merge_return))
+    folder = tempfile.mkdtemp()
+    try:
+        inp_fname = os.path.join(folder, 'benchmark.inp')
+        with open(inp_fname, 'w') as inp:
+            inp.write('*Heading\n' + step_str.format(name=names.get_step_rolling(1)))
+            for cycle_nr in range(2, num_cycles + 2):
+                for step_name in names.get_steps_inbetween(cycle_nr, merge_return):
+                    inp.write(step_str.format(name=step_name))
+                if cycle_nr <= num_cycles:
+                    inp.write(step_str.format(name=names.get_step_rolling(cycle_nr)))
+
+        t0 = time.time()
+        multiply_cycles(inp_fname, num_multiply, os.path.join(folder, 'benchmark_out.inp'),
+                        merge_return)
+        duration = time.time() - t0
+        num_steps_in = num_steps_per_cycle*num_cycles
+        num_steps_out = num_steps_in + num_steps_per_cycle*(num_cycles-1)*(num_multiply-1)
+        print('Input file with %d steps multiplied by %d to %d steps in %0.3f s'
+              % (num_steps_in, num_multiply, num_steps_out, duration))
+    finally:
+        shutil.rmtree(folder)
+
+
 if __name__ == '__main__':
-	main(sys.argv)
+    main(sys.argv)
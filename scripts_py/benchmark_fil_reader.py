@@ -0,0 +1,83 @@
+""" The script :file:`benchmark_fil_reader.py` measures the throughput
+of :py:func:`rollover.utils.fil_reader.iter_increments`. A synthetic
+results file with `num_increments` increments (default 100), each with
+displacements and coordinates for `num_nodes` nodes (default 10 000),
+is written to a temporary folder with
+:py:func:`rollover.utils.fil_reader.write`. The file is then read, and
+the results are checked to be identical to the written data. Abaqus is
+not required.
+
+:command:`python <path_to_benchmark_fil_reader.py> [<num_increments> [<num_nodes>]]`
+
+"""
+from __future__ import print_function
+import sys, os, time, tempfile, shutil
+import numpy as np
+
+repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not repo_path in sys.path:
+    sys.path.append(repo_path)
+
+from rollover.utils import fil_reader
+
+
+def main(argv):
+    num_increments = int(argv[1]) if len(argv) > 1 else 100
+    num_nodes = int(argv[2]) if len(argv) > 2 else 10000
+
+    folder = tempfile.mkdtemp()
+    try:
+        fil_file = os.path.join(folder, 'benchmark.fil')
+        t0 = time.time()
+        for inc_nr in range(num_increments):
+            fil_reader.write(fil_file, [get_increment(inc_nr, num_nodes)], append=inc_nr > 0)
+        write_time = time.time() - t0
+        file_size = os.path.getsize(fil_file)/1.e6
+
+        t0 = time.time()
+        num_read = 0
+        for increment in fil_reader.iter_increments(fil_file):
+            expected = get_increment(num_read, num_nodes)
+            for var in ['U', 'COORD']:
+                if not (np.array_equal(increment[var]['labels'], expected[var]['labels'])
+                        and np.array_equal(increment[var]['values'], expected[var]['values'])):
+                    raise ValueError('The ' + var + ' data of increment ' + str(num_read)
+                                     + ' differs')
+            num_read += 1
+        read_time = time.time() - t0
+    finally:
+        shutil.rmtree(folder)
+
+    if num_read != num_increments:
+        raise ValueError('Read ' + str(num_read) + ' of ' + str(num_increments) + ' increments')
+
+    print('%d increments with %d nodes, %0.1f MB' % (num_increments, num_nodes, file_size))
+    print('%-6s: %8.3f s (%0.1f MB/s)' % ('write', write_time, file_size/write_time))
+    print('%-6s: %8.3f s (%0.1f MB/s, including check)' % ('read', read_time,
+                                                            file_size/read_time))
+
+
+def get_increment(inc_nr, num_nodes):
+    """ Get synthetic data for an increment
+
+    :param inc_nr: The increment number, used as seed
+    :type inc_nr: int
+
+    :param num_nodes: The number of nodes
+    :type num_nodes: int
+
+    :returns: The increment data, see
+              :py:func:`rollover.utils.fil_reader.iter_increments`
+    :rtype: dict
+
+    """
+    rng = np.random.RandomState(inc_nr)
+    labels = np.arange(1, num_nodes + 1)
+    return {'step': 3 + inc_nr, 'increment': 1, 'step_time': 1.0, 'total_time': inc_nr + 1.0,
+            'time_increment': 1.0,
+            'U': {'labels': labels, 'values': rng.rand(num_nodes, 3)},
+            'COORD': {'labels': labels, 'values': rng.rand(num_nodes, 3)}}
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,137 @@
+""" The script :file:`benchmark_inp_edit.py` compares the time required
+to add .fil output to each rolling and return step (as done by
+:py:func:`rollover.three_d.utils.fil_output.add`) with the previous
+implementation of :py:func:`rollover.utils.inp_file_edit.add_at_end_of_cat`
+(searching the keyword block for each insertion), and with
+:py:class:`rollover.utils.inp_file_edit.KeywordIndex`. The previous
+implementation is loaded from the git revision `rev`, by default the
+revision before :py:class:`rollover.utils.inp_file_edit.KeywordIndex`
+was added. The keyword blocks are generated by building a rollover
+model with `num_cycles` cycles (default 100) with the Abaqus stand-in,
+see :py:mod:`rollover.abaqus_standin.benchmark`, hence Abaqus is not
+required. As in Abaqus, the step keywords are preceded by comment lines
+in the same block. The resulting keyword blocks are checked to be
+identical.
+
+:command:`python <path_to_benchmark_inp_edit.py> [<num_cycles> [<rev>]]`
+
+"""
+from __future__ import print_function
+import sys, os, time, types, tempfile, shutil, subprocess
+
+repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not repo_path in sys.path:
+    sys.path.append(repo_path)
+
+# Installs the Abaqus stand-in, required by the previous implementation
+from rollover.abaqus_standin import benchmark
+
+from rollover.utils import naming_mod as names
+from rollover.utils import abaqus_python_tools as apt
+from rollover.utils import inp_file_edit as inp_edit
+from rollover.three_d.rail import include as rail_include
+from rollover.three_d.wheel import include as wheel_include
+from rollover.three_d.utils import contact
+from rollover.three_d.utils import loading
+
+MODULE_PATH = 'rollover/utils/inp_file_edit.py'
+MESH_SIZE = 5.0     # Coarse mesh, the benchmark concerns the steps
+
+
+def main(argv):
+    num_cycles = int(argv[1]) if len(argv) > 1 else 100
+    previous = get_previous_module(argv[2] if len(argv) > 2 else None)
+    sie_blocks = get_model_blocks(num_cycles)
+
+    results = {}
+    times = {}
+    for method in ['previous', 'index']:
+        kwb = inp_edit.FakeKeywordBlock(sie_blocks)
+        t0 = time.time()
+        if method == 'previous':
+            for step_name, add_str in get_insertions(num_cycles):
+                previous.add_at_end_of_cat(kwb, add_str, 'Step', step_name)
+        else:
+            kwi = inp_edit.KeywordIndex(kwb)
+            for step_name, add_str in get_insertions(num_cycles):
+                kwi.add_at_end_of_cat(add_str, 'Step', step_name)
+            kwi.apply()
+        times[method] = time.time() - t0
+        results[method] = kwb.sieBlocks
+
+    if results['previous'] != results['index']:
+        raise ValueError('The keyword blocks differ')
+
+    print('%d cycles, %d blocks' % (num_cycles, len(results['index'])))
+    for method in ['previous', 'index']:
+        print('%-10s: %8.3f s' % (method, times[method]))
+
+
+def get_previous_module(rev=None):
+    """ Load the previous implementation of
+    :py:mod:`rollover.utils.inp_file_edit` from git
+
+    :param rev: The git revision, defaults to the revision before
+                :py:class:`rollover.utils.inp_file_edit.KeywordIndex`
+                was added
+    :type rev: str
+
+    :returns: The module
+    :rtype: module
+
+    """
+    def git(*args):
+        return subprocess.check_output(['git'] + list(args), cwd=repo_path).decode('utf-8')
+
+    if rev is None:
+        commits = git('log', '--format=%H', '-S', 'class KeywordIndex', '--', MODULE_PATH)
+        rev = commits.split()[-1] + '^'
+
+    module = types.ModuleType('previous_inp_file_edit')
+    exec(compile(git('show', rev + ':' + MODULE_PATH), MODULE_PATH + '@' + rev, 'exec'),
+         module.__dict__)
+    return module
+
+
+def get_model_blocks(num_cycles):
+    """ Build a rollover model with the Abaqus stand-in, and get its
+    keyword blocks
+
+    :param num_cycles: The number of cycles
+    :type num_cycles: int
+
+    :returns: The keyword blocks
+    :rtype: list[ str ]
+
+    """
+    work_dir = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        benchmark.mesh_bundle_io.save(benchmark.RAIL_BUNDLE_FILE,
+                                      benchmark.get_rail_bundle(mesh_size=MESH_SIZE))
+        benchmark.write_wheel_folder(benchmark.WHEEL_FOLDER, mesh_size=MESH_SIZE)
+        param = benchmark.get_settings(num_cycles=num_cycles)
+        the_model = apt.create_model(names.model)
+        num_nodes, num_elems = rail_include.from_file(the_model, **param['rail'])
+        wheel_include.from_folder(the_model, start_labels=(num_nodes+1, num_elems+1),
+                                  **param['wheel'])
+        contact.setup(the_model, **param['contact'])
+        loading.setup(the_model, **param['loading'])
+        return list(the_model.keywordBlock.sieBlocks)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir)
+
+
+def get_insertions(num_cycles):
+    nset = names.wheel_inst + '.' + names.wheel_contact_nodes
+    insertions = [(names.get_step_rolling(1), '*NODE FILE, NSET=' + nset + '\nCOORD, U')]
+    for cycle_nr in range(2, num_cycles + 1):
+        insertions.append((names.get_step_return(cycle_nr), '*NODE FILE, NSET=' + nset + '\n'))
+        insertions.append((names.get_step_rolling(cycle_nr), '*NODE FILE, NSET=' + nset + '\nU'))
+    return insertions
+
+
+if __name__ == '__main__':
+    main(sys.argv)
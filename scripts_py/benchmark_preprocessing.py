@@ -0,0 +1,37 @@
+""" The script :file:`benchmark_preprocessing.py` builds a complete
+rollover model (rail with shadow regions and constraints, wheel super
+element, contact, loading and output) with the Abaqus stand-in, see
+:py:mod:`rollover.abaqus_standin.benchmark`, and prints the time and
+memory used by each stage. Hence, Abaqus is not required. A synthetic
+rail and wheel are created with element size `mesh_size` (default 1.0)
+and the model has `num_cycles` cycles (default 10). The files are
+written to `work_dir` (default `benchmark_preprocessing`), including
+the trace file that can be opened in chrome://tracing or Perfetto.
+
+:command:`python <path_to_benchmark_preprocessing.py> [<mesh_size> [<num_cycles> [<work_dir>]]]`
+
+"""
+from __future__ import print_function
+import sys, os
+
+repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not repo_path in sys.path:
+    sys.path.append(repo_path)
+
+from rollover.abaqus_standin import benchmark
+
+
+def main(argv):
+    mesh_size = float(argv[1]) if len(argv) > 1 else 1.0
+    num_cycles = int(argv[2]) if len(argv) > 2 else 10
+    work_dir = argv[3] if len(argv) > 3 else 'benchmark_preprocessing'
+
+    summary = benchmark.run(work_dir, mesh_size=mesh_size, num_cycles=num_cycles)
+    print('')
+    print('mesh size %g, %d cycles' % (mesh_size, num_cycles))
+    benchmark.print_summary(summary)
+    print('Trace written to ' + os.path.join(work_dir, benchmark.TRACE_FILE))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
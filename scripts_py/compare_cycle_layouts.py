@@ -0,0 +1,129 @@
+""" The script :file:`compare_cycle_layouts.py` compares two completed
+jobs of the same model, one with separate return and reapply steps and
+one with `"merge_return": true` in the loading settings, see
+:py:func:`rollover.three_d.utils.loading.setup`.
+
+For each job, the solver statistics (increments and equilibrium
+iterations) of the steps between the rolling steps are summed per
+cycle, see :py:mod:`rollover.utils.solver_stats`, and the wall clock
+time per cycle is calculated. The time saved per cycle by the merged
+layout is then printed. If both jobs were run with the convergence
+monitor, the per-cycle metrics in the convergence logs are compared to
+verify that both layouts give the same results, see
+:py:mod:`rollover.utils.convergence_monitor`.
+
+The arguments are the job names (including the path to the folder if
+not in the current folder) for the separate and merged layouts.
+
+:command:`python <path_to_compare_cycle_layouts.py> <job_separate> <job_merged>`
+
+"""
+from __future__ import print_function
+import sys, os
+
+repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not repo_path in sys.path:
+    sys.path.append(repo_path)
+
+from rollover.utils import naming_mod as names
+from rollover.utils import solver_stats
+from rollover.utils import convergence_monitor
+
+
+def main(argv):
+    jobs = argv[1:3]
+    summaries = [get_summary(job) for job in jobs]
+
+    print('%-12s %8s %10s %10s %10s %12s' % ('layout', 'cycles', 'steps', 'increments',
+                                             'iterations', 'time/cycle'))
+    for layout, summary in zip(['separate', 'merged'], summaries):
+        time_per_cycle = summary['time_per_cycle']
+        time_str = '-' if time_per_cycle is None else '%0.1f s' % time_per_cycle
+        print('%-12s %8d %10.2f %10.2f %10.2f %12s' % (layout, summary['num_cycles'],
+                                                       summary['steps'], summary['increments'],
+                                                       summary['iterations'], time_str))
+
+    if all([summary['time_per_cycle'] is not None for summary in summaries]):
+        saved = summaries[0]['time_per_cycle'] - summaries[1]['time_per_cycle']
+        print('Time saved per cycle with the merged layout: %0.1f s (%0.1f %%)'
+              % (saved, 100*saved/summaries[0]['time_per_cycle']))
+
+    log_files = [os.path.join(os.path.dirname(job), names.convergence_log_file) for job in jobs]
+    if all([os.path.exists(log_file) for log_file in log_files]):
+        compare_logs(*log_files)
+    else:
+        print('No convergence logs to compare')
+
+
+def get_summary(job):
+    """ Get the average solver statistics per cycle for the steps
+    between the rolling steps, and the wall clock time per cycle.
+
+    :param job: The job name
+    :type job: str
+
+    :returns: Dictionary with the fields 'num_cycles' (completed
+              rolling steps), 'steps', 'increments' and 'iterations'
+              (average per cycle, excluding the rolling step) and
+              'time_per_cycle' (None if the wall clock time is not
+              available)
+    :rtype: dict
+
+    """
+    steps = solver_stats.parse_sta(job + '.sta')
+    step_numbers = solver_stats.get_step_numbers(job + '.inp')
+
+    num_cycles = 0
+    inbetween = {'steps': 0, 'increments': 0, 'iterations': 0}
+    for step_name, step_nr in step_numbers.items():
+        if step_nr not in steps or step_name in [names.step1, names.step2]:
+            continue
+        if solver_stats.is_rolling_step(step_name):
+            num_cycles += 1
+        else:
+            inbetween['steps'] += 1
+            inbetween['increments'] += steps[step_nr]['increments'] + steps[step_nr]['cutbacks']
+            inbetween['iterations'] += steps[step_nr]['equilibrium_iterations']
+
+    summary = {key: inbetween[key]/float(max(num_cycles, 1)) for key in inbetween}
+    summary['num_cycles'] = num_cycles
+    wallclock = solver_stats.get_wallclock_time(job)
+    summary['time_per_cycle'] = None if wallclock is None else wallclock/max(num_cycles, 1)
+
+    return summary
+
+
+def compare_logs(log_file_separate, log_file_merged):
+    """ Print the largest difference for each metric in the convergence
+    logs for the cycles in both logs.
+
+    :param log_file_separate: The convergence log for the separate
+                              layout
+    :type log_file_separate: str
+
+    :param log_file_merged: The convergence log for the merged layout
+    :type log_file_merged: str
+
+    :returns: The largest difference for each metric in both logs
+    :rtype: dict
+
+    """
+    logs = [convergence_monitor.read_log(log_file)
+            for log_file in [log_file_separate, log_file_merged]]
+    rows = [{c: nr for nr, c in enumerate(log['cycle'])} for log in logs]
+    cycles = sorted(set(rows[0].keys()) & set(rows[1].keys()))
+
+    max_diff = {}
+    metrics = [m for m in convergence_monitor.METRICS if m in logs[0] and m in logs[1]]
+    for metric in metrics:
+        diffs = [abs(logs[0][metric][rows[0][c]] - logs[1][metric][rows[1][c]])
+                 for c in cycles if logs[0][metric][rows[0][c]] >= 0]
+        max_diff[metric] = max(diffs) if len(diffs) > 0 else 0.0
+        print('Max difference in ' + metric + ' over ' + str(len(cycles)) + ' cycles: %0.3e'
+              % max_diff[metric])
+
+    return max_diff
+
+
+if __name__ == '__main__':
+    main(sys.argv)
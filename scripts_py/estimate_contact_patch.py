@@ -0,0 +1,115 @@
+""" The script :file:`estimate_contact_patch.py` estimates the contact
+patch size with Hertz theory, and proposes values for the rail's
+`refine_region` and `shadow_extents`, and the wheel's
+`wheel_contact_pos` and `wheel_angles`, see
+:py:mod:`rollover.three_d.utils.contact_patch`.
+
+The input is taken from the rail, wheel and rollover settings files
+given as the first three arguments. These default to the file names
+given by `rollover.utils.naming_mod.rail_settings_file`,
+`wheel_settings_file` and `rollover_settings_file` in the current
+folder. The elastic properties are taken from the rail material, and
+the maximum vertical load from the loading settings.
+
+The current and proposed values are printed together with the relative
+change in model size measures. If the last argument is `write`, the
+proposed values are written to the settings files.
+
+:command:`python <path_to_estimate_contact_patch.py> [<rail_settings> <wheel_settings> <rollover_settings>] [write]`
+
+"""
+from __future__ import print_function
+import sys, os
+
+repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not repo_path in sys.path:
+    sys.path.append(repo_path)
+
+from rollover.utils import json_io
+from rollover.utils import naming_mod as names
+from rollover.three_d.utils import contact_patch
+
+
+def main(argv):
+    write = argv[-1] == 'write'
+    args = argv[1:-1] if write else argv[1:]
+    if len(args) == 0:
+        args = [names.rail_settings_file, names.wheel_settings_file, names.rollover_settings_file]
+
+    settings_files = {key: arg for key, arg in zip(['rail', 'wheel', 'rollover'], args)}
+    settings = {key: json_io.read(settings_files[key]) for key in settings_files}
+
+    rail_param = settings['rail']
+    wheel_param = settings['wheel']
+    loading = settings['rollover']['loading']
+    vertical_load = loading['vertical_load']
+    vertical_load = [vertical_load] if isinstance(vertical_load, (int, float)) else vertical_load
+    slip = loading['slip']
+    slip = [slip] if isinstance(slip, (int, float)) else slip
+
+    proposal = contact_patch.propose_settings(rail_profile=rail_param['rail_profile'],
+                                              wheel_profile=wheel_param['wheel_profile'],
+                                              load=max(vertical_load),
+                                              Emod=rail_param['material']['mpar']['E'],
+                                              nu=rail_param['material']['mpar']['nu'],
+                                              rolling_length=loading['rolling_length'],
+                                              rolling_radius=loading['rolling_radius'],
+                                              max_slip=max([abs(s) for s in slip]))
+
+    contact = proposal['contact']
+    print('Hertz contact estimate')
+    print('  Semi-axis, rolling direction    : %8.3f' % contact['a_roll'])
+    print('  Semi-axis, transverse direction : %8.3f' % contact['a_trans'])
+    print('  Maximum pressure                : %8.1f' % contact['p_max'])
+
+    current = {'refine_region': rail_param['refine_region'],
+               'wheel_contact_pos': wheel_param['wheel_contact_pos'],
+               'wheel_angles': wheel_param['wheel_angles'],
+               'shadow_extents': settings['rollover']['rail']['shadow_extents']}
+
+    print('%-20s %-40s %-40s' % ('Setting', 'Current', 'Proposed'))
+    for key in current:
+        print('%-20s %-40s %-40s' % (key, format_value(current[key]),
+                                     format_value(proposal[key])))
+
+    if isinstance(current['refine_region'][0], dict):
+        # Nested refinement zones, compare with the outermost zone
+        current['refine_region'] = sorted([z['region'] for z in current['refine_region']],
+                                          key=get_area)[-1]
+    measures = {key: contact_patch.get_size_measures(rolling_radius=loading['rolling_radius'],
+                                                     **{p: val[p] for p in current})
+                for key, val in zip(['current', 'proposed'], [current, proposal])}
+
+    print('Relative model size (proposed/current)')
+    for key in measures['current']:
+        print('  %-25s: %6.3f' % (key, measures['proposed'][key]/measures['current'][key]))
+
+    if write:
+        if isinstance(rail_param['refine_region'][0], dict):
+            print('refine_region not written, nested refinement zones must be updated manually')
+        else:
+            rail_param['refine_region'] = proposal['refine_region']
+        wheel_param['wheel_contact_pos'] = proposal['wheel_contact_pos']
+        wheel_param['wheel_angles'] = proposal['wheel_angles']
+        settings['rollover']['rail']['shadow_extents'] = proposal['shadow_extents']
+        for key in settings_files:
+            json_io.save(settings_files[key], settings[key])
+        print('Proposed settings written to ' + ', '.join(args))
+
+
+def format_value(value):
+    if isinstance(value[0], dict):
+        return 'nested zones'
+    
+    def rounded(v):
+        return [rounded(vi) for vi in v] if isinstance(v, list) else round(v, 3)
+    
+    return str(rounded(value))
+
+
+def get_area(region):
+    return abs((region[1][0] - region[0][0])*(region[1][1] - region[0][1]))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,39 @@
+""" The script :file:`export_results.py` appends the wheel reference
+point and wheel contact node displacements of the cycles in the results
+file (.fil) that are not yet exported to a results archive, see
+:py:mod:`rollover.utils.result_archive`. It can be called repeatedly
+during a running job, and should be run in the simulation folder (the
+node labels are read from the user subroutine state file).
+
+The first argument is the job name (defaults to "rollover"), and the
+second the archive (defaults to "<job>_results", an NPZ-directory
+archive). Use the suffix .h5 for an HDF5 archive.
+
+:command:`python <path_to_export_results.py> [<job> [<archive>]]`
+
+"""
+from __future__ import print_function
+import sys, os
+
+repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not repo_path in sys.path:
+    sys.path.append(repo_path)
+
+from rollover.utils import naming_mod as names
+from rollover.utils import result_archive
+
+
+def main(argv):
+    job = argv[1] if len(argv) > 1 else names.job
+    archive = argv[2] if len(argv) > 2 else job + '_results'
+
+    new_cycles = result_archive.export_fil(archive, job + '.fil', job + '.inp')
+    if len(new_cycles) > 0:
+        print('Exported cycles ' + str(new_cycles[0]) + '-' + str(new_cycles[-1])
+              + ' to "' + archive + '"')
+    else:
+        print('No new cycles to export')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,72 @@
+""" The script :file:`extract_surface_deformation.py` extracts the
+permanent deformation of the rail contact surface for each cycle, see
+:py:mod:`rollover.utils.surface_deformation`.
+
+The first argument gives the displacements: either a results archive
+(see :file:`export_results.py`) or a results file (.fil, the input file
+with the same job name must be in the same folder). The second argument
+gives the rail contact node labels and coordinates: either a mesh bundle
+(.npz) of the rail, or a results file with node coordinates for the
+rail contact nodes (defaults to "rollover.fil"). The third argument is
+the output folder (defaults to "surface_deformation").
+
+:command:`python <path_to_extract_surface_deformation.py> <results> [<coordinates> [<output>]]`
+
+"""
+from __future__ import print_function
+import sys, os
+import numpy as np
+
+repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not repo_path in sys.path:
+    sys.path.append(repo_path)
+
+from rollover.utils import naming_mod as names
+from rollover.utils import fil_reader
+from rollover.utils import result_archive
+from rollover.utils import surface_deformation as sd
+
+
+def main(argv):
+    if len(argv) < 2:
+        print(__doc__)
+        return
+    results = argv[1]
+    coordinates = argv[2] if len(argv) > 2 else names.job + '.fil'
+    out_dir = argv[3] if len(argv) > 3 else 'surface_deformation'
+
+    is_fil = results.endswith('.fil')
+    if is_fil:
+        inp_file = os.path.splitext(results)[0] + '.inp'
+        cycles = sd.get_fil_cycles(results, inp_file)
+    else:
+        cycles = sd.get_archive_cycles(results)
+
+    if coordinates.endswith('.npz'):
+        labels, coords = sd.get_bundle_coords(coordinates)
+    elif is_fil:
+        labels = result_archive.get_rail_contact_labels(
+            next(fil_reader.iter_increments(results)), result_archive.read_usub_node_sets())
+        coords = sd.get_fil_coords(coordinates, labels)
+    else:
+        labels = result_archive.query(results, 'rail_contact', ['u2'], cycles=cycles[:1])['labels']
+        coords = sd.get_fil_coords(coordinates, labels)
+
+    if is_fil:
+        chunks = sd.iter_fil_chunks(results, inp_file, labels, cycles)
+    else:
+        chunks = sd.iter_archive_chunks(results, labels, cycles)
+    sd.extract(out_dir, labels, coords, cycles, chunks)
+
+    summary = sd.read(out_dir)
+    print('Surface deformation for %d nodes and %d cycles saved to "%s"'
+          % (len(labels), len(cycles), out_dir))
+    print('%6s %12s %12s %10s %10s' % ('cycle', 'ratchet_mean', 'max_u2', 'max_x', 'max_z'))
+    for nr in np.unique(np.linspace(0, len(cycles) - 1, min(len(cycles), 10)).astype(int)):
+        print('%6d %12.4e %12.4e %10.3f %10.3f'
+              % (summary['cycles'][nr], summary['ratchet_mean'][nr], summary['max_u2'][nr],
+                 summary['max_x'][nr], summary['max_z'][nr]))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
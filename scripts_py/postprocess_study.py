@@ -0,0 +1,44 @@
+""" The script :file:`postprocess_study.py` exports the results of all
+rollover jobs in a parameter study in parallel, and merges them into one
+table (`study_results.csv` in the study folder), see
+:py:mod:`rollover.utils.study_postprocess`. Jobs that have not changed
+since the last call are skipped.
+
+The first argument is the study folder (defaults to the current
+folder), which is searched (including subfolders) for job folders. The
+second argument is the number of processes (defaults to the number of
+cores), and the third the number of cycles exported by each task
+(defaults to 50).
+
+:command:`python <path_to_postprocess_study.py> [<study_dir> [<num_proc> [<cycles_per_task>]]]`
+
+"""
+from __future__ import print_function
+import sys, os, time
+
+repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not repo_path in sys.path:
+    sys.path.append(repo_path)
+
+from rollover.utils import study_postprocess
+
+
+def main(argv):
+    study_dir = argv[1] if len(argv) > 1 else os.getcwd()
+    num_processes = int(argv[2]) if len(argv) > 2 else None
+    cycles_per_task = int(argv[3]) if len(argv) > 3 else 50
+
+    t0 = time.time()
+    errors = study_postprocess.run(study_dir, num_processes, cycles_per_task)
+    for key in sorted(errors, key=str):
+        print('Failed task ' + str(key) + ':')
+        print(errors[key])
+
+    print('Post-processed %d jobs in %0.1f s, %d failed tasks'
+          % (len(study_postprocess.find_jobs(study_dir)), time.time() - t0, len(errors)))
+    print('Results written to "'
+          + os.path.join(study_dir, study_postprocess.STUDY_TABLE_FILE) + '"')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,39 @@
+""" The script :file:`report_solver_time.py` summarizes where the solver
+time of a rollover job is spent (by step role and by cycle), see
+:py:mod:`rollover.utils.solver_report`. It writes the summary to
+"<job>_solver_report.json" and a static html report with trend plots to
+"<job>_solver_report.html". It should be run in the simulation folder,
+after the job has finished (or during the job, without the total times).
+
+The first argument is the job name (defaults to "rollover").
+
+:command:`python <path_to_report_solver_time.py> [<job>]`
+
+"""
+from __future__ import print_function
+import sys, os
+
+repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not repo_path in sys.path:
+    sys.path.append(repo_path)
+
+from rollover.utils import naming_mod as names
+from rollover.utils import solver_report
+
+
+def main(argv):
+    job = argv[1] if len(argv) > 1 else names.job
+    summary = solver_report.write(job)
+
+    print('%-10s %6s %10s %8s %10s %8s %10s' % ('role', 'steps', 'increments', 'cutbacks',
+                                               'iterations', 'share', 'wall_time'))
+    for role, stats in [('total', summary['totals'])] + list(summary['roles'].items()):
+        wall_time = '-' if stats['wall_time'] is None else '%0.0f' % stats['wall_time']
+        print('%-10s %6d %10d %8d %10d %7.1f%% %10s'
+              % (role, stats['steps'], stats['increments'], stats['cutbacks'],
+                 stats['iterations'], 100*stats['iteration_share'], wall_time))
+    print('Report written to "' + job + '_solver_report.html"')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
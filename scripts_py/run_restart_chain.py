@@ -0,0 +1,50 @@
+""" The script :file:`run_restart_chain.py` runs a long rollover
+simulation as a chain of restarted Abaqus jobs, each containing a given
+number of cycles, see :py:mod:`rollover.utils.restart_chain`. The
+script is run in the folder where the input file was written. If the
+chain was interrupted, calling the script again resumes the chain from
+the last completed chunk.
+
+The first argument is the number of cycles in each chunk, the second
+the input file (defaults to "rollover.inp"). Remaining arguments are
+passed to the abaqus command, e.g. `cpus=4`. The abaqus command
+defaults to "abaqus", and can be changed with the environment variable
+`ABAQUS_CMD`. The compiled user subroutine in the data folder is used.
+If the argument `auto_tune` is given, the time incrementation of the
+rolling steps in each chunk is tuned based on the solver statistics of
+the previous chunk, see :py:mod:`rollover.utils.solver_stats`.
+
+:command:`python <path_to_run_restart_chain.py> <chunk_size> [<inp_file> [<abaqus options>]] [auto_tune]`
+
+"""
+from __future__ import print_function
+import sys, os
+
+repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not repo_path in sys.path:
+    sys.path.append(repo_path)
+
+from rollover.local_paths import data_path
+from rollover.utils import naming_mod as names
+from rollover.utils import restart_chain
+
+
+def main(argv):
+    auto_tune = 'auto_tune' in argv
+    argv = [arg for arg in argv if arg != 'auto_tune']
+    chunk_size = int(argv[1])
+    inp_file = argv[2] if len(argv) > 2 else names.job + '.inp'
+    options = ' '.join(argv[3:])
+
+    obj_suff = '.o' if os.name == 'posix' else '.obj'
+    usub = data_path + '/usub/usub_rollover' + obj_suff
+    abaqus_cmd = os.environ.get('ABAQUS_CMD', 'abaqus')
+
+    num_completed = restart_chain.run(inp_file, chunk_size, usub, abaqus_cmd, options,
+                                      job=os.path.splitext(os.path.basename(inp_file))[0],
+                                      auto_tune=auto_tune)
+    print('Completed ' + str(num_completed) + ' chunks')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
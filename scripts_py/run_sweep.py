@@ -0,0 +1,118 @@
+""" The script :file:`run_sweep.py` runs a parameter study (sweep) of
+rollover simulations on the local computer, see
+:py:mod:`rollover.utils.param_sweep`. The first argument is the sweep
+file, which should be placed in the study folder. The second argument
+is the maximum number of cpus to use (defaults to the number of cores),
+and the third the maximum number of license tokens (defaults to no
+limit). The abaqus command defaults to "abaqus", and can be changed
+with the environment variable `ABAQUS_CMD`. The compiled user
+subroutine in the data folder is used. If the argument `standin` is
+given, the Abaqus stand-in command
+(:py:mod:`rollover.abaqus_standin.command`) is used instead, to test
+the sweep without Abaqus. If the argument `status` is given, the status
+of each variant is printed without running any tasks. Calling the
+script again continues an interrupted sweep.
+
+:command:`python <path_to_run_sweep.py> <sweep_file> [<cpus> [<tokens>]] [standin] [status]`
+
+To check the sweep pipeline with the Abaqus stand-in, call the script
+with `check` instead of the sweep file. A sweep file for a small sweep
+(`CHECK_GRID`) based on the example settings in the data folder of the
+repository is then written to `study_dir` (default `sweep_check`), and
+the sweep is run. The script exits with an error if any task is not
+done.
+
+:command:`python <path_to_run_sweep.py> check [<study_dir> [<cpus>]]`
+
+"""
+from __future__ import print_function
+import sys, os, time
+
+repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not repo_path in sys.path:
+    sys.path.append(repo_path)
+
+from rollover.utils import json_io
+from rollover.utils import param_sweep
+
+EXAMPLE_SETTINGS = {'rollover_settings': 'rollover_settings/rollover_settings.json',
+                    'rail_settings': 'rail_settings/rail_settings.json',
+                    'wheel_settings': 'wheel_settings/wheel_settings.json'}
+# The stand-in requires the mesh bundle, see rollover.abaqus_standin.command
+CHECK_GRID = {'contact.friction_coefficient': [0.3, 0.5], 'loading.num_cycles': [3],
+              'rail_settings.mesh_bundle': [True]}
+
+
+def main(argv):
+    use_standin = 'standin' in argv
+    status_only = 'status' in argv
+    argv = [arg for arg in argv if arg not in ['standin', 'status']]
+    is_check = argv[1] == 'check'
+    if is_check:
+        use_standin = True
+        sweep_file = write_check_sweep(argv[2] if len(argv) > 2 else 'sweep_check')
+        max_cpus = int(argv[3]) if len(argv) > 3 else None
+        max_tokens = None
+    else:
+        sweep_file = argv[1]
+        max_cpus = int(argv[2]) if len(argv) > 2 else None
+        max_tokens = int(argv[3]) if len(argv) > 3 else None
+    study_dir = os.path.dirname(os.path.abspath(sweep_file))
+
+    if not status_only:
+        if use_standin:
+            from rollover.abaqus_standin import command
+            abaqus_cmd = command.get_cmd()
+            usub = None
+        else:
+            from rollover.local_paths import data_path
+            obj_suff = '.o' if os.name == 'posix' else '.obj'
+            usub = data_path + '/usub/usub_rollover' + obj_suff
+            abaqus_cmd = os.environ.get('ABAQUS_CMD', 'abaqus')
+
+        t0 = time.time()
+        variant_keys = param_sweep.setup(sweep_file)
+        count = param_sweep.run(study_dir, abaqus_cmd, usub, max_cpus, max_tokens)
+        print('Ran %d variants in %0.1f s, tasks: %s'
+              % (len(variant_keys), time.time() - t0,
+                 ', '.join([str(count[s]) + ' ' + s for s in sorted(count)])))
+
+    print('%-16s %-8s %-8s %-8s %-8s %s' % ('Variant', 'rail', 'wheel', 'model', 'job',
+                                            'Parameters'))
+    all_done = True
+    for variant in param_sweep.get_status(study_dir):
+        params = ', '.join([key + '=' + str(variant['params'][key])
+                            for key in sorted(variant['params'])])
+        print('%-16s %-8s %-8s %-8s %-8s %s' % (os.path.basename(variant['folder']),
+                                                variant['rail'], variant['wheel'],
+                                                variant['model'], variant['job'], params))
+        all_done = all_done and all([variant[kind] == 'done' for kind in param_sweep.TASK_KINDS])
+
+    if is_check and not all_done:
+        print('Sweep check failed, see ' + param_sweep.TASK_LOG_FILE + ' in the task folders')
+        sys.exit(1)
+
+
+def write_check_sweep(study_dir):
+    """ Write the sweep file for the check of the sweep pipeline, see
+    the module description.
+
+    :param study_dir: The study folder
+    :type study_dir: str
+
+    :returns: The name of the sweep file
+    :rtype: str
+
+    """
+    if not os.path.exists(study_dir):
+        os.makedirs(study_dir)
+    sweep = dict([(key, os.path.join(repo_path, 'data', EXAMPLE_SETTINGS[key]))
+                  for key in EXAMPLE_SETTINGS])
+    sweep['grid'] = CHECK_GRID
+    sweep_file = os.path.join(study_dir, 'sweep.json')
+    json_io.save(sweep_file, sweep)
+    return sweep_file
+
+
+if __name__ == '__main__':
+    main(sys.argv)
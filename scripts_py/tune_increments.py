@@ -0,0 +1,44 @@
+""" The script :file:`tune_increments.py` prints the solver statistics
+(increments, cutbacks and equilibrium iterations) of the rolling step in
+each cycle of a running or completed job, and proposes the minimum
+number of increments for the upcoming rolling steps, see
+:py:mod:`rollover.utils.solver_stats`.
+
+The first argument is the job name (defaults to "rollover"). If a
+second argument is given, the `*Static` data lines of the rolling steps
+in that input file (e.g. the next chunk in a restart chain) are
+rewritten with the proposed incrementation.
+
+:command:`python <path_to_tune_increments.py> [<job> [<inp_file_to_tune>]]`
+
+"""
+from __future__ import print_function
+import sys, os
+
+repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not repo_path in sys.path:
+    sys.path.append(repo_path)
+
+from rollover.utils import naming_mod as names
+from rollover.utils import solver_stats
+
+
+def main(argv):
+    job = argv[1] if len(argv) > 1 else names.job
+    tune_inp = argv[2] if len(argv) > 2 else None
+    
+    cycle_stats = solver_stats.get_cycle_stats(job)
+    min_incr = solver_stats.get_min_incr(job + '.inp')
+    time_per_incr = solver_stats.get_time_per_increment(job)
+    solver_stats.report(cycle_stats, min_incr, time_per_incr)
+    
+    proposed = solver_stats.propose_min_incr(cycle_stats, min_incr)
+    print('Minimum number of increments per rolling step: current ' + str(min_incr) 
+          + ', proposed ' + str(proposed))
+    if tune_inp is not None:
+        solver_stats.retune(tune_inp, proposed)
+        print('"' + tune_inp + '" updated')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
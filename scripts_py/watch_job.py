@@ -0,0 +1,75 @@
+""" The script :file:`watch_job.py` follows a running rollover job and
+publishes a summary for each cycle (solver statistics, wall clock time
+and reference point displacements), see
+:py:mod:`rollover.utils.live_monitor`. It should be run in the
+simulation folder, and stops when the job has finished.
+
+The first argument is the job name (defaults to "rollover"). The second
+argument is either the json file to write the summary to (defaults to
+"<job>_live.json"), or a port number to serve the summary on
+http://localhost:<port>/. The third argument is the update interval in
+seconds (defaults to 10).
+
+:command:`python <path_to_watch_job.py> [<job> [<json_file or port> [<interval>]]]`
+
+"""
+from __future__ import print_function
+import sys, os, time
+
+repo_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not repo_path in sys.path:
+    sys.path.append(repo_path)
+
+from rollover.utils import naming_mod as names
+from rollover.utils import live_monitor
+
+
+def main(argv):
+    job = argv[1] if len(argv) > 1 else names.job
+    output = argv[2] if len(argv) > 2 else job + '_live.json'
+    interval = float(argv[3]) if len(argv) > 3 else 10.0
+
+    monitor = live_monitor.LiveMonitor(job)
+    server = None
+    if output.isdigit():
+        server = live_monitor.start_server(monitor.get_summary, int(output))
+        print('Serving summary of "' + job + '" on http://localhost:' + output + '/')
+
+    try:
+        while True:
+            for cycle_nr in monitor.update():
+                print_cycle(monitor.cycles.get(cycle_nr, None))
+            if server is None:
+                live_monitor.save_summary(monitor.get_summary(), output)
+            if monitor.status['state'] != 'running':
+                print('Job ' + monitor.status['state'])
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+def print_cycle(cycle):
+    """ Print the summary of a cycle
+
+    :param cycle: The cycle summary, see
+                  :py:class:`rollover.utils.live_monitor.LiveMonitor`
+    :type cycle: dict
+
+    :returns: None
+    :rtype: None
+
+    """
+    if cycle is None:
+        return
+    wall_time = '-' if cycle['wall_time'] is None else '%0.0f s' % cycle['wall_time']
+    u2 = '-' if cycle['wheel_rp'] is None else '%10.3e' % cycle['wheel_rp'][1]
+    print('Cycle %5d: %4d increments, %3d cutbacks, wall time %8s, wheel rp u2 %s'
+          % (cycle['cycle'], cycle['increments'], cycle['cutbacks'], wall_time, u2))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
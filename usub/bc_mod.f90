@@ -72,6 +72,8 @@ implicit none
     num_elem_roll = nint(wheel_rp_disp(4)/get_angle_incr())
     return_angle = wheel_rp_disp(4) - num_elem_roll*get_angle_incr()
     
+    !  u_rp_start(2) is only prescribed in the move back step with the separate cycle layout. 
+    !  Otherwise, the wheel rp is force controlled in y, with the contact nodes prescribed below.
     u_rp_start = 0.d0
     u_rp_start(1:3) = wheel_rp_disp(1:3) + dx_rp
     u_rp_start(4) = return_angle
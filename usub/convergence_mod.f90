@@ -0,0 +1,218 @@
+! Module to monitor the convergence of the rollover response (shakedown or steady ratcheting), 
+! and to stop the analysis when the convergence criteria have been fulfilled for a number of 
+! consecutive cycles. The metrics are evaluated at the end of each rolling step as the change 
+! since the previous rolling step, and are written to the log file for each cycle. 
+! The monitor is only active if the settings file exists. 
+module convergence_mod
+use abaqus_utils_mod
+implicit none
+    
+    private
+    
+    public  :: check_convergence        ! function(cycle_nr, wheel_rp_disp, contact_node_disp) 
+                                        !   result(converged)
+    public  :: write_convergence_state  ! subroutine(file_id)
+    public  :: read_convergence_state   ! subroutine(file_id)
+    
+    ! Available metrics, the metrics to check are selected by name in the settings file
+    ! Only dofs that are not prescribed by DISP during rolling are meaningful as metrics
+    integer, parameter  :: NUM_METRICS = 2
+    integer, parameter  :: METRIC_RAIL_SURFACE = 1      ! Wheel rp vertical displacement (u2)
+    integer, parameter  :: METRIC_CONTACT_HEIGHT = 2    ! Lowest deformed contact node height (y)
+    character(len=*), parameter :: METRIC_NAMES(NUM_METRICS) = ['rail_surface  ', &
+                                                                'contact_height']
+    
+    ! Settings (read from file)
+    logical, save                       :: is_setup = .false.
+    logical, save                       :: is_active = .false.
+    integer, save                       :: num_consecutive_required
+    logical, save                       :: is_checked(NUM_METRICS) = .false.
+    double precision, save              :: tolerances(NUM_METRICS) = -1.d0
+    
+    ! State (updated each cycle)
+    logical, save                       :: has_last_values = .false.
+    double precision, save              :: last_values(NUM_METRICS)
+    integer, save                       :: num_consecutive = 0
+    
+    contains
+    
+    function check_convergence(cycle_nr, wheel_rp_disp, contact_node_disp) result(converged)
+    ! Update the metrics with the results at the end of the rolling step in cycle_nr, and check if
+    ! the criteria have been fulfilled for the required number of consecutive cycles. 
+    ! Must be called before the boundary conditions for the next cycle are set. 
+    use node_id_mod, only : get_node_coords
+    implicit none
+        integer, intent(in)             :: cycle_nr         ! Current rollover cycle
+        double precision, intent(in)    :: wheel_rp_disp(:) ! Wheel rp disp after rolling
+        double precision, intent(in)    :: contact_node_disp(:,:,:) ! Contact node disp
+        logical                         :: converged        ! True if the analysis should stop
+        
+        double precision                :: values(NUM_METRICS)
+        double precision                :: changes(NUM_METRICS)
+        double precision                :: node_coords(3)
+        logical                         :: fulfilled
+        integer                         :: k1, k2
+        
+        converged = .false.
+        if (.not.is_setup) call read_settings()
+        if (.not.is_active) return
+        
+        values(METRIC_RAIL_SURFACE) = wheel_rp_disp(2)
+        
+        ! The lowest point of the deformed wheel surface is in contact with the rail surface
+        values(METRIC_CONTACT_HEIGHT) = huge(1.d0)
+        do k2=1,size(contact_node_disp, 3)
+            do k1=1,size(contact_node_disp, 2)
+                node_coords = get_node_coords([k1, k2]) + contact_node_disp(:, k1, k2)
+                values(METRIC_CONTACT_HEIGHT) = min(values(METRIC_CONTACT_HEIGHT), node_coords(2))
+            enddo
+        enddo
+        
+        if (has_last_values) then
+            changes = abs(values - last_values)
+            fulfilled = all((changes <= tolerances).or.(.not.is_checked))
+        else
+            changes = -1.d0     ! Not available for the first cycle
+            fulfilled = .false.
+        endif
+        
+        if (fulfilled) then
+            num_consecutive = num_consecutive + 1
+        else
+            num_consecutive = 0
+        endif
+        converged = num_consecutive >= num_consecutive_required
+        
+        last_values = values
+        has_last_values = .true.
+        
+        call write_log(cycle_nr, changes, converged)
+        if (converged) then
+            write(*,"(A,I0,A,I0,A)") 'Convergence criteria fulfilled for ', num_consecutive, &
+                                     ' consecutive cycles, stopping after cycle ', cycle_nr, '.'
+        endif
+        
+    end function check_convergence
+    
+    subroutine read_settings()
+    ! Read the settings file, if it exists. Format
+    ! Line 1: Number of consecutive cycles for which the criteria must be fulfilled
+    ! Line 2: Number of metrics to check
+    ! Following lines: Name of the metric (see METRIC_NAMES), tolerance
+    use filenames_mod, only : convergence_file_name
+    use usub_utils_mod, only : get_fid, check_iostat
+    implicit none
+        integer                         :: file_id
+        integer                         :: io_status
+        logical                         :: file_exists
+        character(len=256)              :: filename
+        integer                         :: cwd_length
+        integer                         :: num_checked
+        character(len=64)               :: metric_name
+        double precision                :: tolerance
+        integer                         :: k1, k2, metric_ind
+        
+        is_setup = .true.
+        call getoutdir(filename, cwd_length)
+        inquire(file=trim(filename)//'/'//trim(convergence_file_name), exist=file_exists)
+        if (.not.file_exists) return
+        
+        file_id = get_fid(convergence_file_name)
+        read(file_id, *, iostat=io_status) num_consecutive_required
+        call check_iostat(io_status, 'Could not read number of consecutive cycles from "' &
+                                     //trim(convergence_file_name)//'"')
+        read(file_id, *, iostat=io_status) num_checked
+        call check_iostat(io_status, 'Could not read number of metrics from "' &
+                                     //trim(convergence_file_name)//'"')
+        do k1=1,num_checked
+            read(file_id, *, iostat=io_status) metric_name, tolerance
+            call check_iostat(io_status, 'Could not read metric and tolerance from "' &
+                                         //trim(convergence_file_name)//'"')
+            metric_ind = 0
+            do k2=1,NUM_METRICS
+                if (trim(METRIC_NAMES(k2)) == trim(metric_name)) metric_ind = k2
+            enddo
+            if (metric_ind == 0) then
+                write(*,*) 'Unknown convergence metric "'//trim(metric_name)//'" in "' &
+                           //trim(convergence_file_name)//'"'
+                call xit()
+            endif
+            is_checked(metric_ind) = .true.
+            tolerances(metric_ind) = tolerance
+        enddo
+        close(file_id)
+        
+        is_active = any(is_checked)
+        
+    end subroutine read_settings
+    
+    subroutine write_log(cycle_nr, changes, converged)
+    ! Write the checked metrics for the cycle to the log file. The file is replaced in the first 
+    ! cycle
+    use filenames_mod, only : convergence_log_file_name
+    use usub_utils_mod, only : check_iostat
+    implicit none
+        integer, intent(in)             :: cycle_nr
+        double precision, intent(in)    :: changes(NUM_METRICS)
+        logical, intent(in)             :: converged
+        
+        integer                         :: file_id
+        integer                         :: io_status
+        character(len=256)              :: filename
+        integer                         :: cwd_length
+        character(len=64)               :: row_format
+        integer                         :: k1
+        
+        call getoutdir(filename, cwd_length)
+        filename = trim(filename)//'/'//trim(convergence_log_file_name)
+        if (cycle_nr <= 1) then
+            open(newunit=file_id, file=trim(filename), status='replace', action='write', &
+                 iostat=io_status)
+            call check_iostat(io_status, 'Error opening "'//trim(convergence_log_file_name)//'"')
+            write(file_id, "(A)", advance='no') 'cycle, '
+            do k1=1,NUM_METRICS
+                if (is_checked(k1)) then
+                    write(file_id, "(A)", advance='no') trim(METRIC_NAMES(k1))//', '
+                endif
+            enddo
+            write(file_id, "(A)") 'num_consecutive, converged'
+        else
+            open(newunit=file_id, file=trim(filename), position='append', action='write', &
+                 iostat=io_status)
+            call check_iostat(io_status, 'Error opening "'//trim(convergence_log_file_name)//'"')
+        endif
+        
+        write(row_format, "(A,I0,A)") "(I0,", count(is_checked), &
+                                      "(', ',ES22.14E3),', ',I0,', ',I0)"
+        write(file_id, row_format) cycle_nr, pack(changes, is_checked), num_consecutive, &
+                                   merge(1, 0, converged)
+        close(file_id)
+        
+    end subroutine write_log
+    
+    ! Restart routines
+    subroutine write_convergence_state(file_id)
+    ! Write the state, such that it can be restored after a restart
+    implicit none
+        integer, intent(in)     :: file_id
+        
+        write(file_id, *) has_last_values, num_consecutive
+        write(file_id, *) last_values
+        
+    end subroutine write_convergence_state
+    
+    subroutine read_convergence_state(file_id)
+    ! Read the state written by write_convergence_state
+    use usub_utils_mod, only : check_iostat
+    implicit none
+        integer, intent(in)     :: file_id
+        integer                 :: io_status
+        
+        read(file_id, *, iostat=io_status) has_last_values, num_consecutive
+        call check_iostat(io_status, 'Could not read convergence info from state file')
+        read(file_id, *, iostat=io_status) last_values
+        call check_iostat(io_status, 'Could not read convergence metrics from state file')
+        
+    end subroutine read_convergence_state
+    
+end module convergence_mod
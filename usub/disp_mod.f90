@@ -63,6 +63,8 @@ implicit none
     elseif (step_type == STEP_TYPE_ROLLING) then
         bc_val = get_rp_rolling_wheel_bc(node_jdof, time)
     elseif (step_type == STEP_TYPE_MOVE_BACK) then
+        ! With the merged cycle layout, the load is reapplied in this step. u2 is then force 
+        ! controlled, and the prescribed values of the remaining dofs are unchanged. 
         bc_val = get_rp_move_back_bc(node_jdof)
     elseif (step_type == STEP_TYPE_REAPPLY_LOAD) then
         bc_val = 0.d0
@@ -4,6 +4,10 @@ implicit none
     character(len=20), parameter :: load_param_file_name = 'load_param.txt'
     character(len=20), parameter :: uel_stiffness_file_name = 'uel_stiffness.txt'
 	character(len=20), parameter :: rp_node_coords_file_name = 'rp_coord.txt'
+    character(len=20), parameter :: usub_state_file_name = 'usub_state.txt'
+    character(len=20), parameter :: load_table_file_name = 'load_table.bin'
+    character(len=20), parameter :: convergence_file_name = 'convergence.txt'
+    character(len=30), parameter :: convergence_log_file_name = 'convergence_log.csv'
     
 
 end module filenames_mod
\ No newline at end of file
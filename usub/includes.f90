@@ -13,4 +13,6 @@ include 'node_id_mod.f90'
 include 'load_param_mod.f90'
 include 'bc_mod.f90'
 include 'disp_mod.f90'
-include 'urdfil_mod.f90'
\ No newline at end of file
+include 'urdfil_mod.f90'
+include 'convergence_mod.f90'
+include 'restart_mod.f90'
\ No newline at end of file
@@ -13,6 +13,10 @@ implicit none
     public  :: update_cycle             ! Update the loading parameters, done each cycle
     public  :: get_rolling_par          ! 
     
+    ! Restart routines
+    public  :: write_load_state         ! Write the dynamic load parameters
+    public  :: read_load_state          ! Read the dynamic load parameters
+    
     ! Wheel reference point motion
     public  :: set_rp_bc
     public  :: get_rp_initial_depression_bc
@@ -34,6 +38,8 @@ implicit none
     double precision, allocatable, save :: rolling_times(:)
     double precision, allocatable, save :: rot_per_lengths(:)
     double precision, allocatable, save :: rail_extensions(:)
+    logical, save                       :: use_load_table = .false. ! Read each cycle from table
+    integer, save                       :: num_table_cycles     ! Number of cycles in table
     
     ! Dynamic load parameters (may be updated each cycle)
     integer, save                       :: cycle_spec_ind = 1   ! Current position in update_cycle
@@ -61,9 +67,11 @@ implicit none
     subroutine read_load_params()
     use filenames_mod, only: load_param_file_name
     use usub_utils_mod, only: get_fid, check_iostat
+    use step_type_mod, only: set_cycle_layout, CYCLE_LAYOUT_SEPARATE
     implicit none
         integer             :: file_id
         integer             :: num_cycles_specified
+        integer             :: cycle_layout
         integer             :: k1
         integer             :: io_status
         character(len=256)  :: error_message
@@ -76,19 +84,35 @@ implicit none
         call check_iostat(io_status, 'Could not read initial depression speed from "'//load_param_file_name//'"')
         read(file_id,*, iostat=io_status) num_cycles_specified
         call check_iostat(io_status, 'Could not read number of cycles from "'//load_param_file_name//'"')
-        allocate(update_cycles(num_cycles_specified+1))
-        allocate(rolling_times(num_cycles_specified))
-        allocate(rot_per_lengths(num_cycles_specified))
-        allocate(rail_extensions(num_cycles_specified))
-        do k1=1,num_cycles_specified
-            read(file_id,*, iostat=io_status) update_cycles(k1), rolling_times(k1), rot_per_lengths(k1), rail_extensions(k1)
-            write(error_message, "(A,I0,A,I0,A)") 'Could not read info for cycle spec nr ', k1, &
-                                 ', when given that ', num_cycles_specified, ' cycles are specified'
-            call check_iostat(io_status, error_message)
-        enddo
+        
+        if (num_cycles_specified == 0) then
+            ! Parameters given for each cycle in the load table, keep only the first cycle
+            use_load_table = .true.
+            num_table_cycles = get_num_table_cycles()
+            allocate(update_cycles(2), rolling_times(1), rot_per_lengths(1), rail_extensions(1))
+            update_cycles(1) = 1
+            call read_load_table(1, rolling_times(1), rot_per_lengths(1), rail_extensions(1))
+            num_cycles_specified = 1
+        else
+            allocate(update_cycles(num_cycles_specified+1))
+            allocate(rolling_times(num_cycles_specified))
+            allocate(rot_per_lengths(num_cycles_specified))
+            allocate(rail_extensions(num_cycles_specified))
+            do k1=1,num_cycles_specified
+                read(file_id,*, iostat=io_status) update_cycles(k1), rolling_times(k1), rot_per_lengths(k1), rail_extensions(k1)
+                write(error_message, "(A,I0,A,I0,A)") 'Could not read info for cycle spec nr ', k1, &
+                                     ', when given that ', num_cycles_specified, ' cycles are specified'
+                call check_iostat(io_status, error_message)
+            enddo
+        endif
         ! Add extra element that ensures that we never will see this cycle
         update_cycles(num_cycles_specified+1) = huge(update_cycles(1))
         
+        ! Cycle layout (optional, separate move back and reapply load steps if not given)
+        read(file_id,*, iostat=io_status) cycle_layout
+        if (io_status /= 0) cycle_layout = CYCLE_LAYOUT_SEPARATE
+        call set_cycle_layout(cycle_layout)
+        
         close(file_id)
         call update_cycle(0)
         call setup_initial_rolling_cycle()
@@ -112,6 +136,8 @@ implicit none
         if (cycle_nr == 0) then ! Initial depression
             cycle_spec_ind = 1
             rail_extension = 0.0
+        elseif (use_load_table) then ! Parameters given for each cycle
+            call read_load_table(cycle_nr, rolling_time, rot_per_length, rail_extension)
         elseif (cycle_nr == 1) then !First rolling cycle
             cycle_spec_ind = 1
             rolling_time = rolling_times(1)
@@ -128,6 +154,63 @@ implicit none
         updated_cycle = cycle_nr
     end subroutine
 
+    function get_num_table_cycles() result(num_cycles)
+    ! Get the number of cycles in the load table from the file size
+    use filenames_mod, only: load_table_file_name
+    use usub_utils_mod, only: get_fid
+    implicit none
+        integer                 :: num_cycles
+        integer                 :: file_id
+        integer                 :: file_size
+        double precision        :: record(3)
+        
+        file_id = get_fid(load_table_file_name)
+        inquire(unit=file_id, size=file_size)
+        close(file_id)
+        
+        num_cycles = file_size/(size(record)*storage_size(record)/8)
+        if (num_cycles < 1) then
+            write(*,*) 'load_param_mod:get_num_table_cycles: "'//trim(load_table_file_name)//'" is empty'
+            call xit()
+        endif
+        
+    end function
+    
+    subroutine read_load_table(cycle_nr, the_rolling_time, the_rot_per_length, the_rail_extension)
+    ! Read the parameters for cycle_nr directly from its position in the load table. Cycles after
+    ! the last in the table use the last record. 
+    use filenames_mod, only: load_table_file_name
+    use usub_utils_mod, only: check_iostat
+    implicit none
+        integer, intent(in)             :: cycle_nr
+        double precision, intent(out)   :: the_rolling_time
+        double precision, intent(out)   :: the_rot_per_length
+        double precision, intent(out)   :: the_rail_extension
+        
+        integer                         :: file_id
+        integer                         :: io_status
+        integer                         :: record_nr
+        double precision                :: record(3)
+        character(len=256)              :: filename
+        integer                         :: cwd_length
+        
+        call getoutdir(filename, cwd_length)
+        filename = trim(filename)//'/'//trim(load_table_file_name)
+        open(newunit=file_id, file=trim(filename), access='stream', form='unformatted', &
+             action='read', iostat=io_status)
+        call check_iostat(io_status, 'Error opening "'//trim(load_table_file_name)//'"')
+        
+        record_nr = max(1, min(cycle_nr, num_table_cycles))
+        read(file_id, pos=1+(record_nr-1)*(size(record)*storage_size(record)/8), iostat=io_status) record
+        call check_iostat(io_status, 'Could not read cycle from "'//trim(load_table_file_name)//'"')
+        close(file_id)
+        
+        the_rolling_time = record(1)
+        the_rot_per_length = record(2)
+        the_rail_extension = record(3)
+        
+    end subroutine
+    
     function is_updated(cycle_nr)
     implicit none
         integer, intent(in)     :: cycle_nr
@@ -148,6 +231,51 @@ implicit none
         
     end subroutine
     
+    ! Restart routines
+    subroutine write_load_state(file_id)
+    ! Write the dynamic load parameters, such that they can be restored after a restart
+    implicit none
+        integer, intent(in)     :: file_id
+        
+        write(file_id, *) cycle_spec_ind, updated_cycle
+        write(file_id, *) rolling_time, rot_per_length, rail_extension_last, rail_extension
+        write(file_id, *) u_rp_bc_end_last
+        write(file_id, *) u_rp_bc_start
+        write(file_id, *) u_rp_bc_end
+        write(file_id, *) shape(node_u_bc)
+        write(file_id, *) node_u_bc
+        
+    end subroutine
+    
+    subroutine read_load_state(file_id)
+    ! Read the dynamic load parameters written by write_load_state. The static load parameters 
+    ! must have been read by read_load_params before calling this routine. 
+    use usub_utils_mod, only: check_iostat
+    implicit none
+        integer, intent(in)     :: file_id
+        integer                 :: bc_shape(3)
+        integer                 :: io_status
+        
+        read(file_id, *, iostat=io_status) cycle_spec_ind, updated_cycle
+        call check_iostat(io_status, 'Could not read cycle info from state file')
+        read(file_id, *, iostat=io_status) rolling_time, rot_per_length, rail_extension_last, &
+                                           rail_extension
+        call check_iostat(io_status, 'Could not read rolling parameters from state file')
+        read(file_id, *, iostat=io_status) u_rp_bc_end_last
+        call check_iostat(io_status, 'Could not read u_rp_bc_end_last from state file')
+        read(file_id, *, iostat=io_status) u_rp_bc_start
+        call check_iostat(io_status, 'Could not read u_rp_bc_start from state file')
+        read(file_id, *, iostat=io_status) u_rp_bc_end
+        call check_iostat(io_status, 'Could not read u_rp_bc_end from state file')
+        read(file_id, *, iostat=io_status) bc_shape
+        call check_iostat(io_status, 'Could not read node_u_bc shape from state file')
+        if (allocated(node_u_bc)) deallocate(node_u_bc)
+        allocate(node_u_bc(bc_shape(1), bc_shape(2), bc_shape(3)))
+        read(file_id, *, iostat=io_status) node_u_bc
+        call check_iostat(io_status, 'Could not read node_u_bc from state file')
+        
+    end subroutine
+    
     ! Wheel reference point motion
     subroutine set_rp_bc(bc_end_last, bc_start, bc_end)
     implicit none
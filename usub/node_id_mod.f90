@@ -13,6 +13,8 @@ implicit none
     ! External setup requests
     public  :: set_uel_coords
     public  :: setup_mesh_info          ! subroutine(node_labels, node_coordinates)
+    public  :: write_mesh_state         ! subroutine(file_id)
+    public  :: read_mesh_state          ! subroutine(file_id)
     
     ! Get node wheel node information
     public  :: get_inds                 ! function(node_label) result(mesh_inds)
@@ -203,6 +205,66 @@ implicit none
         
     end subroutine get_wheel_contact_node_dofs
     
+    subroutine write_mesh_state(file_id)
+    ! Write the mesh and reference point info, such that it can be restored after a restart
+    implicit none
+        integer, intent(in)             :: file_id
+        integer                         :: rail_rp_label
+        
+        if (.not.is_mesh_info_setup()) then
+            write(*,*) 'node_id_mod:write_mesh_state: mesh info not setup, exiting...'
+            call xit()
+        endif
+        
+        rail_rp_label = -1
+        if (allocated(rail_rp_node_label)) rail_rp_label = rail_rp_node_label
+        
+        write(file_id, *) get_mesh_size(), element_order, angle_incr
+        write(file_id, *) wheel_rp_node_label, rail_rp_label
+        write(file_id, *) wheel_rp_coords, rail_rp_coords
+        write(file_id, *) wheel_contact_node_labels
+        write(file_id, *) wheel_contact_node_coords
+        write(file_id, *) wheel_contact_node_dofs
+        
+    end subroutine write_mesh_state
+    
+    subroutine read_mesh_state(file_id)
+    ! Read the mesh and reference point info written by write_mesh_state
+    use usub_utils_mod, only : check_iostat
+    implicit none
+        integer, intent(in)             :: file_id
+        integer                         :: mesh_size(2)
+        integer                         :: rp_labels(2)
+        integer                         :: io_stat
+        
+        read(file_id, *, iostat=io_stat) mesh_size, element_order, angle_incr
+        call check_iostat(io_stat, 'Could not read mesh size from state file')
+        read(file_id, *, iostat=io_stat) rp_labels
+        call check_iostat(io_stat, 'Could not read reference point labels from state file')
+        
+        if (.not.allocated(wheel_rp_node_label)) allocate(wheel_rp_node_label)
+        wheel_rp_node_label = rp_labels(1)
+        if (rp_labels(2) > 0) then
+            if (.not.allocated(rail_rp_node_label)) allocate(rail_rp_node_label)
+            rail_rp_node_label = rp_labels(2)
+        endif
+        
+        if (.not.allocated(wheel_rp_coords)) allocate(wheel_rp_coords(3), rail_rp_coords(3))
+        read(file_id, *, iostat=io_stat) wheel_rp_coords, rail_rp_coords
+        call check_iostat(io_stat, 'Could not read reference point coordinates from state file')
+        
+        allocate(wheel_contact_node_labels(mesh_size(1), mesh_size(2)))
+        allocate(wheel_contact_node_coords(3, mesh_size(1), mesh_size(2)))
+        allocate(wheel_contact_node_dofs(3, mesh_size(1), mesh_size(2)))
+        read(file_id, *, iostat=io_stat) wheel_contact_node_labels
+        call check_iostat(io_stat, 'Could not read contact node labels from state file')
+        read(file_id, *, iostat=io_stat) wheel_contact_node_coords
+        call check_iostat(io_stat, 'Could not read contact node coordinates from state file')
+        read(file_id, *, iostat=io_stat) wheel_contact_node_dofs
+        call check_iostat(io_stat, 'Could not read contact node dofs from state file')
+        
+    end subroutine read_mesh_state
+    
     function get_angle_incr() result(the_angle_incr)
     implicit none
         double precision        :: the_angle_incr
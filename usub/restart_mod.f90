@@ -0,0 +1,78 @@
+! Module to save and restore the state of the user subroutines, such that a rollover simulation 
+! can be continued with *Restart, read. The state is saved at the end of each rolling step, i.e.
+! after the boundary conditions for the next cycle have been calculated. 
+! Relies on the following modules
+! - step_type_mod
+! - node_id_mod
+! - load_param_mod
+! - convergence_mod
+module restart_mod
+use abaqus_utils_mod
+implicit none
+    
+    private
+    
+    public  :: save_state       ! subroutine(kstep)
+    public  :: check_restart    ! subroutine(kstep)
+    
+    contains
+    
+    subroutine save_state(kstep)
+    ! Write the state to the state file, overwriting any previous state
+    use filenames_mod, only : usub_state_file_name
+    use usub_utils_mod, only : get_fid
+    use node_id_mod, only : write_mesh_state
+    use load_param_mod, only : write_load_state
+    use convergence_mod, only : write_convergence_state
+    implicit none
+        integer, intent(in)     :: kstep    ! The step number for which the state is saved
+        integer                 :: file_id
+        
+        file_id = get_fid(usub_state_file_name, 'write')
+        write(file_id, *) kstep
+        call write_mesh_state(file_id)
+        call write_load_state(file_id)
+        call write_convergence_state(file_id)
+        close(file_id)
+        
+    end subroutine save_state
+    
+    subroutine check_restart(kstep)
+    ! Restore the state if the analysis has been restarted. This is the case if the mesh info is
+    ! not setup after the first rolling step. Call after the load parameters have been read. 
+    use filenames_mod, only : usub_state_file_name
+    use usub_utils_mod, only : get_fid, check_iostat
+    use step_type_mod, only : get_step_type, get_cycle_nr, STEP_TYPE_ROLLING
+    use node_id_mod, only : is_mesh_info_setup, read_mesh_state
+    use load_param_mod, only : read_load_state
+    use convergence_mod, only : read_convergence_state
+    implicit none
+        integer, intent(in)     :: kstep    ! The current step number
+        integer                 :: cycle_nr
+        integer                 :: saved_kstep
+        integer                 :: file_id
+        integer                 :: io_status
+        
+        if (is_mesh_info_setup()) return
+        
+        cycle_nr = get_cycle_nr(kstep)
+        if (cycle_nr < 1) return
+        if ((cycle_nr == 1).and.(get_step_type(kstep) == STEP_TYPE_ROLLING)) return
+        
+        file_id = get_fid(usub_state_file_name)
+        read(file_id, *, iostat=io_status) saved_kstep
+        call check_iostat(io_status, 'Could not read step number from "'//trim(usub_state_file_name)//'"')
+        if (saved_kstep >= kstep) then
+            write(*,"(A,I0,A,I0)") 'State saved for step ', saved_kstep, &
+                                   ', cannot be used to restart at step ', kstep
+            call xit()
+        endif
+        call read_mesh_state(file_id)
+        call read_load_state(file_id)
+        call read_convergence_state(file_id)
+        close(file_id)
+        write(*,"(A,I0)") 'User subroutine state restored from step ', saved_kstep
+        
+    end subroutine check_restart
+    
+end module restart_mod
@@ -6,6 +6,9 @@ implicit none
     
     public  :: get_step_type
     public  :: get_cycle_nr
+    public  :: set_cycle_layout
+    public  :: CYCLE_LAYOUT_SEPARATE
+    public  :: CYCLE_LAYOUT_MERGED
     public  :: STEP_TYPE_INITIAL_DEPRESSION
     public  :: STEP_TYPE_INITIAL_LOAD
     public  :: STEP_TYPE_ROLLING
@@ -21,22 +24,67 @@ implicit none
     integer, parameter  :: STEP_TYPE_REAPPLY_LOAD = 2
     integer, parameter  :: STEP_TYPE_RELEASE_NODES = 3
     
+    ! Constants for the set_cycle_layout subroutine:
+    integer, parameter  :: CYCLE_LAYOUT_SEPARATE = 0    ! Separate move back and reapply load steps
+    integer, parameter  :: CYCLE_LAYOUT_MERGED = 1      ! Load reapplied in the move back step
+    
     ! Internal parameters
     integer, parameter  :: N_STEP_INITIAL = 3   ! Number of initial steps including first rollover
-    integer, parameter  :: N_STEP_PER_CYCLE = 4 ! Number of steps per rollover cycle
+    ! Step types in each rollover cycle, starting with the rolling step
+    integer, parameter  :: CYCLE_STEP_TYPES_SEPARATE(4) = [STEP_TYPE_ROLLING, STEP_TYPE_MOVE_BACK, &
+                                                           STEP_TYPE_REAPPLY_LOAD, &
+                                                           STEP_TYPE_RELEASE_NODES]
+    integer, parameter  :: CYCLE_STEP_TYPES_MERGED(3) = [STEP_TYPE_ROLLING, STEP_TYPE_MOVE_BACK, &
+                                                         STEP_TYPE_RELEASE_NODES]
+    
+    ! Cycle layout, set from the load parameter file
+    integer, save       :: cycle_layout = CYCLE_LAYOUT_SEPARATE
 	
     contains
+    
+    subroutine set_cycle_layout(layout)
+    ! Set the cycle layout, see module constants
+    implicit none
+        integer, intent(in) :: layout               ! Cycle layout
+        
+        if (.not.any(layout == [CYCLE_LAYOUT_SEPARATE, CYCLE_LAYOUT_MERGED])) then
+            write(*,"(A,I0,A)") 'Cycle layout = ', layout, ' not recognized'
+            write(*,*) 'step_type_mod, set_cycle_layout'
+            call xit()
+        endif
+        cycle_layout = layout
+        
+    end subroutine set_cycle_layout
+    
+    function get_steps_per_cycle() result (n_step_per_cycle)
+    ! Get the number of steps per rollover cycle for the current cycle layout
+    implicit none
+        integer             :: n_step_per_cycle     ! Number of steps per rollover cycle
+        
+        if (cycle_layout == CYCLE_LAYOUT_MERGED) then
+            n_step_per_cycle = size(CYCLE_STEP_TYPES_MERGED)
+        else
+            n_step_per_cycle = size(CYCLE_STEP_TYPES_SEPARATE)
+        endif
+        
+    end function get_steps_per_cycle
 	
 	function get_step_type(kstep) result (step_type)
     ! Determine the step type for the given step number, see module constants
     implicit none
         integer, intent(in) :: kstep                ! Step number
         integer             :: step_type            ! Step type
+        integer             :: cycle_step_ind       ! Step index within the cycle
         
         if (kstep < N_STEP_INITIAL) then
             step_type = -kstep
         else
-            step_type = mod(kstep-N_STEP_INITIAL, N_STEP_PER_CYCLE)
+            cycle_step_ind = mod(kstep-N_STEP_INITIAL, get_steps_per_cycle()) + 1
+            if (cycle_layout == CYCLE_LAYOUT_MERGED) then
+                step_type = CYCLE_STEP_TYPES_MERGED(cycle_step_ind)
+            else
+                step_type = CYCLE_STEP_TYPES_SEPARATE(cycle_step_ind)
+            endif
         endif
         
         ! Check result
@@ -56,12 +104,14 @@ implicit none
         integer, intent(in)         :: kstep
         integer                     :: kstep_red    
         integer                     :: cycle_nr
+        integer                     :: n_step_per_cycle
         
         if (kstep < N_STEP_INITIAL) then
             cycle_nr = 0
         else
             kstep_red = kstep - N_STEP_INITIAL
-            cycle_nr = (kstep_red - mod(kstep_red, N_STEP_PER_CYCLE))/N_STEP_PER_CYCLE + 1
+            n_step_per_cycle = get_steps_per_cycle()
+            cycle_nr = (kstep_red - mod(kstep_red, n_step_per_cycle))/n_step_per_cycle + 1
         endif
         
     end function
@@ -137,7 +137,10 @@ implicit none
                 record_type_key = get_record_type(array)
             enddo
             ! Need to determine which nodes we have data for
-            if (size(node_labels_d) > 1) then   ! Contact nodes
+            if (size(node_labels_d) > 1 .and. allocated(contact_node_disp)) then
+                ! Other node sets after the wheel contact nodes (e.g. rail contact nodes)
+                ! are only written for post-processing, and not used here
+            elseif (size(node_labels_d) > 1) then   ! Contact nodes
                 ! Check that node_coords and node_disp have the same order of nodes
                 if (.not.all(node_labels_c == node_labels_d)) then
                     call sortinds(node_labels_d, sort_inds)
@@ -205,7 +208,9 @@ implicit none
         if (record_type_key == FIL_NODE_DISP) then  ! Displacement output request
             call get_node_data(node_labels, node_disp, array)
             ! Need to determine which nodes we have data for
-            if (size(node_labels) > 1) then   ! Contact nodes
+            if (size(node_labels) > 1 .and. allocated(contact_node_disp)) then
+                ! Other node sets (e.g. rail contact nodes), not used here
+            elseif (size(node_labels) > 1) then   ! Contact nodes
                 call get_contact_node_disp(node_labels, node_disp, contact_node_disp)
             else    ! Reference point node
                 if (is_wheel_rp_node(node_labels(1))) then